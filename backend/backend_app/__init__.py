@@ -8,6 +8,8 @@ from flask_cors import CORS
 from backend_app.extensions import db, jwt, bcrypt, limiter
 from backend_app.config import get_config
 from backend_app.utils.monitoring import init_sentry
+from backend_app.utils.cache import init_cache
+from backend_app.middleware.middleware import init_compression
 from backend_app.utils.log_filter import setup_intelligent_logging
 
 
@@ -21,7 +23,12 @@ def create_app(config_class=None):
     if config_class is None:
         config_class = get_config()
 
-    app.config.from_object(config_class)
+    if isinstance(config_class, dict):
+        # Permitir overrides en forma de diccionario (usado por los tests)
+        app.config.from_object(get_config())
+        app.config.update(config_class)
+    else:
+        app.config.from_object(config_class)
 
     # Asegurar que siempre haya una base de datos disponible para tests
     app.config.setdefault("SQLALCHEMY_DATABASE_URI", "sqlite:///:memory:")
@@ -54,6 +61,8 @@ def create_app(config_class=None):
     jwt.init_app(app)
     bcrypt.init_app(app)
     limiter.init_app(app)
+    init_cache(app)
+    init_compression(app)
 
     # Configurar monitoreo y logging inteligente
     init_sentry(app)
@@ -74,6 +83,9 @@ def create_app(config_class=None):
     from backend_app.api.flashcards import flashcards_bp
     from backend_app.api.stats import stats_bp
     from backend_app.api.health import health_bp
+    from backend_app.api.search import search_bp
+    from backend_app.api.tags import tags_bp
+    from backend_app.api.main_api import api_v2_opt
 
     app.register_blueprint(api_bp)
     app.register_blueprint(auth_bp, url_prefix="/api/auth")
@@ -83,7 +95,15 @@ def create_app(config_class=None):
     app.register_blueprint(decks_bp, url_prefix="/api/decks")
     app.register_blueprint(flashcards_bp, url_prefix="/api/flashcards")
     app.register_blueprint(stats_bp, url_prefix="/api/stats")
+    app.register_blueprint(search_bp, url_prefix="/api/search")
+    app.register_blueprint(tags_bp, url_prefix="/api/tags")
     app.register_blueprint(health_bp)
+    app.register_blueprint(api_v2_opt)
+
+    # Registrar comandos CLI de mantenimiento
+    from backend_app.commands import register_commands
+
+    register_commands(app)
 
     # Crear tablas de base de datos
     with app.app_context():
@@ -8,11 +8,8 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 from marshmallow import Schema, fields, ValidationError
 from backend_app.utils.auth_helpers import AuthHelper, TokenBlacklist
-<<<<<<< HEAD
 from backend_app.utils.monitoring import monitor_api_endpoint, log_user_action
 from backend_app.api.error_handlers import create_error_response
-=======
->>>>>>> 4a64f0c0b7272a924fb9959c73278447c3324b3f
 
 
 # Blueprint para autenticación con refresh tokens
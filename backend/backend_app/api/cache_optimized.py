@@ -0,0 +1,225 @@
+"""
+Cache de respuestas por usuario/deck y consultas optimizadas para la API v2
+
+Las respuestas se cachean con claves versionadas por las mismas generaciones
+que usan los servicios (utils.cache.versioned_key), así que cualquier
+escritura que invalide a un usuario o deck invalida también sus respuestas.
+"""
+
+from flask import Response, make_response, request
+from flask_jwt_extended import get_jwt_identity
+from functools import wraps
+from datetime import datetime, timedelta
+from sqlalchemy import func, select
+import inspect
+import logging
+
+from backend_app.models import DailyActivity, Deck, DeckCardStats, DeckDueBucket
+from backend_app.utils.cache import bump_generations, get_cache, versioned_key
+from .performance_middleware import optimize_json_response
+
+logger = logging.getLogger("app.cache")
+
+# Namespaces de las respuestas cacheadas (invalidables por separado)
+USER_NAMESPACE = "response_user"
+DECK_NAMESPACE = "response_deck"
+STUDY_NAMESPACE = "response_study"
+
+
+def _resolve(value, view_kwargs):
+    """Evaluar un parámetro del decorator (valor o callable con args de la vista)"""
+    if not callable(value):
+        return value
+    parameters = inspect.signature(value).parameters
+    return value(**{name: view_kwargs[name] for name in parameters if name in view_kwargs})
+
+
+def cache_response(namespace, ttl=300, user_id=None, deck_id=None):
+    """
+    Decorator que cachea la respuesta 200 de una vista
+
+    La clave incluye la identidad JWT y la URL completa (con query string),
+    y se versiona con la generación del namespace y del usuario/deck.
+
+    Args:
+        namespace: Namespace de la respuesta
+        ttl: Tiempo de vida en segundos
+        user_id: ID de usuario o callable que lo devuelve
+        deck_id: ID de deck o callable que recibe los args de la vista
+    """
+
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            cache = get_cache()
+            try:
+                key = versioned_key(
+                    cache,
+                    namespace,
+                    f.__name__,
+                    get_jwt_identity(),
+                    request.full_path,
+                    user_id=_resolve(user_id, kwargs),
+                    deck_id=_resolve(deck_id, kwargs),
+                )
+                cached = cache.get(key)
+            except Exception as e:
+                logger.warning(f"Error leyendo cache de respuesta: {str(e)}")
+                return f(*args, **kwargs)
+
+            if cached is not None:
+                body, mimetype = cached
+                response = Response(body, status=200, mimetype=mimetype)
+                response.headers["X-Cache"] = "HIT"
+                return response
+
+            response = make_response(f(*args, **kwargs))
+            if response.status_code == 200 and not response.is_streamed:
+                try:
+                    cache.set(key, (response.get_data(), response.mimetype), timeout=ttl)
+                except Exception as e:
+                    logger.warning(f"Error guardando cache de respuesta: {str(e)}")
+            response.headers["X-Cache"] = "MISS"
+            return response
+
+        return decorated_function
+
+    return decorator
+
+
+def cache_user_data(user_id, ttl=300):
+    """Cachear respuestas que dependen de los datos de un usuario"""
+    return cache_response(USER_NAMESPACE, ttl=ttl, user_id=user_id)
+
+
+def cache_deck_data(deck_id, ttl=300):
+    """
+    Cachear respuestas que dependen de un deck
+
+    También dependen del usuario autenticado: sus repasos cambian las
+    cartas pendientes del deck.
+    """
+    return cache_response(
+        DECK_NAMESPACE, ttl=ttl, user_id=lambda: get_jwt_identity(), deck_id=deck_id)
+
+
+def cache_study_data(user_id, ttl=600):
+    """Cachear estadísticas de estudio de un usuario"""
+    return cache_response(STUDY_NAMESPACE, ttl=ttl, user_id=user_id)
+
+
+def invalidate_user_data(user_id):
+    """Invalidar todas las respuestas cacheadas de un usuario"""
+    bump_generations(get_cache(), user_id=user_id)
+
+
+def invalidate_deck_data(deck_id):
+    """Invalidar todas las respuestas cacheadas de un deck"""
+    bump_generations(get_cache(), deck_id=deck_id)
+
+
+def invalidate_namespace(namespace):
+    """Invalidar todas las respuestas de un namespace (p. ej. tras un despliegue)"""
+    bump_generations(get_cache(), namespace=namespace)
+
+
+class QueryOptimizer:
+    """Consultas de la API v2 apoyadas en los contadores precalculados"""
+
+    @staticmethod
+    def optimize_deck_query(query, include_stats=True):
+        """
+        Excluir decks borrados y, opcionalmente, traer sus contadores
+
+        Con include_stats las filas son (Deck, DeckCardStats, cards_due) y se
+        leen en la misma consulta que los decks.
+
+        Args:
+            query: Query de Deck ya filtrada
+            include_stats: Incluir contadores de cartas
+
+        Returns:
+            Query optimizada
+        """
+        query = query.filter(Deck.is_deleted.is_(False))
+        if not include_stats:
+            return query
+
+        cards_due = (
+            select(func.coalesce(func.sum(DeckDueBucket.card_count), 0))
+            .where(
+                DeckDueBucket.deck_id == Deck.id,
+                DeckDueBucket.due_date <= datetime.utcnow().date(),
+            )
+            .correlate(Deck)
+            .scalar_subquery()
+        )
+        return query.outerjoin(
+            DeckCardStats, DeckCardStats.deck_id == Deck.id
+        ).add_columns(DeckCardStats, cards_due.label("cards_due"))
+
+    @staticmethod
+    def optimize_study_stats_query(query, user_id, days):
+        """
+        Estadísticas diarias desde el resumen de actividad
+
+        Lee daily_activity (una fila por usuario y día) en lugar de agregar
+        las sesiones de estudio.
+
+        Args:
+            query: Query base (se usa su sesión)
+            user_id: ID del usuario
+            days: Número de días hasta hoy
+
+        Returns:
+            Query con filas (date, total_cards, cards_correct, total_time,
+            session_count)
+        """
+        start_date = datetime.utcnow().date() - timedelta(days=days - 1)
+        return (
+            query.session.query(
+                DailyActivity.day.label("date"),
+                DailyActivity.cards_studied.label("total_cards"),
+                DailyActivity.cards_correct.label("cards_correct"),
+                DailyActivity.study_time.label("total_time"),
+                DailyActivity.sessions_count.label("session_count"),
+            )
+            .filter(DailyActivity.user_id == user_id, DailyActivity.day >= start_date)
+            .order_by(DailyActivity.day)
+        )
+
+
+class ResponseCompressor:
+    """Reducción del tamaño de las respuestas paginadas"""
+
+    @staticmethod
+    def optimize_pagination_response(items, pagination):
+        """
+        Construir una respuesta paginada compacta
+
+        Con ?format=columnar los elementos se envían como una lista de
+        campos y filas de valores, sin repetir las claves en cada elemento.
+
+        Args:
+            items: Lista de dicts
+            pagination: Metadatos de paginación
+
+        Returns:
+            dict: {"items", "pagination"} o {"fields", "rows", "pagination"}
+        """
+        if request.args.get("format") != "columnar":
+            return {"items": optimize_json_response(items), "pagination": pagination}
+
+        fields = []
+        for item in items:
+            for key in item:
+                if key not in fields:
+                    fields.append(key)
+        return {
+            "fields": fields,
+            "rows": [
+                optimize_json_response([item.get(field) for field in fields])
+                for item in items
+            ],
+            "pagination": pagination,
+        }
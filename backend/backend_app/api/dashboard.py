@@ -5,9 +5,10 @@ Compatible con frontend existente
 
 from flask import Blueprint, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from backend_app.models import User, Deck, Flashcard, StudySession, CardReview
+from backend_app.models import User, Deck, Flashcard, CardReview
 from backend_app.services_new import StatsService
 from backend_app.extensions import db
+from backend_app.utils.response_helpers import ConditionalResponse
 from datetime import datetime, timedelta
 from sqlalchemy import func
 import logging
@@ -28,6 +29,14 @@ def get_dashboard():
     / """
     try:
         user_id = get_jwt_identity()
+
+        # GET condicional: responder 304 antes de las consultas pesadas
+        version = stats_service.get_dashboard_version(user_id)
+        if version["success"]:
+            not_modified = ConditionalResponse.not_modified(**version["data"])
+            if not_modified is not None:
+                return not_modified
+
         user = User.query.get(user_id)
 
         if not user:
@@ -42,32 +51,34 @@ def get_dashboard():
         dashboard_data = result["data"]
 
         # Formato compatible con frontend
-        return (
-            jsonify(
-                {
-                    "success": True,
-                    "user": {
-                        "id": user.id,
-                        "username": user.username,
-                        "first_name": user.first_name,
-                        "last_name": user.last_name,
-                        "member_since": user.created_at.isoformat(),
-                        "current_streak": user.current_streak,
-                        "total_study_time": user.total_study_time,
-                    },
-                    "stats": dashboard_data["stats"],
-                    "recent_activity": dashboard_data.get(
-                        "recent_activity",
-                        []),
-                    "upcoming_reviews": dashboard_data.get(
-                        "upcoming_reviews",
-                        []),
-                    "weekly_progress": dashboard_data.get(
-                        "weekly_progress",
-                        []),
-                }),
-            200,
+        response = jsonify(
+            {
+                "success": True,
+                "user": {
+                    "id": user.id,
+                    "username": user.username,
+                    "first_name": user.first_name,
+                    "last_name": user.last_name,
+                    "member_since": user.created_at.isoformat(),
+                    "current_streak": user.current_streak,
+                    "total_study_time": user.total_study_time,
+                },
+                "stats": dashboard_data["stats"],
+                "recent_activity": dashboard_data.get(
+                    "recent_activity",
+                    []),
+                "upcoming_reviews": dashboard_data.get(
+                    "upcoming_reviews",
+                    []),
+                "weekly_progress": dashboard_data.get(
+                    "weekly_progress",
+                    []),
+            }
         )
+        if version["success"]:
+            ConditionalResponse.with_validators(response, **version["data"])
+
+        return response, 200
 
     except Exception as e:
         logger.error(f"Error obteniendo dashboard: {str(e)}")
@@ -88,51 +99,20 @@ def get_weekly_stats():
         end_date = datetime.utcnow().date()
         start_date = end_date - timedelta(days=6)
 
-        weekly_data = []
-        current_date = start_date
-
-        while current_date <= end_date:
-            day_start = datetime.combine(current_date, datetime.min.time())
-            day_end = datetime.combine(current_date, datetime.max.time())
-
-            # Cartas estudiadas en el día
-            cards_studied = (
-                db.session.query(func.sum(StudySession.cards_studied))
-                .join(Deck)
-                .filter(
-                    Deck.user_id == user_id,
-                    StudySession.started_at >= day_start,
-                    StudySession.started_at <= day_end,
-                )
-                .scalar()
-                or 0
-            )
-
-            # Tiempo de estudio en el día (en minutos)
-            study_time = (
-                db.session.query(func.sum(StudySession.total_time))
-                .join(Deck)
-                .filter(
-                    Deck.user_id == user_id,
-                    StudySession.started_at >= day_start,
-                    StudySession.started_at <= day_end,
-                )
-                .scalar()
-                or 0
-            )
-
-            study_time_minutes = int(study_time / 60) if study_time else 0
-
-            weekly_data.append(
-                {
-                    "date": current_date.isoformat(),
-                    "day": current_date.strftime("%a"),
-                    "cards_studied": int(cards_studied),
-                    "study_time": study_time_minutes,
-                }
-            )
-
-            current_date += timedelta(days=1)
+        result = stats_service.get_activity_series(user_id, start_date, end_date)
+        if not result["success"]:
+            return jsonify({"error": result["error"]}), result.get("code", 500)
+
+        weekly_data = [
+            {
+                "date": entry["date"],
+                "day": datetime.fromisoformat(entry["date"]).strftime("%a"),
+                "cards_studied": entry["cards_studied"],
+                # en minutos
+                "study_time": int(entry["study_time"] / 60),
+            }
+            for entry in result["data"]
+        ]
 
         return jsonify({"success": True, "weekly_data": weekly_data}), 200
 
@@ -155,34 +135,21 @@ def get_activity_heatmap():
         end_date = datetime.utcnow().date()
         start_date = end_date - timedelta(days=364)
 
-        # Consulta optimizada para obtener actividad diaria
-        activity_data = (
-            db.session.query(
-                func.date(StudySession.started_at).label("date"),
-                func.sum(StudySession.cards_studied).label("cards_studied"),
-                func.sum(StudySession.total_time).label("total_time"),
-            )
-            .join(Deck)
-            .filter(
-                Deck.user_id == user_id,
-                func.date(StudySession.started_at) >= start_date,
-                func.date(StudySession.started_at) <= end_date,
-            )
-            .group_by(func.date(StudySession.started_at))
-            .all()
-        )
-
-        # Convertir a formato para heatmap
-        heatmap_data = []
-        for row in activity_data:
-            heatmap_data.append(
-                {
-                    "date": row.date.isoformat(),
-                    "value": int(row.cards_studied or 0),
-                    # en minutos
-                    "study_time": int((row.total_time or 0) / 60),
-                }
-            )
+        result = stats_service.get_activity_series(user_id, start_date, end_date)
+        if not result["success"]:
+            return jsonify({"error": result["error"]}), result.get("code", 500)
+
+        # Convertir a formato para heatmap (solo días con actividad)
+        heatmap_data = [
+            {
+                "date": entry["date"],
+                "value": entry["cards_studied"],
+                # en minutos
+                "study_time": int(entry["study_time"] / 60),
+            }
+            for entry in result["data"]
+            if entry["cards_studied"] or entry["study_time"]
+        ]
 
         return (
             jsonify(
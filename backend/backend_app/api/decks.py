@@ -3,21 +3,29 @@ Rutas de gestión de decks para StudyingFlash
 Compatible con frontend existente
 """
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from backend_app.models import Deck, Flashcard
-from backend_app.services_new import DeckService
+from backend_app.services_new import DeckService, DuplicateService
 from backend_app.extensions import db
 from backend_app.validation.schemas import DeckCreationSchema
 from backend_app.validation.validators import validate_json
+from backend_app.utils.response_helpers import ConditionalResponse
+from backend_app.utils.pagination import COUNT_EXACT, COUNT_MODES
+from backend_app.utils import deck_formats
+from werkzeug.exceptions import RequestEntityTooLarge
 from datetime import datetime
 import logging
+import os
+import shutil
+import tempfile
 
 logger = logging.getLogger(__name__)
 decks_bp = Blueprint("decks", __name__)
 
 # Usar servicio refactorizado con inyección de dependencias
 deck_service = DeckService(db=db)
+duplicate_service = DuplicateService(db=db)
 
 
 @decks_bp.route("/", methods=["GET"])
@@ -30,29 +38,43 @@ def get_decks():
     try:
         user_id = get_jwt_identity()
 
+        # GET condicional: responder 304 antes de las consultas pesadas
+        version = deck_service.get_user_decks_version(user_id)
+        if version["success"]:
+            not_modified = ConditionalResponse.not_modified(**version["data"])
+            if not_modified is not None:
+                return not_modified
+
         # Obtener parámetros de consulta
         page = request.args.get("page", 1, type=int)
         per_page = request.args.get("per_page", 20, type=int)
         search = request.args.get("search", "")
+        # ?cursor= (vacío para la primera página) activa la paginación keyset
+        cursor = request.args.get("cursor")
+        count = request.args.get("count", COUNT_EXACT)
+        if count not in COUNT_MODES:
+            return jsonify({"error": "Modo de conteo no válido"}), 400
 
         # Usar servicio para obtener decks
-        result = deck_service.get_user_decks(user_id, page, per_page, search)
+        result = deck_service.get_user_decks(
+            user_id, page, per_page, search, cursor=cursor, count=count)
 
         if not result["success"]:
             return jsonify({"error": result["error"]}), 400
 
         decks_data = result["data"]
 
-        return (
-            jsonify(
-                {
-                    "success": True,
-                    "decks": decks_data["decks"],
-                    "pagination": decks_data["pagination"],
-                }
-            ),
-            200,
+        response = jsonify(
+            {
+                "success": True,
+                "decks": decks_data["decks"],
+                "pagination": decks_data["pagination"],
+            }
         )
+        if version["success"]:
+            ConditionalResponse.with_validators(response, **version["data"])
+
+        return response, 200
 
     except Exception as e:
         logger.error(f"Error obteniendo decks: {str(e)}")
@@ -220,77 +242,152 @@ def delete_deck(deck_id):
 @jwt_required()
 def export_deck(deck_id):
     """
-    Exportar deck en formato JSON
-    GET /api/decks/<id>/export
+    Exportar deck en streaming
+    GET /api/decks/<id>/export?format=ndjson|csv|sqlite
     """
     try:
         user_id = get_jwt_identity()
+        export_format = request.args.get("format", "ndjson")
 
-        # Verificar que el deck pertenece al usuario
-        deck = Deck.query.filter_by(id=deck_id, user_id=user_id).first()
-        if not deck:
-            return jsonify({"error": "Deck no encontrado"}), 404
+        result = deck_service.export_deck(deck_id, user_id, export_format)
+        if not result["success"]:
+            return jsonify({"error": result["error"]}), result.get("code", 400)
+
+        export = result["data"]
+        return Response(
+            stream_with_context(export["chunks"]),
+            mimetype=export["mimetype"],
+            headers={
+                "Content-Disposition": f'attachment; filename="{export["filename"]}"',
+            },
+        )
 
-        # Usar servicio para exportar
-        result = deck_service.export_deck(deck_id)
+    except Exception as e:
+        logger.error(f"Error exportando deck: {str(e)}")
+        return jsonify({"error": "Error interno del servidor"}), 500
 
-        if not result["success"]:
-            return jsonify({"error": result["error"]}), 400
 
-        export_data = result["data"]
+@decks_bp.route("/<int:deck_id>/duplicate", methods=["POST"])
+@jwt_required()
+def duplicate_deck(deck_id):
+    """
+    Duplicar un deck con sus flashcards
+    POST /api/decks/<id>/duplicate {"name": ..., "background": ...}
 
-        return (
-            jsonify(
-                {
-                    "success": True,
-                    "export_data": export_data,
-                    "filename": f"{deck.name.replace(' ', '_')}_export.json",
-                }
-            ),
-            200,
-        )
+    Los decks grandes se copian en segundo plano: responde 202 con el job
+    (consultar GET /api/decks/jobs/<job_id>).
+    """
+    try:
+        user_id = get_jwt_identity()
+        data = request.get_json(silent=True) or {}
+
+        result = deck_service.duplicate_deck(
+            deck_id, user_id, new_name=data.get("name"),
+            background=data.get("background"))
+        if not result["success"]:
+            return jsonify({"error": result["error"]}), result.get("code", 400)
+
+        if result.get("accepted"):
+            return jsonify({"success": True, "job": result["data"],
+                            "message": result["message"]}), 202
+        return jsonify({"success": True, "deck": result["data"],
+                        "message": result["message"]}), 201
 
     except Exception as e:
-        logger.error(f"Error exportando deck: {str(e)}")
+        logger.error(f"Error duplicando deck: {str(e)}")
         return jsonify({"error": "Error interno del servidor"}), 500
 
 
-@decks_bp.route("/import", methods=["POST"])
+@decks_bp.route("/jobs/<int:job_id>", methods=["GET"])
 @jwt_required()
-def import_deck():
+def get_deck_job(job_id):
     """
-    Importar deck desde archivo JSON/CSV
-    POST /api/decks/import
+    Estado y progreso de un trabajo en segundo plano (duplicación, importación)
+    GET /api/decks/jobs/<job_id>
     """
     try:
         user_id = get_jwt_identity()
-        data = request.get_json()
 
-        if not data:
-            return jsonify({"error": "No se proporcionaron datos"}), 400
+        result = deck_service.get_job(job_id, user_id)
+        if not result["success"]:
+            return jsonify({"error": result["error"]}), result.get("code", 400)
+
+        return jsonify({"success": True, "job": result["data"]}), 200
+
+    except Exception as e:
+        logger.error(f"Error obteniendo trabajo: {str(e)}")
+        return jsonify({"error": "Error interno del servidor"}), 500
+
 
-        # Usar servicio para importar
-        result = deck_service.import_deck(user_id, data)
+@decks_bp.route("/<int:deck_id>/duplicates", methods=["GET"])
+@jwt_required()
+def get_deck_duplicates(deck_id):
+    """
+    Grupos de flashcards casi duplicadas del deck
+    GET /api/decks/<id>/duplicates?threshold=0.8
+    """
+    try:
+        user_id = get_jwt_identity()
+        threshold = request.args.get("threshold", 0.8, type=float)
 
+        result = duplicate_service.find_duplicates(user_id, deck_id, threshold)
         if not result["success"]:
-            return jsonify({"error": result["error"]}), 400
+            return jsonify({"error": result["error"]}), result.get("code", 400)
 
-        import_data = result["data"]
+        return jsonify({"success": True, **result["data"]}), 200
 
-        return (
-            jsonify(
-                {
-                    "success": True,
-                    "deck": import_data["deck"],
-                    "imported_cards": import_data["imported_cards"],
-                    "message": f"Deck importado exitosamente con {import_data['imported_cards']} cartas",
-                }),
-            201,
-        )
+    except Exception as e:
+        logger.error(f"Error buscando duplicados: {str(e)}")
+        return jsonify({"error": "Error interno del servidor"}), 500
+
+
+@decks_bp.route("/import", methods=["POST"])
+@jwt_required()
+def import_deck():
+    """
+    Importar deck desde un fichero JSON-lines, CSV o paquete SQLite
+    POST /api/decks/import?format=ndjson|csv|sqlite&name=...
+
+    El fichero llega como multipart (campo "file") o como cuerpo de la
+    petición y se copia a disco por bloques. La importación sigue en segundo
+    plano: responde 202 con el job (consultar GET /api/decks/jobs/<job_id>).
+    """
+    path = None
+    try:
+        user_id = get_jwt_identity()
+        upload = request.files.get("file")
+        import_format = request.args.get("format") or deck_formats.detect_format(
+            upload.filename if upload else None,
+            upload.mimetype if upload else request.mimetype)
+        if import_format not in deck_formats.FORMATS:
+            return jsonify({"error": "Formato de importación no reconocido. Usa: "
+                            + ", ".join(deck_formats.FORMATS)}), 400
+
+        folder = current_app.config.get("IMPORT_FOLDER") or tempfile.gettempdir()
+        os.makedirs(folder, exist_ok=True)
+        fd, path = tempfile.mkstemp(
+            suffix=f".{deck_formats.FORMATS[import_format][1]}", dir=folder)
+        with os.fdopen(fd, "wb") as target:
+            shutil.copyfileobj(upload.stream if upload else request.stream, target)
+
+        result = deck_service.import_deck(
+            user_id, path, import_format,
+            name=request.args.get("name") or request.form.get("name"))
+        if not result["success"]:
+            return jsonify({"error": result["error"]}), result.get("code", 400)
 
+        path = None  # El job borra el fichero al terminar
+        return jsonify({"success": True, "job": result["data"],
+                        "message": result["message"]}), 202
+
+    except RequestEntityTooLarge:
+        return jsonify({"error": "El fichero supera el tamaño máximo permitido"}), 413
     except Exception as e:
         logger.error(f"Error importando deck: {str(e)}")
         return jsonify({"error": "Error interno del servidor"}), 500
+    finally:
+        if path and os.path.exists(path):
+            os.remove(path)
 
 
 @decks_bp.route("/public", methods=["GET"])
@@ -303,41 +400,37 @@ def get_public_decks():
         page = request.args.get("page", 1, type=int)
         per_page = request.args.get("per_page", 20, type=int)
         search = request.args.get("search", "")
-
-        # Consulta de decks públicos
-        query = Deck.query.filter_by(is_public=True)
-
-        if search:
-            query = query.filter(Deck.name.contains(search))
-
-        decks = query.paginate(page=page, per_page=per_page, error_out=False)
-
-        decks_data = []
-        for deck in decks.items:
-            # Contar flashcards
-            card_count = Flashcard.query.filter_by(deck_id=deck.id).count()
-
-            decks_data.append({"id": deck.id,
-                               "name": deck.name,
-                               "description": deck.description,
-                               "total_cards": card_count,
-                               "author": f"{deck.owner.first_name} {deck.owner.last_name}",
-                               "created_at": deck.created_at.isoformat(),
-                               })
+        # ?cursor= (vacío para la primera página) activa la paginación keyset
+        cursor = request.args.get("cursor")
+        count = request.args.get("count", COUNT_EXACT)
+        if count not in COUNT_MODES:
+            return jsonify({"error": "Modo de conteo no válido"}), 400
+
+        # Decks, autor y contadores en una sola consulta
+        result = deck_service.get_public_decks(
+            page, per_page, search, cursor=cursor, count=count)
+        if not result["success"]:
+            return jsonify({"error": result["error"]}), result.get("code", 500)
+
+        decks_data = [
+            {
+                "id": deck["id"],
+                "name": deck["name"],
+                "description": deck["description"],
+                "total_cards": deck["total_cards"],
+                "cards_due": deck["cards_due"],
+                "author": deck["author"],
+                "created_at": deck["created_at"],
+            }
+            for deck in result["data"]
+        ]
 
         return (
             jsonify(
                 {
                     "success": True,
                     "decks": decks_data,
-                    "pagination": {
-                        "page": page,
-                        "per_page": per_page,
-                        "total": decks.total,
-                        "pages": decks.pages,
-                        "has_next": decks.has_next,
-                        "has_prev": decks.has_prev,
-                    },
+                    "pagination": result["pagination"],
                 }
             ),
             200,
@@ -6,10 +6,13 @@ Compatible con frontend existente
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from backend_app.models import Deck, Flashcard
+from backend_app.models.search_index import search_clause
 from backend_app.services_new import FlashcardService
 from backend_app.extensions import db
 from backend_app.validation.schemas import FlashcardCreationSchema
 from backend_app.validation.validators import validate_json
+from backend_app.utils.response_helpers import ConditionalResponse
+from backend_app.utils.pagination import COUNT_EXACT, COUNT_MODES
 import logging
 
 logger = logging.getLogger(__name__)
@@ -191,6 +194,13 @@ def get_deck_flashcards(deck_id):
     try:
         user_id = get_jwt_identity()
 
+        # GET condicional: responder 304 antes de las consultas pesadas
+        version = flashcard_service.get_deck_flashcards_version(user_id, deck_id)
+        if version["success"]:
+            not_modified = ConditionalResponse.not_modified(**version["data"])
+            if not_modified is not None:
+                return not_modified
+
         # Verificar que el deck pertenece al usuario
         deck = Deck.query.filter_by(id=deck_id, user_id=user_id).first()
         if not deck:
@@ -201,14 +211,48 @@ def get_deck_flashcards(deck_id):
         per_page = request.args.get("per_page", 50, type=int)
         search = request.args.get("search", "")
 
+        # ?cursor= (vacío para la primera página) activa la paginación keyset
+        cursor = request.args.get("cursor")
+        if cursor is not None:
+            count = request.args.get("count", COUNT_EXACT)
+            if count not in COUNT_MODES:
+                return jsonify({"error": "Modo de conteo no válido"}), 400
+
+            result = flashcard_service.get_user_flashcards(
+                user_id, deck_id=deck_id, per_page=per_page, search=search,
+                cursor=cursor, count=count)
+            if not result["success"]:
+                return jsonify({"error": result["error"]}), result.get("code", 500)
+
+            response = jsonify(
+                {
+                    "success": True,
+                    "flashcards": [
+                        {
+                            "id": card["id"],
+                            "front": card["front_text"],
+                            "back": card["back_text"],
+                            "interval": card["interval_days"],
+                            "difficulty": card["difficulty"],
+                            "next_review": card["next_review"],
+                            "created_at": card["created_at"],
+                        }
+                        for card in result["data"]["flashcards"]
+                    ],
+                    "deck": {"id": deck.id, "name": deck.name},
+                    "pagination": result["data"]["pagination"],
+                }
+            )
+            if version["success"]:
+                ConditionalResponse.with_validators(response, **version["data"])
+
+            return response, 200
+
         # Consulta de flashcards
         query = Flashcard.query.filter_by(deck_id=deck_id)
 
         if search:
-            query = query.filter(
-                db.or_(
-                    Flashcard.front.contains(search),
-                    Flashcard.back.contains(search)))
+            query = query.filter(search_clause(db.session, Flashcard, search))
 
         flashcards = query.paginate(
             page=page, per_page=per_page, error_out=False)
@@ -227,24 +271,25 @@ def get_deck_flashcards(deck_id):
                     "created_at": card.created_at.isoformat(),
                 })
 
-        return (
-            jsonify(
-                {
-                    "success": True,
-                    "flashcards": flashcards_data,
-                    "deck": {"id": deck.id, "name": deck.name},
-                    "pagination": {
-                        "page": page,
-                        "per_page": per_page,
-                        "total": flashcards.total,
-                        "pages": flashcards.pages,
-                        "has_next": flashcards.has_next,
-                        "has_prev": flashcards.has_prev,
-                    },
-                }
-            ),
-            200,
+        response = jsonify(
+            {
+                "success": True,
+                "flashcards": flashcards_data,
+                "deck": {"id": deck.id, "name": deck.name},
+                "pagination": {
+                    "page": page,
+                    "per_page": per_page,
+                    "total": flashcards.total,
+                    "pages": flashcards.pages,
+                    "has_next": flashcards.has_next,
+                    "has_prev": flashcards.has_prev,
+                },
+            }
         )
+        if version["success"]:
+            ConditionalResponse.with_validators(response, **version["data"])
+
+        return response, 200
 
     except Exception as e:
         logger.error(f"Error obteniendo flashcards del deck: {str(e)}")
@@ -274,30 +319,29 @@ def create_bulk_flashcards():
         if not flashcards_data:
             return jsonify(
                 {"error": "Se requiere al menos una flashcard"}), 400
-        # Verificar que el deck pertenece al usuario
-        deck = Deck.query.filter_by(id=deck_id, user_id=user_id).first()
-        if not deck:
-            return jsonify({"error": "Deck no encontrado"}), 404
 
-        # Usar servicio para crear flashcards en lote
-        result = flashcard_service.create_bulk_flashcards(
-            deck_id, flashcards_data)
+        # Usar servicio para crear flashcards en lote (verifica el deck)
+        result = flashcard_service.create_multiple_flashcards(
+            user_id, deck_id, flashcards_data,
+            check_duplicates=data.get("check_duplicates", True),
+            bulk=bool(data.get("bulk", False)))
 
         if not result["success"]:
-            return jsonify({"error": result["error"]}), 400
+            return jsonify({"error": result["error"]}), result.get("code", 400)
 
         bulk_data = result["data"]
+        response = {
+            "success": True,
+            "created_count": bulk_data["created_count"],
+            "flashcards": bulk_data.get("flashcards", []),
+            "near_duplicates": bulk_data.get("near_duplicates", []),
+            "errors": bulk_data.get("errors", []),
+            "message": result["message"],
+        }
+        if "flashcard_ids" in bulk_data:
+            response["flashcard_ids"] = bulk_data["flashcard_ids"]
 
-        return (
-            jsonify(
-                {
-                    "success": True,
-                    "created_count": bulk_data["created_count"],
-                    "flashcards": bulk_data["flashcards"],
-                    "message": f"{bulk_data['created_count']} flashcards creadas exitosamente",
-                }),
-            201,
-        )
+        return jsonify(response), 201
 
     except Exception as e:
         logger.error(f"Error creando flashcards en lote: {str(e)}")
@@ -5,6 +5,7 @@ APIs optimizadas para consumo desde aplicaciones web
 
 from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required
+from sqlalchemy.orm import joinedload
 from backend_app.extensions import db
 from backend_app.models import User, Deck, Flashcard, StudySession, CardReview
 from backend_app.services_new import (
@@ -13,6 +14,7 @@ from backend_app.services_new import (
     FlashcardService,
     StudyService,
     StatsService,
+    SearchService,
 )
 from backend_app.utils import get_current_user_id
 from backend_app.utils.statistics import calculate_study_streak
@@ -29,6 +31,7 @@ deck_service = DeckService(db=db)
 flashcard_service = FlashcardService(db=db)
 study_service = StudyService(db=db)
 stats_service = StatsService(db=db)
+search_service = SearchService(db=db)
 
 
 @frontend_api.route("/health", methods=["GET"])
@@ -67,7 +70,7 @@ def get_user_profile():
 
         # Actividad reciente
         recent_sessions = (
-            StudySession.query.filter_by(
+            StudySession.query.options(joinedload(StudySession.deck)).filter_by(
                 user_id=user_id).order_by(
                 StudySession.created_at.desc()).limit(5).all())
 
@@ -92,7 +95,7 @@ def get_user_profile():
                 "recent_activity": [
                     {
                         "id": session.id,
-                        "deck_name": session.deck.name,
+                        "deck_name": session.deck.name if session.deck else None,
                         "cards_studied": session.cards_studied,
                         "created_at": session.created_at.isoformat(),
                     }
@@ -342,52 +345,40 @@ def search_content():
         if not query:
             return jsonify({"error": "Parámetro de búsqueda requerido"}), 400
 
-        # Buscar en decks
-        decks = (
-            Deck.query.filter_by(user_id=user_id)
-            .filter(
-                Deck.name.contains(query) | Deck.description.contains(query))
-            .limit(10)
-            .all()
-        )
-
-        # Buscar en flashcards
-        flashcards = (
-            db.session.query(Flashcard)
-            .join(Deck)
-            .filter(Deck.user_id == user_id)
-            .filter(
-                Flashcard.front.contains(query) | Flashcard.back.contains(query))
-            .limit(20)
-            .all()
-        )
+        # Búsqueda rankeada sobre el índice de texto completo
+        result = search_service.search(user_id, query)
+        if not result["success"]:
+            return jsonify({"error": result["error"]}), result.get("code", 400)
 
+        results = result["data"]
         return jsonify(
             {
                 "query": query,
                 "results": {
                     "decks": [
                         {
-                            "id": deck.id,
-                            "name": deck.name,
-                            "description": deck.description,
+                            "id": deck["id"],
+                            "name": deck["name"],
+                            "description": deck["description"],
+                            "snippet": deck["snippet"],
                             "type": "deck",
                         }
-                        for deck in decks
+                        for deck in results["decks"]
                     ],
                     "flashcards": [
                         {
-                            "id": card.id,
-                            "front": card.front,
-                            "back": card.back,
-                            "deck_name": card.deck.name,
-                            "deck_id": card.deck_id,
+                            "id": card["id"],
+                            "front": card["front_text"],
+                            "back": card["back_text"],
+                            "snippet": card["snippet"],
+                            "deck_name": card["deck_name"],
+                            "deck_id": card["deck_id"],
                             "type": "flashcard",
                         }
-                        for card in flashcards
+                        for card in results["flashcards"]
                     ],
                 },
-                "total_results": len(decks) + len(flashcards),
+                "total_results": results["total_results"],
             }
         )
     except Exception as e:
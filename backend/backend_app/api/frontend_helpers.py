@@ -0,0 +1,175 @@
+"""
+Helpers de respuesta y formato para las APIs consumidas por el frontend
+"""
+
+from flask import jsonify, request
+from flask_jwt_extended import get_jwt_identity
+from functools import wraps
+from datetime import datetime
+import logging
+import time
+
+logger = logging.getLogger("app.frontend_api")
+
+DEFAULT_PER_PAGE = 20
+MAX_PER_PAGE = 100
+
+# Filtros de listado aceptados en la query string
+FILTER_PARAMS = ("search", "category", "difficulty", "is_public", "tags")
+
+
+def frontend_response(data=None, message=None, meta=None, status_code=200):
+    """
+    Respuesta de éxito con el formato que espera el frontend
+
+    Args:
+        data: Datos de la respuesta
+        message: Mensaje descriptivo
+        meta: Metadatos adicionales (filtros, paginación, etc.)
+        status_code: Código HTTP
+
+    Returns:
+        tuple: (response, status_code)
+    """
+    body = {
+        "success": True,
+        "data": data,
+        "message": message,
+        "timestamp": datetime.utcnow().isoformat(),
+    }
+    if meta:
+        body["meta"] = meta
+    return jsonify(body), status_code
+
+
+def frontend_error(message, error_code, status_code=400, details=None):
+    """
+    Respuesta de error con el formato que espera el frontend
+
+    Args:
+        message: Mensaje de error
+        error_code: Código interno (p. ej. "DECK_NOT_FOUND")
+        status_code: Código HTTP
+        details: Detalles adicionales
+
+    Returns:
+        tuple: (response, status_code)
+    """
+    body = {
+        "success": False,
+        "error": message,
+        "code": error_code,
+        "timestamp": datetime.utcnow().isoformat(),
+    }
+    if details:
+        body["details"] = details
+    return jsonify(body), status_code
+
+
+def format_deck_for_frontend(deck, include_stats=False, stats=None, cards_due=0):
+    """
+    Formatear un deck para el frontend
+
+    Args:
+        deck: Instancia de Deck
+        include_stats: Incluir contadores de cartas
+        stats: Fila de DeckCardStats (None si aún no existe)
+        cards_due: Cartas pendientes hoy
+
+    Returns:
+        dict: Deck formateado
+    """
+    data = deck.to_dict(include_stats=False)
+    if include_stats:
+        data.update({
+            "total_cards": stats.total_cards if stats else deck.total_cards or 0,
+            "cards_due": cards_due or 0,
+            "cards_new": stats.cards_new if stats else 0,
+            "cards_learning": stats.cards_learning if stats else 0,
+            "cards_mastered": stats.cards_mastered if stats else 0,
+        })
+    return data
+
+
+def format_flashcard_for_frontend(card, include_review_data=False):
+    """
+    Formatear una flashcard para el frontend
+
+    Args:
+        card: Instancia de Flashcard
+        include_review_data: Incluir datos del algoritmo de repaso
+
+    Returns:
+        dict: Flashcard formateada
+    """
+    data = {
+        "id": card.id,
+        "deck_id": card.deck_id,
+        "front": card.front_text,
+        "back": card.back_text,
+        "front_image_url": card.front_image_url,
+        "back_image_url": card.back_image_url,
+        "difficulty": card.difficulty,
+        "tags": card.tags_list,
+        "created_at": _isoformat(card.created_at),
+    }
+    if include_review_data:
+        data.update({
+            "interval": card.interval_days,
+            "ease_factor": card.ease_factor,
+            "repetitions": card.repetitions,
+            "next_review": _isoformat(card.next_review),
+            "last_review": _isoformat(card.last_reviewed),
+        })
+    return data
+
+
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+
+def get_request_pagination():
+    """
+    Leer page/per_page de la query string con límites
+
+    Returns:
+        tuple: (page, per_page)
+    """
+    page = max(request.args.get("page", 1, type=int) or 1, 1)
+    per_page = request.args.get("per_page", DEFAULT_PER_PAGE, type=int) or DEFAULT_PER_PAGE
+    return page, min(max(per_page, 1), MAX_PER_PAGE)
+
+
+def get_request_filters():
+    """Filtros de listado presentes (y no vacíos) en la query string"""
+    return {
+        name: request.args[name].strip()
+        for name in FILTER_PARAMS
+        if request.args.get(name, "").strip()
+    }
+
+
+def log_frontend_request(operation):
+    """
+    Decorator que registra la operación, el usuario y la duración
+
+    Args:
+        operation: Nombre lógico de la operación
+    """
+
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return f(*args, **kwargs)
+            finally:
+                logger.info(
+                    f"{operation} user={get_jwt_identity()} "
+                    f"{request.method} {request.full_path} "
+                    f"{(time.perf_counter() - started) * 1000:.1f}ms"
+                )
+
+        return decorated_function
+
+    return decorator
@@ -6,9 +6,18 @@ Versión mejorada de las APIs v2 con optimizaciones específicas para frontend
 from typing import List, Dict
 from flask import Blueprint, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from .models import User, Deck, Flashcard, StudySession
-from .extensions import db
-from .frontend_helpers import (
+from backend_app.models import (
+    User,
+    Deck,
+    Flashcard,
+    StudySession,
+    DailyActivity,
+    DeckCardStats,
+    DeckDueBucket,
+)
+from backend_app.extensions import db
+from backend_app.models.search_index import search_clause
+from backend_app.api.frontend_helpers import (
     frontend_response,
     frontend_error,
     format_deck_for_frontend,
@@ -17,16 +26,16 @@ from .frontend_helpers import (
     get_request_filters,
     log_frontend_request,
 )
-from .cache_optimized import (
+from backend_app.api.cache_optimized import (
     cache_user_data,
     cache_deck_data,
     cache_study_data,
     QueryOptimizer,
     ResponseCompressor,
 )
-from .performance_middleware import performance_monitor, optimize_json_response
+from backend_app.api.performance_middleware import performance_monitor, optimize_json_response
 from datetime import datetime, timedelta
-from sqlalchemy import or_, and_, func
+from sqlalchemy import and_, func
 import logging
 
 logger = logging.getLogger(__name__)
@@ -54,55 +63,44 @@ def get_dashboard_v2_optimized():
                 "USER_NOT_FOUND",
                 status_code=404)
 
-        # Usar consultas optimizadas con agregaciones eficientes
-        now = datetime.utcnow()
-        today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        # Contadores precalculados por deck (deck_card_stats) en una consulta
+        today = datetime.utcnow().date()
 
-        # Consulta única para estadísticas de decks y cards
         deck_stats = (
             db.session.query(
-                func.count(
-                    Deck.id).label("total_decks"),
-                func.count(
-                    Flashcard.id).label("total_cards"),
-                func.sum(
-                    func.case(
-                        [
-                            (Flashcard.next_review <= now,
-                             1)],
-                        else_=0)).label("cards_due"),
-                func.sum(
-                    func.case(
-                        [
-                            (Flashcard.last_review.is_(None),
-                             1)],
-                        else_=0)).label("new_cards"),
-                func.sum(
-                    func.case(
-                        [
-                            (Flashcard.interval > 30,
-                             1)],
-                        else_=0)).label("mastered_cards"),
-            ) .select_from(Deck) .outerjoin(Flashcard) .filter(
-                Deck.user_id == user_id) .first())
-
-        # Consulta optimizada para sesiones de hoy
-        today_stats = (
-            db.session.query(
-                func.sum(
-                    StudySession.cards_studied).label("cards_studied"),
-                func.sum(
-                    StudySession.total_time).label("study_time"),
-            ) .join(Deck) .filter(
+                func.count(Deck.id).label("total_decks"),
+                func.coalesce(func.sum(DeckCardStats.total_cards), 0).label("total_cards"),
+                func.coalesce(func.sum(DeckCardStats.cards_new), 0).label("new_cards"),
+                func.coalesce(func.sum(DeckCardStats.cards_mastered), 0).label("mastered_cards"),
+            )
+            .select_from(Deck)
+            .outerjoin(DeckCardStats, DeckCardStats.deck_id == Deck.id)
+            .filter(Deck.user_id == user_id, Deck.is_deleted.is_(False))
+            .first()
+        )
+
+        # Cartas vencidas desde el histograma de vencimientos
+        cards_due = (
+            db.session.query(func.coalesce(func.sum(DeckDueBucket.card_count), 0))
+            .join(Deck, DeckDueBucket.deck_id == Deck.id)
+            .filter(
                 Deck.user_id == user_id,
-                StudySession.started_at >= today_start) .first())
+                Deck.is_deleted.is_(False),
+                DeckDueBucket.due_date <= today,
+            )
+            .scalar()
+        )
+
+        # Actividad de hoy desde el resumen diario
+        today_stats = DailyActivity.query.filter_by(
+            user_id=user_id, day=today).first()
 
         # Calcular racha de estudio de manera eficiente
         study_streak = calculate_study_streak_optimized(user_id)
 
         # Decks recientes con consulta optimizada
         recent_decks = Deck.query.filter_by(
-            user_id=user_id).order_by(
+            user_id=user_id, is_deleted=False).order_by(
             Deck.updated_at.desc()).limit(5).all()
 
         # Próximas revisiones con consulta agregada
@@ -120,7 +118,7 @@ def get_dashboard_v2_optimized():
             "stats": {
                 "total_decks": deck_stats.total_decks or 0,
                 "total_cards": deck_stats.total_cards or 0,
-                "cards_due_today": deck_stats.cards_due or 0,
+                "cards_due_today": cards_due,
                 "new_cards": deck_stats.new_cards or 0,
                 "mastered_cards": deck_stats.mastered_cards or 0,
                 "mastery_percentage": round(
@@ -128,17 +126,17 @@ def get_dashboard_v2_optimized():
                      if deck_stats.total_cards > 0 else 0),
                     1,
                 ),
-                "cards_studied_today": today_stats.cards_studied or 0,
+                "cards_studied_today": today_stats.cards_studied if today_stats else 0,
                 # convertir a minutos
-                "study_time_today": (today_stats.study_time or 0) // 60,
+                "study_time_today": (today_stats.study_time if today_stats else 0) // 60,
                 "study_streak": study_streak,
             },
             "recent_decks": [format_deck_for_frontend(deck) for deck in recent_decks],
             "upcoming_reviews": upcoming_reviews,
             "quick_actions": {
-                "has_due_cards": (deck_stats.cards_due or 0) > 0,
+                "has_due_cards": cards_due > 0,
                 "has_new_cards": (deck_stats.new_cards or 0) > 0,
-                "suggested_study_time": (min(30, (deck_stats.cards_due or 0) * 2) if deck_stats.cards_due else 0),
+                "suggested_study_time": min(30, cards_due * 2),
             },
         }
 
@@ -176,9 +174,8 @@ def list_decks_v2_optimized():
 
         # Aplicar filtros de manera eficiente
         if "search" in filters:
-            search_term = f"%{filters['search']}%"
-            query = query.filter(or_(Deck.name.ilike(
-                search_term), Deck.description.ilike(search_term)))
+            query = query.filter(
+                search_clause(db.session, Deck, filters["search"]))
 
         # Usar optimizador de consultas
         include_stats = request.args.get(
@@ -207,9 +204,13 @@ def list_decks_v2_optimized():
 
         # Formatear para frontend de manera eficiente
         formatted_decks = []
-        for deck in decks:
-            deck_data = format_deck_for_frontend(
-                deck, include_stats=include_stats)
+        for row in decks:
+            if include_stats:
+                deck, stats, cards_due = row
+                deck_data = format_deck_for_frontend(
+                    deck, include_stats=True, stats=stats, cards_due=cards_due)
+            else:
+                deck_data = format_deck_for_frontend(row)
             formatted_decks.append(deck_data)
 
         # Crear respuesta paginada optimizada
@@ -252,7 +253,8 @@ def get_study_cards_v2_optimized(deck_id):
         user_id = get_jwt_identity()
 
         # Verificar deck con consulta optimizada
-        deck = Deck.query.filter_by(id=deck_id, user_id=user_id).first()
+        deck = Deck.query.filter_by(
+            id=deck_id, user_id=user_id, is_deleted=False).first()
         if not deck:
             return frontend_error(
                 "Deck no encontrado",
@@ -260,7 +262,7 @@ def get_study_cards_v2_optimized(deck_id):
                 status_code=404)
 
         # Parámetros de estudio
-        limit = int(request.args.get("limit", 20))
+        limit = min(max(request.args.get("limit", 20, type=int) or 20, 1), 100)
         include_new = request.args.get("include_new", "true").lower() == "true"
         include_due = request.args.get("include_due", "true").lower() == "true"
 
@@ -275,6 +277,7 @@ def get_study_cards_v2_optimized(deck_id):
                 Flashcard.query.filter(
                     and_(
                         Flashcard.deck_id == deck_id,
+                        Flashcard.is_deleted.is_(False),
                         Flashcard.next_review <= now,
                         Flashcard.last_review.isnot(None),
                     )
@@ -292,6 +295,7 @@ def get_study_cards_v2_optimized(deck_id):
                 Flashcard.query.filter(
                     and_(
                         Flashcard.deck_id == deck_id,
+                        Flashcard.is_deleted.is_(False),
                         Flashcard.last_review.is_(None))) .order_by(
                     Flashcard.created_at.asc()) .limit(remaining_limit) .all())
             study_cards.extend(new_cards)
@@ -357,10 +361,7 @@ def get_progress_stats_v2_optimized():
     """
     try:
         user_id = get_jwt_identity()
-        days = int(request.args.get("days", 30))
-
-        if days > 365:
-            days = 365
+        days = min(max(request.args.get("days", 30, type=int) or 30, 1), 365)
 
         end_date = datetime.utcnow()
         start_date = end_date - timedelta(days=days)
@@ -380,7 +381,9 @@ def get_progress_stats_v2_optimized():
                     "cards_studied": result.total_cards or 0,
                     "study_time_minutes": (result.total_time or 0) // 60,
                     "sessions_count": result.session_count or 0,
-                    "accuracy_percentage": 85,  # Placeholder - calcular si es necesario
+                    "accuracy_percentage": (
+                        round((result.cards_correct or 0) / result.total_cards * 100, 1)
+                        if result.total_cards else 0),
                 }
             )
 
@@ -392,7 +395,7 @@ def get_progress_stats_v2_optimized():
                 func.sum(StudySession.cards_studied).label("total_cards"),
                 func.sum(StudySession.total_time).label("total_time"),
             )
-            .join(StudySession)
+            .join(StudySession, StudySession.deck_id == Deck.id)
             .filter(
                 and_(Deck.user_id == user_id, StudySession.started_at >= start_date))
             .group_by(Deck.id, Deck.name)
@@ -419,9 +422,8 @@ def get_progress_stats_v2_optimized():
                 func.sum(StudySession.cards_studied).label("total_cards"),
                 func.sum(StudySession.total_time).label("total_time"),
             )
-            .join(Deck)
             .filter(
-                and_(Deck.user_id == user_id, StudySession.started_at >= start_date))
+                and_(StudySession.user_id == user_id, StudySession.started_at >= start_date))
             .first()
         )
 
@@ -463,38 +465,27 @@ def get_progress_stats_v2_optimized():
 
 def calculate_study_streak_optimized(user_id: int) -> int:
     """
-    Calcular racha de estudio de manera optimizada
+    Calcular racha de estudio desde el resumen diario de actividad
     """
     try:
-        # Consulta optimizada para obtener días con estudio
-        study_days = (
-            db.session.query(
-                func.date(
-                    StudySession.started_at).label("study_date")) .join(Deck) .filter(
-                and_(
-                    Deck.user_id == user_id,
-                    StudySession.cards_studied > 0,
-                    StudySession.started_at >= datetime.utcnow()
-                    - timedelta(
-                        days=365),
-                )) .distinct() .order_by(
-                func.date(
-                    StudySession.started_at).desc()) .all())
-
-        if not study_days:
-            return 0
-
-        # Calcular racha consecutiva
         today = datetime.utcnow().date()
-        streak = 0
-
-        for i, day_result in enumerate(study_days):
-            expected_date = today - timedelta(days=i)
+        study_days = (
+            db.session.query(DailyActivity.day)
+            .filter(
+                DailyActivity.user_id == user_id,
+                DailyActivity.cards_studied > 0,
+                DailyActivity.day >= today - timedelta(days=365),
+            )
+            .order_by(DailyActivity.day.desc())
+            .all()
+        )
 
-            if day_result.study_date == expected_date:
-                streak += 1
-            else:
+        # Calcular racha consecutiva terminada hoy
+        streak = 0
+        for i, (study_date,) in enumerate(study_days):
+            if study_date != today - timedelta(days=i):
                 break
+            streak += 1
 
         return streak
 
@@ -505,38 +496,35 @@ def calculate_study_streak_optimized(user_id: int) -> int:
 
 def get_upcoming_reviews_optimized(user_id: int, days: int = 7) -> List[Dict]:
     """
-    Obtener próximas revisiones de manera optimizada
+    Obtener próximas revisiones desde el histograma de vencimientos
     """
     try:
-        now = datetime.utcnow()
-        end_date = now + timedelta(days=days)
+        today = datetime.utcnow().date()
 
-        # Consulta optimizada para próximas revisiones
         upcoming_query = (
             db.session.query(
-                func.date(Flashcard.next_review).label("review_date"),
-                func.count(Flashcard.id).label("card_count"),
+                DeckDueBucket.due_date.label("review_date"),
+                func.sum(DeckDueBucket.card_count).label("card_count"),
             )
-            .join(Deck)
+            .join(Deck, DeckDueBucket.deck_id == Deck.id)
             .filter(
                 and_(
                     Deck.user_id == user_id,
-                    Flashcard.next_review >= now,
-                    Flashcard.next_review <= end_date,
+                    Deck.is_deleted.is_(False),
+                    DeckDueBucket.due_date > today,
+                    DeckDueBucket.due_date <= today + timedelta(days=days),
+                    DeckDueBucket.card_count > 0,
                 )
             )
-            .group_by(func.date(Flashcard.next_review))
-            .order_by(func.date(Flashcard.next_review))
+            .group_by(DeckDueBucket.due_date)
+            .order_by(DeckDueBucket.due_date)
             .all()
         )
 
-        # Convertir a formato esperado
-        upcoming_reviews = []
-        for result in upcoming_query:
-            upcoming_reviews.append(
-                {"date": result.review_date.isoformat(), "count": result.card_count})
-
-        return upcoming_reviews
+        return [
+            {"date": result.review_date.isoformat(), "count": result.card_count}
+            for result in upcoming_query
+        ]
 
     except Exception as e:
         logger.error(
@@ -0,0 +1,147 @@
+"""
+Monitor de rendimiento por endpoint y optimización de respuestas JSON
+"""
+
+from flask import make_response, request
+from functools import wraps
+from collections import deque
+from datetime import date, datetime
+from decimal import Decimal
+import logging
+import threading
+import time
+
+logger = logging.getLogger("app.performance")
+
+# Muestras de latencia guardadas por endpoint para percentiles
+LATENCY_SAMPLES = 500
+
+# Decimales conservados en los floats de las respuestas
+FLOAT_PRECISION = 4
+
+
+class EndpointStats:
+    """Latencias recientes y contadores de un endpoint"""
+
+    def __init__(self, threshold_ms):
+        self.threshold_ms = threshold_ms
+        self.count = 0
+        self.slow_count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.samples = deque(maxlen=LATENCY_SAMPLES)
+
+    def record(self, elapsed_ms, status_code):
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.samples.append(elapsed_ms)
+        if elapsed_ms > self.threshold_ms:
+            self.slow_count += 1
+        if status_code >= 500:
+            self.errors += 1
+
+    def to_dict(self):
+        ordered = sorted(self.samples)
+
+        def percentile(fraction):
+            if not ordered:
+                return 0.0
+            return round(ordered[min(int(len(ordered) * fraction), len(ordered) - 1)], 2)
+
+        return {
+            "count": self.count,
+            "slow_count": self.slow_count,
+            "errors": self.errors,
+            "threshold_ms": self.threshold_ms,
+            "avg_ms": round(self.total_ms / self.count, 2) if self.count else 0.0,
+            "p50_ms": percentile(0.50),
+            "p95_ms": percentile(0.95),
+            "max_ms": round(self.max_ms, 2),
+        }
+
+
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def performance_monitor(threshold_ms=500):
+    """
+    Decorator que mide la latencia de un endpoint
+
+    Registra un warning cuando supera threshold_ms, acumula estadísticas por
+    endpoint (ver get_performance_stats) y añade la cabecera Server-Timing.
+
+    Args:
+        threshold_ms: Latencia a partir de la cual la petición se considera lenta
+    """
+
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            started = time.perf_counter()
+            response = make_response(f(*args, **kwargs))
+            elapsed_ms = (time.perf_counter() - started) * 1000
+
+            with _stats_lock:
+                stats = _stats.get(f.__name__)
+                if stats is None:
+                    stats = _stats[f.__name__] = EndpointStats(threshold_ms)
+                stats.record(elapsed_ms, response.status_code)
+
+            if elapsed_ms > threshold_ms:
+                logger.warning(
+                    f"Endpoint lento {f.__name__}: {elapsed_ms:.1f}ms "
+                    f"(umbral {threshold_ms}ms) {request.method} {request.full_path}"
+                )
+
+            response.headers.add("Server-Timing", f"app;dur={elapsed_ms:.1f}")
+            return response
+
+        return decorated_function
+
+    return decorator
+
+
+def get_performance_stats():
+    """Estadísticas de latencia por endpoint desde el arranque del proceso"""
+    with _stats_lock:
+        return {name: stats.to_dict() for name, stats in _stats.items()}
+
+
+def reset_performance_stats():
+    """Reiniciar las estadísticas acumuladas"""
+    with _stats_lock:
+        _stats.clear()
+
+
+def optimize_json_response(data):
+    """
+    Preparar datos para serializar en JSON de forma compacta
+
+    - Elimina las claves con valor None de los diccionarios.
+    - Convierte fechas a ISO 8601 y Decimal a float.
+    - Redondea los floats a FLOAT_PRECISION decimales.
+
+    Args:
+        data: dict, list o valor escalar
+
+    Returns:
+        Datos optimizados (nuevos objetos; no modifica la entrada)
+    """
+    if isinstance(data, dict):
+        return {
+            key: optimize_json_response(value)
+            for key, value in data.items()
+            if value is not None
+        }
+    if isinstance(data, (list, tuple)):
+        return [optimize_json_response(value) for value in data]
+    if isinstance(data, (datetime, date)):
+        return data.isoformat()
+    if isinstance(data, Decimal):
+        data = float(data)
+    if isinstance(data, float):
+        return round(data, FLOAT_PRECISION)
+    return data
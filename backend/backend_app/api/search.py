@@ -0,0 +1,79 @@
+"""
+Rutas de búsqueda de texto completo para StudyingFlash
+"""
+
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from backend_app.services_new import SearchService
+from backend_app.extensions import db
+import logging
+
+logger = logging.getLogger(__name__)
+search_bp = Blueprint("search", __name__)
+
+# Usar servicio refactorizado con inyección de dependencias
+search_service = SearchService(db=db)
+
+
+@search_bp.route("/", methods=["GET"])
+@jwt_required()
+def search():
+    """
+    Buscar decks y flashcards del usuario ordenados por relevancia
+    GET /api/search?q=<texto>&type=all|decks|flashcards&deck_id=&limit=
+    """
+    try:
+        user_id = get_jwt_identity()
+        query = request.args.get("q", "").strip()
+        search_type = request.args.get("type", "all")
+        limit = request.args.get("limit", 20, type=int)
+
+        if search_type == "decks":
+            result = search_service.search_decks(
+                user_id, query, limit=limit,
+                include_public=request.args.get("include_public") == "true")
+            key = "decks"
+        elif search_type == "flashcards":
+            result = search_service.search_flashcards(
+                user_id, query, deck_id=request.args.get("deck_id", type=int),
+                limit=limit)
+            key = "flashcards"
+        elif search_type == "all":
+            result = search_service.search(user_id, query, flashcard_limit=limit)
+            key = None
+        else:
+            return jsonify({"error": "Tipo de búsqueda no válido"}), 400
+
+        if not result["success"]:
+            return jsonify({"error": result["error"]}), result.get("code", 400)
+
+        if key is None:
+            return jsonify({"success": True, **result["data"]}), 200
+        return jsonify({"success": True, "query": query, key: result["data"]}), 200
+
+    except Exception as e:
+        logger.error(f"Error en búsqueda: {str(e)}")
+        return jsonify({"error": "Error interno del servidor"}), 500
+
+
+@search_bp.route("/suggest", methods=["GET"])
+@jwt_required()
+def suggest():
+    """
+    Autocompletar mientras el usuario escribe
+    GET /api/search/suggest?q=<prefijo>&limit=
+    """
+    try:
+        user_id = get_jwt_identity()
+        result = search_service.suggest(
+            user_id, request.args.get("q", ""),
+            limit=request.args.get("limit", 10, type=int))
+
+        if not result["success"]:
+            return jsonify({"error": result["error"]}), result.get("code", 400)
+
+        return jsonify({"success": True, "suggestions": result["data"]}), 200
+
+    except Exception as e:
+        logger.error(f"Error en sugerencias: {str(e)}")
+        return jsonify({"error": "Error interno del servidor"}), 500
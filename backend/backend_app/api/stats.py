@@ -5,7 +5,7 @@ Compatible con frontend existente
 
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from backend_app.models import User, Deck, Flashcard, StudySession, CardReview
+from backend_app.models import User, Deck, Flashcard, CardReview
 from backend_app.services_new import StatsService
 from backend_app.extensions import db
 from datetime import datetime, timedelta
@@ -58,80 +58,39 @@ def get_chart_data():
         chart_type = request.args.get("type", "weekly")
         days = request.args.get("days", 30, type=int)
 
-        if chart_type == "weekly":
-            # Datos semanales
+        if chart_type in ("weekly", "monthly"):
+            # Series diarias desde el resumen de actividad
             end_date = datetime.utcnow().date()
-            start_date = end_date - timedelta(days=6)
-
-            weekly_data = []
-            current_date = start_date
-
-            while current_date <= end_date:
-                day_start = datetime.combine(current_date, datetime.min.time())
-                day_end = datetime.combine(current_date, datetime.max.time())
-
-                # Cartas estudiadas en el día
-                cards_studied = (
-                    db.session.query(func.sum(StudySession.cards_studied))
-                    .join(Deck)
-                    .filter(
-                        Deck.user_id == user_id,
-                        StudySession.started_at >= day_start,
-                        StudySession.started_at <= day_end,
-                    )
-                    .scalar()
-                    or 0
-                )
+            span = 7 if chart_type == "weekly" else min(max(days, 1), 366)
+            start_date = end_date - timedelta(days=span - 1)
+
+            result = stats_service.get_activity_series(user_id, start_date, end_date)
+            if not result["success"]:
+                return jsonify({"error": result["error"]}), result.get("code", 500)
 
-                weekly_data.append(
+            if chart_type == "weekly":
+                chart_data = [
                     {
-                        "date": current_date.isoformat(),
-                        "day": current_date.strftime("%a"),
-                        "cards_studied": int(cards_studied),
+                        "date": entry["date"],
+                        "day": datetime.fromisoformat(entry["date"]).strftime("%a"),
+                        "cards_studied": entry["cards_studied"],
                     }
-                )
-
-                current_date += timedelta(days=1)
-
-            return (
-                jsonify({"success": True, "chart_data": weekly_data, "type": "weekly"}),
-                200,
-            )
-
-        elif chart_type == "monthly":
-            # Datos mensuales
-            end_date = datetime.utcnow().date()
-            start_date = end_date - timedelta(days=days - 1)
-
-            monthly_data = (
-                db.session.query(
-                    func.date(StudySession.started_at).label("date"),
-                    func.sum(StudySession.cards_studied).label("cards_studied"),
-                    func.sum(StudySession.total_time).label("total_time"),
-                )
-                .join(Deck)
-                .filter(
-                    Deck.user_id == user_id,
-                    func.date(StudySession.started_at) >= start_date,
-                    func.date(StudySession.started_at) <= end_date,
-                )
-                .group_by(func.date(StudySession.started_at))
-                .all()
-            )
-
-            chart_data = []
-            for row in monthly_data:
-                chart_data.append(
+                    for entry in result["data"]
+                ]
+            else:
+                chart_data = [
                     {
-                        "date": row.date.isoformat(),
-                        "cards_studied": int(row.cards_studied or 0),
+                        "date": entry["date"],
+                        "cards_studied": entry["cards_studied"],
                         # en minutos
-                        "study_time": int((row.total_time or 0) / 60),
+                        "study_time": int(entry["study_time"] / 60),
                     }
-                )
+                    for entry in result["data"]
+                    if entry["cards_studied"] or entry["study_time"]
+                ]
 
             return (
-                jsonify({"success": True, "chart_data": chart_data, "type": "monthly"}),
+                jsonify({"success": True, "chart_data": chart_data, "type": chart_type}),
                 200,
             )
 
@@ -198,23 +157,13 @@ def get_progress_stats():
 
         # Estadísticas de progreso
         now = datetime.utcnow()
-        today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-
-        # Cartas estudiadas hoy
-        cards_today = (
-            db.session.query(
-                func.sum(
-                    StudySession.cards_studied)) .join(Deck) .filter(
-                Deck.user_id == user_id,
-                StudySession.started_at >= today_start) .scalar() or 0)
-
-        # Tiempo de estudio hoy (en minutos)
-        time_today = (
-            db.session.query(
-                func.sum(
-                    StudySession.total_time)) .join(Deck) .filter(
-                Deck.user_id == user_id,
-                StudySession.started_at >= today_start) .scalar() or 0)
+
+        # Actividad de hoy desde el resumen diario
+        today = now.date()
+        activity = stats_service.get_activity_series(user_id, today, today)
+        today_entry = activity["data"][0] if activity["success"] else {}
+        cards_today = today_entry.get("cards_studied", 0)
+        time_today = today_entry.get("study_time", 0)
 
         time_today_minutes = int(time_today / 60) if time_today else 0
 
@@ -265,6 +214,30 @@ def get_progress_stats():
         return jsonify({"error": "Error interno del servidor"}), 500
 
 
+@stats_bp.route("/forecast", methods=["GET"])
+@jwt_required()
+def get_workload_forecast():
+    """
+    Pronóstico de revisiones por día (simulación Monte-Carlo)
+    GET /api/stats/forecast?days=90&simulations=20
+    """
+    try:
+        user_id = get_jwt_identity()
+        days = request.args.get("days", type=int)
+        simulations = request.args.get("simulations", type=int)
+
+        result = stats_service.get_workload_forecast(user_id, days, simulations)
+
+        if not result["success"]:
+            return jsonify({"error": result["error"]}), result.get("code", 400)
+
+        return jsonify({"success": True, "forecast": result["data"]}), 200
+
+    except Exception as e:
+        logger.error(f"Error obteniendo pronóstico de carga: {str(e)}")
+        return jsonify({"error": "Error interno del servidor"}), 500
+
+
 @stats_bp.route("/leaderboard", methods=["GET"])
 def get_leaderboard():
     """
@@ -273,34 +246,19 @@ def get_leaderboard():
     """
     try:
         # Top usuarios por cartas estudiadas (últimos 30 días)
-        thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-
-        leaderboard = (
-            db.session.query(
-                User.id,
-                User.username,
-                User.first_name,
-                User.last_name,
-                func.sum(StudySession.cards_studied).label("cards_studied"),
-            )
-            .join(StudySession)
-            .filter(StudySession.started_at >= thirty_days_ago)
-            .group_by(User.id, User.username, User.first_name, User.last_name)
-            .order_by(func.sum(StudySession.cards_studied).desc())
-            .limit(10)
-            .all()
-        )
-
-        leaderboard_data = []
-        for i, row in enumerate(leaderboard, 1):
-            leaderboard_data.append(
-                {
-                    "rank": i,
-                    "username": row.username,
-                    "name": f"{row.first_name} {row.last_name}",
-                    "cards_studied": int(row.cards_studied or 0),
-                }
-            )
+        result = stats_service.get_activity_leaderboard(days=30, limit=10)
+        if not result["success"]:
+            return jsonify({"error": result["error"]}), result.get("code", 500)
+
+        leaderboard_data = [
+            {
+                "rank": i,
+                "username": row["username"],
+                "name": row["name"],
+                "cards_studied": row["cards_studied"],
+            }
+            for i, row in enumerate(result["data"], 1)
+        ]
 
         return (
             jsonify({"success": True, "leaderboard": leaderboard_data, "period": "30 días"}),
@@ -5,11 +5,11 @@ Compatible con frontend existente - CRÍTICO para conexión frontend-backend
 
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from backend_app.models import User, Deck, Flashcard, StudySession, CardReview
+from backend_app.models import User, Flashcard, StudySession, CardReview
 from backend_app.services_new import StudyService
 from backend_app.utils import calculate_fsrs, calculate_sm2, get_next_review_date
 from backend_app.extensions import db
-from backend_app.validation.schemas import StudyAnswerSchema
+from backend_app.validation.schemas import StudyAnswerSchema, StudyAnswerBatchSchema
 from backend_app.validation.validators import validate_json
 from datetime import datetime
 import logging
@@ -26,7 +26,10 @@ study_service = StudyService(db=db)
 def start_study_session():
     """
     Iniciar sesión de estudio - Compatible con frontend
-    POST /api/study/session
+    POST /api/study/session {"deck_id": ..., "tag": ..., "algorithm": ...}
+
+    Con tag y sin deck_id la sesión abarca las cartas con ese tag de todos
+    los decks del usuario.
     """
     try:
         user_id = get_jwt_identity()
@@ -36,18 +39,15 @@ def start_study_session():
             return jsonify({"error": "No se proporcionaron datos"}), 400
 
         deck_id = data.get("deck_id")
-        if not deck_id:
-            return jsonify({"error": "deck_id es requerido"}), 400
-
-        # Verificar que el deck pertenece al usuario
-        deck = Deck.query.filter_by(id=deck_id, user_id=user_id).first()
-        if not deck:
-            return jsonify({"error": "Deck no encontrado"}), 404
+        tag = data.get("tag")
+        if not deck_id and not tag:
+            return jsonify({"error": "deck_id o tag es requerido"}), 400
 
-        # Usar servicio para crear sesión
-        result = study_service.start_study_session(user_id, deck_id, algorithm=data.get("algorithm", "fsrs"))
+        # Usar servicio para crear sesión (verifica la propiedad del deck)
+        result = study_service.start_study_session(
+            user_id, deck_id, algorithm=data.get("algorithm", "fsrs"), tag=tag)
         if not result["success"]:
-            return jsonify({"error": result["error"]}), 400
+            return jsonify({"error": result["error"]}), result.get("code", 400)
 
         session_data = result["data"]
 
@@ -55,9 +55,8 @@ def start_study_session():
             jsonify(
                 {
                     "success": True,
-                    "session": session_data["session"],
-                    "cards": session_data["cards"],
-                    "total_cards": len(session_data["cards"]),
+                    "session": session_data,
+                    "total_cards": session_data["available_cards"],
                 }
             ),
             200,
@@ -90,7 +89,7 @@ def answer_card(validated_data):
 
         result = study_service.review_card(session_id, user_id, card_id, quality, validated_data.get("response_time"))
         if not result["success"]:
-            return jsonify({"error": result["error"]}), 400
+            return jsonify({"error": result["error"]}), result.get("code", 400)
         return jsonify(result["data"]), 200
     except Exception as e:
         logger.error(f"Error procesando respuesta de carta: {str(e)}")
@@ -98,6 +97,28 @@ def answer_card(validated_data):
         return jsonify({"error": "Error interno del servidor"}), 500
 
 
+@study_bp.route("/session/<int:session_id>/answers", methods=["POST"])
+@jwt_required()
+@validate_json(StudyAnswerBatchSchema)
+def answer_cards_batch(session_id, validated_data):
+    """
+    Registrar un lote ordenado de respuestas (p. ej. estudio sin conexión)
+    POST /api/study/session/<id>/answers
+    """
+    try:
+        user_id = get_jwt_identity()
+
+        result = study_service.review_cards_batch(
+            session_id, user_id, validated_data["answers"])
+        if not result["success"]:
+            return jsonify({"error": result["error"]}), result.get("code", 400)
+        return jsonify({"success": True, **result["data"]}), 200
+    except Exception as e:
+        logger.error(f"Error procesando lote de respuestas: {str(e)}")
+        db.session.rollback()
+        return jsonify({"error": "Error interno del servidor"}), 500
+
+
 @study_bp.route("/session/<int:session_id>/end", methods=["POST"])
 @jwt_required()
 def end_study_session(session_id):
@@ -155,12 +176,16 @@ def end_study_session(session_id):
 def get_due_cards():
     """
     Obtener cartas que necesitan revisión
-    GET /api/study/cards/due
+    GET /api/study/cards/due?tag=<tag>&deck_id=&limit=
     """
     try:
         user_id = get_jwt_identity()
 
-        result = study_service.get_due_cards(user_id)
+        result = study_service.get_due_cards(
+            user_id,
+            deck_id=request.args.get("deck_id", type=int),
+            limit=request.args.get("limit", 50, type=int),
+            tag=request.args.get("tag"))
         if not result["success"]:
             return jsonify({"error": result["error"]}), 400
         return jsonify(result["data"]), 200
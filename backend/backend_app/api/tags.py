@@ -0,0 +1,92 @@
+"""
+Rutas de tags para StudyingFlash
+"""
+
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from backend_app.services_new import TagService
+from backend_app.extensions import db
+import logging
+
+logger = logging.getLogger(__name__)
+tags_bp = Blueprint("tags", __name__)
+
+# Usar servicio refactorizado con inyección de dependencias
+tag_service = TagService(db=db)
+
+
+@tags_bp.route("/", methods=["GET"])
+@jwt_required()
+def get_tags():
+    """
+    Tags del usuario con número de decks y flashcards
+    GET /api/tags
+    """
+    try:
+        user_id = get_jwt_identity()
+
+        result = tag_service.get_user_tags(user_id)
+        if not result["success"]:
+            return jsonify({"error": result["error"]}), result.get("code", 500)
+
+        return jsonify({"success": True, "tags": result["data"]}), 200
+
+    except Exception as e:
+        logger.error(f"Error obteniendo tags: {str(e)}")
+        return jsonify({"error": "Error interno del servidor"}), 500
+
+
+@tags_bp.route("/decks", methods=["GET"])
+@jwt_required()
+def get_decks_by_tag():
+    """
+    Decks del usuario con un tag
+    GET /api/tags/decks?tag=<tag>&page=&per_page=
+    """
+    try:
+        user_id = get_jwt_identity()
+
+        result = tag_service.get_decks_by_tag(
+            user_id, request.args.get("tag", ""),
+            page=request.args.get("page", 1, type=int),
+            per_page=request.args.get("per_page", 20, type=int))
+        if not result["success"]:
+            return jsonify({"error": result["error"]}), result.get("code", 400)
+
+        return jsonify({
+            "success": True,
+            "decks": result["data"],
+            "pagination": result["pagination"],
+        }), 200
+
+    except Exception as e:
+        logger.error(f"Error obteniendo decks por tag: {str(e)}")
+        return jsonify({"error": "Error interno del servidor"}), 500
+
+
+@tags_bp.route("/flashcards", methods=["GET"])
+@jwt_required()
+def get_flashcards_by_tag():
+    """
+    Flashcards del usuario con un tag, de todos sus decks
+    GET /api/tags/flashcards?tag=<tag>&page=&per_page=
+    """
+    try:
+        user_id = get_jwt_identity()
+
+        result = tag_service.get_flashcards_by_tag(
+            user_id, request.args.get("tag", ""),
+            page=request.args.get("page", 1, type=int),
+            per_page=request.args.get("per_page", 20, type=int))
+        if not result["success"]:
+            return jsonify({"error": result["error"]}), result.get("code", 400)
+
+        return jsonify({
+            "success": True,
+            "flashcards": result["data"],
+            "pagination": result["pagination"],
+        }), 200
+
+    except Exception as e:
+        logger.error(f"Error obteniendo flashcards por tag: {str(e)}")
+        return jsonify({"error": "Error interno del servidor"}), 500
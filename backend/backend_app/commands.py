@@ -0,0 +1,157 @@
+"""
+Comandos CLI de mantenimiento (flask <comando>)
+"""
+
+import click
+
+
+def register_commands(app):
+    """Registrar comandos CLI en la aplicación"""
+
+    @app.cli.command("fsrs-optimize")
+    @click.option("--user-id", "user_ids", type=int, multiple=True,
+                  help="Usuario a optimizar (repetible). Por defecto todos.")
+    @click.option("--workers", type=int, default=None,
+                  help="Procesos en paralelo (por defecto número de CPUs).")
+    @click.option("--min-reviews", type=int, default=None,
+                  help="Revisiones mínimas para ajustar pesos propios.")
+    @click.option("--epochs", type=int, default=None,
+                  help="Pasadas completas sobre el historial.")
+    @click.option("--chunk-size", type=int, default=None,
+                  help="Revisiones por bloque de streaming.")
+    def fsrs_optimize_command(user_ids, workers, min_reviews, epochs, chunk_size):
+        """Ajustar los parámetros FSRS de cada usuario con su historial"""
+        from backend_app.utils import fsrs_optimizer
+
+        options = {
+            "min_reviews": min_reviews or fsrs_optimizer.DEFAULT_MIN_REVIEWS,
+            "epochs": epochs or fsrs_optimizer.DEFAULT_EPOCHS,
+            "chunk_size": chunk_size or fsrs_optimizer.DEFAULT_CHUNK_SIZE,
+        }
+        if not user_ids:
+            user_ids = fsrs_optimizer.get_users_with_reviews(options["min_reviews"])
+
+        results = fsrs_optimizer.optimize_users(user_ids, workers=workers, **options)
+
+        for result in sorted(results, key=lambda r: r["user_id"]):
+            if result["status"] == "optimized":
+                click.echo(
+                    f"Usuario {result['user_id']}: {result['review_count']} revisiones, "
+                    f"log_loss {result['log_loss']:.4f} (base {result['baseline_log_loss']:.4f})"
+                )
+            else:
+                click.echo(f"Usuario {result['user_id']}: {result['status']}")
+
+    @app.cli.command("workload-forecast")
+    @click.option("--user-id", type=int, default=None,
+                  help="Usuario a pronosticar. Por defecto toda la plataforma.")
+    @click.option("--days", type=int, default=None, help="Horizonte en días.")
+    @click.option("--simulations", type=int, default=None,
+                  help="Número de simulaciones Monte-Carlo.")
+    @click.option("--seed", type=int, default=None, help="Semilla aleatoria.")
+    @click.option("--json", "as_json", is_flag=True, help="Salida completa en JSON.")
+    def workload_forecast_command(user_id, days, simulations, seed, as_json):
+        """Pronosticar revisiones por día (esperado y percentiles)"""
+        import json
+
+        from backend_app.utils import workload_simulator
+
+        options = {
+            "days": days or workload_simulator.DEFAULT_DAYS,
+            "simulations": simulations or workload_simulator.DEFAULT_SIMULATIONS,
+            "seed": seed,
+        }
+        if user_id is not None:
+            forecast = workload_simulator.forecast_user_workload(user_id, **options)
+        else:
+            forecast = workload_simulator.forecast_fleet_workload(**options)
+
+        if as_json:
+            click.echo(json.dumps(forecast))
+            return
+
+        click.echo(
+            f"{forecast['cards']} cartas, {forecast['simulations']} simulaciones, "
+            f"total esperado {forecast['total_expected']}"
+        )
+        for entry in forecast["daily"]:
+            click.echo(
+                f"{entry['date']}  {entry['expected']:>10}  "
+                f"p10={entry['p10']:<8} p50={entry['p50']:<8} p90={entry['p90']}"
+            )
+
+    @app.cli.command("deck-stats-rebuild")
+    @click.option("--deck-id", "deck_ids", type=int, multiple=True,
+                  help="Deck a reconstruir (repetible). Por defecto todos.")
+    @click.option("--batch-size", type=int, default=500,
+                  help="Decks por transacción.")
+    def deck_stats_rebuild_command(deck_ids, batch_size):
+        """Reconstruir desde cero los contadores e histograma de cada deck"""
+        from backend_app.services_new import DeckService
+
+        result = DeckService().rebuild_card_stats(
+            deck_ids=list(deck_ids) or None, batch_size=batch_size)
+        if not result["success"]:
+            raise click.ClickException(result["error"])
+        click.echo(f"{result['data']['decks']} decks reconstruidos")
+
+    @app.cli.command("activity-backfill")
+    @click.option("--user-id", "user_ids", type=int, multiple=True,
+                  help="Usuario a reconstruir (repetible). Por defecto todos.")
+    @click.option("--batch-size", type=int, default=500,
+                  help="Usuarios por transacción.")
+    def activity_backfill_command(user_ids, batch_size):
+        """Reconstruir el resumen diario de actividad desde el historial"""
+        from backend_app.services_new import StatsService
+
+        result = StatsService().rebuild_daily_activity(
+            user_ids=list(user_ids) or None, batch_size=batch_size)
+        if not result["success"]:
+            raise click.ClickException(result["error"])
+        click.echo(
+            f"{result['data']['users']} usuarios, {result['data']['days']} días reconstruidos")
+
+    @app.cli.command("tags-backfill")
+    @click.option("--deck-id", "deck_ids", type=int, multiple=True,
+                  help="Deck a reconstruir (repetible). Por defecto todos.")
+    @click.option("--batch-size", type=int, default=500,
+                  help="Decks por transacción.")
+    def tags_backfill_command(deck_ids, batch_size):
+        """Poblar las tablas de tags desde la columna JSON de decks y cartas"""
+        from backend_app.extensions import db
+        from backend_app.models.tags import DeckTag, FlashcardTag, Tag
+        from backend_app.services_new import TagService
+
+        # Bases creadas antes de existir las tablas de tags
+        db.metadata.create_all(
+            db.engine, tables=[Tag.__table__, DeckTag.__table__, FlashcardTag.__table__])
+
+        result = TagService().rebuild_tags(
+            deck_ids=list(deck_ids) or None, batch_size=batch_size)
+        if not result["success"]:
+            raise click.ClickException(result["error"])
+        click.echo(
+            f"{result['data']['decks']} decks, {result['data']['synced']} filas sincronizadas")
+
+    @app.cli.command("jobs-resume")
+    @click.option("--job-id", "job_ids", type=int, multiple=True,
+                  help="Job a reanudar (repetible), aunque haya fallado. "
+                       "Por defecto los interrumpidos.")
+    def jobs_resume_command(job_ids):
+        """Reanudar duplicaciones e importaciones desde su último tramo confirmado"""
+        from backend_app.services_new import DeckService
+
+        result = DeckService().resume_jobs(job_ids=list(job_ids) or None)
+        if not result["success"]:
+            raise click.ClickException(result["error"])
+        click.echo(result["message"])
+
+    @app.cli.command("search-index-rebuild")
+    def search_index_rebuild_command():
+        """Crear (si falta) y repoblar el índice de texto completo"""
+        from backend_app.services_new import SearchService
+
+        result = SearchService().rebuild_index()
+        if not result["success"]:
+            raise click.ClickException(result["error"])
+        click.echo(result["message"])
@@ -45,6 +45,7 @@ class Config:
     # File Upload
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB
     UPLOAD_FOLDER = "uploads"
+    IMPORT_FOLDER = os.environ.get("IMPORT_FOLDER", os.path.join(UPLOAD_FOLDER, "imports"))
 
     # Security Headers (Talisman)
     TALISMAN_CONFIG = {
@@ -62,9 +63,22 @@ class Config:
     # Logging
     LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
 
-    # Cache Configuration
-    CACHE_TYPE = "simple"
+    # Cache Configuration ("simple" = memoria del proceso, "redis" = compartido)
+    CACHE_TYPE = os.environ.get(
+        "CACHE_TYPE", "redis" if os.environ.get("REDIS_URL") else "simple")
+    CACHE_REDIS_URL = os.environ.get("REDIS_URL")
+    CACHE_KEY_PREFIX = os.environ.get("CACHE_KEY_PREFIX", "studyingflash:")
     CACHE_DEFAULT_TIMEOUT = 300
+    CACHE_MAX_ENTRIES = 10000
+    CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+    # Compresión de respuestas (gzip; brotli si está instalado)
+    COMPRESS_ENABLED = True
+    COMPRESS_MIN_SIZE = 1024
+    COMPRESS_LEVEL = 6
+    COMPRESS_BR_QUALITY = 5
+    COMPRESS_STREAM_THRESHOLD = 1024 * 1024
+    COMPRESS_CACHE_TIMEOUT = 300
 
 
 class DevelopmentConfig(Config):
@@ -105,6 +119,7 @@ class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(minutes=5)
+    CACHE_TYPE = "simple"
 
 
 # Configuración por defecto basada en variable de entorno
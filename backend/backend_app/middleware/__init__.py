@@ -2,15 +2,20 @@
 Middleware y seguridad para StudyingFlash
 """
 
-from .security import validate_token, hash_password, verify_password, sanitize_input
-from .middleware import log_request, handle_errors, rate_limit_handler
+from .middleware import (
+    init_middleware,
+    init_compression,
+    compress_response,
+    require_auth,
+    require_auth_optional,
+    handle_api_errors,
+)
 
 __all__ = [
-    "validate_token",
-    "hash_password",
-    "verify_password",
-    "sanitize_input",
-    "log_request",
-    "handle_errors",
-    "rate_limit_handler",
+    "init_middleware",
+    "init_compression",
+    "compress_response",
+    "require_auth",
+    "require_auth_optional",
+    "handle_api_errors",
 ]
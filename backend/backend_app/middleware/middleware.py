@@ -1,16 +1,43 @@
 """
 Middleware específico para integración frontend-backend
-Manejo de CORS, autenticación y headers de seguridad
+Manejo de CORS, autenticación, headers de seguridad y compresión
 """
 
 from flask import request, jsonify, g
 from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
 from functools import wraps
+import gzip
+import hashlib
 import logging
 import time
+import zlib
+
+try:
+    import brotli
+except ImportError:  # brotli es opcional: sin él solo se negocia gzip
+    brotli = None
+
+try:
+    from ..utils.cache import get_cache
+except ImportError:
+    from backend_app.utils.cache import get_cache
 
 logger = logging.getLogger("app.middleware")
 
+COMPRESSIBLE_MIMETYPES = {
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "image/svg+xml",
+    "text/css",
+    "text/csv",
+    "text/html",
+    "text/plain",
+}
+
+# Tamaño de los bloques al comprimir cuerpos grandes en modo streaming
+STREAM_CHUNK_SIZE = 64 * 1024
+
 
 def init_middleware(app):
     """Inicializar middleware personalizado"""
@@ -63,6 +90,157 @@ def init_middleware(app):
         return response
 
 
+def init_compression(app):
+    """
+    Comprimir respuestas (gzip, o brotli si está instalado)
+
+    Configuración: COMPRESS_ENABLED, COMPRESS_MIN_SIZE, COMPRESS_LEVEL,
+    COMPRESS_BR_QUALITY, COMPRESS_STREAM_THRESHOLD y COMPRESS_CACHE_TIMEOUT.
+    Se registra antes que el resto de hooks after_request para ejecutarse
+    el último, sobre el cuerpo definitivo.
+    """
+
+    @app.after_request
+    def compress(response):
+        if not app.config.get("COMPRESS_ENABLED", True):
+            return response
+        try:
+            return compress_response(response, app.config)
+        except Exception as e:
+            logger.warning(f"Error comprimiendo respuesta: {str(e)}")
+            return response
+
+
+def compress_response(response, config):
+    """
+    Comprimir una respuesta según Accept-Encoding
+
+    - Cuerpos menores que COMPRESS_MIN_SIZE se envían sin comprimir.
+    - Respuestas en streaming y cuerpos mayores que COMPRESS_STREAM_THRESHOLD
+      se comprimen por bloques, sin Content-Length.
+    - Respuestas cacheables (con ETag o Cache-Control public/max-age) guardan
+      los bytes comprimidos en cache, indexados por el hash del cuerpo.
+
+    Args:
+        response: Response de Flask
+        config: Configuración de la aplicación
+
+    Returns:
+        La respuesta (comprimida o no)
+    """
+    if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+        return response
+    response.vary.add("Accept-Encoding")
+
+    if (
+        request.method == "HEAD"
+        or not 200 <= response.status_code < 300
+        or response.status_code == 204
+        or response.direct_passthrough
+        or "Content-Encoding" in response.headers
+    ):
+        return response
+
+    encoding = negotiate_encoding()
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        # Vaciar el compresor en cada bloque para no retrasar el envío
+        response.response = _compress_chunks(
+            response.response, encoding, config, flush_each=True)
+        response.headers.pop("Content-Length", None)
+    else:
+        body = response.get_data()
+        if len(body) < config.get("COMPRESS_MIN_SIZE", 1024):
+            return response
+
+        if len(body) >= config.get("COMPRESS_STREAM_THRESHOLD", 1024 * 1024):
+            chunks = (
+                body[start:start + STREAM_CHUNK_SIZE]
+                for start in range(0, len(body), STREAM_CHUNK_SIZE))
+            response.response = _compress_chunks(chunks, encoding, config)
+            response.headers.pop("Content-Length", None)
+        elif _is_cacheable(response):
+            response.set_data(_cached_compress(body, encoding, config))
+        else:
+            response.set_data(_compress(body, encoding, config))
+
+    response.headers["Content-Encoding"] = encoding
+
+    # Un ETag fuerte identifica bytes exactos: distinguir la codificación
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(f"{etag}-{encoding}")
+
+    return response
+
+
+def negotiate_encoding():
+    """Codificación preferida por el cliente ("br", "gzip" o None)"""
+    accepted = request.accept_encodings
+    if brotli is not None and accepted.quality("br") > 0:
+        if accepted.quality("br") >= accepted.quality("gzip"):
+            return "br"
+    if accepted.quality("gzip") > 0:
+        return "gzip"
+    return None
+
+
+def _is_cacheable(response):
+    cache_control = response.cache_control
+    if cache_control.no_store:
+        return False
+    return bool(
+        response.headers.get("ETag")
+        or cache_control.public
+        or cache_control.max_age)
+
+
+def _compress(body, encoding, config):
+    if encoding == "br":
+        return brotli.compress(body, quality=config.get("COMPRESS_BR_QUALITY", 5))
+    # mtime=0: misma entrada, mismos bytes (cacheable y comparable)
+    return gzip.compress(body, compresslevel=config.get("COMPRESS_LEVEL", 6), mtime=0)
+
+
+def _cached_compress(body, encoding, config):
+    """Comprimir reutilizando el resultado cacheado para el mismo cuerpo"""
+    digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+    key = f"compressed:{encoding}:{digest}"
+    cache = get_cache()
+
+    compressed = cache.get(key)
+    if compressed is None:
+        compressed = _compress(body, encoding, config)
+        cache.set(key, compressed, timeout=config.get("COMPRESS_CACHE_TIMEOUT", 300))
+    return compressed
+
+
+def _compress_chunks(chunks, encoding, config, flush_each=False):
+    """Comprimir un iterable de bloques de forma incremental"""
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=config.get("COMPRESS_BR_QUALITY", 5))
+        compress, flush, finish = compressor.process, compressor.flush, compressor.finish
+    else:
+        # wbits=31: formato gzip
+        compressor = zlib.compressobj(config.get("COMPRESS_LEVEL", 6), zlib.DEFLATED, 31)
+        compress = compressor.compress
+        def flush():
+            return compressor.flush(zlib.Z_SYNC_FLUSH)
+        finish = compressor.flush
+
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode("utf-8")
+        data = compress(chunk)
+        if flush_each:
+            data += flush()
+        if data:
+            yield data
+    yield finish()
+
+
 def handle_preflight_request():
     """Manejar requests OPTIONS (preflight)"""
     response = jsonify({"status": "preflight"})
@@ -213,11 +391,7 @@ def validate_json(required_fields=None):
     return decorator
 
 
-<<<<<<< HEAD
 def handle_api_errors(f):
-=======
-or def handle_api_errors(f):
->>>>>>> 4a64f0c0b7272a924fb9959c73278447c3324b3f
     """Decorator para manejo consistente de errores en APIs"""
 
     @wraps(f)
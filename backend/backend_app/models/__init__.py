@@ -2,7 +2,24 @@
 Modelos de base de datos para StudyingFlash
 """
 
-from .models import BaseModel, User, Deck, Flashcard, StudySession, CardReview
+from .models import (
+    BaseModel,
+    User,
+    Deck,
+    Flashcard,
+    StudySession,
+    StudySessionQueue,
+    CardReview,
+    DailyActivity,
+    DeckCardStats,
+    DeckDueBucket,
+    UserFSRSParameters,
+)
+
+# Registra los eventos que crean el índice de texto completo con las tablas
+from . import search_index  # noqa: F401,E402
+from .tags import Tag, DeckTag, FlashcardTag  # noqa: E402
+from .jobs import Job  # noqa: E402
 
 __all__ = [
     "BaseModel",
@@ -10,4 +27,14 @@ __all__ = [
     "Deck",
     "Flashcard",
     "StudySession",
-    "CardReview"]
+    "StudySessionQueue",
+    "CardReview",
+    "DailyActivity",
+    "DeckCardStats",
+    "DeckDueBucket",
+    "UserFSRSParameters",
+    "Tag",
+    "DeckTag",
+    "FlashcardTag",
+    "Job",
+]
@@ -0,0 +1,103 @@
+"""
+Trabajos en segundo plano sobre decks
+
+Las operaciones largas (duplicar decks grandes, importar) se registran en
+la tabla jobs: el cliente recibe el ID y consulta el estado y el progreso
+mientras un hilo hace el trabajo.
+"""
+
+import json
+from datetime import datetime
+
+from sqlalchemy import CheckConstraint, Index
+from sqlalchemy.ext.hybrid import hybrid_property
+
+from backend_app.extensions import db
+from backend_app.models.models import BaseModel
+
+# Estados de un trabajo
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+
+# Tipos de trabajo
+JOB_DUPLICATE_DECK = "duplicate_deck"
+JOB_IMPORT_DECK = "import_deck"
+
+
+class Job(BaseModel):
+    """Trabajo en segundo plano de un usuario"""
+
+    __tablename__ = "jobs"
+
+    user_id = db.Column(
+        db.Integer,
+        db.ForeignKey("users.id"),
+        nullable=False)
+    kind = db.Column(db.String(30), nullable=False)
+    status = db.Column(db.String(20), default=JOB_PENDING, nullable=False)
+
+    # Deck de origen y deck resultante
+    deck_id = db.Column(db.Integer, db.ForeignKey("decks.id"))
+    result_deck_id = db.Column(db.Integer, db.ForeignKey("decks.id"))
+
+    # Progreso en elementos (cartas)
+    total = db.Column(db.Integer, default=0, nullable=False)
+    processed = db.Column(db.Integer, default=0, nullable=False)
+
+    params = db.Column(db.Text)  # JSON string
+    error = db.Column(db.Text)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    # Constraints
+    __table_args__ = (
+        CheckConstraint(
+            "status IN ('pending', 'running', 'completed', 'failed')",
+            name="check_job_status_values"),
+        CheckConstraint("processed >= 0", name="check_non_negative_job_processed"),
+        Index("idx_job_user_created", "user_id", "created_at"),
+    )
+
+    @hybrid_property
+    def params_dict(self):
+        """Obtener parámetros como diccionario"""
+        try:
+            return json.loads(self.params) if self.params else {}
+        except Exception:
+            return {}
+
+    @params_dict.setter
+    def params_dict(self, value):
+        """Establecer parámetros desde diccionario"""
+        self.params = json.dumps(value) if value else None
+
+    def start(self):
+        """Marcar como en curso"""
+        self.status = JOB_RUNNING
+        self.started_at = datetime.utcnow()
+        self.error = None
+
+    def finish(self, error=None):
+        """Marcar como terminado, con error o sin él"""
+        self.status = JOB_FAILED if error else JOB_COMPLETED
+        self.error = error
+        self.finished_at = datetime.utcnow()
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "deck_id": self.deck_id,
+            "result_deck_id": self.result_deck_id,
+            "total": self.total,
+            "processed": self.processed,
+            "progress": round(self.processed / self.total, 4) if self.total else None,
+            "params": self.params_dict,
+            "error": self.error,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
@@ -2,13 +2,20 @@
 Modelos optimizados con índices, constraints y mejoras de rendimiento
 """
 
-from datetime import datetime, timedelta
+from collections import Counter
+from datetime import date, datetime, timedelta
 from backend_app.extensions import db, bcrypt
-from sqlalchemy import Index, CheckConstraint, text, event
+from sqlalchemy import Index, CheckConstraint, text, event, inspect
 from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import validates
 import json
 
+# Intervalo (días) a partir del cual una carta se considera dominada
+MASTERED_INTERVAL_DAYS = 21
+
+# Filas por sentencia de los INSERT masivos de flashcards
+BULK_INSERT_CHUNK_SIZE = 1000
+
 
 class BaseModel(db.Model):
     """Modelo base con funcionalidades comunes"""
@@ -271,6 +278,9 @@ class Deck(BaseModel):
         Index("idx_deck_category_difficulty", "category", "difficulty_level"),
         Index("idx_deck_stats", "total_cards", "average_rating"),
         Index("idx_deck_activity", "last_studied", "created_at"),
+        # Paginación keyset de listados (ver utils.pagination)
+        Index("idx_deck_user_keyset", "user_id", "updated_at", "id"),
+        Index("idx_deck_public_keyset", "is_public", "updated_at", "id"),
     )
 
     @hybrid_property
@@ -415,6 +425,7 @@ class Flashcard(BaseModel):
         Index("idx_flashcard_review_schedule", "next_review", "deck_id"),
         Index("idx_flashcard_stats", "total_reviews", "correct_reviews"),
         Index("idx_flashcard_algorithm", "ease_factor", "interval_days", "stability"),
+        Index("idx_flashcard_deck_keyset", "deck_id", "created_at", "id"),
     )
 
     @hybrid_property
@@ -620,11 +631,12 @@ class StudySession(BaseModel):
         db.ForeignKey("users.id"),
         nullable=False,
         index=True)
+    # Alcance: un deck, o un tag en todos los decks del usuario (deck_id nulo)
     deck_id = db.Column(
         db.Integer,
         db.ForeignKey("decks.id"),
-        nullable=False,
         index=True)
+    tag = db.Column(db.String(50))  # Clave del tag (models.tags.tag_key)
 
     # Configuración de sesión
     algorithm = db.Column(db.String(20), default="fsrs", index=True)
@@ -663,6 +675,7 @@ class StudySession(BaseModel):
         CheckConstraint("cards_correct <= cards_studied", name="check_correct_logic"),
         CheckConstraint("total_time >= 0", name="check_non_negative_time"),
         CheckConstraint("algorithm IN ('fsrs', 'sm2')", name="check_algorithm_values"),
+        CheckConstraint("deck_id IS NOT NULL OR tag IS NOT NULL", name="check_session_scope"),
         Index("idx_session_user_deck", "user_id", "deck_id"),
         Index("idx_session_completion", "is_completed", "completed_at"),
         Index("idx_session_stats", "cards_studied", "cards_correct", "total_time"),
@@ -691,6 +704,7 @@ class StudySession(BaseModel):
             "id": self.id,
             "user_id": self.user_id,
             "deck_id": self.deck_id,
+            "tag": self.tag,
             "algorithm": self.algorithm,
             "max_cards": self.max_cards,
             "cards_studied": self.cards_studied,
@@ -706,6 +720,119 @@ class StudySession(BaseModel):
         }
 
 
+class StudySessionQueue(BaseModel):
+    """Cola precalculada de cartas de una sesión de estudio (respaldo persistente)"""
+
+    __tablename__ = "study_session_queues"
+
+    session_id = db.Column(
+        db.Integer,
+        db.ForeignKey("study_sessions.id"),
+        nullable=False,
+        unique=True,
+        index=True)
+
+    # IDs de cartas pendientes en orden de estudio
+    card_ids = db.Column(db.Text, nullable=False, default="[]")  # JSON string
+
+    # Versión para detectar colas en memoria desactualizadas
+    version = db.Column(db.Integer, default=0, nullable=False)
+
+    # Constraints
+    __table_args__ = (
+        CheckConstraint("version >= 0", name="check_non_negative_queue_version"),
+    )
+
+    @hybrid_property
+    def card_ids_list(self):
+        """Obtener IDs de cartas como lista"""
+        try:
+            return json.loads(self.card_ids) if self.card_ids else []
+        except Exception:
+            return []
+
+    @card_ids_list.setter
+    def card_ids_list(self, value):
+        """Establecer IDs de cartas desde lista"""
+        self.card_ids = json.dumps([int(card_id) for card_id in value])
+
+
+class DeckCardStats(BaseModel):
+    """Contadores por estado de las cartas de un deck (mantenidos incrementalmente)"""
+
+    __tablename__ = "deck_card_stats"
+
+    deck_id = db.Column(
+        db.Integer,
+        db.ForeignKey("decks.id", ondelete="CASCADE"),
+        nullable=False,
+        unique=True,
+        index=True)
+
+    total_cards = db.Column(db.Integer, default=0, nullable=False)
+    cards_new = db.Column(db.Integer, default=0, nullable=False)
+    cards_learning = db.Column(db.Integer, default=0, nullable=False)
+    cards_mastered = db.Column(db.Integer, default=0, nullable=False)
+
+    def to_dict(self):
+        return {
+            "deck_id": self.deck_id,
+            "total_cards": self.total_cards,
+            "cards_new": self.cards_new,
+            "cards_learning": self.cards_learning,
+            "cards_mastered": self.cards_mastered,
+        }
+
+
+class DeckDueBucket(BaseModel):
+    """Histograma de vencimientos: cartas de un deck que vencen cada día"""
+
+    __tablename__ = "deck_due_buckets"
+
+    deck_id = db.Column(
+        db.Integer,
+        db.ForeignKey("decks.id", ondelete="CASCADE"),
+        nullable=False)
+    due_date = db.Column(db.Date, nullable=False)
+    card_count = db.Column(db.Integer, default=0, nullable=False)
+
+    # Constraints
+    __table_args__ = (
+        Index("idx_due_bucket_deck_date", "deck_id", "due_date", unique=True),
+    )
+
+
+class DailyActivity(BaseModel):
+    """Resumen diario de actividad de estudio por usuario (day en UTC)"""
+
+    __tablename__ = "daily_activity"
+
+    user_id = db.Column(
+        db.Integer,
+        db.ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False)
+    day = db.Column(db.Date, nullable=False, index=True)
+
+    cards_studied = db.Column(db.Integer, default=0, nullable=False)
+    cards_correct = db.Column(db.Integer, default=0, nullable=False)
+    study_time = db.Column(db.Integer, default=0, nullable=False)  # igual que StudySession.total_time
+    sessions_count = db.Column(db.Integer, default=0, nullable=False)
+
+    # Constraints
+    __table_args__ = (
+        Index("idx_daily_activity_user_day", "user_id", "day", unique=True),
+    )
+
+    def to_dict(self):
+        return {
+            "date": self.day.isoformat(),
+            "cards_studied": self.cards_studied,
+            "cards_correct": self.cards_correct,
+            "study_time": self.study_time,
+            "sessions": self.sessions_count,
+        }
+
+
 class CardReview(BaseModel):
     __tablename__ = "card_reviews"
 
@@ -753,6 +880,7 @@ class CardReview(BaseModel):
         Index("idx_review_rating_time", "rating", "reviewed_at"),
         Index("idx_review_algorithm_data", "new_ease", "new_interval", "new_stability"),
         Index("idx_review_timeline", "reviewed_at", "new_next_review"),
+        Index("idx_review_flashcard_timeline", "flashcard_id", "reviewed_at"),
     )
 
     def to_dict(self):
@@ -775,6 +903,153 @@ class CardReview(BaseModel):
         }
 
 
+class UserFSRSParameters(BaseModel):
+    """Parámetros FSRS personalizados por usuario (ajustados offline)"""
+
+    __tablename__ = "user_fsrs_parameters"
+
+    user_id = db.Column(
+        db.Integer,
+        db.ForeignKey("users.id"),
+        nullable=False,
+        unique=True,
+        index=True)
+
+    # Vector de 17 pesos FSRS
+    weights = db.Column(db.Text, nullable=False)  # JSON string
+
+    # Métricas del entrenamiento
+    review_count = db.Column(db.Integer, default=0, nullable=False)
+    log_loss = db.Column(db.Float)
+    baseline_log_loss = db.Column(db.Float)
+    trained_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+    # Constraints
+    __table_args__ = (
+        CheckConstraint("review_count >= 0", name="check_non_negative_review_count"),
+    )
+
+    @hybrid_property
+    def weights_list(self):
+        """Obtener pesos como lista"""
+        try:
+            return json.loads(self.weights)
+        except Exception:
+            return None
+
+    @weights_list.setter
+    def weights_list(self, value):
+        """Establecer pesos desde lista"""
+        self.weights = json.dumps([float(w) for w in value])
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "user_id": self.user_id,
+            "weights": self.weights_list,
+            "review_count": self.review_count,
+            "log_loss": self.log_loss,
+            "baseline_log_loss": self.baseline_log_loss,
+            "trained_at": self.trained_at.isoformat() if self.trained_at else None,
+        }
+
+
+def record_daily_activity(connection, user_id, day, cards_studied=0, cards_correct=0,
+                          study_time=0, sessions_count=0):
+    """
+    Sumar actividad al resumen diario de un usuario
+
+    Args:
+        connection: Conexión o sesión SQLAlchemy (misma transacción que la revisión)
+        user_id: ID del usuario
+        day: Día (date) en UTC
+    """
+    activity = DailyActivity.__table__
+    deltas = {
+        "cards_studied": cards_studied,
+        "cards_correct": cards_correct,
+        "study_time": study_time,
+        "sessions_count": sessions_count,
+    }
+    result = connection.execute(
+        activity.update()
+        .where(activity.c.user_id == user_id, activity.c.day == day)
+        .values(
+            updated_at=datetime.utcnow(),
+            **{name: activity.c[name] + delta for name, delta in deltas.items() if delta},
+        )
+    )
+    if result.rowcount == 0:
+        connection.execute(activity.insert().values(user_id=user_id, day=day, **deltas))
+
+
+def _as_date(value):
+    # SQLite devuelve date() como texto
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+def rebuild_daily_activity(connection, user_ids):
+    """
+    Recalcular desde cero el resumen diario de los usuarios indicados
+
+    Las revisiones (CardReview) aportan cartas, aciertos y tiempo; las
+    sesiones completadas cuentan el día en que se completaron.
+
+    Returns:
+        int: Número de días reconstruidos
+    """
+    user_ids = list(user_ids)
+    if not user_ids:
+        return 0
+
+    reviews = CardReview.__table__
+    sessions = StudySession.__table__
+    activity = DailyActivity.__table__
+    rows = {}
+
+    review_day = db.func.date(reviews.c.reviewed_at, type_=db.Date)
+    for row in connection.execute(
+        db.select(
+            sessions.c.user_id,
+            review_day.label("day"),
+            db.func.count().label("cards_studied"),
+            db.func.sum(db.case((reviews.c.rating >= 3, 1), else_=0)).label("cards_correct"),
+            db.func.coalesce(db.func.sum(reviews.c.response_time), 0).label("study_time"),
+        )
+        .select_from(reviews.join(sessions, reviews.c.session_id == sessions.c.id))
+        .where(sessions.c.user_id.in_(user_ids), reviews.c.is_deleted.is_(False))
+        .group_by(sessions.c.user_id, review_day)
+    ):
+        rows[(row.user_id, _as_date(row.day))] = {
+            "cards_studied": row.cards_studied,
+            "cards_correct": int(row.cards_correct or 0),
+            "study_time": int(row.study_time or 0),
+            "sessions_count": 0,
+        }
+
+    completed_day = db.func.date(sessions.c.completed_at, type_=db.Date)
+    for row in connection.execute(
+        db.select(sessions.c.user_id, completed_day.label("day"), db.func.count().label("sessions"))
+        .where(
+            sessions.c.user_id.in_(user_ids),
+            sessions.c.completed_at.isnot(None),
+            sessions.c.is_deleted.is_(False),
+        )
+        .group_by(sessions.c.user_id, completed_day)
+    ):
+        entry = rows.setdefault((row.user_id, _as_date(row.day)), {
+            "cards_studied": 0, "cards_correct": 0, "study_time": 0, "sessions_count": 0})
+        entry["sessions_count"] = row.sessions
+
+    connection.execute(activity.delete().where(activity.c.user_id.in_(user_ids)))
+    if rows:
+        connection.execute(activity.insert(), [
+            {"user_id": user_id, "day": day, **values}
+            for (user_id, day), values in rows.items()
+        ])
+    return len(rows)
+
+
 # Event listeners para mantener estadísticas actualizadas
 @event.listens_for(Flashcard, "after_insert")
 def update_deck_card_count_insert(mapper, connection, target):
@@ -820,6 +1095,393 @@ def update_review_stats(mapper, connection, target):
     # La lógica de Python en answer_card maneja estos incrementos
 
 
+def card_stats_state(last_reviewed, interval_days):
+    """Estado de una carta para los contadores del deck"""
+    if last_reviewed is None:
+        return "cards_new"
+    if (interval_days or 0) >= MASTERED_INTERVAL_DAYS:
+        return "cards_mastered"
+    return "cards_learning"
+
+
+def _card_stats_contribution(is_deleted, last_reviewed, interval_days, next_review):
+    """Aporte de una carta a las estadísticas: (estado, día de vencimiento)"""
+    if is_deleted:
+        return None
+    return (
+        card_stats_state(last_reviewed, interval_days),
+        next_review.date() if next_review else None,
+    )
+
+
+def _apply_deck_stats_delta(connection, deck_id, old, new):
+    """
+    Mover el aporte de una carta de `old` a `new` en las tablas de estadísticas
+
+    Si el deck aún no tiene fila de estadísticas no se hace nada: se
+    reconstruye desde cero la primera vez que se lee.
+    """
+    if old == new or deck_id is None:
+        return
+
+    counters = Counter()
+    buckets = Counter()
+    for contribution, sign in ((old, -1), (new, 1)):
+        _count_card_stats(counters, buckets, contribution, sign)
+    _apply_deck_stats_counts(connection, deck_id, counters, buckets)
+
+
+def _count_card_stats(counters, buckets, contribution, sign=1):
+    """Acumular el aporte de una carta en contadores y días de vencimiento"""
+    if contribution is None:
+        return
+    state, due_date = contribution
+    counters["total_cards"] += sign
+    counters[state] += sign
+    if due_date is not None:
+        buckets[due_date] += sign
+
+
+def _apply_deck_stats_counts(connection, deck_id, counters, buckets):
+    """Sumar deltas de contadores y de días de vencimiento a un deck"""
+    stats = DeckCardStats.__table__
+    values = {
+        name: stats.c[name] + delta for name, delta in counters.items() if delta
+    }
+    if not values and not any(buckets.values()):
+        return
+    result = connection.execute(
+        stats.update()
+        .where(stats.c.deck_id == deck_id)
+        .values(updated_at=datetime.utcnow(), **values)
+    )
+    if result.rowcount == 0:
+        return
+
+    due_buckets = DeckDueBucket.__table__
+    for due_date, delta in buckets.items():
+        if delta == 0:
+            continue
+        result = connection.execute(
+            due_buckets.update()
+            .where(due_buckets.c.deck_id == deck_id, due_buckets.c.due_date == due_date)
+            .values(card_count=due_buckets.c.card_count + delta)
+        )
+        if result.rowcount == 0 and delta > 0:
+            connection.execute(
+                due_buckets.insert().values(deck_id=deck_id, due_date=due_date, card_count=delta))
+
+
+def apply_card_stats_change(connection, deck_id, before, after):
+    """
+    Mover una carta en las estadísticas del deck tras un UPDATE de Core
+
+    Los UPDATE de Core no disparan los listeners de Flashcard; quien los
+    emite debe llamar a esta función en la misma transacción.
+
+    Args:
+        connection: Conexión o sesión SQLAlchemy
+        deck_id: ID del deck de la carta
+        before: (is_deleted, last_reviewed, interval_days, next_review) previos
+        after: Mismos campos tras el UPDATE
+    """
+    _apply_deck_stats_delta(
+        connection, deck_id, _card_stats_contribution(*before), _card_stats_contribution(*after))
+
+
+def bulk_insert_flashcards(connection, deck_id, rows, chunk_size=BULK_INSERT_CHUNK_SIZE):
+    """
+    Insertar flashcards en bloque con INSERT de Core (executemany)
+
+    Los INSERT de Core no disparan los listeners de Flashcard: en lugar de un
+    UPDATE de decks y de estadísticas por carta se aplica un único delta por
+    deck al final. Los tags (models.tags.add_tags) quedan a cargo de quien
+    llama, que conoce al propietario.
+
+    Args:
+        connection: Conexión SQLAlchemy (session.connection())
+        deck_id: ID del deck de todas las cartas
+        rows: Diccionarios con las columnas de cada carta, todos con las
+            mismas claves (sin deck_id)
+        chunk_size: Filas por sentencia
+
+    Returns:
+        list: IDs de las cartas creadas, en el orden de rows
+    """
+    cards = Flashcard.__table__
+    now = datetime.utcnow()
+    counters = Counter()
+    buckets = Counter()
+    # PostgreSQL devuelve los IDs en orden con INSERT ... RETURNING en lote;
+    # SQLite solo podría hacerlo fila a fila, así que se leen después
+    returning = connection.dialect.name == "postgresql"
+
+    ids = []
+    if not returning:
+        last_id = connection.execute(db.select(db.func.max(cards.c.id))).scalar() or 0
+    for start in range(0, len(rows), chunk_size):
+        chunk = [
+            {"deck_id": deck_id, "next_review": now, **row}
+            for row in rows[start:start + chunk_size]
+        ]
+
+        if returning:
+            ids.extend(connection.execute(
+                cards.insert().returning(cards.c.id, sort_by_parameter_order=True),
+                chunk,
+            ).scalars())
+        else:
+            connection.execute(cards.insert(), chunk)
+
+        for row in chunk:
+            _count_card_stats(counters, buckets, _card_stats_contribution(
+                row.get("is_deleted"), row.get("last_reviewed"),
+                row.get("interval_days"), row.get("next_review")))
+
+    if not returning:
+        # IDs autoincrementales: las filas nuevas del deck, en orden de inserción
+        ids = list(connection.execute(
+            db.select(cards.c.id)
+            .where(cards.c.deck_id == deck_id, cards.c.id > last_id)
+            .order_by(cards.c.id)
+        ).scalars())
+
+    _add_deck_card_counts(connection, deck_id, counters, buckets, now)
+    return ids
+
+
+def _add_deck_card_counts(connection, deck_id, counters, buckets, now):
+    """Un único delta de total_cards y de estadísticas para cartas añadidas en bloque"""
+    if counters["total_cards"]:
+        connection.execute(
+            text(
+                "UPDATE decks SET total_cards = total_cards + :count, updated_at = :now "
+                "WHERE id = :deck_id"
+            ),
+            {"count": counters["total_cards"], "now": now, "deck_id": deck_id},
+        )
+    _apply_deck_stats_counts(connection, deck_id, counters, buckets)
+
+
+# Columnas de contenido que se copian al duplicar un deck (sin estado de estudio)
+COPIED_FLASHCARD_COLUMNS = (
+    "front_text", "back_text", "front_image_url", "back_image_url",
+    "front_audio_url", "back_audio_url", "difficulty", "tags",
+)
+
+
+def copy_deck_flashcards(connection, source_deck_id, target_deck_id, after_id=0,
+                         limit=None):
+    """
+    Copiar las cartas activas de un deck a otro con INSERT ... SELECT
+
+    La copia se hace en el servidor sin cargar las cartas en Python. Las
+    cartas nuevas empiezan sin estadísticas de estudio y vencen ahora; los
+    contadores del deck destino se actualizan con un único delta.
+
+    Args:
+        connection: Conexión SQLAlchemy (session.connection())
+        source_deck_id: ID del deck de origen
+        target_deck_id: ID del deck destino
+        after_id: Copiar solo cartas con ID mayor (para copiar por tramos)
+        limit: Máximo de cartas a copiar (None: todas)
+
+    Returns:
+        tuple: (cartas copiadas, ID de la última carta de origen copiada o
+            None si no quedaba ninguna)
+    """
+    cards = Flashcard.__table__
+    pending = db.and_(
+        cards.c.deck_id == source_deck_id,
+        cards.c.is_deleted.is_(False),
+        cards.c.id > after_id,
+    )
+    pending_ids = db.select(cards.c.id).where(pending).order_by(cards.c.id).limit(limit)
+    last_id = connection.execute(
+        db.select(db.func.max(pending_ids.subquery().c.id))).scalar()
+    if last_id is None:
+        return 0, None
+
+    now = datetime.utcnow()
+    columns = ("deck_id", "next_review", "created_at", "updated_at") + COPIED_FLASHCARD_COLUMNS
+    copied = connection.execute(
+        cards.insert().from_select(
+            columns,
+            db.select(
+                db.literal(target_deck_id, db.Integer),
+                db.literal(now, db.DateTime),
+                db.literal(now, db.DateTime),
+                db.literal(now, db.DateTime),
+                *(cards.c[name] for name in COPIED_FLASHCARD_COLUMNS),
+            ).where(pending, cards.c.id <= last_id).order_by(cards.c.id),
+        )
+    ).rowcount
+
+    counters = Counter(total_cards=copied, cards_new=copied)
+    buckets = Counter({now.date(): copied})
+    _add_deck_card_counts(connection, target_deck_id, counters, buckets, now)
+    return copied, last_id
+
+
+def rebuild_deck_card_stats(connection, deck_ids):
+    """
+    Recalcular desde cero contadores e histograma de los decks indicados
+
+    Args:
+        connection: Conexión o sesión SQLAlchemy
+        deck_ids: IDs de los decks a reconstruir
+
+    Returns:
+        int: Número de decks reconstruidos
+    """
+    deck_ids = list(deck_ids)
+    if not deck_ids:
+        return 0
+
+    cards = Flashcard.__table__
+    stats = DeckCardStats.__table__
+    due_buckets = DeckDueBucket.__table__
+    active = db.and_(cards.c.deck_id.in_(deck_ids), cards.c.is_deleted.is_(False))
+    is_new = cards.c.last_reviewed.is_(None)
+    is_mastered = db.and_(db.not_(is_new), cards.c.interval_days >= MASTERED_INTERVAL_DAYS)
+
+    counts = {
+        row.deck_id: row
+        for row in connection.execute(
+            db.select(
+                cards.c.deck_id,
+                db.func.count().label("total_cards"),
+                db.func.sum(db.case((is_new, 1), else_=0)).label("cards_new"),
+                db.func.sum(db.case((is_mastered, 1), else_=0)).label("cards_mastered"),
+            ).where(active).group_by(cards.c.deck_id)
+        )
+    }
+    due_date = db.func.date(cards.c.next_review, type_=db.Date)
+    histogram = connection.execute(
+        db.select(cards.c.deck_id, due_date.label("due_date"), db.func.count().label("card_count"))
+        .where(active, cards.c.next_review.isnot(None))
+        .group_by(cards.c.deck_id, due_date)
+    ).all()
+
+    connection.execute(stats.delete().where(stats.c.deck_id.in_(deck_ids)))
+    connection.execute(due_buckets.delete().where(due_buckets.c.deck_id.in_(deck_ids)))
+
+    stats_rows = []
+    for deck_id in deck_ids:
+        row = counts.get(deck_id)
+        total = row.total_cards if row else 0
+        new = int(row.cards_new or 0) if row else 0
+        mastered = int(row.cards_mastered or 0) if row else 0
+        stats_rows.append({
+            "deck_id": deck_id,
+            "total_cards": total,
+            "cards_new": new,
+            "cards_learning": total - new - mastered,
+            "cards_mastered": mastered,
+        })
+    connection.execute(stats.insert(), stats_rows)
+
+    if histogram:
+        connection.execute(due_buckets.insert(), [
+            {
+                "deck_id": row.deck_id,
+                "due_date": _as_date(row.due_date),
+                "card_count": row.card_count,
+            }
+            for row in histogram
+        ])
+
+    return len(deck_ids)
+
+
+@event.listens_for(Deck, "after_insert")
+def create_deck_card_stats(mapper, connection, target):
+    """Crear la fila de estadísticas vacía de un deck nuevo"""
+    connection.execute(DeckCardStats.__table__.insert().values(deck_id=target.id))
+
+
+@event.listens_for(Deck, "after_delete")
+def delete_deck_card_stats(mapper, connection, target):
+    """Borrar las estadísticas y el histograma de un deck borrado"""
+    # SQLite no aplica ON DELETE CASCADE sin PRAGMA foreign_keys
+    for table in (DeckCardStats.__table__, DeckDueBucket.__table__):
+        connection.execute(table.delete().where(table.c.deck_id == target.id))
+
+
+@event.listens_for(Flashcard, "after_insert")
+def update_deck_card_stats_insert(mapper, connection, target):
+    """Sumar la carta nueva a las estadísticas del deck"""
+    _apply_deck_stats_delta(
+        connection,
+        target.deck_id,
+        None,
+        _card_stats_contribution(
+            target.is_deleted, target.last_reviewed, target.interval_days, target.next_review),
+    )
+
+
+# Columnas de Flashcard que afectan a las estadísticas del deck
+_CARD_STATS_COLUMNS = ("deck_id", "is_deleted", "last_reviewed", "interval_days", "next_review")
+
+
+@event.listens_for(Flashcard, "before_update")
+def capture_deck_card_stats_previous(mapper, connection, target):
+    """Leer el estado guardado de la carta antes de actualizarla"""
+    state = inspect(target)
+    if not any(state.attrs[key].history.has_changes() for key in _CARD_STATS_COLUMNS):
+        state.info.pop("deck_stats_previous", None)
+        return
+
+    # Valor anterior desde el historial; solo si algún atributo estaba
+    # expirado (sin valor cargado) hay que leer la fila
+    previous = []
+    for key in _CARD_STATS_COLUMNS:
+        history = state.attrs[key].history
+        if history.deleted:
+            previous.append(history.deleted[0])
+        elif history.unchanged:
+            previous.append(history.unchanged[0])
+        else:
+            cards = Flashcard.__table__
+            previous = connection.execute(
+                db.select(*(cards.c[key] for key in _CARD_STATS_COLUMNS))
+                .where(cards.c.id == target.id)
+            ).first()
+            break
+    state.info["deck_stats_previous"] = tuple(previous)
+
+
+@event.listens_for(Flashcard, "after_update")
+def update_deck_card_stats_update(mapper, connection, target):
+    """Mover la carta entre estados y días de vencimiento"""
+    previous = inspect(target).info.pop("deck_stats_previous", None)
+    if previous is None:
+        return
+
+    old_deck_id, *old_values = previous
+    old = _card_stats_contribution(*old_values)
+    new = _card_stats_contribution(
+        target.is_deleted, target.last_reviewed, target.interval_days, target.next_review)
+
+    if old_deck_id != target.deck_id:
+        _apply_deck_stats_delta(connection, old_deck_id, old, None)
+        _apply_deck_stats_delta(connection, target.deck_id, None, new)
+    else:
+        _apply_deck_stats_delta(connection, target.deck_id, old, new)
+
+
+@event.listens_for(Flashcard, "after_delete")
+def update_deck_card_stats_delete(mapper, connection, target):
+    """Restar la carta eliminada de las estadísticas del deck"""
+    _apply_deck_stats_delta(
+        connection,
+        target.deck_id,
+        _card_stats_contribution(
+            target.is_deleted, target.last_reviewed, target.interval_days, target.next_review),
+        None,
+    )
+
+
 # Funciones de consulta optimizadas
 class QueryOptimizer:
     """Clase con consultas optimizadas frecuentes"""
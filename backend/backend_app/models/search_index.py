@@ -0,0 +1,278 @@
+"""
+Índice de texto completo para flashcards y decks
+
+- SQLite: tablas FTS5 de contenido externo (flashcards_fts, decks_fts)
+  mantenidas por triggers, con ranking bm25() y snippet().
+- PostgreSQL: índices GIN sobre to_tsvector(), que el propio motor mantiene
+  al día, con ranking ts_rank() y ts_headline().
+- Otros motores: ILIKE sobre las mismas columnas, sin ranking.
+
+Los triggers (y no listeners del ORM) mantienen el índice en SQLite para
+que también lo actualicen los INSERT/UPDATE/DELETE masivos de Core.
+"""
+
+import html
+import re
+
+from sqlalchemy import Float, Integer, Text, event, false, literal, or_, text
+
+from backend_app.models.models import Deck, Flashcard
+
+# Columnas indexadas por tabla (en orden: determinan las columnas FTS)
+SEARCH_COLUMNS = {
+    "flashcards": ("front_text", "back_text", "notes"),
+    "decks": ("name", "description"),
+}
+
+# Tokenizador FTS5: sin distinguir acentos ("corazon" encuentra "corazón")
+FTS5_TOKENIZER = "unicode61 remove_diacritics 2"
+
+# Configuración de PostgreSQL (sin stemming: contenido multilingüe)
+TS_CONFIG = "simple"
+
+# Máximo de términos de una consulta y palabras de un snippet
+MAX_QUERY_TERMS = 10
+SNIPPET_WORDS = 12
+
+# Marcadores internos del snippet; se escapan y convierten a <mark> en Python
+_SNIPPET_START = "\x02"
+_SNIPPET_END = "\x03"
+
+_TERM_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def fts_table(table_name):
+    """Nombre de la tabla FTS5 de una tabla indexada"""
+    return f"{table_name}_fts"
+
+
+def _document_sql(table_name):
+    """Expresión SQL con el texto indexado de una fila (PostgreSQL)"""
+    return " || ' ' || ".join(
+        f"coalesce({table_name}.{column}, '')" for column in SEARCH_COLUMNS[table_name]
+    )
+
+
+def sqlite_ddl(table_name):
+    """
+    Sentencias que crean la tabla FTS5 de una tabla y sus triggers
+
+    Args:
+        table_name: "flashcards" o "decks"
+
+    Returns:
+        list: Sentencias SQL (idempotentes)
+    """
+    fts = fts_table(table_name)
+    columns = SEARCH_COLUMNS[table_name]
+    column_list = ", ".join(columns)
+    new_values = ", ".join(f"new.{column}" for column in columns)
+    old_values = ", ".join(f"old.{column}" for column in columns)
+    delete_old = (
+        f"INSERT INTO {fts}({fts}, rowid, {column_list}) "
+        f"VALUES ('delete', old.id, {old_values});"
+    )
+    insert_new = (
+        f"INSERT INTO {fts}(rowid, {column_list}) VALUES (new.id, {new_values});"
+    )
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"{column_list}, content='{table_name}', content_rowid='id', "
+        f"tokenize='{FTS5_TOKENIZER}')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table_name} "
+        f"BEGIN {insert_new} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table_name} "
+        f"BEGIN {delete_old} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {column_list} "
+        f"ON {table_name} BEGIN {delete_old} {insert_new} END",
+    ]
+
+
+def postgresql_ddl(table_name):
+    """Índice GIN de expresión sobre el documento de una tabla"""
+    return [
+        f"CREATE INDEX IF NOT EXISTS idx_{table_name}_fulltext ON {table_name} "
+        f"USING GIN (to_tsvector('{TS_CONFIG}', {_document_sql(table_name)}))"
+    ]
+
+
+def create_search_index(connection, table_name, rebuild=False):
+    """
+    Crear el índice de una tabla en el motor de la conexión
+
+    Args:
+        connection: Conexión SQLAlchemy
+        table_name: "flashcards" o "decks"
+        rebuild: Repoblar el índice FTS5 desde la tabla (datos previos)
+
+    Returns:
+        bool: True si el motor tiene índice de texto completo
+    """
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        statements = sqlite_ddl(table_name)
+        if rebuild:
+            fts = fts_table(table_name)
+            statements.append(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+    elif dialect == "postgresql":
+        statements = postgresql_ddl(table_name)
+    else:
+        return False
+
+    for statement in statements:
+        connection.execute(text(statement))
+    return True
+
+
+def rebuild_search_index(connection):
+    """
+    Crear (si falta) y repoblar el índice de flashcards y decks
+
+    Necesario en bases creadas antes de existir el índice.
+
+    Returns:
+        bool: True si el motor tiene índice de texto completo
+    """
+    return all(
+        create_search_index(connection, table_name, rebuild=True)
+        for table_name in SEARCH_COLUMNS
+    )
+
+
+def _create_on_table_create(table, connection, **kw):
+    create_search_index(connection, table.name)
+
+
+def _drop_on_table_drop(table, connection, **kw):
+    # Los triggers y el índice GIN desaparecen con la tabla; la tabla FTS5 no
+    if connection.dialect.name == "sqlite":
+        connection.execute(text(f"DROP TABLE IF EXISTS {fts_table(table.name)}"))
+
+
+for _model in (Flashcard, Deck):
+    event.listen(_model.__table__, "after_create", _create_on_table_create)
+    event.listen(_model.__table__, "before_drop", _drop_on_table_drop)
+
+
+def search_terms(query):
+    """
+    Términos de búsqueda de una consulta de usuario
+
+    Solo se conservan caracteres de palabra, así que la sintaxis de FTS5 o
+    tsquery de la entrada nunca llega al motor.
+    """
+    return _TERM_PATTERN.findall(query or "")[:MAX_QUERY_TERMS]
+
+
+def _fts5_query(terms):
+    # Todos los términos; el último como prefijo (búsqueda mientras se escribe)
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def _tsquery(terms):
+    return " & ".join(terms[:-1] + [f"{terms[-1]}:*"])
+
+
+def search_clause(session, model, query):
+    """
+    Condición "la fila coincide con la búsqueda" para filtrar una query
+
+    Args:
+        session: Sesión SQLAlchemy (determina el motor)
+        model: Flashcard o Deck
+        query: Texto de búsqueda del usuario
+
+    Returns:
+        Expresión SQLAlchemy (false() si la búsqueda no tiene términos)
+    """
+    terms = search_terms(query)
+    if not terms:
+        return false()
+
+    table_name = model.__tablename__
+    dialect = session.get_bind().dialect.name
+    if dialect == "sqlite":
+        fts = fts_table(table_name)
+        matches = text(
+            f"SELECT rowid FROM {fts} WHERE {fts} MATCH :fts_query"
+        ).bindparams(fts_query=_fts5_query(terms)).columns(rowid=Integer)
+        return model.id.in_(matches)
+    if dialect == "postgresql":
+        return text(
+            f"to_tsvector('{TS_CONFIG}', {_document_sql(table_name)}) "
+            f"@@ to_tsquery('{TS_CONFIG}', :ts_query)"
+        ).bindparams(ts_query=_tsquery(terms))
+
+    pattern = f"%{' '.join(terms)}%"
+    return or_(*(
+        getattr(model, column).ilike(pattern) for column in SEARCH_COLUMNS[table_name]
+    ))
+
+
+def ranked_matches(session, model, query):
+    """
+    Subconsulta (id, rank, snippet) con las filas que coinciden
+
+    Un rank menor es mejor en todos los motores. El snippet lleva
+    marcadores internos; usar render_snippet antes de devolverlo.
+
+    Args:
+        session: Sesión SQLAlchemy (determina el motor)
+        model: Flashcard o Deck
+        query: Texto de búsqueda del usuario
+
+    Returns:
+        Subquery con columnas id, rank y snippet, o None sin términos
+    """
+    terms = search_terms(query)
+    if not terms:
+        return None
+
+    table_name = model.__tablename__
+    dialect = session.get_bind().dialect.name
+    if dialect == "sqlite":
+        fts = fts_table(table_name)
+        statement = text(
+            f"SELECT rowid AS id, bm25({fts}) AS rank, "
+            f"snippet({fts}, -1, :start, :end, '…', {SNIPPET_WORDS}) AS snippet "
+            f"FROM {fts} WHERE {fts} MATCH :fts_query"
+        ).bindparams(
+            fts_query=_fts5_query(terms), start=_SNIPPET_START, end=_SNIPPET_END)
+    elif dialect == "postgresql":
+        document = _document_sql(table_name)
+        statement = text(
+            f"SELECT id, -ts_rank(to_tsvector('{TS_CONFIG}', {document}), q) AS rank, "
+            f"ts_headline('{TS_CONFIG}', {document}, q, :headline) AS snippet "
+            f"FROM {table_name}, to_tsquery('{TS_CONFIG}', :ts_query) AS q "
+            f"WHERE to_tsvector('{TS_CONFIG}', {document}) @@ q"
+        ).bindparams(
+            ts_query=_tsquery(terms),
+            headline=(
+                f"StartSel={_SNIPPET_START}, StopSel={_SNIPPET_END}, "
+                f"MaxWords={SNIPPET_WORDS}, MinWords={SNIPPET_WORDS // 2}"
+            ),
+        )
+    else:
+        first_column = getattr(model, SEARCH_COLUMNS[table_name][0])
+        return (
+            session.query(
+                model.id.label("id"),
+                literal(0.0, Float).label("rank"),
+                first_column.label("snippet"),
+            )
+            .filter(search_clause(session, model, query))
+            .subquery("search_matches")
+        )
+
+    return statement.columns(id=Integer, rank=Float, snippet=Text).subquery("search_matches")
+
+
+def render_snippet(snippet):
+    """Escapar un snippet y resaltar los términos con <mark>"""
+    return (
+        html.escape(snippet or "")
+        .replace(_SNIPPET_START, "<mark>")
+        .replace(_SNIPPET_END, "</mark>")
+    )
@@ -0,0 +1,298 @@
+"""
+Tags normalizados de decks y flashcards
+
+Deck.tags y Flashcard.tags siguen guardando la lista en JSON (es lo que
+devuelve la API), pero los filtros y conteos por tag usan estas tablas
+indexadas. Los listeners del ORM las mantienen sincronizadas con la
+columna JSON; backfill_tags las reconstruye para datos previos.
+"""
+
+from sqlalchemy import Index, event, inspect, select
+
+from backend_app.extensions import db
+from backend_app.models.models import BaseModel, Deck, Flashcard
+from backend_app.utils.suggest import parse_tags
+
+# Longitud máxima de un tag (se trunca)
+MAX_TAG_LENGTH = 50
+
+
+def tag_key(name):
+    """Clave de un tag: sin espacios sobrantes y sin distinguir mayúsculas"""
+    return " ".join(str(name).split()).lower()[:MAX_TAG_LENGTH]
+
+
+class Tag(BaseModel):
+    """Tag de un usuario (compartido por sus decks y flashcards)"""
+
+    __tablename__ = "tags"
+
+    user_id = db.Column(
+        db.Integer,
+        db.ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False)
+    name = db.Column(db.String(MAX_TAG_LENGTH), nullable=False)
+    name_key = db.Column(db.String(MAX_TAG_LENGTH), nullable=False)
+
+    # Constraints
+    __table_args__ = (
+        Index("idx_tag_user_key", "user_id", "name_key", unique=True),
+    )
+
+
+class DeckTag(BaseModel):
+    """Pertenencia de un deck a un tag"""
+
+    __tablename__ = "deck_tags"
+
+    deck_id = db.Column(
+        db.Integer,
+        db.ForeignKey("decks.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True)
+    tag_id = db.Column(
+        db.Integer,
+        db.ForeignKey("tags.id", ondelete="CASCADE"),
+        nullable=False)
+
+    # Constraints
+    __table_args__ = (
+        Index("idx_deck_tag_tag_deck", "tag_id", "deck_id", unique=True),
+    )
+
+
+class FlashcardTag(BaseModel):
+    """Pertenencia de una flashcard a un tag"""
+
+    __tablename__ = "flashcard_tags"
+
+    flashcard_id = db.Column(
+        db.Integer,
+        db.ForeignKey("flashcards.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True)
+    tag_id = db.Column(
+        db.Integer,
+        db.ForeignKey("tags.id", ondelete="CASCADE"),
+        nullable=False)
+
+    # Constraints
+    __table_args__ = (
+        Index("idx_flashcard_tag_tag_card", "tag_id", "flashcard_id", unique=True),
+    )
+
+
+# Tabla de pertenencia y columna del propietario de cada modelo etiquetado
+_MEMBERSHIPS = {
+    Deck: (DeckTag, "deck_id"),
+    Flashcard: (FlashcardTag, "flashcard_id"),
+}
+
+
+def _tag_ids(connection, user_id, tags):
+    """IDs de los tags del usuario, creando los que falten"""
+    return set(_tag_ids_by_key(connection, user_id, parse_tags(tags)).values())
+
+
+def _tag_ids_by_key(connection, user_id, tag_names):
+    """{name_key: ID} de unos nombres de tag del usuario, creando los que falten"""
+    names = {}
+    for name in tag_names:
+        key = tag_key(name)
+        if key:
+            names.setdefault(key, name[:MAX_TAG_LENGTH])
+    if not names:
+        return {}
+
+    table = Tag.__table__
+    existing = dict(connection.execute(
+        select(table.c.name_key, table.c.id)
+        .where(table.c.user_id == user_id, table.c.name_key.in_(names))
+    ).all())
+    missing = [key for key in names if key not in existing]
+    if missing:
+        connection.execute(table.insert(), [
+            {"user_id": user_id, "name": names[key], "name_key": key} for key in missing
+        ])
+        existing.update(connection.execute(
+            select(table.c.name_key, table.c.id)
+            .where(table.c.user_id == user_id, table.c.name_key.in_(missing))
+        ).all())
+    return existing
+
+
+def sync_tags(connection, model, owner_id, user_id, tags):
+    """
+    Dejar las pertenencias de un deck o flashcard iguales a su lista de tags
+
+    Args:
+        connection: Conexión SQLAlchemy
+        model: Deck o Flashcard
+        owner_id: ID del deck o flashcard
+        user_id: Usuario propietario de los tags
+        tags: Valor de la columna tags (JSON o texto separado por comas)
+    """
+    membership, owner_column = _MEMBERSHIPS[model]
+    table = membership.__table__
+    owner = table.c[owner_column]
+
+    wanted = _tag_ids(connection, user_id, tags)
+    current = set(connection.execute(
+        select(table.c.tag_id).where(owner == owner_id)).scalars())
+
+    if current - wanted:
+        connection.execute(table.delete().where(
+            owner == owner_id, table.c.tag_id.in_(current - wanted)))
+    if wanted - current:
+        connection.execute(table.insert(), [
+            {owner_column: owner_id, "tag_id": tag_id} for tag_id in wanted - current
+        ])
+
+
+def add_tags(connection, model, user_id, owner_tags, chunk_size=1000):
+    """
+    Crear en bloque las pertenencias de decks o flashcards recién insertados
+
+    Para INSERT masivos de Core, que no disparan los listeners: resuelve
+    todos los tags con una consulta y crea las pertenencias con executemany.
+
+    Args:
+        connection: Conexión o sesión SQLAlchemy
+        model: Deck o Flashcard
+        user_id: Usuario propietario de los tags
+        owner_tags: Pares (ID del deck o flashcard, valor de la columna tags)
+        chunk_size: Propietarios por sentencia
+
+    Returns:
+        int: Número de pertenencias creadas
+    """
+    membership, owner_column = _MEMBERSHIPS[model]
+    table = membership.__table__
+
+    keys_by_owner = {
+        owner_id: {tag_key(name): name for name in parse_tags(tags)}
+        for owner_id, tags in owner_tags
+        if tags
+    }
+    if not keys_by_owner:
+        return 0
+    tag_ids = _tag_ids_by_key(connection, user_id, [
+        name for names in keys_by_owner.values() for name in names.values()
+    ])
+
+    owners = list(keys_by_owner)
+    created = 0
+    for start in range(0, len(owners), chunk_size):
+        chunk = owners[start:start + chunk_size]
+        rows = [
+            {owner_column: owner_id, "tag_id": tag_ids[key]}
+            for owner_id in chunk
+            for key in keys_by_owner[owner_id]
+            if key in tag_ids
+        ]
+        if rows:
+            connection.execute(table.insert(), rows)
+            created += len(rows)
+    return created
+
+
+def tagged_with(model, user_id, tag):
+    """
+    Condición "la fila tiene el tag" para filtrar una query de Deck o Flashcard
+
+    Usa los índices (user_id, name_key) y (tag_id, owner_id).
+    """
+    membership, owner_column = _MEMBERSHIPS[model]
+    owners = (
+        select(getattr(membership, owner_column))
+        .join(Tag, Tag.id == membership.tag_id)
+        .where(Tag.user_id == user_id, Tag.name_key == tag_key(tag))
+    )
+    return model.id.in_(owners)
+
+
+def backfill_tags(connection, deck_ids):
+    """
+    Reconstruir desde la columna JSON los tags de unos decks y sus cartas
+
+    Args:
+        connection: Conexión o sesión SQLAlchemy
+        deck_ids: IDs de los decks
+
+    Returns:
+        int: Número de decks y flashcards sincronizados
+    """
+    deck_ids = list(deck_ids)
+    if not deck_ids:
+        return 0
+
+    decks = Deck.__table__
+    cards = Flashcard.__table__
+    owners = dict(connection.execute(
+        select(decks.c.id, decks.c.user_id).where(decks.c.id.in_(deck_ids))).all())
+
+    synced = 0
+    for deck_id, user_id, tags in connection.execute(
+            select(decks.c.id, decks.c.user_id, decks.c.tags)
+            .where(decks.c.id.in_(deck_ids))).all():
+        sync_tags(connection, Deck, deck_id, user_id, tags)
+        synced += 1
+    for card_id, deck_id, tags in connection.execute(
+            select(cards.c.id, cards.c.deck_id, cards.c.tags)
+            .where(cards.c.deck_id.in_(deck_ids))).all():
+        sync_tags(connection, Flashcard, card_id, owners[deck_id], tags)
+        synced += 1
+    return synced
+
+
+def _deck_owner(connection, deck_id):
+    decks = Deck.__table__
+    return connection.execute(
+        select(decks.c.user_id).where(decks.c.id == deck_id)).scalar()
+
+
+@event.listens_for(Deck, "after_insert")
+def sync_deck_tags_insert(mapper, connection, target):
+    """Crear las pertenencias de un deck nuevo"""
+    if target.tags:
+        sync_tags(connection, Deck, target.id, target.user_id, target.tags)
+
+
+@event.listens_for(Deck, "after_update")
+def sync_deck_tags_update(mapper, connection, target):
+    """Actualizar las pertenencias si cambian los tags o el propietario"""
+    state = inspect(target)
+    if any(state.attrs[key].history.has_changes() for key in ("tags", "user_id")):
+        sync_tags(connection, Deck, target.id, target.user_id, target.tags)
+
+
+@event.listens_for(Flashcard, "after_insert")
+def sync_flashcard_tags_insert(mapper, connection, target):
+    """Crear las pertenencias de una flashcard nueva"""
+    if target.tags:
+        sync_tags(connection, Flashcard, target.id,
+                  _deck_owner(connection, target.deck_id), target.tags)
+
+
+@event.listens_for(Flashcard, "after_update")
+def sync_flashcard_tags_update(mapper, connection, target):
+    """Actualizar las pertenencias si cambian los tags o el deck"""
+    state = inspect(target)
+    if any(state.attrs[key].history.has_changes() for key in ("tags", "deck_id")):
+        sync_tags(connection, Flashcard, target.id,
+                  _deck_owner(connection, target.deck_id), target.tags)
+
+
+def _delete_memberships(model):
+    membership, owner_column = _MEMBERSHIPS[model]
+    table = membership.__table__
+
+    def delete_memberships(mapper, connection, target):
+        # SQLite no aplica ON DELETE CASCADE sin PRAGMA foreign_keys
+        connection.execute(table.delete().where(table.c[owner_column] == target.id))
+
+    return delete_memberships
+
+
+for _model in _MEMBERSHIPS:
+    event.listen(_model, "after_delete", _delete_memberships(_model))
@@ -9,6 +9,9 @@ from .deck_service import DeckService
 from .flashcard_service import FlashcardService
 from .study_service import StudyService
 from .stats_service import StatsService
+from .search_service import SearchService
+from .duplicate_service import DuplicateService
+from .tag_service import TagService
 
 # Exportar todas las clases
 __all__ = [
@@ -18,6 +21,9 @@ __all__ = [
     "FlashcardService",
     "StudyService",
     "StatsService",
+    "SearchService",
+    "DuplicateService",
+    "TagService",
 ]
 
 
@@ -39,6 +45,9 @@ def create_services(db=None, cache=None):
         "flashcard_service": FlashcardService(db=db, cache=cache),
         "study_service": StudyService(db=db, cache=cache),
         "stats_service": StatsService(db=db, cache=cache),
+        "search_service": SearchService(db=db, cache=cache),
+        "duplicate_service": DuplicateService(db=db, cache=cache),
+        "tag_service": TagService(db=db, cache=cache),
     }
 
 
@@ -48,6 +57,9 @@ deck_service = DeckService()
 flashcard_service = FlashcardService()
 study_service = StudyService()
 stats_service = StatsService()
+search_service = SearchService()
+duplicate_service = DuplicateService()
+tag_service = TagService()
 
 # Alias para compatibilidad con código existente
 UserService_instance = user_service
@@ -55,3 +67,6 @@ DeckService_instance = deck_service
 FlashcardService_instance = flashcard_service
 StudyService_instance = study_service
 StatsService_instance = stats_service
+SearchService_instance = search_service
+DuplicateService_instance = duplicate_service
+TagService_instance = tag_service
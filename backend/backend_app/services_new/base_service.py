@@ -3,9 +3,18 @@ BaseService mejorado con inyección de dependencias y lógica común
 Proporciona funcionalidades compartidas para todos los servicios
 """
 
+import hashlib
 import logging
+import math
+import random
+import secrets
+import time
 from datetime import datetime
 
+from flask import current_app, has_app_context
+from sqlalchemy import func, select, text
+from sqlalchemy.engine import Row
+
 # Importaciones con manejo de errores para flexibilidad
 try:
     from ..extensions import db as default_db
@@ -16,12 +25,33 @@ except ImportError:
         default_db = None
 
 try:
-    from ..utils.cache import CacheManager
+    from ..utils.cache import (
+        CachedValue, SingleFlight, bump_generations, generation_scopes,
+        get_cache, get_generations, versioned_key)
 except ImportError:
-    try:
-        from backend_app.utils.cache import CacheManager
-    except ImportError:
-        CacheManager = None
+    from backend_app.utils.cache import (
+        CachedValue, SingleFlight, bump_generations, generation_scopes,
+        get_cache, get_generations, versioned_key)
+
+try:
+    from ..utils.pagination import (
+        COUNT_EXACT, COUNT_ESTIMATE_CAP, COUNT_NONE, decode_cursor, encode_cursor,
+        keyset_filter)
+except ImportError:
+    from backend_app.utils.pagination import (
+        COUNT_EXACT, COUNT_ESTIMATE_CAP, COUNT_NONE, decode_cursor, encode_cursor,
+        keyset_filter)
+
+try:
+    from ..models.jobs import Job
+except ImportError:
+    from backend_app.models.jobs import Job
+
+# Agresividad de la expiración temprana probabilística (0 = desactivada)
+CACHE_EARLY_EXPIRY_BETA = 1.0
+
+# Recálculos en curso compartidos por todos los servicios del proceso
+_single_flight = SingleFlight()
 
 
 class BaseService:
@@ -36,25 +66,40 @@ class BaseService:
 
         Args:
             db: Instancia de base de datos (SQLAlchemy)
-            cache: Instancia de cache manager
+            cache: Instancia de cache (por defecto, el cache de la aplicación)
         """
         self.db = db or default_db
-        self.cache = cache or CacheManager()
+        self._cache = cache
         self.logger = logging.getLogger(
             f"app.services.{self.__class__.__name__}")
 
-    def _success_response(self, data, message=None):
+    @property
+    def cache(self):
+        """
+        Cache del servicio
+
+        Los servicios se crean a nivel de módulo, antes de create_app(), así
+        que el backend configurado (memoria o redis) se resuelve al usarlo.
+        """
+        return self._cache if self._cache is not None else get_cache()
+
+    @cache.setter
+    def cache(self, value):
+        self._cache = value
+
+    def _success_response(self, data, message=None, **extra):
         """
         Respuesta exitosa estándar
 
         Args:
             data: Datos a retornar
             message: Mensaje opcional de éxito
+            **extra: Campos adicionales (p. ej. pagination)
 
         Returns:
             dict: Respuesta estructurada
         """
-        return {"success": True, "data": data, "message": message}
+        return {"success": True, "data": data, "message": message, **extra}
 
     def _error_response(self, error, code=None):
         """
@@ -127,7 +172,7 @@ class BaseService:
             return None, self._handle_exception(
                 e, f"verificación de {resource_name}")
 
-    def _apply_pagination(self, query, page=1, per_page=20):
+    def _apply_pagination(self, query, page=1, per_page=20, count=COUNT_EXACT):
         """
         Aplicar paginación a una consulta
 
@@ -135,6 +180,8 @@ class BaseService:
             query: Query de SQLAlchemy
             page: Número de página
             per_page: Elementos por página
+            count: Total exacto ("exact"), aproximado ("estimate") u
+                omitido ("none")
 
         Returns:
             dict: Datos paginados con metadatos
@@ -144,19 +191,23 @@ class BaseService:
             per_page = min(per_page, 100)
 
             paginated = query.paginate(
-                page=page, per_page=per_page, error_out=False)
-
-            return {
-                "items": paginated.items,
-                "pagination": {
-                    "page": page,
-                    "per_page": per_page,
-                    "total": paginated.total,
-                    "pages": paginated.pages,
-                    "has_next": paginated.has_next,
-                    "has_prev": paginated.has_prev,
-                },
+                page=page, per_page=per_page, error_out=False,
+                count=count == COUNT_EXACT)
+
+            pagination = {
+                "page": page,
+                "per_page": per_page,
+                "total": paginated.total,
+                "pages": paginated.pages if count == COUNT_EXACT else None,
+                "has_next": paginated.has_next,
+                "has_prev": paginated.has_prev,
             }
+            if count != COUNT_EXACT:
+                # Sin COUNT(*) has_next se deduce de si la página está llena
+                pagination["has_next"] = len(paginated.items) == per_page
+                pagination.update(self._count_total(query, count))
+
+            return {"items": paginated.items, "pagination": pagination}
 
         except Exception as e:
             self.logger.error(f"Error en paginación: {str(e)}")
@@ -172,6 +223,88 @@ class BaseService:
                 },
             }
 
+    def _apply_keyset_pagination(
+            self, query, order_columns, cursor="", per_page=20, count=COUNT_EXACT):
+        """
+        Paginación por cursor sobre una clave de ordenación única
+
+        Ordena de forma descendente por order_columns (la última debe ser
+        única, normalmente el id) y continúa después del cursor en lugar
+        de usar OFFSET, así que las páginas profundas cuestan lo mismo que
+        la primera.
+
+        Args:
+            query: Query de SQLAlchemy (se ignora su orden previo)
+            order_columns: Columnas de ordenación, p. ej. (updated_at, id)
+            cursor: Token de la página anterior ("" para la primera)
+            per_page: Elementos por página
+            count: Total exacto ("exact"), aproximado ("estimate") u
+                omitido ("none")
+
+        Returns:
+            dict: Datos paginados con next_cursor
+
+        Raises:
+            InvalidCursorError: Si el cursor no es válido
+        """
+        per_page = min(max(per_page, 1), 100)
+        pagination = {"per_page": per_page, "cursor": cursor or None}
+        # El total no depende del cursor: se cuenta sin el filtro
+        pagination.update(self._count_total(query, count))
+
+        page_query = query.order_by(None).order_by(
+            *(column.desc() for column in order_columns))
+        if cursor:
+            page_query = page_query.filter(
+                keyset_filter(order_columns, decode_cursor(cursor, order_columns)))
+
+        # Una fila extra indica si hay página siguiente sin contar
+        items = page_query.limit(per_page + 1).all()
+        has_next = len(items) > per_page
+        items = items[:per_page]
+
+        next_cursor = None
+        if has_next:
+            last = items[-1]
+            entity = last[0] if isinstance(last, Row) else last
+            next_cursor = encode_cursor(
+                [getattr(entity, column.key) for column in order_columns])
+
+        pagination.update({"next_cursor": next_cursor, "has_next": has_next})
+        return {"items": items, "pagination": pagination}
+
+    def _count_total(self, query, count=COUNT_EXACT):
+        """
+        Total de filas de una consulta según el modo de conteo
+
+        El modo "estimate" usa la estimación del planificador en
+        PostgreSQL; en otros motores cuenta hasta COUNT_ESTIMATE_CAP filas.
+
+        Returns:
+            dict: {"total", "total_is_estimate"}
+        """
+        query = query.order_by(None)
+        if count == COUNT_NONE:
+            return {"total": None, "total_is_estimate": False}
+        if count == COUNT_EXACT:
+            return {"total": query.count(), "total_is_estimate": False}
+
+        bind = self.db.session.get_bind()
+        if bind.dialect.name == "postgresql":
+            statement = query.statement.compile(
+                bind, compile_kwargs={"literal_binds": True})
+            plan = self.db.session.execute(
+                text(f"EXPLAIN (FORMAT JSON) {statement}")).scalar()
+            return {"total": int(plan[0]["Plan"]["Plan Rows"]), "total_is_estimate": True}
+
+        total = self.db.session.execute(
+            select(func.count()).select_from(
+                query.limit(COUNT_ESTIMATE_CAP + 1).subquery())).scalar()
+        return {
+            "total": min(total, COUNT_ESTIMATE_CAP),
+            "total_is_estimate": total > COUNT_ESTIMATE_CAP,
+        }
+
     def _invalidate_cache_pattern(self, pattern):
         """
         Invalidar entradas de cache que coincidan con un patrón
@@ -184,36 +317,223 @@ class BaseService:
         except Exception as e:
             self.logger.warning(f"Error invalidando cache {pattern}: {str(e)}")
 
-    def _get_or_set_cache(self, key, fetch_function, timeout=300):
+    def _cache_key(self, namespace, *parts, user_id=None, deck_id=None):
+        """
+        Construir una clave de cache versionada (ver utils.cache.versioned_key)
+
+        Si la cache falla al leer las generaciones se usan unas nuevas, de
+        modo que la clave no coincide con ninguna entrada existente.
+
+        Returns:
+            str: Clave "namespace:generaciones:partes"
+        """
+        generations = self._cache_generations(generation_scopes(namespace, user_id, deck_id))
+        return versioned_key(
+            self.cache, namespace, *parts, user_id=user_id, deck_id=deck_id,
+            generations=generations)
+
+    def _cache_generations(self, scopes):
+        """
+        Obtener (o crear) las generaciones actuales en una sola lectura
+
+        Args:
+            scopes: Lista de ámbitos ("ns:<namespace>", "user:<id>", "deck:<id>")
+
+        Returns:
+            dict: ámbito -> generación
+        """
+        try:
+            return get_generations(self.cache, scopes)
+        except Exception as e:
+            self.logger.warning(f"Error leyendo generaciones de cache: {str(e)}")
+            # Sin cache, generaciones nuevas: nada se reutiliza
+            return {scope: secrets.token_hex(4) for scope in scopes}
+
+    def _invalidate_cache(self, namespace=None, user_id=None, deck_id=None):
+        """
+        Invalidar las entradas de un namespace, usuario o deck
+
+        Sustituye la generación por una nueva; no recorre claves.
+
+        Args:
+            namespace: Namespace a invalidar por completo
+            user_id: Usuario cuyas entradas se invalidan
+            deck_id: Deck cuyas entradas se invalidan
+        """
+        try:
+            bump_generations(self.cache, namespace, user_id, deck_id)
+        except Exception as e:
+            self.logger.warning(
+                f"Error invalidando cache {generation_scopes(namespace, user_id, deck_id)}: {str(e)}")
+
+    def _version_response(self, *parts, scopes=(), last_modified=()):
+        """
+        Versión de un recurso para peticiones condicionales
+
+        Se calcula a partir de agregados baratos (conteos, max(updated_at)) y
+        de las generaciones de cache, sin serializar el recurso.
+
+        Args:
+            *parts: Valores que identifican el estado del recurso
+            scopes: Ámbitos de generación de cache que se incluyen
+            last_modified: Fechas candidatas; se usa la más reciente
+
+        Returns:
+            dict: Respuesta con "version" y "last_modified"
+        """
+        generations = self._cache_generations(list(scopes)) if scopes else {}
+        token = "|".join(
+            [str(part) for part in parts]
+            + [f"{scope}={generations[scope]}" for scope in scopes])
+        dates = [value for value in last_modified if value is not None]
+
+        return self._success_response({
+            "version": hashlib.sha1(token.encode("utf-8")).hexdigest()[:20],
+            "last_modified": max(dates) if dates else None,
+        })
+
+    def _get_or_set_cache(self, key, fetch_function, timeout=300, stale_timeout=0):
         """
         Obtener de cache o ejecutar función y cachear resultado
 
+        Las llamadas concurrentes para la misma clave se agrupan: solo una
+        ejecuta fetch_function y el resto recibe su resultado. Cada entrada
+        puede recalcularse antes de expirar con una probabilidad que crece al
+        acercarse el vencimiento (proporcional a lo que tarda en calcularse),
+        para que las claves populares no expiren para todos a la vez.
+
         Args:
             key: Clave de cache
             fetch_function: Función que obtiene los datos si no están en cache
             timeout: Tiempo de vida del cache en segundos
+            stale_timeout: Segundos durante los que, vencida la entrada, se
+                sigue sirviendo el valor anterior mientras se recalcula en
+                segundo plano (0 = desactivado)
 
         Returns:
             Datos obtenidos del cache o de la función
         """
         try:
-            # Intentar obtener del cache
-            cached_data = self.cache.get(key)
-            if cached_data is not None:
-                return cached_data
+            entry = self.cache.get(key)
+        except Exception as e:
+            self.logger.warning(f"Error en cache {key}: {str(e)}")
+            entry = None
+
+        if entry is not None:
+            # Entradas guardadas sin metadatos se sirven tal cual
+            if not isinstance(entry, CachedValue):
+                return entry
+            if not self._cache_entry_expired(entry):
+                return entry.value
+
+            if stale_timeout:
+                self._refresh_cache_in_background(
+                    key, fetch_function, timeout, stale_timeout)
+                return entry.value
+            # Expiración temprana: si otro ya recalcula, servir el valor actual
+            if _single_flight.in_flight(key):
+                return entry.value
+
+        return _single_flight.do(
+            key,
+            lambda: self._fetch_and_cache(
+                key, fetch_function, timeout, stale_timeout, recheck=entry is None),
+        )
+
+    def _cache_entry_expired(self, entry):
+        """
+        Decidir si una entrada debe recalcularse (expiración temprana probabilística)
+
+        Args:
+            entry: CachedValue leído del cache
+
+        Returns:
+            bool: True si venció o si se adelanta su recálculo
+        """
+        jitter = entry.delta * CACHE_EARLY_EXPIRY_BETA * -math.log(1.0 - random.random())
+        return time.time() + jitter >= entry.fresh_until
 
-            # Si no está en cache, ejecutar función
-            data = fetch_function()
+    def _fetch_and_cache(self, key, fetch_function, timeout, stale_timeout, recheck=True):
+        """
+        Ejecutar fetch_function y guardar el resultado con sus metadatos
 
-            # Cachear resultado
-            self.cache.set(key, data, timeout=timeout)
+        Args:
+            recheck: Releer antes el cache por si otra llamada acaba de guardarlo
+        """
+        if recheck:
+            try:
+                entry = self.cache.get(key)
+            except Exception:
+                entry = None
+            if isinstance(entry, CachedValue) and entry.fresh_until > time.time():
+                return entry.value
 
-            return data
+        started = time.time()
+        data = fetch_function()
+        finished = time.time()
 
+        if data is not None:
+            try:
+                self.cache.set(
+                    key,
+                    CachedValue(data, finished + timeout, finished - started),
+                    timeout=timeout + stale_timeout,
+                )
+            except Exception as e:
+                self.logger.warning(f"Error en cache {key}: {str(e)}")
+        return data
+
+    def _refresh_cache_in_background(self, key, fetch_function, timeout, stale_timeout):
+        """Recalcular una entrada en un hilo si no hay otro recálculo en curso"""
+        app = current_app._get_current_object() if has_app_context() else None
+
+        def refresh():
+            try:
+                if app is None:
+                    return self._fetch_and_cache(
+                        key, fetch_function, timeout, stale_timeout, recheck=False)
+                with app.app_context():
+                    return self._fetch_and_cache(
+                        key, fetch_function, timeout, stale_timeout, recheck=False)
+            except Exception as e:
+                self.logger.warning(f"Error recalculando cache {key}: {str(e)}")
+
+        _single_flight.start(key, refresh)
+
+    def _start_job(self, job_id, work):
+        """
+        Ejecutar un trabajo en un hilo, registrando su estado en la tabla jobs
+
+        Args:
+            job_id: ID del Job ya guardado
+            work: Función work(job) que hace el trabajo en la sesión del
+                hilo; puede hacer commit para publicar el progreso
+
+        Returns:
+            bool: True si se lanzó el hilo (False si ya estaba en curso)
+        """
+        app = current_app._get_current_object()
+
+        def run():
+            with app.app_context():
+                self._run_job(job_id, work)
+
+        return _single_flight.start(f"job:{job_id}", run)
+
+    def _run_job(self, job_id, work):
+        """Ejecutar work(job) marcando el job como en curso y luego terminado"""
+        job = self.db.session.get(Job, job_id)
+        job.start()
+        self._commit_or_rollback()
+        try:
+            work(job)
+            job.finish()
         except Exception as e:
-            self.logger.warning(f"Error en cache {key}: {str(e)}")
-            # Si falla el cache, ejecutar función directamente
-            return fetch_function()
+            self.logger.error(f"Error en job {job_id} ({job.kind}): {str(e)}")
+            self.db.session.rollback()
+            job = self.db.session.get(Job, job_id)
+            job.finish(error=str(e))
+        self._commit_or_rollback()
 
     def _commit_or_rollback(self):
         """
@@ -6,17 +6,60 @@ Refactorizado con inyección de dependencias e interfaces consistentes
 from .base_service import BaseService
 
 try:
-    from ..models import Deck, Flashcard
+    from ..models import (
+        CardReview, Deck, DeckCardStats, DeckDueBucket, Flashcard, Job, User)
+    from ..models.jobs import (
+        JOB_COMPLETED, JOB_DUPLICATE_DECK, JOB_IMPORT_DECK, JOB_PENDING, JOB_RUNNING)
+    from ..models.models import (
+        BULK_INSERT_CHUNK_SIZE, bulk_insert_flashcards, copy_deck_flashcards,
+        rebuild_deck_card_stats)
+    from ..models.search_index import search_clause
+    from ..models.tags import add_tags
+    from ..utils import deck_formats
+    from ..utils.suggest import deck_entries, suggest_index
 except ImportError:
-    from backend_app.models import Deck, Flashcard
-from sqlalchemy import and_, or_
+    from backend_app.models import (
+        CardReview, Deck, DeckCardStats, DeckDueBucket, Flashcard, Job, User)
+    from backend_app.models.jobs import (
+        JOB_COMPLETED, JOB_DUPLICATE_DECK, JOB_IMPORT_DECK, JOB_PENDING, JOB_RUNNING)
+    from backend_app.models.models import (
+        BULK_INSERT_CHUNK_SIZE, bulk_insert_flashcards, copy_deck_flashcards,
+        rebuild_deck_card_stats)
+    from backend_app.models.search_index import search_clause
+    from backend_app.models.tags import add_tags
+    from backend_app.utils import deck_formats
+    from backend_app.utils.suggest import deck_entries, suggest_index
+try:
+    from ..utils.pagination import COUNT_EXACT, InvalidCursorError
+except ImportError:
+    from backend_app.utils.pagination import COUNT_EXACT, InvalidCursorError
+from sqlalchemy import case, func, or_, select, tuple_, update
+from werkzeug.utils import secure_filename
 from datetime import datetime
+from itertools import islice
+import os
+
+# Decks con al menos estas cartas se duplican en segundo plano
+DUPLICATE_BACKGROUND_MIN_CARDS = 5000
+
+# Cartas copiadas por transacción al duplicar en segundo plano
+DUPLICATE_CHUNK_SIZE = 5000
+
+# Filas leídas por bloque (yield_per) al exportar
+EXPORT_CHUNK_SIZE = 1000
+
+# Registros del fichero validados e insertados por transacción al importar
+IMPORT_CHUNK_SIZE = 1000
+
+# Errores de registros inválidos que se guardan en el job de importación
+IMPORT_MAX_ERRORS = 20
 
 
 class DeckService(BaseService):
     """Servicio para gestión de decks del usuario"""
 
-    def get_user_decks(self, user_id, page=1, per_page=20, search=""):
+    def get_user_decks(self, user_id, page=1, per_page=20, search="",
+                       cursor=None, count=COUNT_EXACT):
         """
         Obtener decks del usuario con filtros y paginación
 
@@ -25,52 +68,39 @@ class DeckService(BaseService):
             page: Número de página
             per_page: Elementos por página
             search: Término de búsqueda
+            cursor: Cursor de paginación keyset ("" para la primera página;
+                None usa page)
+            count: Modo de conteo del total ("exact", "estimate", "none")
 
         Returns:
             dict: Respuesta con decks paginados
         """
         try:
             # Cache key
-            cache_key = f"user_decks:{user_id}:{page}:{per_page}:{search}"
+            cache_key = self._cache_key(
+                "user_decks", page, per_page, search, cursor, count, user_id=user_id)
 
             def fetch_decks():
                 # Query base
-                query = self.db.session.query(Deck).filter_by(
-                    user_id=user_id, is_deleted=False)
+                query = self._query_decks_with_stats().filter(
+                    Deck.user_id == user_id, Deck.is_deleted.is_(False))
 
-                # Aplicar búsqueda si se proporciona
+                # Aplicar búsqueda si se proporciona (índice de texto completo)
                 if search:
-                    search_term = f"%{search}%"
                     query = query.filter(
-                        or_(
-                            Deck.name.ilike(search_term),
-                            Deck.description.ilike(search_term),
-                        )
-                    )
+                        search_clause(self.db.session, Deck, search))
 
                 # Ordenar por fecha de actualización
                 query = query.order_by(Deck.updated_at.desc())
 
-                # Aplicar paginación
-                paginated_data = self._apply_pagination(query, page, per_page)
-
-                # Convertir decks a diccionarios con estadísticas
-                decks_data = []
-                for deck in paginated_data["items"]:
-                    deck_dict = deck.to_dict()
-
-                    # Agregar estadísticas básicas
-                    total_cards = self.db.session.query(Flashcard).filter_by(
-                        deck_id=deck.id, is_deleted=False).count()
+                # Paginación con estadísticas en una sola consulta
+                paginated_data = self._paginate_decks_with_stats(
+                    query, page, per_page, cursor, count)
 
-                    deck_dict.update(
-                        {
-                            "total_cards": total_cards,
-                            "cards_due": self._get_cards_due_count(deck.id),
-                        }
-                    )
-
-                    decks_data.append(deck_dict)
+                decks_data = [
+                    self._deck_with_stats(deck, stats, cards_due)
+                    for deck, stats, cards_due in paginated_data["items"]
+                ]
 
                 return {
                     "decks": decks_data,
@@ -81,9 +111,46 @@ class DeckService(BaseService):
 
             return self._success_response(result)
 
+        except InvalidCursorError as e:
+            return self._error_response(str(e), code=400)
         except Exception as e:
             return self._handle_exception(e, "obtención de decks del usuario")
 
+    def get_user_decks_version(self, user_id):
+        """
+        Versión del listado de decks del usuario (para ETag/Last-Modified)
+
+        Args:
+            user_id: ID del usuario
+
+        Returns:
+            dict: Respuesta con version y last_modified
+        """
+        try:
+            cards_updated = (
+                select(func.max(Flashcard.updated_at))
+                .join(Deck, Flashcard.deck_id == Deck.id)
+                .where(Deck.user_id == user_id)
+                .scalar_subquery()
+            )
+            # Los borrados lógicos también actualizan updated_at
+            total, decks_updated, cards_updated = self.db.session.query(
+                func.sum(case((Deck.is_deleted.is_(False), 1), else_=0)),
+                func.max(Deck.updated_at),
+                cards_updated,
+            ).filter(Deck.user_id == user_id).one()
+
+            # Las cartas pendientes cambian de un día para otro
+            today = datetime.combine(datetime.utcnow().date(), datetime.min.time())
+            return self._version_response(
+                "user_decks", total or 0, decks_updated, cards_updated, today.date(),
+                scopes=[f"user:{user_id}"],
+                last_modified=(decks_updated, cards_updated, today),
+            )
+
+        except Exception as e:
+            return self._handle_exception(e, "versión de decks del usuario")
+
     def create_deck(self, user_id, deck_data):
         """
         Crear nuevo deck
@@ -130,7 +197,8 @@ class DeckService(BaseService):
                 return self._error_response("Error al crear deck", code=500)
 
             # Invalidar cache de decks del usuario
-            self._invalidate_cache_pattern(f"user_decks:{user_id}:*")
+            self._invalidate_cache(user_id=user_id)
+            suggest_index.update(user_id, added=deck_entries(deck.name, deck.tags))
 
             return self._success_response(
                 deck.to_dict(), "Deck creado exitosamente")
@@ -150,33 +218,15 @@ class DeckService(BaseService):
             dict: Respuesta con datos del deck
         """
         try:
-            deck, error = self._get_resource_if_owned(
-                Deck, deck_id, user_id, "deck")
-
-            if error:
-                return error
-            
-            # Obtener estadísticas del deck
-            deck_dict = deck.to_dict()
-
-            # Agregar estadísticas detalladas
-            total_cards = self.db.session.query(Flashcard).filter_by(
-                deck_id=deck_id, is_deleted=False).count()
-
-            cards_due = self._get_cards_due_count(deck_id)
-            cards_new = self._get_cards_new_count(deck_id)
-            cards_learning = self._get_cards_learning_count(deck_id)
-            cards_mastered = self._get_cards_mastered_count(deck_id)
-
-            deck_dict.update(
-                {
-                    "total_cards": total_cards,
-                    "cards_due": cards_due,
-                    "cards_new": cards_new,
-                    "cards_learning": cards_learning,
-                    "cards_mastered": cards_mastered,
-                }
+            row = self._fetch_deck_with_stats(
+                Deck.id == deck_id,
+                Deck.user_id == user_id,
+                Deck.is_deleted.is_(False),
             )
+            if row is None:
+                return self._error_response("Deck no encontrado", code=404)
+
+            deck_dict = self._deck_with_stats(*row)
 
             return self._success_response(deck_dict)
 
@@ -220,6 +270,8 @@ class DeckService(BaseService):
                     return self._error_response(
                         "Ya existe un deck con ese nombre", code=409)
 
+            previous_entries = deck_entries(deck.name, deck.tags)
+
             # Actualizar campos permitidos
             allowed_fields = [
                 "name",
@@ -250,7 +302,12 @@ class DeckService(BaseService):
                     "Error al actualizar deck", code=500)
 
             # Invalidar cache
-            self._invalidate_cache_pattern(f"user_decks:{user_id}:*")
+            self._invalidate_cache(user_id=user_id, deck_id=deck_id)
+            suggest_index.update(
+                user_id,
+                removed=previous_entries,
+                added=deck_entries(deck.name, deck.tags),
+            )
 
             return self._success_response(
                 deck.to_dict(), "Deck actualizado exitosamente")
@@ -284,12 +341,15 @@ class DeckService(BaseService):
             self.db.session.query(Flashcard).filter_by(deck_id=deck_id).update(
                 {"is_deleted": True, "updated_at": datetime.utcnow()}
             )
+            # El update masivo no dispara los listeners de estadísticas
+            rebuild_deck_card_stats(self.db.session.connection(), [deck_id])
 
             if not self._commit_or_rollback():
                 return self._error_response("Error al eliminar deck", code=500)
 
-            # Invalidar cache
-            self._invalidate_cache_pattern(f"user_decks:{user_id}:*")
+            # Invalidar cache (las cartas del deck también dejan el índice)
+            self._invalidate_cache(user_id=user_id, deck_id=deck_id)
+            suggest_index.invalidate(user_id)
 
             return self._success_response(
                 {"message": "Deck eliminado"}, "Deck eliminado exitosamente")
@@ -297,17 +357,25 @@ class DeckService(BaseService):
         except Exception as e:
             return self._handle_exception(e, "eliminación de deck")
 
-    def duplicate_deck(self, deck_id, user_id, new_name=None):
+    def duplicate_deck(self, deck_id, user_id, new_name=None, background=None):
         """
         Duplicar un deck existente
 
+        Las cartas se copian en el servidor con INSERT ... SELECT, sin
+        cargarlas en memoria. Los decks grandes se copian en un hilo por
+        tramos y la respuesta trae el job para consultar el progreso; el
+        duplicado queda oculto hasta que se confirma el último tramo y, si
+        el proceso muere, resume_jobs continúa desde el último tramo.
+
         Args:
             deck_id: ID del deck a duplicar
             user_id: ID del usuario propietario
             new_name: Nombre para el deck duplicado
+            background: Copiar en segundo plano (None: según el tamaño)
 
         Returns:
-            dict: Respuesta con deck duplicado
+            dict: Respuesta con el deck duplicado, o con el job y
+                accepted=True si la copia sigue en segundo plano
         """
         try:
             deck, error = self._get_resource_if_owned(
@@ -315,18 +383,12 @@ class DeckService(BaseService):
 
             if error:
                 return error
-            
-            # Generar nombre para el duplicado
-            if not new_name:
-                new_name = f"{deck.name} (Copia)"
 
-            # Verificar que el nuevo nombre no exista
-            counter = 1
-            original_new_name = new_name
-            while self.db.session.query(Deck).filter_by(
-                    user_id=user_id, name=new_name, is_deleted=False).first():
-                new_name = f"{original_new_name} ({counter})"
-                counter += 1
+            # Generar nombre para el duplicado
+            new_name = self._free_deck_name(
+                user_id, new_name or f"{deck.name} (Copia)")
+            if background is None:
+                background = deck.total_cards >= DUPLICATE_BACKGROUND_MIN_CARDS
 
             # Crear deck duplicado
             new_deck = Deck(
@@ -341,34 +403,36 @@ class DeckService(BaseService):
                 tags=deck.tags,
             )
 
+            # Oculto mientras se copia en segundo plano
+            new_deck.is_deleted = bool(background)
             self.db.session.add(new_deck)
             self.db.session.flush()  # Para obtener el ID del nuevo deck
 
-            # Duplicar flashcards
-            flashcards = self.db.session.query(Flashcard).filter_by(
-                deck_id=deck_id, is_deleted=False).all()
-
-            for card in flashcards:
-                new_card = Flashcard(
-                    deck_id=new_deck.id,
-                    front_text=card.front_text,
-                    back_text=card.back_text,
-                    front_image_url=card.front_image_url,
-                    back_image_url=card.back_image_url,
-                    front_audio_url=card.front_audio_url,
-                    back_audio_url=card.back_audio_url,
-                    difficulty=card.difficulty,
-                    tags=card.tags,
-                    # No copiamos estadísticas de estudio (interval,
-                    # ease_factor, etc.)
+            if background:
+                job = Job(
+                    user_id=user_id,
+                    kind=JOB_DUPLICATE_DECK,
+                    deck_id=deck_id,
+                    result_deck_id=new_deck.id,
+                    total=deck.total_cards,
                 )
-                self.db.session.add(new_card)
+                self.db.session.add(job)
+                if not self._commit_or_rollback():
+                    return self._error_response("Error al duplicar deck", code=500)
+
+                self._start_job(job.id, self._copy_deck_in_chunks)
+                return self._success_response(
+                    job.to_dict(), f'Duplicando deck como "{new_name}"', accepted=True)
+
+            # Duplicar flashcards (no se copian estadísticas de estudio)
+            self._copy_deck_cards(deck_id, new_deck.id, user_id)
 
             if not self._commit_or_rollback():
                 return self._error_response("Error al duplicar deck", code=500)
 
             # Invalidar cache
-            self._invalidate_cache_pattern(f"user_decks:{user_id}:*")
+            self._invalidate_cache(user_id=user_id)
+            suggest_index.invalidate(user_id)
 
             return self._success_response(
                 new_deck.to_dict(), f'Deck duplicado como "{new_name}"')
@@ -376,76 +440,451 @@ class DeckService(BaseService):
         except Exception as e:
             return self._handle_exception(e, "duplicación de deck")
 
-    def _get_cards_due_count(self, deck_id):
-        """Obtener número de cartas vencidas para repaso"""
+    def _free_deck_name(self, user_id, name):
+        """
+        Primer nombre libre entre name, "name (1)", "name (2)"...
+
+        Lee con una sola consulta los nombres del usuario que podrían chocar.
+        """
+        taken = set(self.db.session.scalars(
+            select(Deck.name).where(
+                Deck.user_id == user_id,
+                Deck.is_deleted.is_(False),
+                or_(Deck.name == name, Deck.name.startswith(f"{name} (", autoescape=True)),
+            )
+        ))
+        counter = 0
+        candidate = name
+        while candidate in taken:
+            counter += 1
+            candidate = f"{name} ({counter})"
+        return candidate
+
+    def _copy_deck_cards(self, source_deck_id, target_deck_id, user_id, after_id=0,
+                         limit=None):
+        """Copiar cartas (o un tramo) y sus tags; devuelve (copiadas, último ID)"""
+        connection = self.db.session.connection()
+        previous_id = connection.execute(
+            select(func.max(Flashcard.id)).where(Flashcard.deck_id == target_deck_id)
+        ).scalar() or 0
+        copied, last_id = copy_deck_flashcards(
+            connection, source_deck_id, target_deck_id, after_id, limit)
+        if not copied:
+            return copied, last_id
+
+        # Pertenencias a tags de las cartas recién copiadas
+        new_cards = select(Flashcard.id, Flashcard.tags).where(
+            Flashcard.deck_id == target_deck_id,
+            Flashcard.id > previous_id,
+            Flashcard.tags.isnot(None),
+            Flashcard.tags != "",
+        )
+        for partition in connection.execute(new_cards).partitions(BULK_INSERT_CHUNK_SIZE):
+            add_tags(connection, Flashcard, user_id, partition)
+        return copied, last_id
+
+    def _copy_deck_in_chunks(self, job):
+        """
+        Trabajo de duplicación en segundo plano: un commit por tramo
+
+        params["after_id"] (último ID de origen copiado) es el cursor para
+        reanudar. El deck se muestra en la misma transacción que marca el
+        job como terminado.
+        """
         try:
-            return (
-                self.db.session.query(Flashcard)
-                .filter(
-                    and_(
-                        Flashcard.deck_id == deck_id,
-                        not Flashcard.is_deleted,
-                        Flashcard.next_review <= datetime.utcnow(),
-                    )
-                )
-                .count()
+            while True:
+                copied, last_id = self._copy_deck_cards(
+                    job.deck_id, job.result_deck_id, job.user_id,
+                    after_id=job.params_dict.get("after_id", 0),
+                    limit=DUPLICATE_CHUNK_SIZE)
+                if not copied:
+                    break
+                job.processed += copied
+                job.params_dict = {**job.params_dict, "after_id": last_id}
+                self.db.session.commit()
+
+            self.db.session.execute(
+                update(Deck)
+                .where(Deck.id == job.result_deck_id)
+                .values(is_deleted=False, updated_at=datetime.utcnow())
             )
-        except Exception:
-            return 0
+        finally:
+            self._invalidate_cache(user_id=job.user_id)
+            suggest_index.invalidate(job.user_id)
+
+    def export_deck(self, deck_id, user_id, export_format="ndjson"):
+        """
+        Exportar un deck en streaming
+
+        Las cartas se leen por bloques de EXPORT_CHUNK_SIZE filas (yield_per)
+        mientras se envía la respuesta; el deck nunca está entero en memoria.
+        La lectura ocurre al consumir chunks, que necesita el contexto de la
+        aplicación (stream_with_context en la ruta).
 
-    def _get_cards_new_count(self, deck_id):
-        """Obtener número de cartas nuevas (nunca estudiadas)"""
+        Args:
+            deck_id: ID del deck
+            user_id: ID del usuario propietario
+            export_format: "ndjson", "csv" o "sqlite" (con historial de revisiones)
+
+        Returns:
+            dict: Respuesta con filename, mimetype y chunks (generador)
+        """
         try:
-            return (
-                self.db.session.query(Flashcard)
-                .filter(
-                    and_(
+            if export_format not in deck_formats.FORMATS:
+                return self._error_response(
+                    f"Formato no soportado. Usa: {', '.join(deck_formats.FORMATS)}")
+
+            deck, error = self._get_resource_if_owned(
+                Deck, deck_id, user_id, "deck")
+            if error:
+                return error
+
+            deck_data = {field: getattr(deck, field) for field in deck_formats.DECK_FIELDS}
+            cards = self._stream_rows(
+                select(*(getattr(Flashcard, field)
+                         for field in deck_formats.EXPORTED_CARD_FIELDS))
+                .where(Flashcard.deck_id == deck_id, Flashcard.is_deleted.is_(False))
+                .order_by(Flashcard.id)
+            )
+
+            if export_format == "ndjson":
+                chunks = deck_formats.ndjson_chunks(deck_data, cards)
+            elif export_format == "csv":
+                chunks = deck_formats.csv_chunks(cards)
+            else:
+                reviews = self._stream_rows(
+                    select(*(getattr(CardReview, field)
+                             for field in deck_formats.REVIEW_FIELDS))
+                    .join(Flashcard, Flashcard.id == CardReview.flashcard_id)
+                    .where(
                         Flashcard.deck_id == deck_id,
-                        not Flashcard.is_deleted,
-                        Flashcard.last_reviewed is None,
+                        Flashcard.is_deleted.is_(False),
+                        CardReview.is_deleted.is_(False),
                     )
+                    .order_by(CardReview.id)
                 )
-                .count()
+                chunks = deck_formats.sqlite_package_chunks(deck_data, cards, reviews)
+
+            mimetype, extension = deck_formats.FORMATS[export_format]
+            filename = secure_filename(deck.name) or f"deck_{deck_id}"
+            return self._success_response({
+                "filename": f"{filename}_export.{extension}",
+                "mimetype": mimetype,
+                "chunks": chunks,
+            })
+
+        except Exception as e:
+            return self._handle_exception(e, "exportación de deck")
+
+    def _stream_rows(self, statement):
+        """Bloques de filas de una consulta, leídos del servidor al iterar"""
+        result = self.db.session.execute(
+            statement.execution_options(yield_per=EXPORT_CHUNK_SIZE))
+        try:
+            yield from result.partitions()
+        finally:
+            result.close()
+
+    def import_deck(self, user_id, path, file_format, name=None):
+        """
+        Importar un deck desde un fichero subido, en segundo plano
+
+        Crea el deck vacío y un job que lee el fichero en streaming: cada
+        bloque de IMPORT_CHUNK_SIZE registros se valida, se deduplica y se
+        inserta en bloque en su propia transacción, junto con el progreso
+        del job. Si el proceso muere, resume_jobs continúa desde el
+        último bloque confirmado. El deck queda oculto hasta el final y el
+        fichero se borra al terminar.
+
+        Args:
+            user_id: ID del usuario propietario
+            path: Ruta del fichero subido (en IMPORT_FOLDER)
+            file_format: "ndjson", "csv" o "sqlite"
+            name: Nombre del deck (por defecto el del fichero)
+
+        Returns:
+            dict: Respuesta con el job y accepted=True
+        """
+        try:
+            if file_format not in deck_formats.FORMATS:
+                return self._error_response(
+                    f"Formato no soportado. Usa: {', '.join(deck_formats.FORMATS)}")
+
+            try:
+                deck_data = deck_formats.read_deck(path, file_format)
+            except ValueError as e:
+                return self._error_response(str(e))
+
+            name = (name or deck_data.get("name") or "").strip()[:80] or "Deck importado"
+            deck = Deck(
+                user_id=user_id,
+                name=self._free_deck_name(user_id, name),
+                is_public=False,
+                is_deleted=True,  # Oculto mientras se importa
+                **deck_formats.deck_row(deck_data),
             )
-        except Exception:
-            return 0
+            self.db.session.add(deck)
+            self.db.session.flush()
+
+            job = Job(user_id=user_id, kind=JOB_IMPORT_DECK, result_deck_id=deck.id)
+            job.params_dict = {"path": path, "format": file_format}
+            self.db.session.add(job)
+            if not self._commit_or_rollback():
+                return self._error_response("Error al importar deck", code=500)
+
+            self._invalidate_cache(user_id=user_id)
+            self._start_job(job.id, self._import_in_chunks)
+            return self._success_response(
+                job.to_dict(), f'Importando deck como "{deck.name}"', accepted=True)
+
+        except Exception as e:
+            return self._handle_exception(e, "importación de deck")
 
-    def _get_cards_learning_count(self, deck_id):
-        """Obtener número de cartas en proceso de aprendizaje"""
+    def resume_jobs(self, job_ids=None, background=False):
+        """
+        Reanudar duplicaciones e importaciones interrumpidas
+
+        Cada job continúa desde su último tramo confirmado. Sin job_ids
+        reanuda los pendientes o en curso (un proceso que murió a mitad deja
+        el job "running"); con job_ids también los fallidos. Debe ejecutarse
+        cuando no hay workers procesando esos jobs.
+
+        Args:
+            job_ids: IDs de jobs (por defecto los interrumpidos)
+            background: Reanudar en hilos en lugar de en esta llamada
+
+        Returns:
+            dict: Respuesta con los IDs de los jobs reanudados
+        """
         try:
-            return (
-                self.db.session.query(Flashcard)
-                .filter(
-                    and_(
-                        Flashcard.deck_id == deck_id,
-                        not Flashcard.is_deleted,
-                        Flashcard.last_reviewed is not None,
-                        Flashcard.interval_days < 21,  # Menos de 3 semanas
-                    )
-                )
-                .count()
+            workers = {
+                JOB_DUPLICATE_DECK: self._copy_deck_in_chunks,
+                JOB_IMPORT_DECK: self._import_in_chunks,
+            }
+            query = self.db.session.query(Job.id, Job.kind).filter(Job.kind.in_(workers))
+            if job_ids:
+                query = query.filter(Job.id.in_(job_ids), Job.status != JOB_COMPLETED)
+            else:
+                query = query.filter(Job.status.in_((JOB_PENDING, JOB_RUNNING)))
+            resumed = query.order_by(Job.id).all()
+
+            for job_id, kind in resumed:
+                if background:
+                    self._start_job(job_id, workers[kind])
+                else:
+                    self._run_job(job_id, workers[kind])
+
+            return self._success_response(
+                {"jobs": [job_id for job_id, _ in resumed]},
+                f"{len(resumed)} trabajos reanudados")
+
+        except Exception as e:
+            return self._handle_exception(e, "reanudación de trabajos")
+
+    def _import_in_chunks(self, job):
+        """Trabajo de importación: un commit por bloque con el progreso del job"""
+        params = job.params_dict
+        path, file_format = params["path"], params["format"]
+        try:
+            if not job.total:
+                job.total = deck_formats.count_cards(path, file_format)
+                self.db.session.commit()
+
+            # job.processed es el cursor: registros ya confirmados
+            records = islice(deck_formats.read_cards(path, file_format), job.processed, None)
+            while True:
+                chunk = list(islice(records, IMPORT_CHUNK_SIZE))
+                if not chunk:
+                    break
+                params = self._import_chunk(job, chunk, params)
+                job.processed += len(chunk)
+                job.params_dict = params
+                self.db.session.commit()
+
+            self.db.session.execute(
+                update(Deck)
+                .where(Deck.id == job.result_deck_id)
+                .values(is_deleted=False, updated_at=datetime.utcnow())
+            )
+        finally:
+            self._invalidate_cache(user_id=job.user_id)
+            suggest_index.invalidate(job.user_id)
+
+        if os.path.exists(path):
+            os.remove(path)
+
+    def _import_chunk(self, job, records, params):
+        """Validar, deduplicar e insertar un bloque; devuelve los contadores"""
+        imported = params.get("imported", 0)
+        duplicates = params.get("duplicates", 0)
+        errors = params.get("errors", [])
+        invalid = params.get("invalid", 0)
+
+        rows = []
+        for number, record in enumerate(records, job.processed + 1):
+            try:
+                if isinstance(record, deck_formats.InvalidRecord):
+                    raise record
+                rows.append(deck_formats.card_row(record))
+            except deck_formats.InvalidRecord as e:
+                invalid += 1
+                if len(errors) < IMPORT_MAX_ERRORS:
+                    errors.append(f"Registro {number}: {e}")
+
+        # Repetidas dentro del bloque o ya presentes en el deck
+        connection = self.db.session.connection()
+        seen = {tuple(key) for key in connection.execute(
+            select(Flashcard.front_text, Flashcard.back_text).where(
+                Flashcard.deck_id == job.result_deck_id,
+                Flashcard.is_deleted.is_(False),
+                tuple_(Flashcard.front_text, Flashcard.back_text).in_(
+                    [(row["front_text"], row["back_text"]) for row in rows]),
             )
-        except Exception:
-            return 0
+        )} if rows else set()
+        fresh = []
+        for row in rows:
+            key = (row["front_text"], row["back_text"])
+            if key in seen:
+                duplicates += 1
+            else:
+                seen.add(key)
+                fresh.append(row)
+
+        if fresh:
+            ids = bulk_insert_flashcards(connection, job.result_deck_id, fresh)
+            add_tags(connection, Flashcard, job.user_id, [
+                (card_id, row["tags"]) for card_id, row in zip(ids, fresh) if row["tags"]
+            ])
+            imported += len(fresh)
+
+        return {**params, "imported": imported, "duplicates": duplicates,
+                "invalid": invalid, "errors": errors}
+
+    def get_job(self, job_id, user_id):
+        """
+        Estado y progreso de un trabajo en segundo plano del usuario
 
-    def _get_cards_mastered_count(self, deck_id):
-        """Obtener número de cartas dominadas"""
+        Args:
+            job_id: ID del job
+            user_id: ID del usuario
+
+        Returns:
+            dict: Respuesta con el job
+        """
         try:
-            return (
-                self.db.session.query(Flashcard)
-                .filter(
-                    and_(
-                        Flashcard.deck_id == deck_id,
-                        not Flashcard.is_deleted,
-                        Flashcard.interval_days >= 21,  # 3 semanas o más
-                    )
-                )
-                .count()
+            job = self.db.session.query(Job).filter_by(id=job_id, user_id=user_id).first()
+            if job is None:
+                return self._error_response("Trabajo no encontrado", code=404)
+            return self._success_response(job.to_dict())
+
+        except Exception as e:
+            return self._handle_exception(e, "obtención de trabajo")
+
+    def _query_decks_with_stats(self):
+        """
+        Query de decks con sus contadores y cartas vencidas en una sola lectura
+
+        Las cartas vencidas se suman del histograma de vencimientos hasta
+        hoy (UTC), por lo que incluyen las que vencen más tarde en el día.
+        """
+        cards_due = (
+            select(func.coalesce(func.sum(DeckDueBucket.card_count), 0))
+            .where(
+                DeckDueBucket.deck_id == Deck.id,
+                DeckDueBucket.due_date <= datetime.utcnow().date(),
             )
-        except Exception:
-            return 0
+            .correlate(Deck)
+            .scalar_subquery()
+        )
+        return self.db.session.query(
+            Deck, DeckCardStats, cards_due.label("cards_due")
+        ).outerjoin(DeckCardStats, DeckCardStats.deck_id == Deck.id)
+
+    def _paginate_decks_with_stats(self, query, page, per_page, cursor=None,
+                                   count=COUNT_EXACT):
+        """
+        Paginar decks con estadísticas, reconstruyendo las que falten
+
+        Con cursor (aunque sea "") se pagina por keyset sobre
+        (updated_at, id); si no, por número de página.
+
+        Los decks creados antes de existir las tablas de estadísticas no
+        tienen fila; se reconstruyen una vez y se repite la lectura.
+        """
+        def paginate():
+            if cursor is None:
+                return self._apply_pagination(query, page, per_page, count)
+            return self._apply_keyset_pagination(
+                query, (Deck.updated_at, Deck.id), cursor, per_page, count)
+
+        paginated_data = paginate()
+        missing = [row[0].id for row in paginated_data["items"] if row[1] is None]
+        if missing:
+            rebuild_deck_card_stats(self.db.session.connection(), missing)
+            self._commit_or_rollback()
+            paginated_data = paginate()
+        return paginated_data
+
+    def _fetch_deck_with_stats(self, *filters):
+        """Obtener un deck con sus estadísticas (o None si no existe)"""
+        query = self._query_decks_with_stats().filter(*filters)
+        row = query.first()
+        if row is not None and row[1] is None:
+            rebuild_deck_card_stats(self.db.session.connection(), [row[0].id])
+            self._commit_or_rollback()
+            row = query.first()
+        return row
+
+    @staticmethod
+    def _deck_with_stats(deck, stats, cards_due):
+        """Serializar deck agregando contadores de cartas"""
+        deck_dict = deck.to_dict()
+        deck_dict.update(
+            {
+                "total_cards": stats.total_cards if stats else 0,
+                "cards_due": int(cards_due or 0),
+                "cards_new": stats.cards_new if stats else 0,
+                "cards_learning": stats.cards_learning if stats else 0,
+                "cards_mastered": stats.cards_mastered if stats else 0,
+            }
+        )
+        return deck_dict
+
+    def rebuild_card_stats(self, deck_ids=None, batch_size=500):
+        """
+        Reconstruir desde cero las estadísticas de cartas (job de reparación)
+
+        Args:
+            deck_ids: IDs de decks a reconstruir (por defecto todos)
+            batch_size: Decks por transacción
+
+        Returns:
+            dict: Respuesta con el número de decks reconstruidos
+        """
+        try:
+            if deck_ids is None:
+                deck_ids = [
+                    deck_id for (deck_id,) in
+                    self.db.session.query(Deck.id).order_by(Deck.id)
+                ]
+            deck_ids = list(deck_ids)
+
+            rebuilt = 0
+            for start in range(0, len(deck_ids), batch_size):
+                rebuilt += rebuild_deck_card_stats(
+                    self.db.session.connection(), deck_ids[start:start + batch_size])
+                if not self._commit_or_rollback():
+                    return self._error_response(
+                        "Error al reconstruir estadísticas", code=500)
+
+            return self._success_response(
+                {"decks": rebuilt}, "Estadísticas de cartas reconstruidas")
+
+        except Exception as e:
+            return self._handle_exception(e, "reconstrucción de estadísticas")
 
-    def get_public_decks(self, page=1, per_page=20, search=""):
+    def get_public_decks(self, page=1, per_page=20, search="", cursor=None,
+                         count=COUNT_EXACT):
         """
         Obtener decks públicos con filtros y paginación
 
@@ -453,58 +892,53 @@ class DeckService(BaseService):
             page: Número de página
             per_page: Elementos por página
             search: Término de búsqueda
+            cursor: Cursor de paginación keyset ("" para la primera página;
+                None usa page)
+            count: Modo de conteo del total ("exact", "estimate", "none")
 
         Returns:
             dict: Respuesta con decks públicos paginados
         """
         try:
             # Query base para decks públicos
-            query = self.db.session.query(Deck).filter_by(
-                is_public=True, is_deleted=False)
+            query = (
+                self._query_decks_with_stats()
+                .add_columns(User.first_name, User.last_name)
+                .join(User, Deck.user_id == User.id)
+                .filter(Deck.is_public.is_(True), Deck.is_deleted.is_(False))
+            )
 
-            # Aplicar búsqueda si se proporciona
+            # Aplicar búsqueda si se proporciona (índice de texto completo)
             if search:
-                search_term = f"%{search}%"
-                query = query.filter(
-                    or_(
-                        Deck.name.ilike(search_term),
-                        Deck.description.ilike(search_term),
-                    )
-                )
+                query = query.filter(search_clause(self.db.session, Deck, search))
 
-            # Ordenar por popularidad (número de flashcards)
             query = query.order_by(Deck.updated_at.desc())
 
-            # Paginación
-            total = query.count()
-            decks = query.offset((page - 1) * per_page).limit(per_page).all()
+            paginated_data = self._paginate_decks_with_stats(
+                query, page, per_page, cursor, count)
 
             # Serializar decks
             decks_data = []
-            for deck in decks:
-                deck_data = deck.to_dict()
-                # Agregar estadísticas básicas
-                deck_data.update({
-                    'total_cards': self._get_total_cards_count(deck.id),
-                    'cards_due': self._get_cards_due_count(deck.id),
-                })
+            for deck, stats, cards_due, first_name, last_name in paginated_data["items"]:
+                deck_data = self._deck_with_stats(deck, stats, cards_due)
+                deck_data["author"] = f"{first_name} {last_name}"
                 decks_data.append(deck_data)
 
+            total = paginated_data["pagination"]["total"]
             return self._success_response(
                 data=decks_data,
-                message=f"Se encontraron {total} decks públicos",
-                pagination={
-                    'page': page,
-                    'per_page': per_page,
-                    'total': total,
-                    'pages': (total + per_page - 1) // per_page
-                }
+                message=(f"Se encontraron {total} decks públicos"
+                         if total is not None else None),
+                pagination=paginated_data["pagination"],
             )
 
+        except InvalidCursorError as e:
+            return self._error_response(str(e), code=400)
         except Exception as e:
             return self._handle_exception(e, "obtención de decks públicos")
 
-    def search_decks(self, user_id, query, page=1, per_page=20):
+    def search_decks(self, user_id, query, page=1, per_page=20, cursor=None,
+                     count=COUNT_EXACT):
         """
         Buscar decks del usuario por término de búsqueda
 
@@ -513,6 +947,8 @@ class DeckService(BaseService):
             query: Término de búsqueda
             page: Número de página
             per_page: Elementos por página
+            cursor: Cursor de paginación keyset (ver get_user_decks)
+            count: Modo de conteo del total
 
         Returns:
             dict: Respuesta con decks encontrados
@@ -527,23 +963,9 @@ class DeckService(BaseService):
                 user_id,
                 page=page,
                 per_page=per_page,
-                search=query.strip())
+                search=query.strip(),
+                cursor=cursor,
+                count=count)
 
         except Exception as e:
             return self._handle_exception(e, "búsqueda de decks")
-
-    def _get_total_cards_count(self, deck_id):
-        """Obtener número total de cartas en el deck"""
-        try:
-            return (
-                self.db.session.query(Flashcard)
-                .filter(
-                    and_(
-                        Flashcard.deck_id == deck_id,
-                        not Flashcard.is_deleted,
-                    )
-                )
-                .count()
-            )
-        except Exception:
-            return 0
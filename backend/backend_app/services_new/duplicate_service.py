@@ -0,0 +1,77 @@
+"""
+DuplicateService - Detección de flashcards casi duplicadas
+Usa firmas MinHash y LSH (utils.minhash) para no comparar todos los pares
+"""
+
+from .base_service import BaseService
+
+try:
+    from ..models import Deck, Flashcard
+    from ..utils import minhash
+except ImportError:
+    from backend_app.models import Deck, Flashcard
+    from backend_app.utils import minhash
+
+
+class DuplicateService(BaseService):
+    """Servicio de agrupación de flashcards casi duplicadas por deck"""
+
+    def find_duplicates(self, user_id, deck_id, threshold=minhash.DEFAULT_THRESHOLD):
+        """
+        Grupos de flashcards casi duplicadas de un deck
+
+        Args:
+            user_id: ID del usuario propietario
+            deck_id: ID del deck
+            threshold: Similitud de Jaccard mínima (0-1]
+
+        Returns:
+            dict: Respuesta con los grupos, de mayor a menor tamaño
+        """
+        try:
+            if not minhash.is_available():
+                return self._error_response(
+                    "Detección de duplicados no disponible", code=503)
+            if not 0 < threshold <= 1:
+                return self._error_response(
+                    "El umbral debe estar entre 0 y 1", code=400)
+
+            deck, error = self._get_resource_if_owned(Deck, deck_id, user_id, "deck")
+            if error:
+                return error
+
+            cache_key = self._cache_key(
+                "deck_duplicates", threshold, user_id=user_id, deck_id=deck_id)
+
+            def fetch_clusters():
+                cards = self.db.session.query(
+                    Flashcard.id, Flashcard.front_text, Flashcard.back_text
+                ).filter(
+                    Flashcard.deck_id == deck_id,
+                    Flashcard.is_deleted.is_(False),
+                ).order_by(Flashcard.id).all()
+
+                signatures = minhash.minhash_signatures(
+                    [minhash.card_text(front, back) for _, front, back in cards])
+                clusters = [
+                    [
+                        {"id": cards[index].id,
+                         "front_text": cards[index].front_text,
+                         "back_text": cards[index].back_text}
+                        for index in members
+                    ]
+                    for members in minhash.duplicate_clusters(signatures, threshold)
+                ]
+                return {
+                    "deck_id": deck_id,
+                    "threshold": threshold,
+                    "total_cards": len(cards),
+                    "duplicate_cards": sum(len(cluster) - 1 for cluster in clusters),
+                    "clusters": clusters,
+                }
+
+            return self._success_response(
+                self._get_or_set_cache(cache_key, fetch_clusters, timeout=300))
+
+        except Exception as e:
+            return self._handle_exception(e, "detección de duplicados")
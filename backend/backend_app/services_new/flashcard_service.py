@@ -7,9 +7,24 @@ from .base_service import BaseService
 
 try:
     from ..models import Deck, Flashcard
+    from ..models.models import bulk_insert_flashcards
+    from ..models.search_index import search_clause
+    from ..models.tags import add_tags
+    from ..utils import minhash
+    from ..utils.suggest import card_entries, suggest_index
 except ImportError:
     from backend_app.models import Deck, Flashcard
-from sqlalchemy import and_, or_
+    from backend_app.models.models import bulk_insert_flashcards
+    from backend_app.models.search_index import search_clause
+    from backend_app.models.tags import add_tags
+    from backend_app.utils import minhash
+    from backend_app.utils.suggest import card_entries, suggest_index
+try:
+    from ..utils.pagination import COUNT_EXACT, InvalidCursorError
+except ImportError:
+    from backend_app.utils.pagination import COUNT_EXACT, InvalidCursorError
+from sqlalchemy import and_, func
+from sqlalchemy.orm import contains_eager
 from datetime import datetime
 
 
@@ -22,7 +37,9 @@ class FlashcardService(BaseService):
     deck_id=None,
     page=1,
     per_page=20,
-     search=""):
+    search="",
+    cursor=None,
+     count=COUNT_EXACT):
         """
         Obtener flashcards del usuario con filtros
 
@@ -32,24 +49,38 @@ class FlashcardService(BaseService):
             page: Número de página
             per_page: Elementos por página
             search: Término de búsqueda
+            cursor: Cursor de paginación keyset sobre (created_at, id)
+                ("" para la primera página; None usa page)
+            count: Modo de conteo del total ("exact", "estimate", "none")
 
         Returns:
             dict: Respuesta con flashcards paginadas
-        ""
+        """
         try:
             # Cache key
-            cache_key = f"user_flashcards:{user_id}:{deck_id}:{page}:{per_page}:{search}"
+            # Filtrado por deck depende del deck y del usuario (las revisiones
+            # solo invalidan al usuario); sin filtro, del usuario
+            if deck_id:
+                cache_key = self._cache_key(
+                    "user_flashcards", user_id, deck_id, page, per_page, search,
+                    cursor, count, user_id=user_id, deck_id=deck_id)
+            else:
+                cache_key = self._cache_key(
+                    "user_flashcards", None, page, per_page, search, cursor, count,
+                    user_id=user_id)
 
             def fetch_flashcards():
-                # Query base con join a Deck para verificar propiedad
+                # Query base con join a Deck para verificar propiedad; el
+                # mismo join carga card.deck (sin una consulta por carta)
                 query = (
                     self.db.session.query(Flashcard)
                     .join(Deck)
+                    .options(contains_eager(Flashcard.deck))
                     .filter(
                         and_(
                             Deck.user_id == user_id,
-                            not Deck.is_deleted,
-                            not Flashcard.is_deleted,
+                            Deck.is_deleted.is_(False),
+                            Flashcard.is_deleted.is_(False),
                         )
                     )
                 )
@@ -58,21 +89,22 @@ class FlashcardService(BaseService):
                 if deck_id:
                     query = query.filter(Flashcard.deck_id == deck_id)
 
-                # Aplicar búsqueda si se proporciona
+                # Aplicar búsqueda si se proporciona (índice de texto completo)
                 if search:
-                    search_term = f"%{search}%"
                     query = query.filter(
-                        or_(
-                            Flashcard.front_text.ilike(search_term),
-                            Flashcard.back_text.ilike(search_term),
-                        )
-                    )
+                        search_clause(self.db.session, Flashcard, search))
 
                 # Ordenar por fecha de creación
                 query = query.order_by(Flashcard.created_at.desc())
 
                 # Aplicar paginación
-                paginated_data = self._apply_pagination(query, page, per_page)
+                if cursor is None:
+                    paginated_data = self._apply_pagination(
+                        query, page, per_page, count)
+                else:
+                    paginated_data = self._apply_keyset_pagination(
+                        query, (Flashcard.created_at, Flashcard.id), cursor,
+                        per_page, count)
 
                 # Convertir flashcards a diccionarios
                 flashcards_data = []
@@ -92,11 +124,50 @@ class FlashcardService(BaseService):
 
             return self._success_response(result)
 
+        except InvalidCursorError as e:
+            return self._error_response(str(e), code=400)
         except Exception as e:
             return self._handle_exception(
                 e, "obtención de flashcards del usuario")
 
+    def get_deck_flashcards_version(self, user_id, deck_id):
+        """
+        Versión del listado de flashcards de un deck (para ETag/Last-Modified)
+
+        Args:
+            user_id: ID del usuario
+            deck_id: ID del deck
+
+        Returns:
+            dict: Respuesta con version y last_modified
+        """
+        try:
+            deck_updated = (
+                self.db.session.query(Deck.updated_at)
+                .filter(Deck.id == deck_id, Deck.user_id == user_id)
+                .scalar()
+            )
+            if deck_updated is None:
+                return self._error_response("Deck no encontrado", code=404)
+
+            total, cards_updated = (
+                self.db.session.query(
+                    func.count(Flashcard.id), func.max(Flashcard.updated_at))
+                .filter(Flashcard.deck_id == deck_id)
+                .one()
+            )
+
+            return self._version_response(
+                "deck_flashcards", deck_id, total, deck_updated, cards_updated,
+                scopes=[f"deck:{deck_id}"],
+                last_modified=(deck_updated, cards_updated),
+            )
+
+        except Exception as e:
+            return self._handle_exception(e, "versión de flashcards del deck")
+
     def create_flashcard(self, user_id, flashcard_data):
+        """
         Crear nueva flashcard
 
         Args:
@@ -111,6 +182,12 @@ class FlashcardService(BaseService):
             if not deck_id:
                 return self._error_response(
                     "El ID del deck es requerido", code=400)
+
+            deck, error = self._get_resource_if_owned(
+                Deck, deck_id, user_id, "deck")
+            if error:
+                return error
+
             # Validar contenido mínimo
             front_text = flashcard_data.get("front_text", "").strip()
             back_text = flashcard_data.get("back_text", "").strip()
@@ -132,7 +209,7 @@ class FlashcardService(BaseService):
                 back_image_url=flashcard_data.get("back_image_url", ""),
                 front_audio_url=flashcard_data.get("front_audio_url", ""),
                 back_audio_url=flashcard_data.get("back_audio_url", ""),
-                difficulty=flashcard_data.get("difficulty", "medium"),
+                difficulty=flashcard_data.get("difficulty", "normal"),
                 tags=flashcard_data.get("tags", ""),
             )
 
@@ -149,8 +226,9 @@ class FlashcardService(BaseService):
             self._commit_or_rollback()
 
             # Invalidar cache
-            self._invalidate_cache_pattern(f"user_flashcards:{user_id}:*")
-            self._invalidate_cache_pattern(f"user_decks:{user_id}:*")
+            self._invalidate_cache(user_id=user_id, deck_id=deck_id)
+            suggest_index.update(
+                user_id, added=card_entries(flashcard.front_text, flashcard.tags))
 
             return self._success_response(
     flashcard.to_dict(), "Flashcard creada exitosamente")
@@ -174,12 +252,13 @@ class FlashcardService(BaseService):
             flashcard = (
                 self.db.session.query(Flashcard)
                 .join(Deck)
+                .options(contains_eager(Flashcard.deck))
                 .filter(
                     and_(
                         Flashcard.id == flashcard_id,
                         Deck.user_id == user_id,
-                        not Flashcard.is_deleted,
-                        not Deck.is_deleted,
+                        Flashcard.is_deleted.is_(False),
+                        Deck.is_deleted.is_(False),
                     )
                 )
                 .first()
@@ -218,8 +297,8 @@ class FlashcardService(BaseService):
                     and_(
                         Flashcard.id == flashcard_id,
                         Deck.user_id == user_id,
-                        not Flashcard.is_deleted,
-                        not Deck.is_deleted,
+                        Flashcard.is_deleted.is_(False),
+                        Deck.is_deleted.is_(False),
                     )
                 )
                 .first()
@@ -229,6 +308,8 @@ class FlashcardService(BaseService):
                 return self._error_response(
     "Flashcard no encontrada", code=404)
 
+            previous_entries = card_entries(flashcard.front_text, flashcard.tags)
+
             # Actualizar campos permitidos
             allowed_fields = [
                 "front_text",
@@ -268,7 +349,12 @@ class FlashcardService(BaseService):
     "Error al actualizar flashcard", code=500)
 
             # Invalidar cache
-            self._invalidate_cache_pattern(f"user_flashcards:{user_id}:*")
+            self._invalidate_cache(user_id=user_id, deck_id=flashcard.deck_id)
+            suggest_index.update(
+                user_id,
+                removed=previous_entries,
+                added=card_entries(flashcard.front_text, flashcard.tags),
+            )
 
             return self._success_response(
     flashcard.to_dict(),
@@ -297,8 +383,8 @@ class FlashcardService(BaseService):
                     and_(
                         Flashcard.id == flashcard_id,
                         Deck.user_id == user_id,
-                        not Flashcard.is_deleted,
-                        not Deck.is_deleted,
+                        Flashcard.is_deleted.is_(False),
+                        Deck.is_deleted.is_(False),
                     )
                 )
                 .first()
@@ -317,15 +403,16 @@ class FlashcardService(BaseService):
     "Error al eliminar flashcard", code=500)
 
             # Actualizar contador de cartas en el deck
-            deck = flashcard.deck
+            deck = self.db.session.get(Deck, flashcard.deck_id)
             deck.total_cards = self.db.session.query(Flashcard).filter_by(
                 deck_id=deck.id, is_deleted=False).count()
             self._update_timestamps(deck)
             self._commit_or_rollback()
 
             # Invalidar cache
-            self._invalidate_cache_pattern(f"user_flashcards:{user_id}:*")
-            self._invalidate_cache_pattern(f"user_decks:{user_id}:*")
+            self._invalidate_cache(user_id=user_id, deck_id=deck.id)
+            suggest_index.update(
+                user_id, removed=card_entries(flashcard.front_text, flashcard.tags))
 
             return self._success_response(
                 {"message": "Flashcard eliminada"}, "Flashcard eliminada exitosamente")
@@ -343,20 +430,20 @@ class FlashcardService(BaseService):
             return f"Carta {index+1}: El reverso debe tener texto o imagen"
         return None
 
-    def _create_single_flashcard_object(self, deck_id, card_data):
-        return Flashcard(
-            deck_id=deck_id,
-            front_text=card_data.get("front_text", "").strip(),
-            back_text=card_data.get("back_text", "").strip(),
-            front_image_url=card_data.get("front_image_url", ""),
-            back_image_url=card_data.get("back_image_url", ""),
-            front_audio_url=card_data.get("front_audio_url", ""),
-            back_audio_url=card_data.get("back_audio_url", ""),
-            difficulty=card_data.get("difficulty", "medium"),
-            tags=card_data.get("tags", ""),
-        )
-
-    def create_multiple_flashcards(self, user_id, deck_id, flashcards_data):
+    def _flashcard_values(self, card_data):
+        return {
+            "front_text": card_data.get("front_text", "").strip(),
+            "back_text": card_data.get("back_text", "").strip(),
+            "front_image_url": card_data.get("front_image_url", ""),
+            "back_image_url": card_data.get("back_image_url", ""),
+            "front_audio_url": card_data.get("front_audio_url", ""),
+            "back_audio_url": card_data.get("back_audio_url", ""),
+            "difficulty": card_data.get("difficulty", "normal"),
+            "tags": card_data.get("tags", ""),
+        }
+
+    def create_multiple_flashcards(self, user_id, deck_id, flashcards_data,
+                                   check_duplicates=True, bulk=False):
         """
         Crear múltiples flashcards en lote
 
@@ -364,9 +451,12 @@ class FlashcardService(BaseService):
             user_id: ID del usuario propietario
             deck_id: ID del deck
             flashcards_data: Lista de datos de flashcards
+            check_duplicates: Señalar las cartas casi duplicadas (no se descartan)
+            bulk: Insertar con INSERT masivos de Core en lugar del ORM; la
+                respuesta trae flashcard_ids en lugar de flashcards
 
         Returns:
-            dict: Respuesta con flashcards creadas
+            dict: Respuesta con flashcards creadas y near_duplicates
         """
         try:
             deck, error = self._get_resource_if_owned(
@@ -377,7 +467,7 @@ class FlashcardService(BaseService):
                 return self._error_response(
     "Se requiere una lista de flashcards", code=400)
 
-            created_cards = []
+            rows = []
             errors = []
 
             for i, card_data in enumerate(flashcards_data):
@@ -387,47 +477,90 @@ class FlashcardService(BaseService):
                     errors.append(validation_error)
                     continue
                 try:
-                    flashcard = self._create_single_flashcard_object(
-                        deck_id, card_data)
-                    self.db.session.add(flashcard)
-                    created_cards.append(flashcard)
+                    rows.append(self._flashcard_values(card_data))
                 except Exception as e:
                     errors.append(f"Carta {i+1}: {str(e)}")
 
-            if not created_cards:
+            if not rows:
                 return self._error_response(
                     f'No se pudo crear ninguna flashcard. Errores: {"; ".join(errors)}',
                     code=400,
                 )
 
+            if bulk:
+                connection = self.db.session.connection()
+                ids = bulk_insert_flashcards(connection, deck_id, rows)
+                add_tags(connection, Flashcard, user_id,
+                         [(card_id, row["tags"]) for card_id, row in zip(ids, rows)])
+            else:
+                # El listener after_insert mantiene total_cards y las estadísticas
+                created_cards = [Flashcard(deck_id=deck_id, **row) for row in rows]
+                self.db.session.add_all(created_cards)
+                self._update_timestamps(deck)
+
             if not self._commit_or_rollback():
                 return self._error_response(
     "Error al guardar flashcards", code=500)
+            if not bulk:
+                ids = [card.id for card in created_cards]
+
+            self._invalidate_cache(user_id=user_id, deck_id=deck_id)
+            suggest_index.update(
+                user_id,
+                added=[
+                    entry
+                    for row in rows
+                    for entry in card_entries(row["front_text"], row["tags"])
+                ],
+            )
 
-            deck.total_cards = self.db.session.query(Flashcard).filter_by(
-                deck_id=deck_id, is_deleted=False).count()
-            self._update_timestamps(deck)
-            self._commit_or_rollback()
-
-            self._invalidate_cache_pattern(f"user_flashcards:{user_id}:*")
-            self._invalidate_cache_pattern(f"user_decks:{user_id}:*")
-
-            result = {
-                "created_count": len(created_cards),
-                "flashcards": [card.to_dict() for card in created_cards],
-            }
+            result = {"created_count": len(rows)}
+            if bulk:
+                result["flashcard_ids"] = ids
+            else:
+                result["flashcards"] = [card.to_dict() for card in created_cards]
+            if check_duplicates and minhash.is_available():
+                result["near_duplicates"] = self._near_duplicates(
+                    deck_id, ids, rows)
 
             if errors:
                 result["errors"] = errors
-                message = f"{len(created_cards)} flashcards creadas con {len(errors)} errores"
+                message = f"{len(rows)} flashcards creadas con {len(errors)} errores"
             else:
-                message = f"{len(created_cards)} flashcards creadas exitosamente"
+                message = f"{len(rows)} flashcards creadas exitosamente"
 
             return self._success_response(result, message)
 
         except Exception as e:
             return self._handle_exception(e, "creación múltiple de flashcards")
 
+    def _near_duplicates(self, deck_id, created_ids, created_rows):
+        """Cartas recién creadas casi iguales a otra del deck o del lote"""
+        created = set(created_ids)
+        existing = [
+            card for card in self.db.session.query(
+                Flashcard.id, Flashcard.front_text, Flashcard.back_text
+            ).filter(
+                Flashcard.deck_id == deck_id,
+                Flashcard.is_deleted.is_(False),
+            )
+            if card.id not in created
+        ]
+
+        ids = [card.id for card in existing] + list(created_ids)
+        matches = minhash.new_duplicates(
+            [minhash.card_text(front, back) for _, front, back in existing],
+            [minhash.card_text(row["front_text"], row["back_text"]) for row in created_rows],
+        )
+        return [
+            {
+                "flashcard_id": created_ids[index],
+                "duplicate_of": ids[other],
+                "similarity": round(score, 3),
+            }
+            for index, (other, score) in sorted(matches.items())
+        ]
+
     def get_flashcards_for_study(self, user_id, deck_id, limit=20):
         """
         Obtener flashcards para sesión de estudio
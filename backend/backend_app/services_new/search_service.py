@@ -0,0 +1,247 @@
+"""
+SearchService - Búsqueda de texto completo en decks y flashcards
+Usa el índice de models.search_index (FTS5 / tsvector) con ranking y snippets
+"""
+
+from .base_service import BaseService
+
+try:
+    from ..models import Deck, Flashcard, User
+    from ..models.search_index import (
+        ranked_matches, rebuild_search_index, render_snippet, search_terms)
+    from ..utils.suggest import (
+        SUGGEST_TOP_K, card_entries, deck_entries, suggest_index)
+except ImportError:
+    from backend_app.models import Deck, Flashcard, User
+    from backend_app.models.search_index import (
+        ranked_matches, rebuild_search_index, render_snippet, search_terms)
+    from backend_app.utils.suggest import (
+        SUGGEST_TOP_K, card_entries, deck_entries, suggest_index)
+from sqlalchemy import or_
+
+# Longitud mínima de la consulta (en caracteres de palabra)
+MIN_QUERY_LENGTH = 2
+
+# Límites de resultados por tipo
+MAX_SEARCH_LIMIT = 50
+
+
+def _clamp_limit(limit):
+    """Límite de resultados entre 1 y MAX_SEARCH_LIMIT (LIMIT -1 no limita en SQLite)"""
+    return max(1, min(limit, MAX_SEARCH_LIMIT))
+
+
+class SearchService(BaseService):
+    """Servicio de búsqueda rankeada sobre el contenido del usuario"""
+
+    def search(self, user_id, query, deck_limit=10, flashcard_limit=20):
+        """
+        Búsqueda global en decks y flashcards del usuario
+
+        Args:
+            user_id: ID del usuario
+            query: Texto de búsqueda
+            deck_limit: Máximo de decks
+            flashcard_limit: Máximo de flashcards
+
+        Returns:
+            dict: Respuesta con decks y flashcards ordenados por relevancia
+        """
+        try:
+            error = self._validate_query(query)
+            if error:
+                return error
+
+            cache_key = self._cache_key(
+                "search", query.strip().lower(), deck_limit, flashcard_limit,
+                user_id=user_id)
+
+            def fetch_results():
+                decks = self._search_decks(user_id, query, deck_limit)
+                flashcards = self._search_flashcards(
+                    user_id, query, None, flashcard_limit)
+                return {
+                    "query": query,
+                    "decks": decks,
+                    "flashcards": flashcards,
+                    "total_results": len(decks) + len(flashcards),
+                }
+
+            return self._success_response(
+                self._get_or_set_cache(cache_key, fetch_results, timeout=60))
+
+        except Exception as e:
+            return self._handle_exception(e, "búsqueda")
+
+    def search_flashcards(self, user_id, query, deck_id=None, limit=20):
+        """
+        Buscar flashcards del usuario por relevancia
+
+        Args:
+            user_id: ID del usuario
+            query: Texto de búsqueda
+            deck_id: Limitar a un deck (opcional)
+            limit: Máximo de resultados
+
+        Returns:
+            dict: Respuesta con flashcards, snippet y rank
+        """
+        try:
+            error = self._validate_query(query)
+            if error:
+                return error
+
+            return self._success_response(
+                self._search_flashcards(user_id, query, deck_id, limit))
+
+        except Exception as e:
+            return self._handle_exception(e, "búsqueda de flashcards")
+
+    def search_decks(self, user_id, query, limit=10, include_public=False):
+        """
+        Buscar decks del usuario (y opcionalmente públicos) por relevancia
+
+        Args:
+            user_id: ID del usuario
+            query: Texto de búsqueda
+            limit: Máximo de resultados
+            include_public: Incluir decks públicos de otros usuarios
+
+        Returns:
+            dict: Respuesta con decks, snippet y rank
+        """
+        try:
+            error = self._validate_query(query)
+            if error:
+                return error
+
+            return self._success_response(
+                self._search_decks(user_id, query, limit, include_public))
+
+        except Exception as e:
+            return self._handle_exception(e, "búsqueda de decks")
+
+    def suggest(self, user_id, prefix, limit=SUGGEST_TOP_K):
+        """
+        Autocompletar con el índice de prefijos en memoria del usuario
+
+        Args:
+            user_id: ID del usuario
+            prefix: Texto escrito hasta ahora
+            limit: Máximo de sugerencias
+
+        Returns:
+            dict: Respuesta con sugerencias (deck, term o tag)
+        """
+        try:
+            return self._success_response(
+                suggest_index.suggest(user_id, prefix, self._suggest_entries, limit))
+
+        except Exception as e:
+            return self._handle_exception(e, "sugerencias de búsqueda")
+
+    def _suggest_entries(self, user_id):
+        decks = self.db.session.query(Deck.name, Deck.tags).filter(
+            Deck.user_id == user_id, Deck.is_deleted.is_(False))
+        for name, tags in decks:
+            yield from deck_entries(name, tags)
+
+        cards = (
+            self.db.session.query(Flashcard.front_text, Flashcard.tags)
+            .join(Deck, Flashcard.deck_id == Deck.id)
+            .filter(
+                Deck.user_id == user_id,
+                Deck.is_deleted.is_(False),
+                Flashcard.is_deleted.is_(False),
+            )
+            .execution_options(yield_per=1000)
+        )
+        for front_text, tags in cards:
+            yield from card_entries(front_text, tags)
+
+    def rebuild_index(self):
+        """
+        Crear (si falta) y repoblar el índice de texto completo
+
+        Returns:
+            dict: Respuesta indicando si el motor tiene índice propio
+        """
+        try:
+            indexed = rebuild_search_index(self.db.session.connection())
+            if not self._commit_or_rollback():
+                return self._error_response("Error al reconstruir el índice", code=500)
+
+            return self._success_response(
+                {"indexed": indexed},
+                "Índice de búsqueda reconstruido" if indexed
+                else "El motor no tiene índice de texto completo; se usa ILIKE",
+            )
+
+        except Exception as e:
+            return self._handle_exception(e, "reconstrucción del índice de búsqueda")
+
+    def _validate_query(self, query):
+        if len("".join(search_terms(query))) < MIN_QUERY_LENGTH:
+            return self._error_response(
+                f"El término de búsqueda debe tener al menos {MIN_QUERY_LENGTH} caracteres")
+        return None
+
+    def _search_flashcards(self, user_id, query, deck_id, limit):
+        matches = ranked_matches(self.db.session, Flashcard, query)
+        rows = (
+            self.db.session.query(Flashcard, Deck.name, matches.c.rank, matches.c.snippet)
+            .join(matches, matches.c.id == Flashcard.id)
+            .join(Deck, Flashcard.deck_id == Deck.id)
+            .filter(
+                Deck.user_id == user_id,
+                Deck.is_deleted.is_(False),
+                Flashcard.is_deleted.is_(False),
+            )
+        )
+        if deck_id:
+            rows = rows.filter(Flashcard.deck_id == deck_id)
+
+        rows = rows.order_by(matches.c.rank, Flashcard.id).limit(_clamp_limit(limit))
+
+        return [
+            {
+                "id": card.id,
+                "deck_id": card.deck_id,
+                "deck_name": deck_name,
+                "front_text": card.front_text,
+                "back_text": card.back_text,
+                "snippet": render_snippet(snippet),
+                "rank": rank,
+                "type": "flashcard",
+            }
+            for card, deck_name, rank, snippet in rows
+        ]
+
+    def _search_decks(self, user_id, query, limit, include_public=False):
+        matches = ranked_matches(self.db.session, Deck, query)
+        owner = Deck.user_id == user_id
+        if include_public:
+            owner = or_(owner, Deck.is_public.is_(True))
+
+        rows = (
+            self.db.session.query(Deck, User.username, matches.c.rank, matches.c.snippet)
+            .join(matches, matches.c.id == Deck.id)
+            .join(User, Deck.user_id == User.id)
+            .filter(owner, Deck.is_deleted.is_(False))
+            .order_by(matches.c.rank, Deck.id)
+            .limit(_clamp_limit(limit))
+        )
+
+        return [
+            {
+                "id": deck.id,
+                "name": deck.name,
+                "description": deck.description,
+                "is_public": deck.is_public,
+                "author": username,
+                "snippet": render_snippet(snippet),
+                "rank": rank,
+                "type": "deck",
+            }
+            for deck, username, rank, snippet in rows
+        ]
@@ -6,11 +6,21 @@ Refactorizado con consultas optimizadas y lógica centralizada
 from .base_service import BaseService
 
 try:
-    from ..models import User, Deck, Flashcard, StudySession, CardReview
+    from ..models import User, Deck, Flashcard, StudySession, CardReview, DailyActivity
+    from ..models.models import rebuild_daily_activity
 except ImportError:
-    from backend_app.models import User, Deck, Flashcard, StudySession, CardReview
-from sqlalchemy import and_, func, desc
-from datetime import datetime, timedelta
+    from backend_app.models import User, Deck, Flashcard, StudySession, CardReview, DailyActivity
+    from backend_app.models.models import rebuild_daily_activity
+
+try:
+    from ..utils import workload_simulator
+except ImportError:
+    from backend_app.utils import workload_simulator
+from sqlalchemy import and_, func, select
+from datetime import date, datetime, timedelta
+
+# Igual al TTL del cache de estadísticas del dashboard
+DASHBOARD_VERSION_WINDOW = 300
 
 
 class StatsService(BaseService):
@@ -27,7 +37,7 @@ class StatsService(BaseService):
             dict: Respuesta con estadísticas del dashboard
         """
         try:
-            cache_key = f"dashboard_stats:{user_id}"
+            cache_key = self._cache_key("dashboard_stats", user_id=user_id)
 
             def fetch_stats():
                 # Obtener usuario
@@ -67,35 +77,12 @@ class StatsService(BaseService):
                     .count()
                 )
 
-                # Cartas estudiadas hoy
-                today_start = datetime.utcnow().replace(
-                    hour=0, minute=0, second=0, microsecond=0)
-                cards_studied_today = (
-                    self.db.session.query(func.sum(StudySession.cards_studied))
-                    .join(Deck)
-                    .filter(
-                        and_(
-                            Deck.user_id == user_id,
-                            StudySession.started_at >= today_start,
-                        )
-                    )
-                    .scalar()
-                    or 0
-                )
-
-                # Tiempo de estudio hoy (en minutos)
-                study_time_today = (
-                    self.db.session.query(func.sum(StudySession.total_time))
-                    .join(Deck)
-                    .filter(
-                        and_(
-                            Deck.user_id == user_id,
-                            StudySession.started_at >= today_start,
-                        )
-                    )
-                    .scalar()
-                    or 0
-                )
+                # Actividad de hoy desde el resumen diario
+                today_date = datetime.utcnow().date()
+                today = self._activity_by_day(
+                    user_id, today_date, today_date).get(today_date)
+                cards_studied_today = today.cards_studied if today else 0
+                study_time_today = today.study_time if today else 0
 
                 # Racha de estudio
                 study_streak = self._calculate_study_streak(user_id)
@@ -116,7 +103,8 @@ class StatsService(BaseService):
                     "longest_streak": user.longest_streak or 0,
                 }
 
-            stats = self._get_or_set_cache(cache_key, fetch_stats, timeout=300)
+            stats = self._get_or_set_cache(
+                cache_key, fetch_stats, timeout=300, stale_timeout=60)
 
             if stats is None:
                 return self._error_response("Usuario no encontrado", code=404)
@@ -127,6 +115,47 @@ class StatsService(BaseService):
             return self._handle_exception(
                 e, "obtención de estadísticas del dashboard")
 
+    def get_dashboard_version(self, user_id):
+        """
+        Versión del dashboard del usuario (para ETag/Last-Modified)
+
+        Las cartas vencidas dependen de la hora, así que la versión cambia
+        también en cada ventana de DASHBOARD_VERSION_WINDOW segundos.
+
+        Args:
+            user_id: ID del usuario
+
+        Returns:
+            dict: Respuesta con version y last_modified
+        """
+        try:
+            user_updated = select(User.updated_at).where(
+                User.id == user_id).scalar_subquery()
+            decks_updated = select(func.max(Deck.updated_at)).where(
+                Deck.user_id == user_id).scalar_subquery()
+            cards_updated = (
+                select(func.max(Flashcard.updated_at))
+                .join(Deck, Flashcard.deck_id == Deck.id)
+                .where(Deck.user_id == user_id)
+                .scalar_subquery()
+            )
+            sessions_updated = select(func.max(StudySession.updated_at)).where(
+                StudySession.user_id == user_id).scalar_subquery()
+
+            row = self.db.session.query(
+                user_updated, decks_updated, cards_updated, sessions_updated).one()
+
+            window = int(datetime.utcnow().timestamp()) // DASHBOARD_VERSION_WINDOW
+            window_start = datetime.utcfromtimestamp(window * DASHBOARD_VERSION_WINDOW)
+            return self._version_response(
+                "dashboard", window, *row,
+                scopes=[f"user:{user_id}"],
+                last_modified=(*row, window_start),
+            )
+
+        except Exception as e:
+            return self._handle_exception(e, "versión del dashboard")
+
     def get_weekly_stats(self, user_id):
         """
         Obtener estadísticas de los últimos 7 días
@@ -138,66 +167,22 @@ class StatsService(BaseService):
             dict: Respuesta con estadísticas semanales
         """
         try:
-            cache_key = f"weekly_stats:{user_id}"
+            cache_key = self._cache_key("weekly_stats", user_id=user_id)
 
             def fetch_weekly():
                 end_date = datetime.utcnow().date()
                 start_date = end_date - timedelta(days=6)
 
-                weekly_data = []
-                current_date = start_date
-
-                while current_date <= end_date:
-                    day_start = datetime.combine(
-                        current_date, datetime.min.time())
-                    day_end = datetime.combine(
-                        current_date, datetime.max.time())
-
-                    # Cartas estudiadas en el día
-                    cards_studied = (
-                        self.db.session.query(
-                            func.sum(
-                                StudySession.cards_studied)) .join(Deck) .filter(
-                            and_(
-                                Deck.user_id == user_id,
-                                StudySession.started_at.between(
-                                    day_start,
-                                    day_end),
-                            )) .scalar() or 0)
-
-                    # Tiempo de estudio en el día (en minutos)
-                    study_time = (
-                        self.db.session.query(
-                            func.sum(
-                                StudySession.total_time)) .join(Deck) .filter(
-                            and_(
-                                Deck.user_id == user_id,
-                                StudySession.started_at.between(
-                                    day_start,
-                                    day_end),
-                            )) .scalar() or 0)
-
-                    # Número de sesiones
-                    sessions_count = (
-                        self.db.session.query(StudySession) .join(Deck) .filter(
-                            and_(
-                                Deck.user_id == user_id,
-                                StudySession.started_at.between(
-                                    day_start,
-                                    day_end),
-                            )) .count())
-
-                    weekly_data.append(
-                        {
-                            "date": current_date.isoformat(),
-                            "day": current_date.strftime("%a"),
-                            "cards_studied": int(cards_studied),
-                            "study_time": int(study_time),
-                            "sessions": sessions_count,
-                        }
-                    )
-
-                    current_date += timedelta(days=1)
+                weekly_data = [
+                    {
+                        "date": entry["date"],
+                        "day": datetime.fromisoformat(entry["date"]).strftime("%a"),
+                        "cards_studied": entry["cards_studied"],
+                        "study_time": entry["study_time"],
+                        "sessions": entry["sessions"],
+                    }
+                    for entry in self._activity_series(user_id, start_date, end_date)
+                ]
 
                 return {"weekly_data": weekly_data}
 
@@ -222,7 +207,8 @@ class StatsService(BaseService):
             dict: Respuesta con análisis de rendimiento
         """
         try:
-            cache_key = f"performance_analytics:{user_id}:{days}"
+            cache_key = self._cache_key(
+                "performance_analytics", days, user_id=user_id)
 
             def fetch_performance():
                 end_date = datetime.utcnow()
@@ -314,7 +300,7 @@ class StatsService(BaseService):
             dict: Respuesta con análisis de retención
         """
         try:
-            cache_key = f"retention_analysis:{user_id}"
+            cache_key = self._cache_key("retention_analysis", user_id=user_id)
 
             def fetch_retention():
                 # Obtener cartas por intervalos de retención
@@ -417,7 +403,7 @@ class StatsService(BaseService):
             dict: Respuesta con progreso por deck
         """
         try:
-            cache_key = f"progress_tracking:{user_id}"
+            cache_key = self._cache_key("progress_tracking", user_id=user_id)
 
             def fetch_progress():
                 # Obtener decks del usuario
@@ -530,69 +516,32 @@ class StatsService(BaseService):
             if not year:
                 year = datetime.utcnow().year
 
-            cache_key = f"activity_heatmap:{user_id}:{year}"
+            cache_key = self._cache_key(
+                "activity_heatmap", year, user_id=user_id)
 
             def fetch_heatmap():
-                # Fechas del año
-                start_date = datetime(year, 1, 1)
-                end_date = datetime(year, 12, 31, 23, 59, 59)
-
-                # Obtener actividad diaria
-                daily_activity = {}
-
-                # Consulta optimizada para obtener actividad por día
-                sessions = (
-                    self.db.session.query(
-                        func.date(StudySession.started_at).label("date"),
-                        func.sum(StudySession.cards_studied).label("cards"),
-                        func.sum(StudySession.total_time).label("time"),
-                        func.count(StudySession.id).label("sessions"),
-                    )
-                    .join(Deck)
-                    .filter(
-                        and_(
-                            Deck.user_id == user_id,
-                            StudySession.started_at.between(start_date, end_date),
-                        )
-                    )
-                    .group_by(func.date(StudySession.started_at))
-                    .all()
-                )
-
-                # Procesar resultados
-                for session in sessions:
-                    date_str = session.date.isoformat()
-                    daily_activity[date_str] = {
-                        "cards_studied": int(session.cards or 0),
-                        "study_time": int(session.time or 0),
-                        "sessions": int(session.sessions or 0),
-                    }
+                # Un día por entrada a partir del resumen diario
+                series = self._activity_series(
+                    user_id, date(year, 1, 1), date(year, 12, 31))
 
-                # Generar datos para todos los días del año
                 heatmap_data = []
-                current_date = start_date.date()
-                end_date_only = end_date.date()
-
-                while current_date <= end_date_only:
-                    date_str = current_date.isoformat()
-                    activity = daily_activity.get(
-                        date_str, {"cards_studied": 0, "study_time": 0, "sessions": 0})
-
+                for entry in series:
+                    current_date = date.fromisoformat(entry["date"])
                     heatmap_data.append(
                         {
-                            "date": date_str,
+                            "date": entry["date"],
                             "day_of_week": current_date.weekday(),
                             "week_of_year": current_date.isocalendar()[1],
-                            **activity,
+                            "cards_studied": entry["cards_studied"],
+                            "study_time": entry["study_time"],
+                            "sessions": entry["sessions"],
                         }
                     )
 
-                    current_date += timedelta(days=1)
-
                 return {"year": year, "heatmap_data": heatmap_data}
 
             result = self._get_or_set_cache(
-                cache_key, fetch_heatmap, timeout=3600)
+                cache_key, fetch_heatmap, timeout=3600, stale_timeout=600)
 
             return self._success_response(result)
 
@@ -600,6 +549,163 @@ class StatsService(BaseService):
             return self._handle_exception(
                 e, "obtención de heatmap de actividad")
 
+    def get_workload_forecast(self, user_id, days=None, simulations=None):
+        """
+        Pronosticar la carga diaria de revisiones de los próximos días
+
+        Args:
+            user_id: ID del usuario
+            days: Horizonte en días (máximo workload_simulator.MAX_DAYS)
+            simulations: Número de simulaciones Monte-Carlo
+
+        Returns:
+            dict: Respuesta con carga esperada y percentiles por día
+        """
+        try:
+            days = days or workload_simulator.DEFAULT_DAYS
+            simulations = simulations or workload_simulator.DEFAULT_SIMULATIONS
+            if not 1 <= days <= workload_simulator.MAX_DAYS:
+                return self._error_response(
+                    f"days debe estar entre 1 y {workload_simulator.MAX_DAYS}", code=400)
+            if not 1 <= simulations <= workload_simulator.MAX_SIMULATIONS:
+                return self._error_response(
+                    f"simulations debe estar entre 1 y {workload_simulator.MAX_SIMULATIONS}",
+                    code=400)
+
+            cache_key = self._cache_key(
+                "workload_forecast", days, simulations, user_id=user_id)
+
+            def fetch_forecast():
+                return workload_simulator.forecast_user_workload(
+                    user_id, days=days, simulations=simulations,
+                    session=self.db.session)
+
+            result = self._get_or_set_cache(
+                cache_key, fetch_forecast, timeout=1800)
+
+            return self._success_response(result)
+
+        except Exception as e:
+            return self._handle_exception(
+                e, "pronóstico de carga de revisiones")
+
+    def get_activity_series(self, user_id, start_date, end_date):
+        """
+        Obtener la actividad diaria de un rango de fechas (días sin actividad en cero)
+
+        Args:
+            user_id: ID del usuario
+            start_date: Primer día (date, UTC)
+            end_date: Último día (date, UTC)
+
+        Returns:
+            dict: Respuesta con una entrada por día
+        """
+        try:
+            return self._success_response(
+                self._activity_series(user_id, start_date, end_date))
+        except Exception as e:
+            return self._handle_exception(e, "obtención de actividad diaria")
+
+    def get_activity_leaderboard(self, days=30, limit=10):
+        """
+        Obtener los usuarios con más cartas estudiadas en los últimos días
+
+        Returns:
+            dict: Respuesta con filas (usuario, cartas estudiadas)
+        """
+        try:
+            since = datetime.utcnow().date() - timedelta(days=days - 1)
+            cards_studied = func.sum(DailyActivity.cards_studied)
+            rows = (
+                self.db.session.query(
+                    User.id,
+                    User.username,
+                    User.first_name,
+                    User.last_name,
+                    cards_studied.label("cards_studied"),
+                )
+                .join(DailyActivity, DailyActivity.user_id == User.id)
+                .filter(DailyActivity.day >= since)
+                .group_by(User.id, User.username, User.first_name, User.last_name)
+                .order_by(cards_studied.desc())
+                .limit(limit)
+                .all()
+            )
+            return self._success_response([
+                {
+                    "user_id": row.id,
+                    "username": row.username,
+                    "name": f"{row.first_name} {row.last_name}",
+                    "cards_studied": int(row.cards_studied or 0),
+                }
+                for row in rows
+            ])
+        except Exception as e:
+            return self._handle_exception(e, "obtención de tabla de líderes")
+
+    def rebuild_daily_activity(self, user_ids=None, batch_size=500):
+        """
+        Reconstruir el resumen diario desde revisiones y sesiones (backfill)
+
+        Args:
+            user_ids: IDs de usuarios (por defecto todos)
+            batch_size: Usuarios por transacción
+
+        Returns:
+            dict: Respuesta con usuarios y días reconstruidos
+        """
+        try:
+            if user_ids is None:
+                user_ids = [
+                    user_id for (user_id,) in
+                    self.db.session.query(User.id).order_by(User.id)
+                ]
+            user_ids = list(user_ids)
+
+            days = 0
+            for start in range(0, len(user_ids), batch_size):
+                days += rebuild_daily_activity(
+                    self.db.session.connection(), user_ids[start:start + batch_size])
+                if not self._commit_or_rollback():
+                    return self._error_response(
+                        "Error al reconstruir actividad diaria", code=500)
+
+            return self._success_response(
+                {"users": len(user_ids), "days": days},
+                "Actividad diaria reconstruida")
+
+        except Exception as e:
+            return self._handle_exception(e, "reconstrucción de actividad diaria")
+
+    def _activity_by_day(self, user_id, start_date, end_date):
+        """Filas del resumen diario indexadas por día"""
+        rows = self.db.session.query(DailyActivity).filter(
+            DailyActivity.user_id == user_id,
+            DailyActivity.day.between(start_date, end_date),
+        )
+        return {row.day: row for row in rows}
+
+    def _activity_series(self, user_id, start_date, end_date):
+        """Serie diaria continua del rango, rellenando con ceros"""
+        activity = self._activity_by_day(user_id, start_date, end_date)
+
+        series = []
+        current_date = start_date
+        while current_date <= end_date:
+            row = activity.get(current_date)
+            series.append(
+                row.to_dict() if row else {
+                    "date": current_date.isoformat(),
+                    "cards_studied": 0,
+                    "cards_correct": 0,
+                    "study_time": 0,
+                    "sessions": 0,
+                }
+            )
+            current_date += timedelta(days=1)
+        return series
+
     def _calculate_study_streak(self, user_id):
         """
         Calcular racha de días consecutivos estudiando
@@ -611,20 +717,20 @@ class StatsService(BaseService):
             int: Número de días consecutivos
         """
         try:
-            # Obtener fechas únicas de estudio en orden descendente
-            study_dates = (
-                self.db.session.query(
-                    func.date(
-                        StudySession.started_at).label("study_date")) .join(Deck) .filter(
-                    Deck.user_id == user_id) .distinct() .order_by(
-                    desc("study_date")) .all())
+            # Días con actividad en orden descendente
+            dates = [
+                row.day for row in
+                self.db.session.query(DailyActivity.day)
+                .filter(
+                    DailyActivity.user_id == user_id,
+                    (DailyActivity.cards_studied > 0) | (DailyActivity.sessions_count > 0),
+                )
+                .order_by(DailyActivity.day.desc())
+            ]
 
-            if not study_dates:
+            if not dates:
                 return 0
 
-            # Convertir a lista de fechas
-            dates = [date.study_date for date in study_dates]
-
             # Calcular racha desde hoy hacia atrás
             today = datetime.utcnow().date()
             streak = 0
@@ -11,19 +11,36 @@ except ImportError:
     from backend_app.utils.algorithms import calculate_fsrs, calculate_sm2
 
 try:
-    from ..models import Deck, Flashcard, StudySession, CardReview
+    from ..utils.fsrs_optimizer import get_user_fsrs_weights
 except ImportError:
-    from backend_app.models import Deck, Flashcard, StudySession, CardReview
+    from backend_app.utils.fsrs_optimizer import get_user_fsrs_weights
 
-from sqlalchemy import and_, or_
-from datetime import datetime, timedelta
-import random
+try:
+    from ..models import Deck, Flashcard, StudySession, StudySessionQueue, CardReview
+    from ..models.models import apply_card_stats_change, record_daily_activity
+    from ..models.tags import tag_key, tagged_with
+except ImportError:
+    from backend_app.models import Deck, Flashcard, StudySession, StudySessionQueue, CardReview
+    from backend_app.models.models import apply_card_stats_change, record_daily_activity
+    from backend_app.models.tags import tag_key, tagged_with
+
+from sqlalchemy import and_, func, insert, or_, select, update
+from sqlalchemy.orm import contains_eager
+from collections import deque
+from datetime import datetime, timedelta, timezone
+import json
+
+# Tiempo de vida de la cola en memoria (la copia persistente no expira)
+CARD_QUEUE_CACHE_TIMEOUT = 6 * 3600
+
+# Reintentos de una revisión cuando otra escritura cambió la carta a la vez
+REVIEW_MAX_RETRIES = 3
 
 
 class StudyService(BaseService):
     """Servicio para gestión de sesiones de estudio y algoritmos de repetición"""
 
-    def start_study_session(self, user_id, deck_id, algorithm="fsrs"):
+    def start_study_session(self, user_id, deck_id=None, algorithm="fsrs", tag=None):
         """
         Iniciar nueva sesión de estudio
 
@@ -31,27 +48,28 @@ class StudyService(BaseService):
             user_id: ID del usuario
             deck_id: ID del deck a estudiar
             algorithm: Algoritmo de repetición ("fsrs", "sm2", "anki", "ultra_sm2")
+            tag: Estudiar las cartas con este tag (en todos los decks si no
+                se indica deck_id)
 
         Returns:
             dict: Respuesta con sesión creada
         """
         try:
-            # Verificar que el deck existe y pertenece al usuario
-            deck, error = self._get_resource_if_owned(
-                Deck, deck_id, user_id, "deck")
-            if error:
-                return error
-            
-            # Verificar que hay cartas disponibles para estudiar
-            available_cards = self._get_cards_for_study(deck_id)
-            if not available_cards:
-                return self._error_response(
-                    "No hay cartas disponibles para estudiar", code=404)
+            deck = None
+            if deck_id is not None:
+                # Verificar que el deck existe y pertenece al usuario
+                deck, error = self._get_resource_if_owned(
+                    Deck, deck_id, user_id, "deck")
+                if error:
+                    return error
+            elif not (tag and tag_key(tag)):
+                return self._error_response("Indica un deck o un tag")
 
             # Crear sesión de estudio
             session = StudySession(
                 user_id=user_id,
                 deck_id=deck_id,
+                tag=tag_key(tag) if tag else None,
                 algorithm=algorithm,
                 started_at=datetime.utcnow(),
                 cards_studied=0,
@@ -59,16 +77,29 @@ class StudyService(BaseService):
                 total_time=0,
             )
 
+            # Materializar la cola de cartas una sola vez por sesión
+            available_cards = self._get_cards_for_study(
+                session, limit=session.max_cards or 20)
+            if not available_cards:
+                return self._error_response(
+                    "No hay cartas disponibles para estudiar", code=404)
+
             self.db.session.add(session)
+            self.db.session.flush()
+            queue_record = self._create_card_queue(session, available_cards)
 
             if not self._commit_or_rollback():
                 return self._error_response(
                     "Error al crear sesión de estudio", code=500)
 
+            self._cache_card_queue(
+                session.id, queue_record.version, deque(queue_record.card_ids_list))
+
             return self._success_response(
                 {
                     "session_id": session.id,
-                    "deck_name": deck.name,
+                    "deck_name": deck.name if deck else None,
+                    "tag": session.tag,
                     "algorithm": algorithm,
                     "available_cards": len(available_cards),
                     "started_at": session.started_at.isoformat(),
@@ -92,27 +123,26 @@ class StudyService(BaseService):
         """
         try:
             # Verificar que la sesión existe y pertenece al usuario
-            session = (
-                self.db.session.query(StudySession)
-                # Sesión activa
-                .filter_by(id=session_id, user_id=user_id, completed_at=None)
-                .first()
-            )
+            session, queue_version = self._get_active_session(session_id, user_id)
 
             if not session:
                 return self._error_response(
                     "Sesión de estudio no encontrada o completada", code=404)
 
-            # Obtener cartas disponibles para esta sesión
-            available_cards = self._get_cards_for_study(session.deck_id)
+            queue = self._load_card_queue(session, queue_version)
+            card, repaired = self._peek_card_queue(session, queue)
 
-            if not available_cards:
+            # Guardar la cola si se creó aquí o se descartaron cartas borradas
+            if repaired or queue_version is None:
+                self._save_card_queue(session.id, queue)
+                if not self._commit_or_rollback():
+                    return self._error_response(
+                        "Error al actualizar la cola de estudio", code=500)
+
+            if card is None:
                 return self._error_response(
                     "No hay más cartas para estudiar", code=404)
 
-            # Seleccionar carta según prioridad
-            card = self._select_next_card(available_cards)
-
             # Preparar datos de la carta (sin mostrar la respuesta)
             card_data = {
                 "id": card.id,
@@ -130,6 +160,155 @@ class StudyService(BaseService):
         except Exception as e:
             return self._handle_exception(e, "obtención de siguiente carta")
 
+    def _get_active_session(self, session_id, user_id):
+        """
+        Obtener sesión activa junto con la versión de su cola en una consulta
+
+        Returns:
+            tuple: (session, queue_version); (None, None) si no existe
+        """
+        row = (
+            self.db.session.query(StudySession, StudySessionQueue.version)
+            .outerjoin(
+                StudySessionQueue,
+                StudySessionQueue.session_id == StudySession.id)
+            .filter(
+                StudySession.id == session_id,
+                StudySession.user_id == user_id,
+                StudySession.completed_at.is_(None),
+            )
+            .first()
+        )
+        return (row[0], row[1]) if row else (None, None)
+
+    def _card_queue_cache_key(self, session_id):
+        return f"study_queue:{session_id}"
+
+    def _cache_card_queue(self, session_id, version, queue):
+        self.cache.set(
+            self._card_queue_cache_key(session_id),
+            (version, queue),
+            timeout=CARD_QUEUE_CACHE_TIMEOUT)
+
+    def _create_card_queue(self, session, cards):
+        """
+        Crear la copia persistente de la cola (sin commit)
+        """
+        queue_record = StudySessionQueue(session_id=session.id, version=0)
+        queue_record.card_ids_list = [card.id for card in cards]
+        self.db.session.add(queue_record)
+        return queue_record
+
+    def _load_card_queue(self, session, queue_version):
+        """
+        Obtener la cola de la sesión: memoria si está al día, si no la
+        copia persistente. Las sesiones sin cola la construyen aquí.
+        """
+        cached = self.cache.get(self._card_queue_cache_key(session.id))
+        if cached is not None and queue_version is not None and cached[0] == queue_version:
+            return cached[1]
+
+        if queue_version is None:
+            cards = self._get_cards_for_study(
+                session, limit=session.max_cards or 20)
+            queue_record = self._create_card_queue(session, cards)
+            self.db.session.flush()
+        else:
+            queue_record = (
+                self.db.session.query(StudySessionQueue)
+                .filter_by(session_id=session.id)
+                .first()
+            )
+
+        queue = deque(queue_record.card_ids_list)
+        self._cache_card_queue(session.id, queue_record.version, queue)
+        return queue
+
+    def _save_card_queue(self, session_id, queue):
+        """
+        Persistir la cola e incrementar su versión (sin commit)
+        """
+        self.db.session.query(StudySessionQueue).filter_by(
+            session_id=session_id
+        ).update(
+            {
+                StudySessionQueue.card_ids: json.dumps(list(queue)),
+                StudySessionQueue.version: StudySessionQueue.version + 1,
+                StudySessionQueue.updated_at: datetime.utcnow(),
+            },
+            synchronize_session=False,
+        )
+        cached = self.cache.get(self._card_queue_cache_key(session_id))
+        version = cached[0] + 1 if cached is not None else -1
+        self._cache_card_queue(session_id, version, queue)
+
+    def _peek_card_queue(self, session, queue):
+        """
+        Obtener la carta al frente de la cola sin retirarla
+
+        Las cartas eliminadas o movidas a otro deck durante la sesión se
+        descartan aquí, así la cola se repara sin depender de quién editó.
+
+        Returns:
+            tuple: (carta o None, True si la cola cambió)
+        """
+        repaired = False
+        while queue:
+            card = (
+                self.db.session.query(Flashcard)
+                .join(Deck, Flashcard.deck_id == Deck.id)
+                .filter(
+                    Flashcard.id == queue[0],
+                    *self._session_scope(session),
+                    Flashcard.is_deleted.is_(False),
+                    Deck.is_deleted.is_(False),
+                )
+                .first()
+            )
+            if card is not None:
+                return card, repaired
+            queue.popleft()
+            repaired = True
+        return None, repaired
+
+    @staticmethod
+    def _session_scope(session):
+        """Condiciones sobre Flashcard de las cartas que abarca la sesión"""
+        scope = []
+        if session.deck_id is not None:
+            scope.append(Flashcard.deck_id == session.deck_id)
+        else:
+            # Sesión por tag: cualquier deck activo del usuario
+            scope.append(Flashcard.deck_id.in_(
+                select(Deck.id).where(
+                    Deck.user_id == session.user_id, Deck.is_deleted.is_(False))))
+        if session.tag:
+            scope.append(tagged_with(Flashcard, session.user_id, session.tag))
+        return scope
+
+    def _advance_card_queue(self, session_id, queue, card_id):
+        """
+        Retirar de la cola la carta respondida (O(1) si es la del frente)
+        """
+        if queue and queue[0] == card_id:
+            queue.popleft()
+        elif card_id in queue:
+            queue.remove(card_id)
+        else:
+            return
+        self._save_card_queue(session_id, queue)
+
+    def _remove_from_card_queue(self, session_id, queue, card_ids):
+        """
+        Retirar varias cartas respondidas de la cola con una sola escritura
+        """
+        remaining = [card_id for card_id in queue if card_id not in card_ids]
+        if len(remaining) == len(queue):
+            return
+        queue.clear()
+        queue.extend(remaining)
+        self._save_card_queue(session_id, queue)
+
     def _update_card_review_data(
             self,
             card,
@@ -137,44 +316,132 @@ class StudyService(BaseService):
             new_ease_factor,
             new_repetitions,
             algorithm_result,
-            session_algorithm):
+            session_algorithm,
+            reviewed_at=None):
+        reviewed_at = reviewed_at or datetime.utcnow()
         card.interval_days = new_interval
-        card.ease_factor = new_ease_factor
+        card.ease_factor = new_ease_factor or card.ease_factor
         card.repetitions = new_repetitions or (card.repetitions or 0) + 1
-        card.last_reviewed = datetime.utcnow()
-        card.next_review = datetime.utcnow() + timedelta(days=new_interval)
+        card.last_reviewed = reviewed_at
+        card.next_review = reviewed_at + timedelta(days=new_interval)
 
         if session_algorithm == "fsrs":
+            # _apply_fsrs devuelve el nuevo estado FSRS en "message"
+            fsrs_state = algorithm_result.get("message") or {}
             if hasattr(card, "stability"):
-                card.stability = algorithm_result.get(
+                card.stability = fsrs_state.get(
                     "stability", card.stability)
             if hasattr(card, "difficulty_fsrs"):
-                card.difficulty_fsrs = algorithm_result.get(
+                card.difficulty_fsrs = fsrs_state.get(
                     "difficulty", card.difficulty_fsrs)
         self._update_timestamps(card)
 
-    def _create_card_review_record(
+    def _card_review_values(
             self,
-            card_id,
+            card,
             session_id,
             quality,
             response_time,
-            session_algorithm,
+            previous_state):
+        return {
+            "flashcard_id": card.id,
+            "session_id": session_id,
+            "rating": self._quality_to_rating(quality),
+            "response_time": response_time or 0,
+            "previous_ease": previous_state["ease_factor"],
+            "previous_interval": previous_state["interval_days"],
+            "previous_stability": previous_state["stability"],
+            "new_ease": card.ease_factor,
+            "new_interval": card.interval_days,
+            "new_stability": card.stability,
+            "new_next_review": card.next_review,
+            "reviewed_at": card.last_reviewed,
+        }
+
+    @staticmethod
+    def _apply_review_counters(card, review_values):
+        """
+        Equivalente en memoria del listener after_insert de CardReview
+        """
+        card.total_reviews = (card.total_reviews or 0) + 1
+        if review_values["rating"] >= 3:
+            card.correct_reviews = (card.correct_reviews or 0) + 1
+        card.last_review_rating = review_values["rating"]
+        card.last_reviewed = review_values["reviewed_at"]
+
+    @staticmethod
+    def _normalize_reviewed_at(reviewed_at):
+        """
+        Convertir la hora enviada por el cliente a UTC naive, sin futuro
+        """
+        if reviewed_at is None:
+            return None
+        if isinstance(reviewed_at, str):
+            reviewed_at = datetime.fromisoformat(reviewed_at.replace("Z", "+00:00"))
+        if reviewed_at.tzinfo is not None:
+            reviewed_at = reviewed_at.astimezone(timezone.utc).replace(tzinfo=None)
+        return min(reviewed_at, datetime.utcnow())
+
+    def _apply_review_in_memory(
+            self,
+            session,
+            card,
+            quality,
+            response_time=None,
+            user_id=None,
+            reviewed_at=None):
+        """
+        Aplicar el algoritmo y actualizar carta y sesión sin tocar la base
+        de datos
+
+        Returns:
+            tuple: (valores de CardReview, nuevo intervalo) o (None, respuesta de error)
+        """
+        algorithm_result = self._apply_spaced_repetition(
+            card, quality, session.algorithm, user_id=user_id,
+            reviewed_at=reviewed_at)
+        if not algorithm_result["success"]:
+            return None, algorithm_result
+
+        new_interval, new_ease_factor, new_repetitions = algorithm_result["data"]
+
+        # Estado previo para el historial (usado por el optimizador FSRS)
+        previous_state = {
+            "ease_factor": card.ease_factor,
+            "interval_days": card.interval_days,
+            "stability": card.stability,
+        }
+
+        self._update_card_review_data(
+            card,
             new_interval,
-            new_ease_factor):
-        review = CardReview(
-            flashcard_id=card_id,
-            session_id=session_id,
-            quality=quality,
-            response_time=response_time or 0,
-            algorithm=session_algorithm,
-            interval_before=card.interval_days,
-            interval_after=new_interval,
-            ease_factor=new_ease_factor or card.ease_factor,
-            reviewed_at=datetime.utcnow(),
-        )
-        self.db.session.add(review)
-        return review
+            new_ease_factor,
+            new_repetitions,
+            algorithm_result,
+            session.algorithm,
+            reviewed_at=reviewed_at)
+        self._update_session_stats(session, quality, response_time)
+
+        review_values = self._card_review_values(
+            card, session.id, quality, response_time, previous_state)
+        return review_values, new_interval
+
+    def _record_review_activity(self, user_id, review_rows):
+        """
+        Sumar revisiones al resumen diario del usuario (una escritura por día)
+        """
+        by_day = {}
+        for row in review_rows:
+            totals = by_day.setdefault(row["reviewed_at"].date(), [0, 0, 0])
+            totals[0] += 1
+            totals[1] += 1 if row["rating"] >= 3 else 0
+            totals[2] += row["response_time"] or 0
+
+        connection = self.db.session.connection()
+        for day, (studied, correct, study_time) in by_day.items():
+            record_daily_activity(
+                connection, user_id, day,
+                cards_studied=studied, cards_correct=correct, study_time=study_time)
 
     def _update_session_stats(self, session, quality, response_time):
         session.cards_studied += 1
@@ -224,61 +491,283 @@ class StudyService(BaseService):
             dict: Respuesta con resultado del algoritmo
         """
         try:
-            session = (
-                self.db.session.query(StudySession).filter_by(
-                    id=session_id,
-                    user_id=user_id,
-                    completed_at=None).first())
+            for _ in range(REVIEW_MAX_RETRIES):
+                result = self._write_review(
+                    session_id, user_id, card_id, quality, response_time)
+                if result is not None:
+                    return result
+                # Otra revisión de la misma carta ganó la carrera: releer
+                self.db.session.rollback()
+
+            return self._error_response(
+                "La carta se está revisando en otra sesión, inténtalo de nuevo", code=409)
+
+        except Exception as e:
+            return self._handle_exception(e, "revisión de carta")
+
+    def _get_session_and_card(self, session_id, user_id, card_id):
+        """
+        Sesión activa, versión de su cola y carta respondida en una consulta
+
+        Las sesiones por tag comprueban con una consulta más que la carta
+        tenga el tag.
+
+        Returns:
+            tuple: (session, queue_version, card); card es None si no está
+                en el alcance de la sesión y session es None si no existe
+        """
+        row = (
+            self.db.session.query(StudySession, StudySessionQueue.version, Flashcard)
+            .outerjoin(
+                StudySessionQueue,
+                StudySessionQueue.session_id == StudySession.id)
+            .outerjoin(
+                Flashcard,
+                and_(
+                    Flashcard.id == card_id,
+                    or_(Flashcard.deck_id == StudySession.deck_id,
+                        StudySession.deck_id.is_(None)),
+                    Flashcard.is_deleted.is_(False),
+                ))
+            .filter(
+                StudySession.id == session_id,
+                StudySession.user_id == user_id,
+                StudySession.completed_at.is_(None),
+            )
+            .first()
+        )
+        if not row:
+            return None, None, None
+        session, queue_version, card = row
+        if card is not None and session.tag and not self.db.session.query(
+                select(Flashcard.id).where(
+                    Flashcard.id == card.id, *self._session_scope(session)).exists()
+        ).scalar():
+            card = None
+        return session, queue_version, card
+
+    def _write_review(self, session_id, user_id, card_id, quality, response_time):
+        """
+        Escribir una revisión con el mínimo de sentencias en una transacción
+
+        El algoritmo se aplica en memoria y después se emiten: un UPDATE de
+        la carta con sus contadores, el INSERT de CardReview (de Core, sin el
+        UPDATE duplicado del listener) y un UPDATE incremental de la sesión.
+        El UPDATE de la carta solo se aplica si total_reviews sigue valiendo
+        lo que se leyó (versionado optimista), así dos revisiones simultáneas
+        de la misma carta no se pisan.
+
+        Returns:
+            dict: Respuesta final, o None si hubo conflicto y hay que reintentar
+        """
+        session, queue_version, card = self._get_session_and_card(
+            session_id, user_id, card_id)
+        if not session:
+            return self._error_response(
+                "Sesión de estudio no encontrada o completada", code=404)
+        if not card:
+            return self._error_response("Carta no encontrada", code=404)
+        if not self._is_valid_quality(quality):
+            return self._error_response(
+                "La calidad debe ser un número entre 0 y 5", code=400)
+
+        read_version = card.total_reviews or 0
+        stats_before = (
+            card.is_deleted, card.last_reviewed, card.interval_days, card.next_review)
+
+        review_values, new_interval = self._apply_review_in_memory(
+            session, card, quality, response_time, user_id=user_id)
+        if review_values is None:
+            return new_interval
+        self._apply_review_counters(card, review_values)
+
+        # Los cambios ya calculados se escriben con Core: que el ORM no los
+        # vuelva a volcar al hacer flush/commit
+        self.db.session.expunge(card)
+        self.db.session.expunge(session)
+
+        updated = self.db.session.execute(
+            update(Flashcard)
+            .where(
+                Flashcard.id == card.id,
+                func.coalesce(Flashcard.total_reviews, 0) == read_version,
+            )
+            .values(
+                interval_days=card.interval_days,
+                ease_factor=card.ease_factor,
+                repetitions=card.repetitions,
+                stability=card.stability,
+                difficulty_fsrs=card.difficulty_fsrs,
+                next_review=card.next_review,
+                last_reviewed=card.last_reviewed,
+                last_review_rating=card.last_review_rating,
+                total_reviews=read_version + 1,
+                correct_reviews=card.correct_reviews,
+                updated_at=card.updated_at,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        if updated.rowcount == 0:
+            return None
+
+        connection = self.db.session.connection()
+        apply_card_stats_change(
+            connection, card.deck_id, stats_before,
+            (card.is_deleted, card.last_reviewed, card.interval_days, card.next_review))
+        self.db.session.execute(insert(CardReview), [review_values])
+
+        is_correct = quality >= 3
+        session_update = (
+            update(StudySession)
+            .where(StudySession.id == session.id, StudySession.completed_at.is_(None))
+            .values(
+                cards_studied=StudySession.cards_studied + 1,
+                cards_correct=StudySession.cards_correct + (1 if is_correct else 0),
+                total_time=StudySession.total_time + (response_time or 0),
+                updated_at=session.updated_at,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        if connection.dialect.update_returning:
+            # Contadores reales aunque otra petición de la sesión escriba a la vez
+            counters = self.db.session.execute(session_update.returning(
+                StudySession.cards_studied, StudySession.cards_correct)).first()
+            if counters is not None:
+                session.cards_studied, session.cards_correct = counters
+        else:
+            counters = self.db.session.execute(session_update).rowcount or None
+        if counters is None:
+            self.db.session.rollback()
+            return self._error_response(
+                "Sesión de estudio no encontrada o completada", code=404)
+
+        self._record_review_activity(session.user_id, [review_values])
+        self._advance_card_queue(
+            session_id, self._load_card_queue(session, queue_version), card_id)
+
+        if not self._commit_or_rollback():
+            self.cache.delete(self._card_queue_cache_key(session_id))
+            return self._error_response(
+                "Error al guardar revisión", code=500)
+
+        # Los listados de decks y estadísticas del usuario cambian
+        self._invalidate_cache(user_id=session.user_id)
+
+        return self._build_review_response(
+            card, quality, new_interval, session)
+
+    def review_cards_batch(self, session_id, user_id, answers):
+        """
+        Registrar un lote ordenado de respuestas en una sola transacción
+
+        Pensado para clientes que estudian sin conexión y sincronizan
+        después: el algoritmo se aplica en memoria respuesta a respuesta,
+        los CardReview se insertan en bloque y cartas, sesión y cola se
+        guardan con un único commit.
+
+        Args:
+            session_id: ID de la sesión de estudio
+            user_id: ID del usuario
+            answers: Lista ordenada de dicts con card_id, quality y
+                opcionalmente response_time y reviewed_at
+
+        Returns:
+            dict: Respuesta con el resultado de cada respuesta
+        """
+        try:
+            session, queue_version = self._get_active_session(session_id, user_id)
             if not session:
                 return self._error_response(
                     "Sesión de estudio no encontrada o completada", code=404)
 
-            card = (
-                self.db.session.query(Flashcard) .filter_by(
-                    id=card_id,
-                    deck_id=session.deck_id,
-                    is_deleted=False) .first())
-            if not card:
-                return self._error_response("Carta no encontrada", code=404)
-
-            if not isinstance(quality, (int, float)
-                              ) or quality < 0 or quality > 5:
-                return self._error_response(
-                    "La calidad debe ser un número entre 0 y 5", code=400)
-
-            algorithm_result = self._apply_spaced_repetition(
-                card, quality, session.algorithm)
-            if not algorithm_result["success"]:
-                return algorithm_result
-
-            new_interval, new_ease_factor, new_repetitions = algorithm_result["data"]
-
-            self._update_card_review_data(
-                card,
-                new_interval,
-                new_ease_factor,
-                new_repetitions,
-                algorithm_result,
-                session.algorithm)
-            self._create_card_review_record(
-                card_id,
-                session_id,
-                quality,
-                response_time,
-                session.algorithm,
-                new_interval,
-                new_ease_factor)
-            self._update_session_stats(session, quality, response_time)
+            # Una sola consulta para todas las cartas del lote
+            card_ids = {answer.get("card_id") for answer in answers}
+            cards = {
+                card.id: card
+                for card in self.db.session.query(Flashcard).filter(
+                    Flashcard.id.in_(card_ids),
+                    *self._session_scope(session),
+                    Flashcard.is_deleted.is_(False),
+                )
+            } if card_ids else {}
+
+            results = []
+            review_rows = []
+            for index, answer in enumerate(answers):
+                card_id = answer.get("card_id")
+                quality = answer.get("quality")
+                card = cards.get(card_id)
+
+                if card is None:
+                    error = "Carta no encontrada"
+                elif not self._is_valid_quality(quality):
+                    error = "La calidad debe ser un número entre 0 y 5"
+                else:
+                    review_values, new_interval = self._apply_review_in_memory(
+                        session,
+                        card,
+                        quality,
+                        answer.get("response_time"),
+                        user_id=user_id,
+                        reviewed_at=self._normalize_reviewed_at(answer.get("reviewed_at")),
+                    )
+                    error = None if review_values else new_interval["error"]
+
+                if error:
+                    results.append({
+                        "index": index,
+                        "card_id": card_id,
+                        "success": False,
+                        "error": error,
+                    })
+                    continue
+
+                self._apply_review_counters(card, review_values)
+                review_rows.append(review_values)
+                results.append({
+                    "index": index,
+                    "card_id": card.id,
+                    "success": True,
+                    "quality": quality,
+                    "new_interval": new_interval,
+                    "next_review": card.next_review.isoformat(),
+                    "is_correct": quality >= 3,
+                })
+
+            if review_rows:
+                # Inserción en bloque: no dispara los listeners por fila, por
+                # eso los contadores de cada carta se actualizan en memoria
+                self.db.session.execute(insert(CardReview), review_rows)
+                self._record_review_activity(session.user_id, review_rows)
+                self._remove_from_card_queue(
+                    session_id,
+                    self._load_card_queue(session, queue_version),
+                    {row["flashcard_id"] for row in review_rows},
+                )
 
-            if not self._commit_or_rollback():
-                return self._error_response(
-                    "Error al guardar revisión", code=500)
+                if not self._commit_or_rollback():
+                    self.cache.delete(self._card_queue_cache_key(session_id))
+                    return self._error_response(
+                        "Error al guardar revisiones", code=500)
 
-            return self._build_review_response(
-                card, quality, new_interval, session)
+                self._invalidate_cache(user_id=session.user_id)
+
+            return self._success_response({
+                "session_id": session_id,
+                "processed": len(review_rows),
+                "failed": len(answers) - len(review_rows),
+                "results": results,
+                "session_stats": {
+                    "cards_studied": session.cards_studied,
+                    "cards_correct": session.cards_correct,
+                    "accuracy": (
+                        (session.cards_correct / session.cards_studied * 100) if session.cards_studied > 0 else 0
+                    ),
+                },
+            }, "Respuestas registradas exitosamente")
 
         except Exception as e:
-            return self._handle_exception(e, "revisión de carta")
+            return self._handle_exception(e, "revisión de cartas en lote")
 
     def complete_study_session(self, session_id, user_id):
         """
@@ -309,11 +798,22 @@ class StudyService(BaseService):
                 (session.completed_at - session.started_at).total_seconds())
 
             self._update_timestamps(session)
+            record_daily_activity(
+                self.db.session.connection(), session.user_id,
+                session.completed_at.date(), sessions_count=1)
+
+            # La cola ya no se necesita
+            self.db.session.query(StudySessionQueue).filter_by(
+                session_id=session.id).delete(synchronize_session=False)
 
             if not self._commit_or_rollback():
                 return self._error_response(
                     "Error al completar sesión", code=500)
 
+            self.cache.delete(self._card_queue_cache_key(session.id))
+            # Las estadísticas cacheadas del usuario quedan desactualizadas
+            self._invalidate_cache(user_id=session.user_id)
+
             # Calcular estadísticas finales
             accuracy = (
                 session.cards_correct
@@ -328,7 +828,8 @@ class StudyService(BaseService):
                 "cards_correct": session.cards_correct,
                 "accuracy_percentage": round(accuracy, 1),
                 "algorithm_used": session.algorithm,
-                "deck_name": session.deck.name,
+                "deck_name": session.deck.name if session.deck_id else None,
+                "tag": session.tag,
             }
 
             return self._success_response(
@@ -338,7 +839,7 @@ class StudyService(BaseService):
             return self._handle_exception(
                 e, "finalización de sesión de estudio")
 
-    def get_due_cards(self, user_id, deck_id=None, limit=50):
+    def get_due_cards(self, user_id, deck_id=None, limit=50, tag=None):
         """
         Obtener cartas vencidas para repaso
 
@@ -346,23 +847,25 @@ class StudyService(BaseService):
             user_id: ID del usuario
             deck_id: ID del deck (opcional)
             limit: Número máximo de cartas
+            tag: Solo cartas con este tag, de todos los decks (opcional)
 
         Returns:
             dict: Respuesta con cartas vencidas
         """
         try:
-            # Query base
+            # Query base (card.deck se carga con el mismo join)
             query = (
                 self.db.session.query(Flashcard)
                 .join(Deck)
+                .options(contains_eager(Flashcard.deck))
                 .filter(
                     and_(
                         Deck.user_id == user_id,
-                        not Deck.is_deleted,
-                        not Flashcard.is_deleted,
+                        Deck.is_deleted.is_(False),
+                        Flashcard.is_deleted.is_(False),
                         or_(
                             Flashcard.next_review <= datetime.utcnow(),  # Cartas vencidas
-                            Flashcard.last_reviewed is None,  # Cartas nuevas
+                            Flashcard.last_reviewed.is_(None),  # Cartas nuevas
                         ),
                     )
                 )
@@ -371,6 +874,8 @@ class StudyService(BaseService):
             # Filtrar por deck específico si se proporciona
             if deck_id:
                 query = query.filter(Flashcard.deck_id == deck_id)
+            if tag:
+                query = query.filter(tagged_with(Flashcard, user_id, tag))
 
             # Ordenar por prioridad: vencidas primero, luego nuevas
             query = query.order_by(
@@ -408,22 +913,26 @@ class StudyService(BaseService):
         except Exception as e:
             return self._handle_exception(e, "obtención de cartas vencidas")
 
-    def _get_cards_for_study(self, deck_id, limit=20):
+    def _get_cards_for_study(self, session, limit=20):
         """
-        Obtener cartas disponibles para estudiar en un deck
+        Obtener cartas disponibles para estudiar en la sesión (su deck o su
+        tag), en orden de estudio: vencidas (más antiguas primero) y después
+        nuevas
         """
         try:
+            now = datetime.utcnow()
+
             # Priorizar cartas vencidas
             due_cards = (
                 self.db.session.query(Flashcard)
                 .filter(
                     and_(
-                        Flashcard.deck_id == deck_id,
-                        not Flashcard.is_deleted,
-                        Flashcard.next_review <= datetime.utcnow(),
+                        *self._session_scope(session),
+                        Flashcard.is_deleted.is_(False),
+                        Flashcard.next_review <= now,
                     )
                 )
-                .order_by(Flashcard.next_review.asc())
+                .order_by(Flashcard.next_review.asc(), Flashcard.id.asc())
                 .limit(limit)
                 .all()
             )
@@ -435,9 +944,11 @@ class StudyService(BaseService):
                     self.db.session.query(Flashcard)
                     .filter(
                         and_(
-                            Flashcard.deck_id == deck_id,
-                            not Flashcard.is_deleted,
-                            Flashcard.last_reviewed is None,
+                            *self._session_scope(session),
+                            Flashcard.is_deleted.is_(False),
+                            Flashcard.last_reviewed.is_(None),
+                            # Las nuevas ya vencidas están en due_cards
+                            or_(Flashcard.next_review.is_(None), Flashcard.next_review > now),
                         )
                     )
                     .order_by(Flashcard.created_at.asc())
@@ -452,38 +963,15 @@ class StudyService(BaseService):
         except Exception:
             return []
 
-    def _select_next_card(self, available_cards):
-        """
-        Seleccionar la siguiente carta según prioridad
-        """
-        if not available_cards:
-            return None
-
-        # Separar cartas vencidas y nuevas
-        due_cards = [
-            c for c in available_cards if c.next_review and c.next_review <= datetime.utcnow()]
-        new_cards = [c for c in available_cards if c.last_reviewed is None]
-
-        # Priorizar cartas vencidas
-        if due_cards:
-            # Ordenar por fecha de vencimiento (más vencidas primero)
-            due_cards.sort(key=lambda x: x.next_review)
-            return due_cards[0]
-
-        # Si no hay vencidas, tomar carta nueva
-        if new_cards:
-            return new_cards[0]
-
-        # Fallback: carta aleatoria
-        return random.choice(available_cards)
-
-    def _apply_spaced_repetition(self, card, quality, algorithm):
+    def _apply_spaced_repetition(self, card, quality, algorithm, user_id=None,
+                                 reviewed_at=None):
         """
         Aplicar algoritmo de repetición espaciada
         """
         try:
             if algorithm == "fsrs":
-                return self._apply_fsrs(card, quality)
+                return self._apply_fsrs(
+                    card, quality, user_id=user_id, reviewed_at=reviewed_at)
             elif algorithm == "sm2":
                 return self._apply_sm2(card, quality)
             elif algorithm == "ultra_sm2":
@@ -498,16 +986,51 @@ class StudyService(BaseService):
             return self._handle_exception(
                 e, f"aplicación de algoritmo {algorithm}")
 
-    def _apply_fsrs(self, card, quality):
+    @staticmethod
+    def _is_valid_quality(quality):
+        return (isinstance(quality, (int, float)) and not isinstance(quality, bool)
+                and 0 <= quality <= 5)
+
+    @staticmethod
+    def _quality_to_rating(quality):
         """
-        Aplicar algoritmo FSRS
+        Convertir calidad a calificación 1-4 (1=Again, 2=Hard, 3=Good, 4=Easy)
+
+        La API envía 1-4; 0 y 5 se aceptan y se acotan al rango.
+        """
+        return min(max(int(quality), 1), 4)
+
+    def _get_user_fsrs_weights(self, user_id):
+        """
+        Obtener pesos FSRS optimizados del usuario (None = pesos por defecto)
+        """
+        if not user_id:
+            return None
+        weights = self._get_or_set_cache(
+            self._cache_key("fsrs_weights", user_id),
+            lambda: get_user_fsrs_weights(user_id, session=self.db.session) or [],
+            timeout=3600,
+        )
+        return weights or None
+
+    def _apply_fsrs(self, card, quality, user_id=None, reviewed_at=None):
+        """
+        Aplicar algoritmo FSRS con los pesos personalizados del usuario
         """
         try:
-            stability = getattr(card, "stability", 2.5)
-            difficulty = getattr(card, "difficulty_fsrs", 5.0)
+            stability = getattr(card, "stability", None) or 1.0
+            difficulty = getattr(card, "difficulty_fsrs", None) or 5.0
+            elapsed_days = 0
+            if card.last_reviewed:
+                elapsed_days = max(
+                    ((reviewed_at or datetime.utcnow()) - card.last_reviewed).days, 0)
 
             new_stability, new_difficulty, new_interval = calculate_fsrs(
-                stability, difficulty, quality, card.repetitions or 0
+                rating=self._quality_to_rating(quality),
+                stability=stability,
+                difficulty=difficulty,
+                elapsed_days=elapsed_days,
+                weights=self._get_user_fsrs_weights(user_id),
             )
 
             return self._success_response(
@@ -529,7 +1052,11 @@ class StudyService(BaseService):
             repetitions = card.repetitions or 0
 
             new_ease_factor, new_interval, new_repetitions = calculate_sm2(
-                ease_factor, repetitions, quality)
+                rating=self._quality_to_rating(quality),
+                ease_factor=ease_factor,
+                interval=card.interval_days or 1,
+                repetitions=repetitions,
+            )
 
             return self._success_response(
                 (new_interval, new_ease_factor, new_repetitions))
@@ -549,7 +1076,11 @@ class StudyService(BaseService):
 
             # Calcular SM-2 base
             new_ease_factor, new_interval, new_repetitions = calculate_sm2(
-                ease_factor, repetitions, quality)
+                rating=self._quality_to_rating(quality),
+                ease_factor=ease_factor,
+                interval=card.interval_days or 1,
+                repetitions=repetitions,
+            )
 
             # Aplicar límites dinámicos del Ultra SM-2
             if quality < 3:
@@ -589,9 +1120,14 @@ class StudyService(BaseService):
             elif repetitions >= 2 and quality >= 3:
                 # Carta graduada: usar SM-2
                 new_ease_factor, new_interval, new_repetitions = calculate_sm2(
-                    ease_factor, repetitions - 2, quality)
+                    rating=self._quality_to_rating(quality),
+                    ease_factor=ease_factor,
+                    interval=card.interval_days or 1,
+                    repetitions=repetitions - 2,
+                )
+                # Las repeticiones de SM-2 se cuentan tras los dos pasos
                 return self._success_response(
-                    (new_interval, new_ease_factor, new_repetitions))
+                    (new_interval, new_ease_factor, new_repetitions + 2))
             else:
                 # Respuesta incorrecta: reiniciar
                 new_interval = 1 / 1440  # 1 minuto
@@ -0,0 +1,185 @@
+"""
+TagService - Conteos y listados por tag
+Usa las tablas normalizadas de models.tags en lugar de la columna JSON
+"""
+
+from .base_service import BaseService
+
+try:
+    from ..models import Deck, Flashcard
+    from ..models.tags import (
+        DeckTag, FlashcardTag, Tag, backfill_tags, tag_key, tagged_with)
+except ImportError:
+    from backend_app.models import Deck, Flashcard
+    from backend_app.models.tags import (
+        DeckTag, FlashcardTag, Tag, backfill_tags, tag_key, tagged_with)
+from sqlalchemy import func
+
+
+class TagService(BaseService):
+    """Servicio de tags del usuario"""
+
+    def get_user_tags(self, user_id):
+        """
+        Tags del usuario con el número de decks y flashcards de cada uno
+
+        Args:
+            user_id: ID del usuario
+
+        Returns:
+            dict: Respuesta con tags ordenados por número de flashcards
+        """
+        try:
+            cache_key = self._cache_key("user_tags", user_id=user_id)
+
+            def fetch_tags():
+                deck_counts = dict(
+                    self.db.session.query(DeckTag.tag_id, func.count())
+                    .join(Tag, Tag.id == DeckTag.tag_id)
+                    .join(Deck, Deck.id == DeckTag.deck_id)
+                    .filter(Tag.user_id == user_id, Deck.is_deleted.is_(False))
+                    .group_by(DeckTag.tag_id)
+                    .all()
+                )
+                card_counts = dict(
+                    self.db.session.query(FlashcardTag.tag_id, func.count())
+                    .join(Tag, Tag.id == FlashcardTag.tag_id)
+                    .join(Flashcard, Flashcard.id == FlashcardTag.flashcard_id)
+                    .join(Deck, Deck.id == Flashcard.deck_id)
+                    .filter(
+                        Tag.user_id == user_id,
+                        Flashcard.is_deleted.is_(False),
+                        Deck.is_deleted.is_(False),
+                    )
+                    .group_by(FlashcardTag.tag_id)
+                    .all()
+                )
+
+                tag_ids = set(deck_counts) | set(card_counts)
+                if not tag_ids:
+                    return []
+                tags = [
+                    {
+                        "name": name,
+                        "deck_count": deck_counts.get(tag_id, 0),
+                        "flashcard_count": card_counts.get(tag_id, 0),
+                    }
+                    for tag_id, name in self.db.session.query(Tag.id, Tag.name)
+                    .filter(Tag.id.in_(tag_ids))
+                ]
+                return sorted(
+                    tags, key=lambda tag: (-tag["flashcard_count"], -tag["deck_count"],
+                                           tag_key(tag["name"])))
+
+            return self._success_response(
+                self._get_or_set_cache(cache_key, fetch_tags, timeout=300))
+
+        except Exception as e:
+            return self._handle_exception(e, "obtención de tags")
+
+    def get_decks_by_tag(self, user_id, tag, page=1, per_page=20):
+        """
+        Decks del usuario con un tag
+
+        Args:
+            user_id: ID del usuario
+            tag: Nombre del tag (sin distinguir mayúsculas)
+            page: Número de página
+            per_page: Elementos por página
+
+        Returns:
+            dict: Respuesta con decks paginados
+        """
+        try:
+            if not tag_key(tag or ""):
+                return self._error_response("Se requiere un tag")
+
+            query = (
+                self.db.session.query(Deck)
+                .filter(
+                    Deck.user_id == user_id,
+                    Deck.is_deleted.is_(False),
+                    tagged_with(Deck, user_id, tag),
+                )
+                .order_by(Deck.updated_at.desc(), Deck.id.desc())
+            )
+            result = self._apply_pagination(query, page, per_page)
+
+            return self._success_response(
+                [deck.to_dict() for deck in result["items"]],
+                pagination=result["pagination"])
+
+        except Exception as e:
+            return self._handle_exception(e, "obtención de decks por tag")
+
+    def get_flashcards_by_tag(self, user_id, tag, page=1, per_page=20):
+        """
+        Flashcards del usuario con un tag, de todos sus decks
+
+        Args:
+            user_id: ID del usuario
+            tag: Nombre del tag (sin distinguir mayúsculas)
+            page: Número de página
+            per_page: Elementos por página
+
+        Returns:
+            dict: Respuesta con flashcards paginadas (con deck_name)
+        """
+        try:
+            if not tag_key(tag or ""):
+                return self._error_response("Se requiere un tag")
+
+            query = (
+                self.db.session.query(Flashcard, Deck.name)
+                .join(Deck, Deck.id == Flashcard.deck_id)
+                .filter(
+                    Deck.user_id == user_id,
+                    Deck.is_deleted.is_(False),
+                    Flashcard.is_deleted.is_(False),
+                    tagged_with(Flashcard, user_id, tag),
+                )
+                .order_by(Flashcard.created_at.desc(), Flashcard.id.desc())
+            )
+            result = self._apply_pagination(query, page, per_page)
+
+            return self._success_response(
+                [
+                    {**card.to_dict(), "deck_name": deck_name}
+                    for card, deck_name in result["items"]
+                ],
+                pagination=result["pagination"])
+
+        except Exception as e:
+            return self._handle_exception(e, "obtención de flashcards por tag")
+
+    def rebuild_tags(self, deck_ids=None, batch_size=500):
+        """
+        Reconstruir las tablas de tags desde la columna JSON (backfill)
+
+        Args:
+            deck_ids: IDs de decks a reconstruir (por defecto todos)
+            batch_size: Decks por transacción
+
+        Returns:
+            dict: Respuesta con decks y filas sincronizadas
+        """
+        try:
+            if deck_ids is None:
+                deck_ids = [
+                    deck_id for (deck_id,) in
+                    self.db.session.query(Deck.id).order_by(Deck.id)
+                ]
+            deck_ids = list(deck_ids)
+
+            synced = 0
+            for start in range(0, len(deck_ids), batch_size):
+                synced += backfill_tags(
+                    self.db.session.connection(), deck_ids[start:start + batch_size])
+                if not self._commit_or_rollback():
+                    return self._error_response("Error al reconstruir tags", code=500)
+
+            return self._success_response(
+                {"decks": len(deck_ids), "synced": synced}, "Tags reconstruidos")
+
+        except Exception as e:
+            return self._handle_exception(e, "reconstrucción de tags")
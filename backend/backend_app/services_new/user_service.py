@@ -243,7 +243,7 @@ class UserService(BaseService):
                 return self._error_response("Usuario no encontrado", code=404)
 
             # Usar cache para estadísticas
-            cache_key = f"user_stats:{user_id}"
+            cache_key = self._cache_key("user_stats", user_id=user_id)
 
             def fetch_stats():
                 return {
@@ -311,7 +311,7 @@ class UserService(BaseService):
                     "Error al actualizar estadísticas", code=500)
 
             # Invalidar cache de estadísticas
-            self._invalidate_cache_pattern(f"user_stats:{user_id}")
+            self._invalidate_cache(user_id=user_id)
 
             return self._success_response(
                 {"message": "Estadísticas actualizadas"},
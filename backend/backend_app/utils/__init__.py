@@ -4,18 +4,25 @@ Utilidades y helpers para StudyingFlash
 
 from .algorithms import (
     calculate_fsrs,
+    calculate_fsrs_batch,
     calculate_sm2,
+    calculate_sm2_batch,
     get_next_review_date,
     update_card_after_review,
 )
 from .utils import get_current_user_id
-from .cache import CacheManager
+from .cache import CacheBackend, CacheManager, RedisCache, get_cache
 
 __all__ = [
     "calculate_fsrs",
+    "calculate_fsrs_batch",
     "calculate_sm2",
+    "calculate_sm2_batch",
     "get_next_review_date",
     "update_card_after_review",
     "get_current_user_id",
+    "CacheBackend",
     "CacheManager",
+    "RedisCache",
+    "get_cache",
 ]
@@ -5,7 +5,35 @@ Implementación de FSRS (Free Spaced Repetition Scheduler) y SM-2 (SuperMemo 2)
 
 import math
 from datetime import datetime, timedelta
-from typing import Tuple
+from typing import Sequence, Tuple
+
+# NumPy solo es necesario para las variantes por lotes
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# Parámetros por defecto del algoritmo FSRS
+FSRS_DEFAULT_WEIGHTS = (
+    0.4,
+    0.6,
+    2.4,
+    5.8,
+    4.93,
+    0.94,
+    0.86,
+    0.01,
+    1.49,
+    0.14,
+    0.94,
+    2.18,
+    0.05,
+    0.34,
+    1.26,
+    0.29,
+    2.61,
+)
 
 
 def calculate_fsrs(
@@ -14,6 +42,7 @@ def calculate_fsrs(
     difficulty: float,
     elapsed_days: int = 0,
     retrievability: float = None,
+    weights: Sequence[float] = None,
 ) -> Tuple[float, float, int]:
     """
     Algoritmo FSRS (Free Spaced Repetition Scheduler)
@@ -24,31 +53,14 @@ def calculate_fsrs(
         difficulty: Dificultad actual de la carta
         elapsed_days: Días transcurridos desde la última revisión
         retrievability: Probabilidad de recordar (calculada automáticamente si no se proporciona)
+        weights: Parámetros FSRS personalizados (por defecto FSRS_DEFAULT_WEIGHTS)
 
     Returns:
         Tuple[nueva_estabilidad, nueva_dificultad, nuevo_intervalo]
     """
 
     # Parámetros del algoritmo FSRS
-    w = [
-        0.4,
-        0.6,
-        2.4,
-        5.8,
-        4.93,
-        0.94,
-        0.86,
-        0.01,
-        1.49,
-        0.14,
-        0.94,
-        2.18,
-        0.05,
-        0.34,
-        1.26,
-        0.29,
-        2.61,
-    ]
+    w = FSRS_DEFAULT_WEIGHTS if weights is None else weights
 
     # Calcular retrievability si no se proporciona
     if retrievability is None and elapsed_days > 0:
@@ -153,6 +165,194 @@ def calculate_sm2(rating: int, ease_factor: float, interval: int,
     return new_ease_factor, new_interval, new_repetitions
 
 
+def _require_numpy():
+    """Verificar que NumPy está disponible para los cálculos por lotes"""
+    if np is None:
+        raise ImportError(
+            "NumPy es requerido para calculate_fsrs_batch/calculate_sm2_batch")
+
+
+def _fsrs_kernel(rating, stability, difficulty, retrievability, w):
+    """
+    Fórmulas FSRS vectorizadas sin conversión de entradas
+
+    Cada w[i] puede ser un escalar o un array que se difunde contra el estado
+    de las cartas, lo que permite evaluar varios vectores de parámetros a la
+    vez (usado por el optimizador de parámetros por usuario).
+
+    Returns:
+        Tuple[nuevas_estabilidades, nuevas_dificultades, intervalos_sin_truncar]
+    """
+    again = rating == 1
+    easy = rating == 4
+
+    # Calcular nueva dificultad
+    shifted = difficulty + w[6] * (3 - rating)
+    new_difficulty = np.where(
+        again, np.minimum(10, shifted), np.maximum(1, shifted))
+
+    # Calcular nueva estabilidad (ambas ramas, luego seleccionar)
+    forget_stability = (
+        w[11]
+        * np.power(difficulty, -w[12])
+        * (np.power(stability + 1, w[13]) - 1)
+        * np.exp((1 - retrievability) * w[14])
+    )
+    bonus_factor = np.where(easy, 1.3, 1.0)
+    success_stability = (
+        stability
+        * bonus_factor
+        * (
+            1
+            + np.exp(w[8])
+            * (11 - new_difficulty)
+            * np.power(stability, -w[9])
+            * (np.exp((1 - retrievability) * w[10]) - 1)
+        )
+    )
+    new_stability = np.where(
+        again, forget_stability, np.maximum(0.01, success_stability))
+
+    # Intervalo antes de truncar
+    interval_factor = np.where(again, w[15], np.where(easy, 1.5, 0.9))
+
+    return new_stability, new_difficulty, new_stability * interval_factor
+
+
+def calculate_fsrs_batch(
+    ratings,
+    stabilities,
+    difficulties,
+    elapsed_days=0,
+    retrievabilities=None,
+    weights=None,
+):
+    """
+    Versión vectorizada de calculate_fsrs para reprogramar colecciones completas
+
+    Aplica las mismas fórmulas que calculate_fsrs elemento a elemento: las
+    dificultades y los intervalos coinciden exactamente con la llamada escalar
+    y las estabilidades difieren como máximo en el redondeo de exp/pow.
+
+    Args:
+        ratings: Array de calificaciones (1=Again, 2=Hard, 3=Good, 4=Easy)
+        stabilities: Array de estabilidades actuales
+        difficulties: Array de dificultades actuales
+        elapsed_days: Array (o escalar) de días desde la última revisión
+        retrievabilities: Array opcional de retrievability; si se omite se
+            calcula como en calculate_fsrs
+        weights: Parámetros FSRS personalizados (por defecto FSRS_DEFAULT_WEIGHTS)
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]:
+            (nuevas_estabilidades, nuevas_dificultades, nuevos_intervalos)
+    """
+    _require_numpy()
+
+    w = FSRS_DEFAULT_WEIGHTS if weights is None else tuple(weights)
+
+    rating = np.asarray(ratings)
+    stability = np.asarray(stabilities, dtype=np.float64)
+    difficulty = np.asarray(difficulties, dtype=np.float64)
+    elapsed = np.asarray(elapsed_days, dtype=np.float64)
+    rating, stability, difficulty, elapsed = np.broadcast_arrays(
+        rating, stability, difficulty, elapsed)
+
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        # Calcular retrievability si no se proporciona
+        if retrievabilities is None:
+            retrievability = np.where(
+                elapsed > 0, np.power(0.9, elapsed / stability), 1.0)
+        else:
+            retrievability = np.broadcast_to(
+                np.asarray(retrievabilities, dtype=np.float64), rating.shape)
+
+        new_stability, new_difficulty, raw_interval = _fsrs_kernel(
+            rating, stability, difficulty, retrievability, w)
+
+        # Calcular nuevo intervalo (int() trunca hacia cero)
+        min_interval = np.where(rating == 4, 2, 1)
+        new_interval = np.asarray(np.maximum(
+            min_interval, np.trunc(raw_interval).astype(np.int64)))
+
+    # exp/pow de NumPy pueden diferir en 1 ULP de math.*; los elementos cuyo
+    # intervalo queda justo en el borde de truncamiento se recalculan con la
+    # versión escalar para que los intervalos coincidan siempre.
+    fraction = raw_interval - np.floor(raw_interval)
+    tolerance = 1e-9 * np.abs(raw_interval)
+    for i in np.flatnonzero((fraction < tolerance) | (1 - fraction < tolerance)):
+        index = np.unravel_index(i, rating.shape)
+        new_stability[index], new_difficulty[index], new_interval[index] = (
+            calculate_fsrs(
+                int(rating[index]),
+                float(stability[index]),
+                float(difficulty[index]),
+                float(elapsed[index]),
+                None if retrievabilities is None else float(retrievability[index]),
+                weights=w,
+            )
+        )
+
+    return new_stability, new_difficulty, new_interval
+
+
+def calculate_sm2_batch(ratings, ease_factors, intervals, repetitions):
+    """
+    Versión vectorizada de calculate_sm2 para reprogramar colecciones completas
+
+    Args:
+        ratings: Array de calificaciones (1=Again, 2=Hard, 3=Good, 4=Easy)
+        ease_factors: Array de factores de facilidad actuales
+        intervals: Array de intervalos actuales en días
+        repetitions: Array de repeticiones consecutivas correctas
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]:
+            (nuevos_ease_factors, nuevos_intervalos, nuevas_repeticiones)
+    """
+    _require_numpy()
+
+    rating = np.asarray(ratings)
+    ease_factor = np.asarray(ease_factors, dtype=np.float64)
+    interval = np.asarray(intervals, dtype=np.int64)
+    reps = np.asarray(repetitions, dtype=np.int64)
+    rating, ease_factor, interval, reps = np.broadcast_arrays(
+        rating, ease_factor, interval, reps)
+
+    failed = rating < 3
+    easy = rating == 4
+
+    # Respuestas correctas
+    new_repetitions = np.where(failed, 0, reps + 1)
+
+    grown_interval = np.trunc(interval * ease_factor).astype(np.int64)
+    passed_interval = np.where(
+        new_repetitions == 1,
+        np.where(rating < 4, 1, 2),
+        np.where(new_repetitions == 2, 6, grown_interval),
+    )
+    passed_interval = np.where(
+        easy,
+        np.maximum(
+            passed_interval,
+            np.trunc(passed_interval * 1.3).astype(np.int64)),
+        passed_interval,
+    )
+
+    passed_ease = np.where(easy, ease_factor + 0.15, ease_factor)
+    quality_gap = 5 - rating
+    passed_ease = passed_ease + \
+        (0.1 - quality_gap * (0.08 + quality_gap * 0.02))
+    passed_ease = np.maximum(1.3, passed_ease)
+
+    # Respuestas incorrectas
+    new_interval = np.where(failed, 1, passed_interval)
+    new_ease_factor = np.where(
+        failed, np.maximum(1.3, ease_factor - 0.2), passed_ease)
+
+    return new_ease_factor, new_interval, new_repetitions
+
+
 def get_next_review_date(interval_days: int) -> datetime:
     """
     Calcular la fecha de la próxima revisión
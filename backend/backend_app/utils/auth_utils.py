@@ -2,7 +2,7 @@
 Utilidades de autenticación para eliminar duplicación de código
 """
 from backend_app.models.models import User, Deck, Flashcard
-from .error_handlers import NotFoundError, PermissionErr
+from .error_handlers import NotFoundError, PermissionError
 
 def get_current_user_or_404(user_id):
     """
@@ -1,31 +1,640 @@
 """
-Sistema de cache simplificado para StudyingFlash
+Sistema de cache para StudyingFlash
+
+Dos backends con la misma interfaz (CacheBackend):
+
+- CacheManager: memoria del proceso, acotado por entradas y bytes
+  (desalojo LRU), con TTL por entrada e invalidación por prefijo/patrón
+  usando un índice de claves.
+- RedisCache: compartido entre workers a través de un servidor Redis
+  (REDIS_URL), de modo que una escritura invalida en todos los procesos.
+
+El backend se elige con CACHE_TYPE ("simple" o "redis") en init_cache().
 """
 
+import fnmatch
+import logging
+import math
+import pickle
+import secrets
+import sys
+import threading
+import time
+from collections import OrderedDict, defaultdict, namedtuple
 
-class CacheManager:
-    """Cache manager simplificado usando memoria"""
+logger = logging.getLogger(__name__)
 
-    def __init__(self):
-        self._cache = {}
+# Límites por defecto (por proceso)
+DEFAULT_MAX_ENTRIES = 10000
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_TIMEOUT = 300
+
+DEFAULT_KEY_PREFIX = "studyingflash:"
+
+# Separador de segmentos en las claves ("user_decks:1:1:20:")
+KEY_SEPARATOR = ":"
+
+_WILDCARDS = "*?["
+
+# Las generaciones duran más que cualquier entrada versionada; si una se
+# pierde, se crea otra nueva y las entradas anteriores dejan de leerse.
+GENERATION_TIMEOUT = 7 * 24 * 3600
+
+
+def _estimate_size(value):
+    """Tamaño aproximado en bytes de un valor cacheado"""
+    try:
+        return len(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return sys.getsizeof(value)
+
+
+def _key_prefixes(key):
+    """Prefijos completos por segmento: "a:b:c" -> "a", "a:b" """
+    parts = key.split(KEY_SEPARATOR)
+    return [KEY_SEPARATOR.join(parts[:i]) for i in range(1, len(parts))]
+
+
+class CacheBackend:
+    """Interfaz común de los backends de cache"""
 
     def get(self, key):
-        """Obtener valor del cache"""
-        return self._cache.get(key)
+        """Obtener valor (None si no existe o expiró)"""
+        raise NotImplementedError
 
-    def set(self, key, value, timeout=300):
-        """Establecer valor en cache"""
-        self._cache[key] = value
+    def set(self, key, value, timeout=None):
+        """Guardar valor con TTL en segundos (None = por defecto, 0 = sin expiración)"""
+        raise NotImplementedError
+
+    def delete(self, key):
+        """Eliminar una clave"""
+        raise NotImplementedError
+
+    def delete_pattern(self, pattern):
+        """Eliminar las claves que coinciden con un patrón glob"""
+        raise NotImplementedError
+
+    def clear(self):
+        """Eliminar todas las claves del cache"""
+        raise NotImplementedError
+
+    def get_stats(self):
+        """Contadores de uso"""
+        raise NotImplementedError
+
+    def get_many(self, keys):
+        """
+        Obtener varias claves de una vez
+
+        Returns:
+            dict: Solo las claves encontradas
+        """
+        found = {}
+        for key in keys:
+            value = self.get(key)
+            if value is not None:
+                found[key] = value
+        return found
+
+    def set_many(self, mapping, timeout=None):
+        """Guardar varias claves con el mismo TTL"""
+        results = [self.set(key, value, timeout=timeout) for key, value in mapping.items()]
+        return all(results)
+
+    def delete_prefix(self, prefix):
+        """Eliminar todas las claves bajo un prefijo de segmentos"""
+        return self.delete_pattern(f"{prefix}{KEY_SEPARATOR}*") + int(self.delete(prefix))
+
+
+class CacheManager(CacheBackend):
+    """Cache manager en memoria, thread-safe, con TTL y desalojo LRU"""
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES,
+                 default_timeout=DEFAULT_TIMEOUT):
+        """
+        Args:
+            max_entries: Número máximo de entradas
+            max_bytes: Tamaño máximo aproximado de los valores
+            default_timeout: TTL en segundos cuando set() no lo indica
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_timeout = default_timeout
+
+        # clave -> (valor, expira_en, tamaño); el orden es el de uso (LRU)
+        self._cache = OrderedDict()
+        # prefijo por segmentos -> claves que lo comparten
+        self._index = defaultdict(set)
+        self._bytes = 0
+        self._lock = threading.RLock()
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def get(self, key):
+        """Obtener valor del cache (None si no existe o expiró)"""
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+
+            value, expires_at, _ = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                self._remove(key)
+                self._expirations += 1
+                self._misses += 1
+                return None
+
+            self._cache.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def set(self, key, value, timeout=None):
+        """
+        Establecer valor en cache
+
+        Args:
+            key: Clave
+            value: Valor a guardar
+            timeout: TTL en segundos (None = por defecto, 0 = sin expiración)
+
+        Returns:
+            bool: False si el valor no cabe en el cache
+        """
+        size = _estimate_size(value)
+        if size > self.max_bytes:
+            return False
+
+        if timeout is None:
+            timeout = self.default_timeout
+        expires_at = time.monotonic() + timeout if timeout else None
+
+        with self._lock:
+            if key in self._cache:
+                self._remove(key)
+            self._cache[key] = (value, expires_at, size)
+            self._bytes += size
+            for prefix in _key_prefixes(key):
+                self._index[prefix].add(key)
+            self._evict()
         return True
 
     def delete(self, key):
         """Eliminar valor del cache"""
-        if key in self._cache:
-            del self._cache[key]
-            return True
-        return False
+        with self._lock:
+            if key in self._cache:
+                self._remove(key)
+                return True
+            return False
+
+    def delete_prefix(self, prefix):
+        """
+        Eliminar todas las claves que empiezan por un prefijo de segmentos
+
+        Args:
+            prefix: Prefijo sin separador final (p. ej. "user_decks:1")
+
+        Returns:
+            int: Número de claves eliminadas
+        """
+        with self._lock:
+            keys = list(self._index.get(prefix, ()))
+            if prefix in self._cache:
+                keys.append(prefix)
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def delete_pattern(self, pattern):
+        """
+        Eliminar claves que coincidan con un patrón glob (p. ej. "user_decks:1:*")
+
+        Solo se recorren las claves del prefijo fijo más largo del patrón.
+
+        Returns:
+            int: Número de claves eliminadas
+        """
+        wildcard = min(
+            (pattern.index(char) for char in _WILDCARDS if char in pattern),
+            default=None)
+        if wildcard is None:
+            return int(self.delete(pattern))
+
+        fixed = pattern[:wildcard]
+        prefix = fixed.rsplit(KEY_SEPARATOR, 1)[0] if KEY_SEPARATOR in fixed else None
+
+        with self._lock:
+            if prefix is None:
+                candidates = list(self._cache)
+            else:
+                candidates = list(self._index.get(prefix, ()))
+            keys = [key for key in candidates if fnmatch.fnmatchcase(key, pattern)]
+            for key in keys:
+                self._remove(key)
+            return len(keys)
 
     def clear(self):
         """Limpiar todo el cache"""
-        self._cache.clear()
+        with self._lock:
+            self._cache.clear()
+            self._index.clear()
+            self._bytes = 0
         return True
+
+    def get_stats(self):
+        """Contadores de uso del cache"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._cache),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+            }
+
+    def __len__(self):
+        return len(self._cache)
+
+    def _remove(self, key):
+        """Quitar una clave del cache y del índice (con el lock tomado)"""
+        _, _, size = self._cache.pop(key)
+        self._bytes -= size
+        for prefix in _key_prefixes(key):
+            keys = self._index.get(prefix)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._index[prefix]
+
+    def _evict(self):
+        """Desalojar entradas expiradas o menos usadas hasta cumplir los límites"""
+        now = time.monotonic()
+        while len(self._cache) > self.max_entries or self._bytes > self.max_bytes:
+            key, (_, expires_at, _) = next(iter(self._cache.items()))
+            self._remove(key)
+            if expires_at is not None and expires_at <= now:
+                self._expirations += 1
+            else:
+                self._evictions += 1
+
+
+class RedisCache(CacheBackend):
+    """
+    Cache compartido entre procesos sobre Redis
+
+    Los valores se serializan con pickle: el servidor debe ser de confianza
+    (el mismo que ya usa el rate limiter). Los errores de conexión se
+    registran y se tratan como fallos de cache para no romper peticiones.
+    """
+
+    def __init__(self, url=None, client=None, key_prefix=DEFAULT_KEY_PREFIX,
+                 default_timeout=DEFAULT_TIMEOUT):
+        """
+        Args:
+            url: URL del servidor (REDIS_URL)
+            client: Cliente compatible con redis-py ya creado (opcional)
+            key_prefix: Prefijo de todas las claves de la aplicación
+            default_timeout: TTL en segundos cuando set() no lo indica
+        """
+        if client is None:
+            try:
+                import redis
+            except ImportError as e:
+                raise RuntimeError(
+                    "CACHE_TYPE=redis requiere el paquete 'redis'") from e
+            client = redis.Redis.from_url(
+                url, socket_timeout=1, socket_connect_timeout=1)
+
+        self._client = client
+        self.key_prefix = key_prefix
+        self.default_timeout = default_timeout
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._errors = 0
+
+    def get(self, key):
+        """Obtener valor del cache"""
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys):
+        """Obtener varias claves con un único MGET"""
+        keys = list(keys)
+        if not keys:
+            return {}
+        try:
+            raw_values = self._client.mget([self._key(key) for key in keys])
+        except Exception as e:
+            self._error("get_many", e)
+            self._count(misses=len(keys))
+            return {}
+
+        found = {}
+        for key, raw in zip(keys, raw_values):
+            if raw is not None:
+                found[key] = pickle.loads(raw)
+        self._count(hits=len(found), misses=len(keys) - len(found))
+        return found
+
+    def set(self, key, value, timeout=None):
+        """Establecer valor en cache"""
+        return self.set_many({key: value}, timeout=timeout)
+
+    def set_many(self, mapping, timeout=None):
+        """Guardar varias claves en un único pipeline"""
+        if not mapping:
+            return True
+        if timeout is None:
+            timeout = self.default_timeout
+        expires = max(1, math.ceil(timeout)) if timeout else None
+        try:
+            pipeline = self._client.pipeline(transaction=False)
+            for key, value in mapping.items():
+                pipeline.set(
+                    self._key(key), pickle.dumps(value, pickle.HIGHEST_PROTOCOL), ex=expires)
+            pipeline.execute()
+            return True
+        except Exception as e:
+            self._error("set_many", e)
+            return False
+
+    def delete(self, key):
+        """Eliminar valor del cache"""
+        try:
+            return bool(self._client.delete(self._key(key)))
+        except Exception as e:
+            self._error("delete", e)
+            return False
+
+    def delete_pattern(self, pattern, batch_size=500):
+        """
+        Eliminar claves que coincidan con un patrón glob (SCAN + DEL por lotes)
+
+        Returns:
+            int: Número de claves eliminadas
+        """
+        deleted = 0
+        try:
+            batch = []
+            for raw_key in self._client.scan_iter(match=self._key(pattern), count=batch_size):
+                batch.append(raw_key)
+                if len(batch) >= batch_size:
+                    deleted += self._client.delete(*batch)
+                    batch = []
+            if batch:
+                deleted += self._client.delete(*batch)
+        except Exception as e:
+            self._error("delete_pattern", e)
+        return deleted
+
+    def clear(self):
+        """Eliminar las claves de la aplicación (no el resto de la base)"""
+        self.delete_pattern("*")
+        return True
+
+    def get_stats(self):
+        """Contadores de uso del cache en este proceso"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "backend": "redis",
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "errors": self._errors,
+            }
+
+    def _key(self, key):
+        return f"{self.key_prefix}{key}"
+
+    def _count(self, hits=0, misses=0):
+        with self._lock:
+            self._hits += hits
+            self._misses += misses
+
+    def _error(self, operation, error):
+        with self._lock:
+            self._errors += 1
+        logger.warning(f"Error de cache redis en {operation}: {str(error)}")
+
+
+# Valor cacheado con metadatos para expiración temprana y stale-while-revalidate:
+# fresh_until es un timestamp (time.time()) y delta lo que tardó en calcularse.
+CachedValue = namedtuple("CachedValue", ["value", "fresh_until", "delta"])
+
+
+class _Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalescencia de cálculos concurrentes por clave (en el proceso)
+
+    Mientras una llamada para una clave está en curso, las demás esperan
+    su resultado en vez de repetir el cálculo.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, function):
+        """
+        Ejecutar function una sola vez para las llamadas concurrentes de key
+
+        Returns:
+            Resultado de function (el mismo para todos los que esperan)
+
+        Raises:
+            La excepción de function, también en los que esperan
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        self._run(key, call, function)
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def start(self, key, function):
+        """
+        Ejecutar function en segundo plano si no hay otra llamada en curso
+
+        Returns:
+            bool: True si se lanzó el hilo
+        """
+        with self._lock:
+            if key in self._calls:
+                return False
+            call = self._calls[key] = _Call()
+
+        thread = threading.Thread(
+            target=self._run, args=(key, call, function), daemon=True)
+        thread.start()
+        return True
+
+    def in_flight(self, key):
+        """Hay un cálculo en curso para la clave"""
+        with self._lock:
+            return key in self._calls
+
+    def _run(self, key, call, function):
+        try:
+            call.result = function()
+        except Exception as e:
+            call.error = e
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+
+
+def generation_scopes(namespace=None, user_id=None, deck_id=None):
+    """Ámbitos de generación ("ns:<namespace>", "user:<id>", "deck:<id>")"""
+    scopes = []
+    if namespace is not None:
+        scopes.append(f"ns:{namespace}")
+    if user_id is not None:
+        scopes.append(f"user:{user_id}")
+    if deck_id is not None:
+        scopes.append(f"deck:{deck_id}")
+    return scopes
+
+
+def get_generations(cache, scopes):
+    """
+    Obtener (o crear) las generaciones actuales en una sola lectura
+
+    Args:
+        cache: Backend de cache
+        scopes: Lista de ámbitos de generation_scopes()
+
+    Returns:
+        dict: ámbito -> generación
+    """
+    keys = {scope: f"generation:{scope}" for scope in scopes}
+    found = cache.get_many(list(keys.values()))
+
+    generations = {}
+    created = {}
+    for scope, key in keys.items():
+        generation = found.get(key)
+        if generation is None:
+            generation = created[key] = secrets.token_hex(4)
+        generations[scope] = generation
+
+    if created:
+        cache.set_many(created, timeout=GENERATION_TIMEOUT)
+    return generations
+
+
+def versioned_key(cache, namespace, *parts, user_id=None, deck_id=None, generations=None):
+    """
+    Clave "namespace:generaciones:partes" versionada por generaciones
+
+    La clave incluye la generación del namespace y, si se indican, la del
+    usuario y la del deck. Invalidar consiste en cambiar una generación
+    (O(1)); las entradas de generaciones anteriores ya no se leen y
+    expiran por su TTL.
+
+    Args:
+        cache: Backend de cache
+        namespace: Namespace de la clave (p. ej. "user_decks")
+        *parts: Resto de componentes de la clave
+        user_id: Usuario del que dependen los datos
+        deck_id: Deck del que dependen los datos
+        generations: Generaciones ya leídas (ámbito -> generación); por
+            defecto se leen de cache
+
+    Returns:
+        str: Clave "namespace:generaciones:partes"
+    """
+    scopes = generation_scopes(namespace, user_id, deck_id)
+    if generations is None:
+        generations = get_generations(cache, scopes)
+    version = ".".join(str(generations[scope]) for scope in scopes)
+    return KEY_SEPARATOR.join([namespace, version, *(str(part) for part in parts)])
+
+
+def bump_generations(cache, namespace=None, user_id=None, deck_id=None):
+    """Invalidar un namespace, usuario o deck sustituyendo su generación"""
+    scopes = generation_scopes(namespace, user_id, deck_id)
+    if scopes:
+        cache.set_many(
+            {f"generation:{scope}": secrets.token_hex(4) for scope in scopes},
+            timeout=GENERATION_TIMEOUT,
+        )
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def create_cache(config):
+    """
+    Crear el backend de cache indicado en la configuración
+
+    Args:
+        config: Mapping con CACHE_TYPE, CACHE_REDIS_URL, CACHE_KEY_PREFIX,
+            CACHE_DEFAULT_TIMEOUT, CACHE_MAX_ENTRIES y CACHE_MAX_BYTES
+
+    Returns:
+        CacheBackend: Backend configurado
+    """
+    backend = (config.get("CACHE_TYPE") or "simple").lower()
+    default_timeout = config.get("CACHE_DEFAULT_TIMEOUT", DEFAULT_TIMEOUT)
+
+    if backend == "redis":
+        return RedisCache(
+            url=config.get("CACHE_REDIS_URL"),
+            key_prefix=config.get("CACHE_KEY_PREFIX", DEFAULT_KEY_PREFIX),
+            default_timeout=default_timeout,
+        )
+    if backend in ("simple", "memory"):
+        return CacheManager(
+            max_entries=config.get("CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES),
+            max_bytes=config.get("CACHE_MAX_BYTES", DEFAULT_MAX_BYTES),
+            default_timeout=default_timeout,
+        )
+    raise ValueError(f"CACHE_TYPE no soportado: {backend}")
+
+
+def init_cache(app):
+    """Crear el cache de la aplicación y usarlo como cache por defecto"""
+    global _default_cache
+    cache = create_cache(app.config)
+    app.extensions["cache"] = cache
+    with _default_cache_lock:
+        _default_cache = cache
+    return cache
+
+
+def get_cache():
+    """Cache por defecto del proceso (memoria si no se llamó a init_cache)"""
+    global _default_cache
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                _default_cache = CacheManager()
+    return _default_cache
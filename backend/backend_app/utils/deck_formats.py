@@ -0,0 +1,422 @@
+"""
+Formatos de intercambio de decks: JSON-lines, CSV y paquete SQLite
+
+Los escritores reciben las cartas por bloques (particiones de filas) y
+devuelven generadores de bloques de texto o bytes, para enviar la
+exportación en streaming sin tener el deck entero en memoria. Los
+lectores recorren un fichero subido registro a registro (read_cards) y
+card_row convierte cada registro en columnas de Flashcard validadas.
+
+- ndjson: una línea {"type": "deck"} y después una {"type": "card"} por carta
+- csv: cabecera y una fila por carta (sin metadatos del deck)
+- sqlite: base de datos autocontenida con tablas meta, deck, cards y
+  reviews (historial de revisiones). SQLite no puede escribirse en
+  streaming: se genera en un fichero temporal que se envía por bloques y
+  se borra al terminar.
+"""
+
+import csv
+import io
+import json
+import os
+import sqlite3
+import tempfile
+from datetime import date, datetime
+
+# Versión del formato (se guarda en la cabecera ndjson y en la tabla meta)
+FORMAT_VERSION = 1
+
+# Formatos: tipo MIME y extensión del fichero
+FORMATS = {
+    "ndjson": ("application/x-ndjson", "jsonl"),
+    "csv": ("text/csv", "csv"),
+    "sqlite": ("application/vnd.sqlite3", "sqlite"),
+}
+
+DECK_FIELDS = (
+    "name", "description", "difficulty_level", "color", "icon", "category", "tags",
+)
+
+# Contenido de la carta; id es el de origen (enlaza las revisiones)
+CARD_FIELDS = (
+    "id", "front_text", "back_text", "front_image_url", "back_image_url",
+    "front_audio_url", "back_audio_url", "difficulty", "tags", "notes",
+)
+
+# Estado de programación de la carta
+SCHEDULING_FIELDS = (
+    "ease_factor", "interval_days", "repetitions", "stability", "difficulty_fsrs",
+    "total_reviews", "correct_reviews", "last_review_rating", "next_review",
+    "last_reviewed",
+)
+
+EXPORTED_CARD_FIELDS = CARD_FIELDS + SCHEDULING_FIELDS
+
+REVIEW_FIELDS = (
+    "flashcard_id", "rating", "response_time", "previous_ease", "previous_interval",
+    "previous_stability", "new_ease", "new_interval", "new_stability",
+    "new_next_review", "reviewed_at",
+)
+
+# Bytes por bloque al enviar el paquete SQLite
+SQLITE_BLOCK_SIZE = 64 * 1024
+
+# Valores de una carta importada sin estado de programación
+DEFAULT_SCHEDULING = {
+    "ease_factor": 2.5,
+    "interval_days": 1,
+    "repetitions": 0,
+    "stability": 1.0,
+    "difficulty_fsrs": 5.0,
+    "total_reviews": 0,
+    "correct_reviews": 0,
+    "last_review_rating": None,
+    "next_review": None,
+    "last_reviewed": None,
+}
+
+DIFFICULTIES = ("easy", "normal", "hard")
+DECK_LEVELS = ("beginner", "intermediate", "advanced")
+
+# Longitud máxima de las URLs multimedia (columnas String(500))
+MAX_URL_LENGTH = 500
+
+_SQLITE_SCHEMA = (
+    "CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)",
+    f"CREATE TABLE deck ({', '.join(DECK_FIELDS)})",
+    f"CREATE TABLE cards (id INTEGER PRIMARY KEY, "
+    f"{', '.join(EXPORTED_CARD_FIELDS[1:])})",
+    f"CREATE TABLE reviews ({', '.join(REVIEW_FIELDS)})",
+    "CREATE INDEX idx_reviews_card ON reviews (flashcard_id)",
+)
+
+
+def _plain(value):
+    """Valor serializable: fechas en ISO 8601"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _record(fields, row):
+    return {field: _plain(value) for field, value in zip(fields, row)}
+
+
+def ndjson_chunks(deck, card_partitions):
+    """
+    Exportación JSON-lines
+
+    Args:
+        deck: Diccionario con DECK_FIELDS
+        card_partitions: Iterable de bloques de filas con EXPORTED_CARD_FIELDS
+
+    Yields:
+        str: Bloques de líneas (uno por partición)
+    """
+    header = {"type": "deck", "format_version": FORMAT_VERSION, **_record(
+        DECK_FIELDS, (deck.get(field) for field in DECK_FIELDS))}
+    yield json.dumps(header, ensure_ascii=False) + "\n"
+
+    for rows in card_partitions:
+        yield "".join(
+            json.dumps({"type": "card", **_record(EXPORTED_CARD_FIELDS, row)},
+                       ensure_ascii=False) + "\n"
+            for row in rows
+        )
+
+
+def csv_chunks(card_partitions):
+    """
+    Exportación CSV (cabecera con EXPORTED_CARD_FIELDS)
+
+    Yields:
+        str: Bloques de filas (uno por partición)
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORTED_CARD_FIELDS)
+    yield buffer.getvalue()
+
+    for rows in card_partitions:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_plain(value) for value in row] for row in rows)
+        yield buffer.getvalue()
+
+
+def sqlite_package_chunks(deck, card_partitions, review_partitions,
+                          block_size=SQLITE_BLOCK_SIZE):
+    """
+    Paquete SQLite con el deck, sus cartas y su historial de revisiones
+
+    Args:
+        deck: Diccionario con DECK_FIELDS
+        card_partitions: Bloques de filas con EXPORTED_CARD_FIELDS
+        review_partitions: Bloques de filas con REVIEW_FIELDS
+        block_size: Bytes por bloque enviado
+
+    Yields:
+        bytes: Bloques del fichero SQLite
+    """
+    fd, path = tempfile.mkstemp(suffix=".sqlite")
+    os.close(fd)
+    try:
+        connection = sqlite3.connect(path)
+        try:
+            for statement in _SQLITE_SCHEMA:
+                connection.execute(statement)
+            connection.executemany("INSERT INTO meta VALUES (?, ?)", [
+                ("format_version", str(FORMAT_VERSION)),
+                ("exported_at", datetime.utcnow().isoformat()),
+            ])
+            connection.execute(
+                f"INSERT INTO deck VALUES ({', '.join('?' * len(DECK_FIELDS))})",
+                [_plain(deck.get(field)) for field in DECK_FIELDS],
+            )
+            for table, fields, partitions in (
+                ("cards", EXPORTED_CARD_FIELDS, card_partitions),
+                ("reviews", REVIEW_FIELDS, review_partitions),
+            ):
+                insert = f"INSERT INTO {table} VALUES ({', '.join('?' * len(fields))})"
+                for rows in partitions:
+                    connection.executemany(
+                        insert, ([_plain(value) for value in row] for row in rows))
+            connection.commit()
+        finally:
+            connection.close()
+
+        with open(path, "rb") as package:
+            while True:
+                block = package.read(block_size)
+                if not block:
+                    break
+                yield block
+    finally:
+        os.unlink(path)
+
+
+class InvalidRecord(ValueError):
+    """Registro de importación que no se puede convertir en carta"""
+
+
+def detect_format(filename=None, mimetype=None):
+    """Formato según la extensión del fichero o el tipo MIME (None si no se reconoce)"""
+    extension = os.path.splitext(filename or "")[1].lstrip(".").lower()
+    aliases = {"json": "ndjson", "ndjson": "ndjson", "db": "sqlite", "sqlite3": "sqlite"}
+    for name, (known_mimetype, known_extension) in FORMATS.items():
+        if extension == known_extension or (not extension and mimetype == known_mimetype):
+            return name
+    return aliases.get(extension)
+
+
+def read_deck(path, file_format):
+    """
+    Metadatos del deck de un fichero (vacío si el formato no los lleva)
+
+    Raises:
+        ValueError: Si el fichero no es del formato indicado
+    """
+    if file_format == "ndjson":
+        with open(path, encoding="utf-8-sig") as source:
+            for line in source:
+                if line.strip():
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        raise ValueError("La primera línea no es JSON válido")
+                    if isinstance(record, dict) and record.get("type") == "deck":
+                        return {field: record.get(field) for field in DECK_FIELDS}
+                    return {}
+        return {}
+    if file_format == "sqlite":
+        with _open_package(path) as connection:
+            row = connection.execute("SELECT * FROM deck LIMIT 1").fetchone()
+            return {field: row[field] for field in DECK_FIELDS if row and field in row.keys()}
+    return {}
+
+
+def read_cards(path, file_format):
+    """
+    Registros de carta de un fichero, uno a uno y en orden
+
+    Yields:
+        dict | InvalidRecord: Campos de la carta, o el error de un registro
+            ilegible (p. ej. una línea que no es JSON)
+    """
+    if file_format == "ndjson":
+        with open(path, encoding="utf-8-sig") as source:
+            for line in source:
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    yield InvalidRecord("JSON inválido")
+                    continue
+                if not isinstance(record, dict):
+                    yield InvalidRecord("Se esperaba un objeto JSON")
+                elif record.get("type", "card") == "card":
+                    yield record
+    elif file_format == "csv":
+        with open(path, encoding="utf-8-sig", newline="") as source:
+            yield from csv.DictReader(source)
+    elif file_format == "sqlite":
+        with _open_package(path) as connection:
+            yield from (dict(row) for row in connection.execute(
+                "SELECT * FROM cards ORDER BY rowid"))
+    else:
+        raise ValueError(f"Formato no soportado: {file_format}")
+
+
+def count_cards(path, file_format):
+    """Número de registros de carta de un fichero (recorriéndolo)"""
+    if file_format == "sqlite":
+        with _open_package(path) as connection:
+            return connection.execute("SELECT COUNT(*) FROM cards").fetchone()[0]
+    return sum(1 for _ in read_cards(path, file_format))
+
+
+class _open_package:
+    """Conexión de solo lectura a un paquete SQLite exportado"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def __enter__(self):
+        try:
+            self.connection = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+            self.connection.row_factory = sqlite3.Row
+            version = self.connection.execute(
+                "SELECT value FROM meta WHERE key = 'format_version'").fetchone()
+        except sqlite3.DatabaseError:
+            self.__exit__(None, None, None)
+            raise ValueError("El fichero no es un paquete SQLite de decks")
+        if version is None or int(version[0]) > FORMAT_VERSION:
+            self.__exit__(None, None, None)
+            raise ValueError("Versión de paquete no soportada")
+        return self.connection
+
+    def __exit__(self, *exc_info):
+        connection = getattr(self, "connection", None)
+        if connection is not None:
+            connection.close()
+            self.connection = None
+
+
+def deck_row(deck):
+    """
+    Columnas de Deck de los metadatos importados (solo las válidas)
+
+    Returns:
+        dict: Columnas con valor; el nombre lo decide quien importa
+    """
+    row = {
+        "description": _text(deck, "description") or None,
+        "difficulty_level": _text(deck, "difficulty_level").lower(),
+        "color": _text(deck, "color"),
+        "icon": _text(deck, "icon"),
+        "category": _text(deck, "category")[:50] or None,
+        "tags": _tags(deck),
+    }
+    if row["difficulty_level"] not in DECK_LEVELS:
+        del row["difficulty_level"]
+    if not (len(row["color"]) == 7 and row["color"].startswith("#")):
+        del row["color"]
+    if not row["icon"] or len(row["icon"]) > 10:
+        del row["icon"]
+    return row
+
+
+def _text(record, field, alias=None):
+    value = record.get(field)
+    if value is None and alias:
+        value = record.get(alias)
+    return "" if value is None else str(value).strip()
+
+
+def _tags(record):
+    """Columna tags: lista JSON tal cual, o el texto guardado"""
+    tags = record.get("tags")
+    return json.dumps(tags) if isinstance(tags, list) else (_text(record, "tags") or None)
+
+
+def _parse(value, parse):
+    if value is None or value == "":
+        return None
+    try:
+        return parse(value)
+    except (TypeError, ValueError):
+        raise InvalidRecord(f"Valor inválido: {value!r}")
+
+
+def card_row(record):
+    """
+    Columnas de Flashcard de un registro importado
+
+    Acepta los campos de EXPORTED_CARD_FIELDS (y front/back como alias).
+    El estado de programación se conserva si es coherente; si no, la
+    carta empieza de cero.
+
+    Returns:
+        dict: Columnas de la carta (mismas claves para todos los registros)
+
+    Raises:
+        InvalidRecord: Si la carta no tiene frente o reverso
+    """
+    row = {
+        "front_text": _text(record, "front_text", "front"),
+        "back_text": _text(record, "back_text", "back"),
+        "notes": _text(record, "notes") or None,
+    }
+    for field in ("front_image_url", "back_image_url", "front_audio_url", "back_audio_url"):
+        row[field] = _text(record, field)[:MAX_URL_LENGTH]
+    if not row["front_text"] and not row["front_image_url"]:
+        raise InvalidRecord("El frente debe tener texto o imagen")
+    if not row["back_text"] and not row["back_image_url"]:
+        raise InvalidRecord("El reverso debe tener texto o imagen")
+
+    difficulty = _text(record, "difficulty").lower()
+    row["difficulty"] = difficulty if difficulty in DIFFICULTIES else "normal"
+    row["tags"] = _tags(record)
+
+    try:
+        scheduling = {
+            "ease_factor": _parse(record.get("ease_factor"), float),
+            "interval_days": _parse(record.get("interval_days"), lambda v: int(float(v))),
+            "repetitions": _parse(record.get("repetitions"), lambda v: int(float(v))),
+            "stability": _parse(record.get("stability"), float),
+            "difficulty_fsrs": _parse(record.get("difficulty_fsrs"), float),
+            "total_reviews": _parse(record.get("total_reviews"), lambda v: int(float(v))),
+            "correct_reviews": _parse(record.get("correct_reviews"), lambda v: int(float(v))),
+            "last_review_rating": _parse(
+                record.get("last_review_rating"), lambda v: int(float(v))),
+            "next_review": _parse(record.get("next_review"), datetime.fromisoformat),
+            "last_reviewed": _parse(record.get("last_reviewed"), datetime.fromisoformat),
+        }
+    except InvalidRecord:
+        scheduling = {}
+    scheduling = {
+        field: DEFAULT_SCHEDULING[field] if value is None else value
+        for field, value in ({**DEFAULT_SCHEDULING, **scheduling}).items()
+    }
+    if not _consistent_scheduling(scheduling):
+        scheduling = dict(DEFAULT_SCHEDULING)
+    row.update(scheduling)
+    if row["next_review"] is None:
+        row["next_review"] = datetime.utcnow()
+    return row
+
+
+def _consistent_scheduling(values):
+    """Comprueba las restricciones CHECK de Flashcard sobre la programación"""
+    rating = values["last_review_rating"]
+    return (
+        values["ease_factor"] > 0
+        and values["interval_days"] >= 0
+        and values["repetitions"] >= 0
+        and values["stability"] > 0
+        and values["difficulty_fsrs"] >= 0
+        and 0 <= values["correct_reviews"] <= values["total_reviews"]
+        and (rating is None or 1 <= rating <= 5)
+    )
+
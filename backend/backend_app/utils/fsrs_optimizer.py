@@ -0,0 +1,481 @@
+"""
+Optimizador de parámetros FSRS por usuario
+
+Ajusta los pesos de calculate_fsrs a partir del historial de CardReview de
+cada usuario. El historial se lee en streaming y se procesa por bloques de
+cartas completas, de modo que la memoria usada depende del tamaño del bloque
+y no del número total de revisiones.
+"""
+
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from flask import current_app
+from sqlalchemy import func
+
+from backend_app.extensions import db
+from backend_app.models import CardReview, StudySession, UserFSRSParameters
+from backend_app.utils.algorithms import (
+    FSRS_DEFAULT_WEIGHTS,
+    _fsrs_kernel,
+    _require_numpy,
+    np,
+)
+
+logger = logging.getLogger(__name__)
+
+# Pesos que influyen en la retención predicha (el resto se deja por defecto)
+TRAINABLE_WEIGHTS = (6, 8, 9, 10, 11, 12, 13, 14)
+
+# Rangos permitidos para mantener el modelo numéricamente estable
+WEIGHT_BOUNDS = {
+    6: (0.0, 3.0),
+    8: (0.0, 4.0),
+    9: (0.0, 0.8),
+    10: (0.01, 4.0),
+    11: (0.01, 5.0),
+    12: (0.0, 1.0),
+    13: (0.01, 1.0),
+    14: (0.01, 5.0),
+}
+
+DEFAULT_CHUNK_SIZE = 20000
+DEFAULT_MIN_REVIEWS = 200
+DEFAULT_EPOCHS = 5
+DEFAULT_LEARNING_RATE = 0.02
+
+# Estado inicial de una carta nueva (coincide con los defaults de Flashcard)
+INITIAL_STABILITY = 1.0
+INITIAL_DIFFICULTY = 5.0
+
+_EPOCH = datetime(1970, 1, 1)
+_SECONDS_PER_DAY = 86400.0
+_EPS = 1e-6
+
+
+@dataclass
+class ReviewChunk:
+    """Bloque de historial en forma matricial (cartas x revisiones)"""
+
+    ratings: "np.ndarray"
+    elapsed_days: "np.ndarray"
+    mask: "np.ndarray"
+    initial_stability: "np.ndarray"
+
+    @property
+    def review_count(self) -> int:
+        return int(self.mask.sum())
+
+
+def build_review_chunk(rows: Sequence[Tuple]) -> ReviewChunk:
+    """
+    Convierte filas (flashcard_id, rating, reviewed_at, previous_stability)
+    ordenadas por carta y fecha en matrices rellenadas
+
+    Args:
+        rows: Filas de revisiones agrupadas por carta
+
+    Returns:
+        ReviewChunk: Matrices listas para el replay vectorizado
+    """
+    _require_numpy()
+    count = len(rows)
+    card_ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=count)
+    ratings = np.fromiter((row[1] for row in rows), dtype=np.int8, count=count)
+    timestamps = np.fromiter(
+        ((row[2] - _EPOCH).total_seconds() for row in rows),
+        dtype=np.float64,
+        count=count,
+    )
+
+    # Inicio de cada carta dentro del bloque
+    new_card = np.ones(count, dtype=bool)
+    new_card[1:] = card_ids[1:] != card_ids[:-1]
+    starts = np.flatnonzero(new_card)
+    lengths = np.diff(np.append(starts, count))
+
+    # Posición de cada revisión dentro de su carta
+    card_index = np.repeat(np.arange(len(starts)), lengths)
+    position = np.arange(count) - np.repeat(starts, lengths)
+
+    elapsed = np.zeros(count)
+    elapsed[1:] = (timestamps[1:] - timestamps[:-1]) / _SECONDS_PER_DAY
+    elapsed[new_card] = 0.0
+    np.maximum(elapsed, 0.0, out=elapsed)
+
+    shape = (len(starts), int(lengths.max()))
+    rating_matrix = np.ones(shape, dtype=np.int8)
+    elapsed_matrix = np.zeros(shape)
+    mask = np.zeros(shape, dtype=bool)
+    rating_matrix[card_index, position] = ratings
+    elapsed_matrix[card_index, position] = elapsed
+    mask[card_index, position] = True
+
+    # Estabilidad registrada antes de la primera revisión del historial
+    initial_stability = np.array(
+        [rows[i][3] if rows[i][3] and rows[i][3] > 0 else INITIAL_STABILITY for i in starts],
+        dtype=np.float64,
+    )
+
+    return ReviewChunk(rating_matrix, elapsed_matrix, mask, initial_stability)
+
+
+def iter_review_chunks(user_id: int, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                       session=None) -> Iterator[ReviewChunk]:
+    """
+    Lee el historial de revisiones del usuario en streaming
+
+    Los bloques se cortan en límites de carta, así que cada carta se
+    reproduce completa dentro de un único bloque.
+
+    Args:
+        user_id: ID del usuario
+        chunk_size: Número aproximado de revisiones por bloque
+        session: Sesión SQLAlchemy (por defecto db.session)
+
+    Yields:
+        ReviewChunk: Bloques de historial
+    """
+    session = session or db.session
+    query = (
+        session.query(
+            CardReview.flashcard_id,
+            CardReview.rating,
+            CardReview.reviewed_at,
+            CardReview.previous_stability,
+        )
+        .join(StudySession, CardReview.session_id == StudySession.id)
+        .filter(
+            StudySession.user_id == user_id,
+            CardReview.is_deleted.is_(False),
+            CardReview.reviewed_at.isnot(None),
+        )
+        .order_by(CardReview.flashcard_id, CardReview.reviewed_at, CardReview.id)
+        .yield_per(chunk_size)
+    )
+
+    buffer: List[Tuple] = []
+    current_card = None
+    for row in query:
+        if row[0] != current_card:
+            if len(buffer) >= chunk_size:
+                yield build_review_chunk(buffer)
+                buffer = []
+            current_card = row[0]
+        buffer.append(tuple(row))
+
+    if buffer:
+        yield build_review_chunk(buffer)
+
+
+def replay_log_loss(chunk: ReviewChunk, weight_matrix) -> Tuple["np.ndarray", int]:
+    """
+    Reproduce el historial con varios vectores de pesos a la vez
+
+    Args:
+        chunk: Bloque de historial
+        weight_matrix: Array (P, 17) con los vectores de pesos a evaluar
+
+    Returns:
+        Tuple[pérdida logarítmica total por vector, revisiones evaluadas]
+    """
+    weight_matrix = np.atleast_2d(np.asarray(weight_matrix, dtype=np.float64))
+    candidates = weight_matrix.shape[0]
+    # (17, P, 1) para difundir contra el estado (P, cartas)
+    w = weight_matrix.T[:, :, None]
+
+    cards, length = chunk.mask.shape
+    stability = np.repeat(chunk.initial_stability[None, :], candidates, axis=0)
+    difficulty = np.full((candidates, cards), INITIAL_DIFFICULTY)
+    total = np.zeros(candidates)
+    scored = 0
+
+    with np.errstate(over="ignore", invalid="ignore", divide="ignore"):
+        for step in range(length):
+            active = np.flatnonzero(chunk.mask[:, step])
+            if active.size == 0:
+                break
+
+            rating = chunk.ratings[active, step]
+            elapsed = chunk.elapsed_days[active, step]
+            current_stability = stability[:, active]
+            current_difficulty = difficulty[:, active]
+
+            retrievability = np.where(
+                elapsed > 0, np.power(0.9, elapsed / current_stability), 1.0)
+
+            # Solo las revisiones con tiempo transcurrido aportan a la pérdida
+            evaluated = elapsed > 0
+            if step > 0 and evaluated.any():
+                predicted = np.clip(retrievability[:, evaluated], _EPS, 1 - _EPS)
+                recalled = rating[evaluated] > 1
+                loss = -np.where(recalled, np.log(predicted), np.log1p(-predicted))
+                total += loss.sum(axis=1)
+                scored += int(evaluated.sum())
+
+            new_stability, new_difficulty, _ = _fsrs_kernel(
+                rating, current_stability, current_difficulty, retrievability, w)
+            stability[:, active] = np.clip(
+                np.nan_to_num(new_stability, nan=INITIAL_STABILITY), 0.01, 36500)
+            difficulty[:, active] = new_difficulty
+
+    return total, scored
+
+
+def _candidate_weights(weights, steps):
+    """Vector actual + perturbaciones centrales para diferencias finitas"""
+    candidates = np.repeat(weights[None, :], 1 + 2 * len(TRAINABLE_WEIGHTS), axis=0)
+    for offset, index in enumerate(TRAINABLE_WEIGHTS):
+        candidates[1 + 2 * offset, index] += steps[offset]
+        candidates[2 + 2 * offset, index] -= steps[offset]
+    return candidates
+
+
+def _clip_to_bounds(weights):
+    for index in TRAINABLE_WEIGHTS:
+        low, high = WEIGHT_BOUNDS[index]
+        weights[index] = min(max(weights[index], low), high)
+    return weights
+
+
+def fit_weights(chunks_factory, initial_weights: Sequence[float] = None,
+                epochs: int = DEFAULT_EPOCHS,
+                learning_rate: float = DEFAULT_LEARNING_RATE,
+                regularization: float = 0.01) -> Optional[Dict]:
+    """
+    Ajusta los pesos FSRS minimizando la pérdida logarítmica de recuerdo
+
+    Cada bloque produce un paso de Adam con gradiente por diferencias finitas
+    centrales; todas las perturbaciones se evalúan en una sola pasada
+    vectorizada. Se aplica una penalización L2 hacia los pesos por defecto.
+
+    Args:
+        chunks_factory: Callable que devuelve un iterable nuevo de ReviewChunk
+        initial_weights: Pesos de partida (por defecto FSRS_DEFAULT_WEIGHTS)
+        epochs: Pasadas completas sobre el historial
+        learning_rate: Tasa de aprendizaje de Adam
+        regularization: Peso de la penalización hacia los defaults
+
+    Returns:
+        dict con weights, review_count, log_loss y baseline_log_loss,
+        o None si no hay revisiones evaluables
+    """
+    _require_numpy()
+    defaults = np.asarray(FSRS_DEFAULT_WEIGHTS, dtype=np.float64)
+    weights = np.array(
+        defaults if initial_weights is None else initial_weights, dtype=np.float64)
+    trainable = np.array(TRAINABLE_WEIGHTS)
+    scale = np.maximum(np.abs(defaults[trainable]), 0.05)
+
+    first_moment = np.zeros(len(TRAINABLE_WEIGHTS))
+    second_moment = np.zeros(len(TRAINABLE_WEIGHTS))
+    beta1, beta2 = 0.9, 0.999
+    iteration = 0
+
+    for _ in range(epochs):
+        for chunk in chunks_factory():
+            steps = 1e-4 * np.maximum(np.abs(weights[trainable]), 1.0)
+            losses, scored = replay_log_loss(chunk, _candidate_weights(weights, steps))
+            if scored == 0:
+                continue
+
+            mean_losses = losses / scored
+            gradient = (mean_losses[1::2] - mean_losses[2::2]) / (2 * steps)
+            gradient += 2 * regularization * \
+                (weights[trainable] - defaults[trainable]) / scale ** 2
+            if not np.all(np.isfinite(gradient)):
+                continue
+
+            iteration += 1
+            first_moment = beta1 * first_moment + (1 - beta1) * gradient
+            second_moment = beta2 * second_moment + (1 - beta2) * gradient ** 2
+            corrected_first = first_moment / (1 - beta1 ** iteration)
+            corrected_second = second_moment / (1 - beta2 ** iteration)
+            weights[trainable] -= learning_rate * scale * corrected_first / \
+                (np.sqrt(corrected_second) + 1e-8)
+            _clip_to_bounds(weights)
+
+    # Pasada final: pérdida del ajuste frente a los pesos por defecto
+    totals = np.zeros(2)
+    review_count = 0
+    for chunk in chunks_factory():
+        losses, scored = replay_log_loss(chunk, np.stack([weights, defaults]))
+        totals += losses
+        review_count += scored
+
+    if review_count == 0:
+        return None
+
+    log_loss, baseline_log_loss = (totals / review_count).tolist()
+
+    # No empeorar nunca la calidad respecto a los pesos por defecto
+    if not np.isfinite(log_loss) or log_loss > baseline_log_loss:
+        weights, log_loss = defaults, baseline_log_loss
+
+    return {
+        "weights": [round(float(value), 6) for value in weights],
+        "review_count": review_count,
+        "log_loss": log_loss,
+        "baseline_log_loss": baseline_log_loss,
+    }
+
+
+def count_user_reviews(user_id: int, session=None) -> int:
+    """Cuenta las revisiones registradas de un usuario"""
+    session = session or db.session
+    return (
+        session.query(func.count(CardReview.id))
+        .join(StudySession, CardReview.session_id == StudySession.id)
+        .filter(StudySession.user_id == user_id, CardReview.is_deleted.is_(False))
+        .scalar()
+        or 0
+    )
+
+
+def get_users_with_reviews(min_reviews: int = DEFAULT_MIN_REVIEWS,
+                           session=None) -> List[int]:
+    """IDs de usuarios con historial suficiente para optimizar"""
+    session = session or db.session
+    rows = (
+        session.query(StudySession.user_id)
+        .join(CardReview, CardReview.session_id == StudySession.id)
+        .filter(CardReview.is_deleted.is_(False))
+        .group_by(StudySession.user_id)
+        .having(func.count(CardReview.id) >= min_reviews)
+        .all()
+    )
+    return [row[0] for row in rows]
+
+
+def get_user_fsrs_weights(user_id: int, session=None) -> Optional[List[float]]:
+    """
+    Obtiene los pesos FSRS optimizados del usuario
+
+    Returns:
+        Lista de 17 pesos o None si el usuario usa los pesos por defecto
+    """
+    if not user_id:
+        return None
+    session = session or db.session
+    parameters = (
+        session.query(UserFSRSParameters)
+        .filter_by(user_id=user_id, is_deleted=False)
+        .first()
+    )
+    if not parameters:
+        return None
+    weights = parameters.weights_list
+    return weights if len(weights) == len(FSRS_DEFAULT_WEIGHTS) else None
+
+
+def save_user_fsrs_weights(user_id: int, result: Dict, session=None) -> UserFSRSParameters:
+    """Guarda (o actualiza) los pesos optimizados de un usuario"""
+    session = session or db.session
+    parameters = session.query(UserFSRSParameters).filter_by(user_id=user_id).first()
+    if parameters is None:
+        parameters = UserFSRSParameters(user_id=user_id)
+        session.add(parameters)
+
+    parameters.weights_list = result["weights"]
+    parameters.review_count = result["review_count"]
+    parameters.log_loss = result["log_loss"]
+    parameters.baseline_log_loss = result["baseline_log_loss"]
+    parameters.trained_at = datetime.utcnow()
+    parameters.is_deleted = False
+    parameters.deleted_at = None
+    session.commit()
+    return parameters
+
+
+def optimize_user(user_id: int, min_reviews: int = DEFAULT_MIN_REVIEWS,
+                  chunk_size: int = DEFAULT_CHUNK_SIZE, epochs: int = DEFAULT_EPOCHS,
+                  learning_rate: float = DEFAULT_LEARNING_RATE) -> Dict:
+    """
+    Optimiza y guarda los pesos FSRS de un usuario
+
+    Returns:
+        dict con el resultado del ajuste (status: optimized | skipped)
+    """
+    review_count = count_user_reviews(user_id)
+    if review_count < min_reviews:
+        return {"user_id": user_id, "status": "skipped", "review_count": review_count}
+
+    result = fit_weights(
+        lambda: iter_review_chunks(user_id, chunk_size=chunk_size),
+        initial_weights=get_user_fsrs_weights(user_id),
+        epochs=epochs,
+        learning_rate=learning_rate,
+    )
+    if result is None:
+        return {"user_id": user_id, "status": "skipped", "review_count": review_count}
+
+    save_user_fsrs_weights(user_id, result)
+    logger.info(
+        "Pesos FSRS optimizados para usuario %s: log_loss %.4f (base %.4f)",
+        user_id, result["log_loss"], result["baseline_log_loss"])
+    return {"user_id": user_id, "status": "optimized", **result}
+
+
+# Aplicación Flask propia de cada proceso worker
+_worker_app = None
+
+
+def _init_worker(config_overrides: Dict):
+    global _worker_app
+    from backend_app import create_app
+
+    _worker_app = create_app(config_overrides)
+
+
+def _optimize_user_in_worker(user_id: int, options: Dict) -> Dict:
+    with _worker_app.app_context():
+        try:
+            return optimize_user(user_id, **options)
+        except Exception as e:
+            db.session.rollback()
+            logger.exception("Error optimizando pesos FSRS del usuario %s", user_id)
+            return {"user_id": user_id, "status": "error", "error": str(e)}
+
+
+def optimize_users(user_ids: Iterable[int], workers: int = None, **options) -> List[Dict]:
+    """
+    Optimiza varios usuarios en paralelo con un pool de procesos
+
+    Cada worker crea su propia aplicación y conexión a la misma base de datos
+    que la aplicación actual. Requiere app context; con workers=1 se ejecuta
+    en el proceso actual.
+
+    Args:
+        user_ids: IDs de usuarios a optimizar
+        workers: Número de procesos (por defecto os.cpu_count())
+        **options: Argumentos adicionales para optimize_user
+
+    Returns:
+        Lista de resultados por usuario
+    """
+    user_ids = list(user_ids)
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1 or len(user_ids) <= 1:
+        return [optimize_user(user_id, **options) for user_id in user_ids]
+
+    config_overrides = {
+        "SQLALCHEMY_DATABASE_URI": current_app.config["SQLALCHEMY_DATABASE_URI"],
+    }
+    # No compartir conexiones abiertas con los procesos hijos
+    db.engine.dispose()
+
+    results = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(config_overrides,)) as executor:
+        futures = [
+            executor.submit(_optimize_user_in_worker, user_id, options)
+            for user_id in user_ids
+        ]
+        for future in as_completed(futures):
+            results.append(future.result())
+    return results
@@ -0,0 +1,261 @@
+"""
+Detección de casi-duplicados con MinHash y LSH
+
+El texto de cada carta se normaliza, se divide en k-gramas de caracteres
+(shingles) y se resume en una firma MinHash de SIGNATURE_SIZE valores. La
+proporción de valores iguales entre dos firmas estima la similitud de
+Jaccard de sus shingles. LSH agrupa las firmas por bandas para comparar
+solo las cartas que comparten alguna banda, en lugar de todos los pares.
+
+Las firmas usan one permutation hashing: un único hash por shingle elige
+la posición de la firma (sus bits altos) y el valor (los bajos), y las
+posiciones vacías se rellenan rotando desde la siguiente ocupada. Cuesta
+O(shingles) en lugar de O(shingles x permutaciones) y está vectorizado con
+NumPy sobre los code points de todas las cartas concatenados.
+"""
+
+import unicodedata
+
+from .algorithms import np
+
+
+# Tamaño de los shingles (caracteres) y de la firma (potencia de 2)
+SHINGLE_SIZE = 3
+SIGNATURE_SIZE = 128
+
+# Bandas LSH: 16 bandas de 8 filas detectan pares con Jaccard desde ~0.7
+LSH_BANDS = 16
+
+# Similitud de Jaccard estimada a partir de la que dos cartas son duplicados
+DEFAULT_THRESHOLD = 0.8
+
+# Firmas densificadas por bloque (acota la matriz de trabajo)
+DENSIFY_CHUNK_ROWS = 8192
+
+_UINT32_MAX = np.iinfo(np.uint32).max if np is not None else None
+# Desplazamiento de los valores tomados de otra posición al densificar
+_ROTATION_OFFSET = 0x9E3779B9
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("NumPy es requerido para la detección de duplicados")
+
+
+def is_available():
+    """True si NumPy está instalado y se pueden calcular firmas"""
+    return np is not None
+
+
+def normalize_text(text):
+    """Minúsculas, sin acentos y con los espacios colapsados"""
+    decomposed = unicodedata.normalize("NFKD", (text or "").lower())
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(stripped.split())
+
+
+def card_text(front_text, back_text):
+    """Texto comparado de una carta (frente y reverso)"""
+    return normalize_text(f"{front_text or ''} | {back_text or ''}")
+
+
+def _mix64(values):
+    # Finalizador de splitmix64: todos los bits dependen de toda la entrada
+    values = values ^ (values >> np.uint64(30))
+    values = values * np.uint64(0xBF58476D1CE4E5B9)
+    values = values ^ (values >> np.uint64(27))
+    values = values * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+
+def _shingle_hashes(texts, shingle_size):
+    """
+    Hash de 64 bits de cada shingle de cada texto
+
+    Returns:
+        tuple: (hashes, counts) con los shingles de todos los textos
+            concatenados y el número de shingles de cada texto
+    """
+    # Los textos cortos se rellenan para tener al menos un shingle
+    texts = [text.ljust(shingle_size) for text in texts]
+    lengths = np.fromiter((len(text) for text in texts), dtype=np.int64, count=len(texts))
+    codepoints = np.frombuffer(
+        "".join(texts).encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+
+    # Hash polinómico de cada ventana de shingle_size code points
+    windows = len(codepoints) - shingle_size + 1
+    rolling = np.zeros(windows, dtype=np.uint64)
+    for offset in range(shingle_size):
+        rolling = rolling * np.uint64(1_000_003) + codepoints[offset:offset + windows]
+
+    # Quedarse con las ventanas que no cruzan el final de un texto
+    counts = lengths - shingle_size + 1
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    positions = np.repeat(starts, counts) + (
+        np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts))
+
+    return _mix64(rolling[positions]), counts
+
+
+def minhash_signatures(texts, signature_size=SIGNATURE_SIZE,
+                       shingle_size=SHINGLE_SIZE):
+    """
+    Firmas MinHash de una lista de textos
+
+    Args:
+        texts: Textos ya normalizados (ver card_text)
+        signature_size: Longitud de la firma (potencia de 2)
+        shingle_size: Caracteres por shingle
+
+    Returns:
+        np.ndarray: Matriz uint32 (len(texts), signature_size)
+    """
+    _require_numpy()
+    if not texts:
+        return np.empty((0, signature_size), dtype=np.uint32)
+
+    hashes, counts = _shingle_hashes(texts, shingle_size)
+    bin_bits = signature_size.bit_length() - 1
+    bins = (hashes >> np.uint64(64 - bin_bits)).astype(np.int64)
+    values = (hashes & np.uint64(_UINT32_MAX)).astype(np.uint32)
+    rows = np.repeat(np.arange(len(texts), dtype=np.int64), counts)
+
+    # Mínimo de los valores que caen en cada posición de cada firma
+    signatures = np.full(len(texts) * signature_size, _UINT32_MAX, dtype=np.uint32)
+    np.minimum.at(signatures, rows * signature_size + bins, values)
+    signatures = signatures.reshape(len(texts), signature_size)
+    filled = signatures != _UINT32_MAX
+
+    for start in range(0, len(texts), DENSIFY_CHUNK_ROWS):
+        block = slice(start, start + DENSIFY_CHUNK_ROWS)
+        signatures[block] = _densify(signatures[block], filled[block])
+    return signatures
+
+
+def _densify(signatures, filled):
+    """
+    Rellenar las posiciones vacías con la siguiente ocupada (circular)
+
+    Al valor prestado se le suma la distancia recorrida, así dos cartas
+    solo coinciden en una posición vacía si también coinciden en la origen.
+    """
+    if filled.all():
+        return signatures
+    size = signatures.shape[1]
+    columns = np.arange(2 * size)
+    source = np.where(np.tile(filled, 2), columns, 2 * size)
+    source = np.minimum.accumulate(source[:, ::-1], axis=1)[:, ::-1][:, :size]
+    distance = (source - columns[:size]).astype(np.uint32)
+    borrowed = np.take_along_axis(signatures, source % size, axis=1)
+    return np.where(filled, signatures, borrowed + distance * np.uint32(_ROTATION_OFFSET))
+
+
+def _candidate_pairs(signatures, bands):
+    """Pares (i, j) que comparten al menos una banda LSH"""
+    rows = signatures.shape[1] // bands
+    pairs = []
+    for band in range(bands):
+        columns = signatures[:, band * rows:(band + 1) * rows].astype(np.uint64)
+        keys = np.zeros(len(signatures), dtype=np.uint64)
+        for column in columns.T:
+            keys = keys * np.uint64(2_147_483_659) + column
+
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        same_as_previous = sorted_keys[1:] == sorted_keys[:-1]
+        if not same_as_previous.any():
+            continue
+
+        # Cada carta de un bucket se compara con la anterior y con la primera
+        run_start = np.concatenate(([True], ~same_as_previous))
+        first_of_run = order[np.maximum.accumulate(
+            np.where(run_start, np.arange(len(order)), 0))]
+        members = np.flatnonzero(~run_start)
+        pairs.append(np.stack((order[members - 1], order[members]), axis=1))
+        pairs.append(np.stack((first_of_run[members], order[members]), axis=1))
+
+    if not pairs:
+        return np.empty((0, 2), dtype=np.int64)
+    pairs = np.sort(np.concatenate(pairs), axis=1)
+    # Quitar repetidos entre bandas con una clave escalar por par
+    keys = np.unique(pairs[:, 0] * len(signatures) + pairs[:, 1])
+    return np.stack(np.divmod(keys, len(signatures)), axis=1)
+
+
+def similar_pairs(signatures, threshold=DEFAULT_THRESHOLD, bands=LSH_BANDS):
+    """
+    Pares de firmas con similitud estimada >= threshold
+
+    Args:
+        signatures: Matriz de minhash_signatures
+        threshold: Similitud de Jaccard mínima
+        bands: Número de bandas LSH (debe dividir la longitud de la firma)
+
+    Returns:
+        list: [(i, j, similitud)] con i < j
+    """
+    _require_numpy()
+    if len(signatures) < 2:
+        return []
+
+    pairs = _candidate_pairs(signatures, bands)
+    if not len(pairs):
+        return []
+    similarity = (signatures[pairs[:, 0]] == signatures[pairs[:, 1]]).mean(axis=1)
+    keep = similarity >= threshold
+    return [
+        (int(i), int(j), float(score))
+        for (i, j), score in zip(pairs[keep], similarity[keep])
+    ]
+
+
+def duplicate_clusters(signatures, threshold=DEFAULT_THRESHOLD, bands=LSH_BANDS):
+    """
+    Grupos de índices conectados por pares similares (union-find)
+
+    Returns:
+        list: Listas de índices ordenadas, de mayor a menor tamaño
+    """
+    parent = list(range(len(signatures)))
+
+    def find(index):
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+
+    for i, j, _ in similar_pairs(signatures, threshold, bands):
+        root_i, root_j = find(i), find(j)
+        if root_i != root_j:
+            parent[max(root_i, root_j)] = min(root_i, root_j)
+
+    clusters = {}
+    for index in range(len(signatures)):
+        clusters.setdefault(find(index), []).append(index)
+    return sorted(
+        (members for members in clusters.values() if len(members) > 1),
+        key=lambda members: (-len(members), members[0]),
+    )
+
+
+def new_duplicates(existing_texts, new_texts, threshold=DEFAULT_THRESHOLD,
+                   bands=LSH_BANDS):
+    """
+    Casi-duplicados de textos nuevos frente a los existentes y entre sí
+
+    Args:
+        existing_texts: Textos normalizados ya guardados
+        new_texts: Textos normalizados que se añaden
+
+    Returns:
+        dict: {índice en new_texts: (índice del más parecido en
+            existing_texts + new_texts, similitud)}
+    """
+    signatures = minhash_signatures(list(existing_texts) + list(new_texts))
+    offset = len(existing_texts)
+    matches = {}
+    for i, j, score in similar_pairs(signatures, threshold, bands):
+        # i < j: cada par se marca en la carta añadida después
+        if j >= offset and score > matches.get(j - offset, (None, -1.0))[1]:
+            matches[j - offset] = (i, score)
+    return matches
@@ -0,0 +1,108 @@
+"""
+Paginación por cursor (keyset) con tokens opacos
+
+En lugar de OFFSET, cada página continúa después de la última fila de la
+anterior según una clave de ordenación única, p. ej. (updated_at, id). El
+coste de una página no depende de lo profunda que sea.
+"""
+
+import base64
+import binascii
+import json
+from datetime import date, datetime
+
+from sqlalchemy import and_, or_
+
+# Modos de conteo del total de resultados
+COUNT_EXACT = "exact"
+COUNT_ESTIMATE = "estimate"
+COUNT_NONE = "none"
+COUNT_MODES = (COUNT_EXACT, COUNT_ESTIMATE, COUNT_NONE)
+
+# Máximo de filas que cuenta el modo estimate cuando no hay estadísticas
+# del planificador (el total se devuelve como "al menos" este valor)
+COUNT_ESTIMATE_CAP = 10000
+
+
+class InvalidCursorError(ValueError):
+    """Cursor de paginación mal formado o de otra ordenación"""
+
+
+def encode_cursor(values):
+    """
+    Codificar los valores de la clave de ordenación como token opaco
+
+    Args:
+        values: Valores de las columnas de ordenación de la última fila
+
+    Returns:
+        str: Token base64 url-safe sin relleno
+    """
+    payload = [
+        value.isoformat() if isinstance(value, (datetime, date)) else value
+        for value in values
+    ]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token, columns):
+    """
+    Decodificar un cursor y convertir sus valores al tipo de cada columna
+
+    Args:
+        token: Token generado por encode_cursor
+        columns: Columnas de ordenación (mismo orden que al codificar)
+
+    Returns:
+        list: Valores de la clave de ordenación
+
+    Raises:
+        InvalidCursorError: Si el token no corresponde a estas columnas
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        values = json.loads(raw)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise InvalidCursorError("Cursor inválido") from e
+
+    if not isinstance(values, list) or len(values) != len(columns):
+        raise InvalidCursorError("Cursor inválido")
+
+    decoded = []
+    for value, column in zip(values, columns):
+        python_type = column.type.python_type
+        try:
+            if value is not None and python_type is datetime:
+                value = datetime.fromisoformat(value)
+            elif value is not None and python_type is date:
+                value = date.fromisoformat(value)
+            elif value is not None and not isinstance(value, python_type):
+                raise TypeError(value)
+        except (TypeError, ValueError) as e:
+            raise InvalidCursorError("Cursor inválido") from e
+        decoded.append(value)
+    return decoded
+
+
+def keyset_filter(columns, values):
+    """
+    Condición "después de la fila values" para un orden descendente
+
+    Se expande como (a < x) OR (a = x AND b < y) ..., que los índices
+    compuestos resuelven con un rango en todos los motores.
+
+    Args:
+        columns: Columnas de ordenación (todas descendentes)
+        values: Valores del cursor
+
+    Returns:
+        Expresión SQLAlchemy
+    """
+    clauses = []
+    for position, (column, value) in enumerate(zip(columns, values)):
+        equal_prefix = [
+            columns[i] == values[i] for i in range(position)
+        ]
+        clauses.append(and_(*equal_prefix, column < value))
+    return or_(*clauses)
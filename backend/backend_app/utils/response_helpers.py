@@ -3,8 +3,8 @@ Response Helpers - Calidad Empresarial Premium
 Centraliza la creación de respuestas API para garantizar consistencia y mantenibilidad
 """
 from typing import Dict, Any, Optional, Union, List
-from flask import jsonify
-from datetime import datetime
+from flask import jsonify, make_response, request
+from datetime import datetime, timezone
 import logging
 
 logger = logging.getLogger(__name__)
@@ -23,6 +23,7 @@ class HTTPStatus:
     OK = 200
     CREATED = 201
     NO_CONTENT = 204
+    NOT_MODIFIED = 304
     BAD_REQUEST = 400
     UNAUTHORIZED = 401
     FORBIDDEN = 403
@@ -307,3 +308,67 @@ class ServiceResponse:
             response["details"] = details
 
         return response
+
+
+class ConditionalResponse:
+    """
+    GET condicionales con ETag débil y Last-Modified
+
+    El handler calcula la versión del recurso antes de las consultas
+    pesadas y responde 304 si el cliente ya la tiene.
+    """
+
+    @staticmethod
+    def not_modified(version: str,
+                     last_modified: Optional[datetime] = None):
+        """
+        Respuesta 304 si la petición ya tiene esta versión
+
+        If-None-Match tiene prioridad sobre If-Modified-Since (RFC 9110).
+
+        Args:
+            version: Versión del recurso (valor del ETag, sin comillas)
+            last_modified: Fecha de última modificación (UTC naive)
+
+        Returns:
+            Response 304 o None si hay que generar la respuesta completa
+        """
+        if request.if_none_match:
+            if not request.if_none_match.contains_weak(version):
+                return None
+        elif last_modified is None or request.if_modified_since is None:
+            return None
+        elif ConditionalResponse._http_date(last_modified) > request.if_modified_since:
+            return None
+
+        response = make_response("", HTTPStatus.NOT_MODIFIED)
+        return ConditionalResponse.with_validators(response, version, last_modified)
+
+    @staticmethod
+    def with_validators(response,
+                        version: str,
+                        last_modified: Optional[datetime] = None):
+        """
+        Añadir ETag débil, Last-Modified y Cache-Control a una respuesta
+
+        Args:
+            response: Response de Flask
+            version: Versión del recurso
+            last_modified: Fecha de última modificación (UTC naive)
+
+        Returns:
+            La misma respuesta
+        """
+        response.set_etag(version, weak=True)
+        if last_modified is not None:
+            response.last_modified = ConditionalResponse._http_date(last_modified)
+        # Datos privados: el navegador puede guardarlos pero debe revalidar
+        response.headers["Cache-Control"] = "private, no-cache"
+        return response
+
+    @staticmethod
+    def _http_date(value: datetime) -> datetime:
+        """Fecha UTC con precisión de segundos, como en las cabeceras HTTP"""
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.replace(microsecond=0)
@@ -0,0 +1,316 @@
+"""
+Índice de prefijos en memoria para autocompletar búsquedas
+
+Cada usuario tiene un trie con los nombres de sus decks, los términos del
+frente de sus cartas y sus tags. El trie se construye la primera vez que se
+usa, se actualiza con las escrituras de los servicios y se descarta entero
+(LRU) cuando el proceso supera el límite de usuarios o de términos.
+
+El índice vive en cada proceso: las escrituras atendidas por otro worker
+solo se ven tras SUGGEST_INDEX_TTL segundos, cuando el trie se reconstruye.
+"""
+
+from collections import OrderedDict
+import json
+import re
+import threading
+import time
+import unicodedata
+
+# Límites de memoria del proceso (se desaloja el usuario usado hace más tiempo)
+SUGGEST_MAX_USERS = 1000
+SUGGEST_MAX_TERMS = 2_000_000
+
+# Segundos tras los que un trie se reconstruye desde la base de datos
+SUGGEST_INDEX_TTL = 300
+
+# Sugerencias precalculadas por nodo (límite máximo de una consulta)
+SUGGEST_TOP_K = 10
+
+# Longitud mínima de los términos de las cartas y máxima de una clave
+MIN_TERM_LENGTH = 3
+MAX_KEY_LENGTH = 64
+
+_WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def normalize(text):
+    """Minúsculas y sin acentos: la clave con la que se indexa y se busca"""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def parse_tags(tags):
+    """Tags de una columna JSON (lista) o texto separado por comas"""
+    if not tags:
+        return []
+    if isinstance(tags, (list, tuple)):
+        values = tags
+    else:
+        try:
+            values = json.loads(tags)
+        except (TypeError, ValueError):
+            values = tags.split(",")
+        if not isinstance(values, list):
+            values = [values]
+    return [str(tag).strip() for tag in values if str(tag).strip()]
+
+
+def _tag_entries(tags):
+    return [(normalize(tag), "tag", tag) for tag in parse_tags(tags)]
+
+
+def deck_entries(name, tags=None):
+    """
+    Entradas de un deck: sus tags y el nombre completo desde cada palabra
+
+    Así "verb" sugiere "Spanish Verbs".
+    """
+    words = (name or "").split()
+    entries = [
+        (normalize(" ".join(words[i:])), "deck", " ".join(words))
+        for i in range(len(words))
+    ]
+    entries.extend(_tag_entries(tags))
+    return entries
+
+
+def card_entries(front_text, tags=None):
+    """Entradas de una carta: términos del frente y tags"""
+    entries = [
+        (normalize(word), "term", word.lower())
+        for word in _WORD_PATTERN.findall(front_text or "")
+        if len(word) >= MIN_TERM_LENGTH
+    ]
+    entries.extend(_tag_entries(tags))
+    return entries
+
+
+class _Node:
+    __slots__ = ("children", "entries", "top")
+
+    def __init__(self):
+        self.children = {}
+        # {(tipo, texto): apariciones} de las entradas que terminan aquí
+        self.entries = None
+        # Mejores sugerencias del subárbol (None = hay que recalcularlas)
+        self.top = None
+
+
+class PrefixTrie:
+    """
+    Trie de entradas con contador de apariciones
+
+    Cada nodo guarda sus SUGGEST_TOP_K mejores sugerencias la primera vez
+    que se consultan; insertar o borrar solo invalida los nodos del camino,
+    así que una consulta repetida cuesta la longitud del prefijo.
+    """
+
+    def __init__(self):
+        self.root = _Node()
+        self.size = 0
+        self.built_at = time.monotonic()
+
+    def add(self, key, kind, text, count=1):
+        key = key[:MAX_KEY_LENGTH]
+        if not key:
+            return
+        node = self.root
+        node.top = None
+        for char in key:
+            node = node.children.setdefault(char, _Node())
+            node.top = None
+        if node.entries is None:
+            node.entries = {}
+        if (kind, text) not in node.entries:
+            self.size += 1
+        node.entries[(kind, text)] = node.entries.get((kind, text), 0) + count
+
+    def remove(self, key, kind, text, count=1):
+        key = key[:MAX_KEY_LENGTH]
+        path = [self.root]
+        for char in key:
+            node = path[-1].children.get(char)
+            if node is None:
+                return
+            path.append(node)
+
+        node = path[-1]
+        if not node.entries or (kind, text) not in node.entries:
+            return
+        remaining = node.entries[(kind, text)] - count
+        if remaining > 0:
+            node.entries[(kind, text)] = remaining
+        else:
+            del node.entries[(kind, text)]
+            self.size -= 1
+            if not node.entries:
+                node.entries = None
+
+        for node in path:
+            node.top = None
+        # Podar las ramas que quedan vacías
+        for char, parent, child in zip(reversed(key), reversed(path[:-1]), reversed(path[1:])):
+            if child.children or child.entries:
+                break
+            del parent.children[char]
+
+    def suggest(self, prefix, limit=SUGGEST_TOP_K):
+        """
+        Mejores entradas que empiezan por prefix (ya normalizado)
+
+        Returns:
+            list: [(tipo, texto, apariciones)] por apariciones descendentes
+        """
+        node = self.root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return []
+        if node.top is None:
+            node.top = self._top_entries(node)
+        return node.top[:limit]
+
+    @staticmethod
+    def _top_entries(node):
+        # Reutiliza el top de los hijos ya calculados
+        candidates = []
+        if node.entries:
+            candidates.extend(
+                (kind, text, count) for (kind, text), count in node.entries.items())
+        for child in node.children.values():
+            if child.top is None:
+                child.top = PrefixTrie._top_entries(child)
+            candidates.extend(child.top)
+
+        candidates.sort(key=lambda entry: (-entry[2], len(entry[1]), entry[1]))
+        unique = []
+        seen = set()
+        for kind, text, count in candidates:
+            if (kind, text) in seen:
+                continue
+            seen.add((kind, text))
+            unique.append((kind, text, count))
+            if len(unique) == SUGGEST_TOP_K:
+                break
+        return unique
+
+
+class SuggestIndex:
+    """Tries por usuario con construcción perezosa y desalojo LRU"""
+
+    def __init__(self, max_users=SUGGEST_MAX_USERS, max_terms=SUGGEST_MAX_TERMS,
+                 ttl=SUGGEST_INDEX_TTL):
+        self.max_users = max_users
+        self.max_terms = max_terms
+        self.ttl = ttl
+        self._tries = OrderedDict()
+        self._terms = 0
+        self._lock = threading.RLock()
+
+    def suggest(self, user_id, prefix, loader, limit=SUGGEST_TOP_K):
+        """
+        Sugerencias para un prefijo, construyendo el trie si hace falta
+
+        Args:
+            user_id: ID del usuario
+            prefix: Texto escrito por el usuario
+            loader: Callable(user_id) que devuelve las entradas del usuario
+            limit: Máximo de sugerencias (hasta SUGGEST_TOP_K)
+
+        Returns:
+            list: [{"text", "type", "count"}]
+        """
+        key = normalize(prefix.strip())[:MAX_KEY_LENGTH]
+        if not key:
+            return []
+
+        trie = self._get(user_id)
+        if trie is None:
+            # Construir fuera del lock: la consulta a la base de datos es lenta
+            trie = PrefixTrie()
+            for entry in loader(user_id):
+                trie.add(*entry)
+            self._store(user_id, trie)
+
+        with self._lock:
+            results = trie.suggest(key, min(limit, SUGGEST_TOP_K))
+        return [
+            {"text": text, "type": kind, "count": count}
+            for kind, text, count in results
+        ]
+
+    def update(self, user_id, removed=(), added=()):
+        """
+        Aplicar una escritura al trie del usuario (si está cargado)
+
+        Args:
+            user_id: ID del usuario
+            removed: Entradas que desaparecen (deck_entries/card_entries)
+            added: Entradas nuevas
+        """
+        with self._lock:
+            trie = self._tries.get(self._user_key(user_id))
+            if trie is None:
+                return
+            before = trie.size
+            for entry in removed:
+                trie.remove(*entry)
+            for entry in added:
+                trie.add(*entry)
+            self._terms += trie.size - before
+            self._evict()
+
+    def invalidate(self, user_id):
+        """Descartar el trie de un usuario (se reconstruye al usarse)"""
+        with self._lock:
+            trie = self._tries.pop(self._user_key(user_id), None)
+            if trie is not None:
+                self._terms -= trie.size
+
+    def clear(self):
+        with self._lock:
+            self._tries.clear()
+            self._terms = 0
+
+    def get_stats(self):
+        with self._lock:
+            return {"users": len(self._tries), "terms": self._terms}
+
+    @staticmethod
+    def _user_key(user_id):
+        # El identity JWT llega como texto y los servicios usan enteros
+        return str(user_id)
+
+    def _get(self, user_id):
+        with self._lock:
+            key = self._user_key(user_id)
+            trie = self._tries.get(key)
+            if trie is None:
+                return None
+            if time.monotonic() - trie.built_at > self.ttl:
+                self._terms -= self._tries.pop(key).size
+                return None
+            self._tries.move_to_end(key)
+            return trie
+
+    def _store(self, user_id, trie):
+        with self._lock:
+            key = self._user_key(user_id)
+            previous = self._tries.pop(key, None)
+            if previous is not None:
+                self._terms -= previous.size
+            self._tries[key] = trie
+            self._terms += trie.size
+            self._evict()
+
+    def _evict(self):
+        # Nunca se desaloja el usuario recién usado
+        while len(self._tries) > 1 and (
+                len(self._tries) > self.max_users or self._terms > self.max_terms):
+            _, trie = self._tries.popitem(last=False)
+            self._terms -= trie.size
+
+
+# Índice compartido por todos los servicios del proceso
+suggest_index = SuggestIndex()
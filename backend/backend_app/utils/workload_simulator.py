@@ -0,0 +1,312 @@
+"""
+Simulador Monte-Carlo de la carga futura de revisiones
+
+Proyecta cuántas revisiones tendrá cada usuario (o toda la plataforma) por
+día, simulando el estado FSRS de cada carta (stability, difficulty_fsrs,
+next_review) con las mismas fórmulas que calculate_fsrs.
+"""
+
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, Optional, Sequence, Tuple
+
+from sqlalchemy import and_
+
+from backend_app.extensions import db
+from backend_app.models import Deck, Flashcard, UserFSRSParameters
+from backend_app.utils.algorithms import (
+    FSRS_DEFAULT_WEIGHTS,
+    _fsrs_kernel,
+    _require_numpy,
+    np,
+)
+
+DEFAULT_DAYS = 90
+MAX_DAYS = 365
+DEFAULT_SIMULATIONS = 20
+MAX_SIMULATIONS = 200
+DEFAULT_PERCENTILES = (10, 50, 90)
+
+# Probabilidad de Hard/Good/Easy cuando la carta se recuerda
+DEFAULT_RECALL_RATINGS = (0.15, 0.75, 0.10)
+
+# Cartas por bloque al simular toda la plataforma
+FLEET_CHUNK_SIZE = 100000
+
+
+def simulate_review_load(
+    stabilities,
+    difficulties,
+    due_in_days,
+    days_since_review=None,
+    days: int = DEFAULT_DAYS,
+    simulations: int = DEFAULT_SIMULATIONS,
+    weights=None,
+    recall_ratings: Sequence[float] = DEFAULT_RECALL_RATINGS,
+    seed: Optional[int] = None,
+):
+    """
+    Simula la carga diaria de revisiones de un conjunto de cartas
+
+    Todas las simulaciones avanzan a la vez: cada día solo se procesan las
+    parejas (simulación, carta) que vencen ese día.
+
+    Args:
+        stabilities: Estabilidad actual de cada carta
+        difficulties: Dificultad FSRS actual de cada carta
+        due_in_days: Días hasta la próxima revisión (<= 0 vence hoy)
+        days_since_review: Días desde la última revisión (None = carta nueva)
+        days: Horizonte de simulación en días
+        simulations: Número de simulaciones Monte-Carlo
+        weights: Pesos FSRS, vector de 17 o matriz (17, cartas)
+        recall_ratings: Probabilidades de Hard/Good/Easy al recordar
+        seed: Semilla para resultados reproducibles
+
+    Returns:
+        np.ndarray (simulations, days) con revisiones por día
+    """
+    _require_numpy()
+    rng = np.random.default_rng(seed)
+
+    stabilities = np.asarray(stabilities, dtype=np.float64)
+    cards = stabilities.shape[0]
+    loads = np.zeros((simulations, days), dtype=np.int64)
+    if cards == 0 or days <= 0:
+        return loads
+
+    w = np.asarray(FSRS_DEFAULT_WEIGHTS if weights is None else weights, dtype=np.float64)
+    per_card_weights = w.ndim == 2
+    if per_card_weights:
+        w = w.astype(np.float32)
+    else:
+        # Escalares de Python: no fuerzan la promoción a float64
+        w = tuple(w.tolist())
+
+    # Estado por (simulación, carta), aplanado en un único eje. float32 e
+    # int16 bastan para un pronóstico y reducen el ancho de banda a la mitad
+    total = simulations * cards
+    stability = np.tile(stabilities.astype(np.float32), simulations)
+    difficulty = np.tile(np.asarray(difficulties, dtype=np.float32), simulations)
+    due_day = np.tile(
+        np.clip(np.ceil(np.asarray(due_in_days, dtype=np.float64)), 0, days).astype(np.int16),
+        simulations,
+    )
+    if days_since_review is None:
+        last_review_day = np.full(total, np.nan, dtype=np.float32)
+    else:
+        last_review_day = -np.tile(
+            np.asarray(days_since_review, dtype=np.float32), simulations)
+
+    recall_cdf = np.cumsum(recall_ratings) / np.sum(recall_ratings)
+
+    with np.errstate(over="ignore", invalid="ignore", divide="ignore"):
+        for day in range(days):
+            due = np.flatnonzero(due_day == day)
+            if due.size == 0:
+                continue
+            loads[:, day] = np.bincount(due // cards, minlength=simulations)
+
+            current_stability = stability[due]
+            elapsed = day - last_review_day[due]
+            # Cartas nuevas (sin revisión previa) tienen retrievability 1
+            retrievability = np.power(
+                np.float32(0.9), np.nan_to_num(elapsed, nan=0.0) / current_stability)
+
+            # Muestrear la respuesta: olvido (Again) o Hard/Good/Easy
+            draws = rng.random(due.size, dtype=np.float32)
+            recalled = draws < retrievability
+            rating = np.where(
+                recalled,
+                2 + np.searchsorted(recall_cdf, rng.random(due.size, dtype=np.float32)),
+                1,
+            ).astype(np.float32)
+
+            card_weights = w[:, due % cards] if per_card_weights else w
+            new_stability, new_difficulty, raw_interval = _fsrs_kernel(
+                rating, current_stability, difficulty[due], retrievability, card_weights)
+            interval = np.maximum(
+                np.where(rating == 4, 2, 1),
+                np.minimum(np.nan_to_num(raw_interval, nan=1.0), days),
+            ).astype(np.int16)
+
+            stability[due] = np.clip(new_stability, 0.01, 36500)
+            difficulty[due] = new_difficulty
+            last_review_day[due] = day
+            # Las cartas que vencen fuera del horizonte quedan en `days`
+            due_day[due] = np.minimum(day + interval, days)
+
+    return loads
+
+
+def summarize_load(loads, start_date: date = None,
+                   percentiles: Sequence[int] = DEFAULT_PERCENTILES) -> Dict:
+    """
+    Resume la carga simulada en carga esperada y percentiles por día
+
+    Args:
+        loads: Array (simulations, days) devuelto por simulate_review_load
+        start_date: Fecha del primer día simulado (por defecto hoy)
+        percentiles: Percentiles a calcular
+
+    Returns:
+        dict con la serie diaria y los totales
+    """
+    start_date = start_date or datetime.utcnow().date()
+    simulations, days = loads.shape
+    expected = loads.mean(axis=0)
+    bands = np.percentile(loads, percentiles, axis=0)
+
+    daily = []
+    for day in range(days):
+        entry = {
+            "date": (start_date + timedelta(days=day)).isoformat(),
+            "expected": round(float(expected[day]), 2),
+        }
+        for percentile, band in zip(percentiles, bands):
+            entry[f"p{percentile}"] = float(band[day])
+        daily.append(entry)
+
+    totals = loads.sum(axis=1)
+    return {
+        "days": days,
+        "simulations": simulations,
+        "daily": daily,
+        "total_expected": round(float(totals.mean()), 2),
+        "peak_expected": round(float(expected.max()), 2) if days else 0.0,
+        "total_percentiles": {
+            f"p{percentile}": float(value)
+            for percentile, value in zip(percentiles, np.percentile(totals, percentiles))
+        },
+    }
+
+
+def _card_state_query(session, user_id=None):
+    query = (
+        session.query(
+            Deck.user_id,
+            Flashcard.stability,
+            Flashcard.difficulty_fsrs,
+            Flashcard.next_review,
+            Flashcard.last_reviewed,
+        )
+        .join(Deck, Flashcard.deck_id == Deck.id)
+        .filter(and_(Flashcard.is_deleted.is_(False), Deck.is_deleted.is_(False)))
+    )
+    if user_id is not None:
+        query = query.filter(Deck.user_id == user_id)
+    return query
+
+
+def _rows_to_state(rows, now: datetime) -> Tuple:
+    """Convierte filas de cartas a arrays de estado para el simulador"""
+    count = len(rows)
+    stabilities = np.fromiter(
+        (row[1] if row[1] and row[1] > 0 else 1.0 for row in rows), dtype=np.float64, count=count)
+    difficulties = np.fromiter(
+        (row[2] if row[2] else 5.0 for row in rows), dtype=np.float64, count=count)
+    due_in_days = np.fromiter(
+        ((row[3] - now).total_seconds() / 86400 if row[3] else 0.0 for row in rows),
+        dtype=np.float64, count=count)
+    days_since_review = np.fromiter(
+        ((now - row[4]).total_seconds() / 86400 if row[4] else np.nan for row in rows),
+        dtype=np.float64, count=count)
+    return stabilities, difficulties, due_in_days, days_since_review
+
+
+def _user_weights(session) -> Dict[int, list]:
+    """Pesos FSRS personalizados de todos los usuarios que los tienen"""
+    parameters = session.query(UserFSRSParameters).filter(
+        UserFSRSParameters.is_deleted.is_(False)).all()
+    return {
+        p.user_id: p.weights_list for p in parameters
+        if p.weights_list and len(p.weights_list) == len(FSRS_DEFAULT_WEIGHTS)
+    }
+
+
+def forecast_user_workload(user_id: int, days: int = DEFAULT_DAYS,
+                           simulations: int = DEFAULT_SIMULATIONS,
+                           seed: Optional[int] = None, session=None) -> Dict:
+    """
+    Pronostica la carga diaria de revisiones de un usuario
+
+    Args:
+        user_id: ID del usuario
+        days: Horizonte en días
+        simulations: Número de simulaciones
+        seed: Semilla opcional
+        session: Sesión SQLAlchemy (por defecto db.session)
+
+    Returns:
+        dict con la serie diaria, totales y número de cartas
+    """
+    from backend_app.utils.fsrs_optimizer import get_user_fsrs_weights
+
+    session = session or db.session
+    now = datetime.utcnow()
+    rows = _card_state_query(session, user_id).all()
+    stabilities, difficulties, due_in_days, days_since_review = _rows_to_state(rows, now)
+
+    loads = simulate_review_load(
+        stabilities,
+        difficulties,
+        due_in_days,
+        days_since_review,
+        days=days,
+        simulations=simulations,
+        weights=get_user_fsrs_weights(user_id, session=session),
+        seed=seed,
+    )
+    summary = summarize_load(loads, now.date())
+    summary["cards"] = len(rows)
+    return summary
+
+
+def _iter_fleet_chunks(session, chunk_size: int) -> Iterator[list]:
+    query = _card_state_query(session).yield_per(chunk_size)
+    buffer = []
+    for row in query:
+        buffer.append(tuple(row))
+        if len(buffer) >= chunk_size:
+            yield buffer
+            buffer = []
+    if buffer:
+        yield buffer
+
+
+def forecast_fleet_workload(days: int = DEFAULT_DAYS,
+                            simulations: int = DEFAULT_SIMULATIONS,
+                            seed: Optional[int] = None,
+                            chunk_size: int = FLEET_CHUNK_SIZE,
+                            session=None) -> Dict:
+    """
+    Pronostica la carga diaria total de la plataforma
+
+    Las cartas se leen por bloques; como cada simulación es independiente,
+    sumar la simulación i de todos los bloques da una muestra válida de la
+    carga total. Cada carta usa los pesos FSRS de su usuario.
+
+    Returns:
+        dict con la serie diaria, totales y número de cartas
+    """
+    session = session or db.session
+    now = datetime.utcnow()
+    rng = np.random.default_rng(seed)
+    weights_by_user = _user_weights(session)
+    defaults = np.asarray(FSRS_DEFAULT_WEIGHTS, dtype=np.float64)
+
+    loads = np.zeros((simulations, days), dtype=np.int64)
+    cards = 0
+    for rows in _iter_fleet_chunks(session, chunk_size):
+        state = _rows_to_state(rows, now)
+        if weights_by_user:
+            weights = np.array(
+                [weights_by_user.get(row[0], defaults) for row in rows], dtype=np.float64).T
+        else:
+            weights = defaults
+        loads += simulate_review_load(
+            *state, days=days, simulations=simulations, weights=weights,
+            seed=int(rng.integers(2 ** 32)))
+        cards += len(rows)
+
+    summary = summarize_load(loads, now.date())
+    summary["cards"] = cards
+    return summary
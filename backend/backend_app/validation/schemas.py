@@ -5,8 +5,12 @@ Proporciona validación robusta y mensajes de error claros
 
 from pydantic import BaseModel, EmailStr, Field, validator
 from typing import Optional, List
+from datetime import datetime
 import re
 
+# Máximo de respuestas aceptadas en un envío por lotes
+MAX_BATCH_ANSWERS = 500
+
 
 class UserRegistrationSchema(BaseModel):
     """Esquema de validación para registro de usuario"""
@@ -158,6 +162,35 @@ class StudyAnswerSchema(BaseModel):
         return v
 
 
+class StudyBatchAnswerSchema(BaseModel):
+    """Esquema de validación para una respuesta dentro de un lote"""
+
+    card_id: int = Field(..., gt=0, description="ID de la carta")
+    quality: int = Field(..., ge=1, le=4,
+                         description="Calidad de la respuesta (1-4)")
+    response_time: Optional[int] = Field(
+        None, ge=0, description="Tiempo de respuesta en milisegundos")
+    reviewed_at: Optional[datetime] = Field(
+        None, description="Momento de la respuesta (clientes sin conexión)")
+
+
+class StudyAnswerBatchSchema(BaseModel):
+    """Esquema de validación para un lote ordenado de respuestas"""
+
+    answers: List[StudyBatchAnswerSchema] = Field(
+        ..., description="Respuestas en el orden en que se dieron")
+
+    @validator("answers")
+    def validate_answers(cls, v):
+        """Validar tamaño del lote"""
+        if not v:
+            raise ValueError("Debe enviar al menos una respuesta")
+        if len(v) > MAX_BATCH_ANSWERS:
+            raise ValueError(
+                f"Máximo {MAX_BATCH_ANSWERS} respuestas por lote")
+        return v
+
+
 class StudySessionSchema(BaseModel):
     """Esquema de validación para sesión de estudio"""
 
@@ -4,14 +4,29 @@ Configuración global de pytest con fixtures para testing
 import pytest
 import tempfile
 import os
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from unittest.mock import Mock
 
+from sqlalchemy import event
+
 from backend_app import create_app
-from backend_app.models.models import db, User, Deck, Flashcard
+from backend_app.models.models import db, User, Deck, DeckCardStats, DeckDueBucket, Flashcard
+from backend_app.models.jobs import Job
+from backend_app.models.tags import DeckTag, FlashcardTag, Tag
 from backend_app.services_new import create_services
 
 
+def pytest_collection_modifyitems(config, items):
+    """Saltar los benchmarks (marca slow) salvo con RUN_SLOW_TESTS=1"""
+    if os.environ.get('RUN_SLOW_TESTS') == '1':
+        return
+    skip_slow = pytest.mark.skip(reason='benchmark lento: usar RUN_SLOW_TESTS=1')
+    for item in items:
+        if 'slow' in item.keywords:
+            item.add_marker(skip_slow)
+
+
 @pytest.fixture(scope='session')
 def app():
     """Crear aplicación Flask para testing"""
@@ -48,11 +63,43 @@ def runner(app):
     return app.test_cli_runner()
 
 
+@pytest.fixture
+def max_queries(app):
+    """
+    Limitar las sentencias SQL ejecutadas en un bloque (detecta consultas N+1)
+
+        with max_queries(3):
+            client.get('/api/study/cards/due', headers=headers)
+    """
+    @contextmanager
+    def check(limit):
+        statements = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            statements.append(' '.join(statement.split()))
+
+        event.listen(db.engine, 'before_cursor_execute', capture)
+        try:
+            yield statements
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', capture)
+        assert len(statements) <= limit, (
+            f'{len(statements)} sentencias SQL (máximo {limit}):\n' + '\n'.join(statements))
+
+    return check
+
+
 @pytest.fixture
 def db_session(app):
     """Sesión de base de datos para testing"""
     with app.app_context():
         # Limpiar todas las tablas antes de cada test
+        db.session.query(Job).delete()
+        db.session.query(FlashcardTag).delete()
+        db.session.query(DeckTag).delete()
+        db.session.query(Tag).delete()
+        db.session.query(DeckDueBucket).delete()
+        db.session.query(DeckCardStats).delete()
         db.session.query(Flashcard).delete()
         db.session.query(Deck).delete()
         db.session.query(User).delete()
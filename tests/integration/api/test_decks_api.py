@@ -249,3 +249,126 @@ class TestDecksAPI:
         # Todos deberían haber sido exitosos
         assert all(status == 201 for status in results)
 
+
+
+class TestConditionalRequests:
+    """Tests de ETag / Last-Modified en el listado de decks"""
+
+    @pytest.fixture
+    def headers(self, app, test_user):
+        from flask_jwt_extended import create_access_token
+
+        with app.app_context():
+            token = create_access_token(identity=str(test_user.id))
+        return {'Authorization': f'Bearer {token}'}
+
+    @pytest.mark.integration
+    def test_etag_returns_304_until_decks_change(self, client, headers, db_session, test_deck):
+        """If-None-Match responde 304 hasta que cambia el listado"""
+        first = client.get('/api/decks/', headers=headers)
+        etag = first.headers['ETag']
+
+        assert first.status_code == 200
+        assert etag.startswith('W/')
+
+        cached = client.get('/api/decks/', headers={**headers, 'If-None-Match': etag})
+        assert cached.status_code == 304
+        assert cached.data == b''
+
+        test_deck.name = 'Renombrado'
+        db_session.commit()
+
+        changed = client.get('/api/decks/', headers={**headers, 'If-None-Match': etag})
+        assert changed.status_code == 200
+        assert changed.headers['ETag'] != etag
+
+    @pytest.mark.integration
+    def test_if_modified_since(self, client, headers, test_deck):
+        """If-Modified-Since con la fecha devuelta responde 304"""
+        first = client.get('/api/decks/', headers=headers)
+        last_modified = first.headers['Last-Modified']
+
+        cached = client.get('/api/decks/', headers={**headers, 'If-Modified-Since': last_modified})
+        assert cached.status_code == 304
+
+        stale = client.get('/api/decks/', headers={
+            **headers, 'If-Modified-Since': 'Mon, 01 Jan 2001 00:00:00 GMT'})
+        assert stale.status_code == 200
+
+
+class TestDeckExport:
+    """Tests de la exportación en streaming"""
+
+    @pytest.fixture
+    def headers(self, app, test_user):
+        from flask_jwt_extended import create_access_token
+
+        with app.app_context():
+            token = create_access_token(identity=str(test_user.id))
+        return {'Authorization': f'Bearer {token}'}
+
+    @pytest.mark.integration
+    def test_export_is_streamed_as_attachment(self, client, headers, test_deck, multiple_flashcards):
+        response = client.get(f'/api/decks/{test_deck.id}/export?format=ndjson', headers=headers)
+
+        assert response.status_code == 200
+        assert response.is_streamed
+        assert response.mimetype == 'application/x-ndjson'
+        assert 'attachment; filename="Test_Deck_export.jsonl"' == response.headers['Content-Disposition']
+        lines = response.get_data(as_text=True).splitlines()
+        assert len(lines) == 1 + len(multiple_flashcards)
+
+    @pytest.mark.integration
+    def test_unknown_format_is_rejected(self, client, headers, test_deck):
+        response = client.get(f'/api/decks/{test_deck.id}/export?format=xml', headers=headers)
+
+        assert response.status_code == 400
+
+
+class TestDeckImport:
+    """Tests de la importación desde fichero"""
+
+    @pytest.fixture
+    def headers(self, app, test_user):
+        from flask_jwt_extended import create_access_token
+
+        with app.app_context():
+            token = create_access_token(identity=str(test_user.id))
+        return {'Authorization': f'Bearer {token}'}
+
+    @pytest.mark.integration
+    def test_upload_is_imported_in_background(self, app, client, headers, tmp_path):
+        import io
+        import time
+
+        app.config['IMPORT_FOLDER'] = str(tmp_path)
+        body = 'front_text,back_text,tags\nHola,Hello,"[""saludos""]"\nAdiós,Bye,\n'
+
+        response = client.post(
+            '/api/decks/import?name=Vocabulario', headers=headers,
+            data={'file': (io.BytesIO(body.encode()), 'vocabulario.csv')},
+            content_type='multipart/form-data')
+
+        assert response.status_code == 202
+        job_url = f"/api/decks/jobs/{response.get_json()['job']['id']}"
+        deadline = time.monotonic() + 10
+        while True:
+            job = client.get(job_url, headers=headers).get_json()['job']
+            if job['status'] in ('completed', 'failed') or time.monotonic() > deadline:
+                break
+            time.sleep(0.05)
+        assert job['status'] == 'completed', job['error']
+        assert job['params']['imported'] == 2
+        deck = client.get(f"/api/decks/{job['result_deck_id']}", headers=headers).get_json()
+        assert 'Vocabulario' in str(deck)
+        assert list(tmp_path.iterdir()) == []
+
+    @pytest.mark.integration
+    def test_unknown_format_is_rejected(self, app, client, headers, tmp_path):
+        app.config['IMPORT_FOLDER'] = str(tmp_path)
+
+        response = client.post('/api/decks/import', headers=headers, data='<deck/>',
+                               content_type='application/xml')
+
+        assert response.status_code == 400
+        assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,80 @@
+"""
+Tests de número de consultas por endpoint (regresiones N+1)
+
+Cada endpoint se llama con varias cartas en varios decks y con el cache
+vacío: el número de sentencias no debe crecer con el número de filas.
+"""
+import pytest
+
+from backend_app.models.models import Deck, Flashcard
+from backend_app.utils.cache import get_cache
+
+
+@pytest.fixture
+def headers(app, test_user):
+    from flask_jwt_extended import create_access_token
+
+    with app.app_context():
+        token = create_access_token(identity=str(test_user.id))
+    return {'Authorization': f'Bearer {token}'}
+
+
+@pytest.fixture
+def cards(db_session, test_user, test_deck):
+    """20 cartas repartidas en dos decks"""
+    other_deck = Deck(user_id=test_user.id, name='Otro Deck')
+    db_session.add(other_deck)
+    db_session.flush()
+    cards = [
+        Flashcard(deck_id=deck.id, front_text=f'Pregunta {i}', back_text=f'Respuesta {i}',
+                  difficulty='normal')
+        for i in range(10) for deck in (test_deck, other_deck)
+    ]
+    db_session.add_all(cards)
+    db_session.commit()
+    get_cache().clear()
+    return cards
+
+
+@pytest.mark.integration
+def test_due_cards(client, headers, cards, max_queries):
+    with max_queries(3):
+        response = client.get('/api/study/cards/due', headers=headers)
+
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['total_due'] == 20
+    assert {deck['deck_name'] for deck in data['decks']} == {'Test Deck', 'Otro Deck'}
+
+
+@pytest.mark.integration
+def test_deck_flashcards(client, headers, test_deck, cards, max_queries):
+    # Deck, versión (ETag), conteo y página; el nombre del deck llega con las cartas
+    with max_queries(6):
+        response = client.get(f'/api/flashcards/deck/{test_deck.id}?cursor=', headers=headers)
+
+    assert response.status_code == 200
+    assert len(response.get_json()['flashcards']) == 10
+
+
+@pytest.mark.integration
+def test_user_flashcards_loads_deck_names_with_cards(app, test_user, cards, max_queries):
+    from backend_app.services_new import FlashcardService
+
+    with max_queries(3):
+        result = FlashcardService().get_user_flashcards(test_user.id, per_page=50)
+
+    flashcards = result['data']['flashcards']
+    assert len(flashcards) == 20
+    assert {card['deck_name'] for card in flashcards} == {'Test Deck', 'Otro Deck'}
+
+
+@pytest.mark.integration
+def test_search_content_projects_deck_name(app, test_user, cards, max_queries):
+    """La búsqueda global (frontend_api.search_content) lee el nombre del deck en la consulta"""
+    from backend_app.services_new import SearchService
+
+    with max_queries(4):
+        result = SearchService().search(test_user.id, 'Pregunta')
+
+    assert {card['deck_name'] for card in result['data']['flashcards']} == {'Test Deck', 'Otro Deck'}
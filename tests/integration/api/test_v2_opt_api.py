@@ -0,0 +1,98 @@
+"""
+Tests de integración para la API v2 optimizada (/api/v2/opt)
+"""
+
+import pytest
+
+from backend_app.api.cache_optimized import invalidate_user_data
+from backend_app.api.performance_middleware import (
+    get_performance_stats,
+    optimize_json_response,
+)
+
+
+class TestV2OptimizedAPI:
+    """Cache de respuestas y monitor de rendimiento de la API v2"""
+
+    @pytest.fixture
+    def headers(self, app, test_user):
+        from flask_jwt_extended import create_access_token
+
+        with app.app_context():
+            token = create_access_token(identity=str(test_user.id))
+        return {'Authorization': f'Bearer {token}'}
+
+    @pytest.mark.integration
+    def test_list_decks_cached_until_invalidated(self, app, client, headers, db_session,
+                                                 test_user, test_deck):
+        """La segunda petición sale de cache hasta que se invalida el usuario"""
+        first = client.get('/api/v2/opt/decks', headers=headers)
+        assert first.status_code == 200
+        assert first.headers['X-Cache'] == 'MISS'
+        assert 'app;dur=' in first.headers['Server-Timing']
+
+        items = first.get_json()['data']['items']
+        assert [deck['id'] for deck in items] == [test_deck.id]
+        assert 'cards_due' in items[0]
+
+        second = client.get('/api/v2/opt/decks', headers=headers)
+        assert second.headers['X-Cache'] == 'HIT'
+        assert second.get_json()['data'] == first.get_json()['data']
+
+        test_deck.name = 'Renombrado'
+        db_session.commit()
+        with app.app_context():
+            invalidate_user_data(test_user.id)
+
+        third = client.get('/api/v2/opt/decks', headers=headers)
+        assert third.headers['X-Cache'] == 'MISS'
+        assert third.get_json()['data']['items'][0]['name'] == 'Renombrado'
+
+    @pytest.mark.integration
+    def test_list_decks_columnar_format(self, client, headers, test_deck):
+        """format=columnar envía los campos una sola vez"""
+        response = client.get('/api/v2/opt/decks?format=columnar', headers=headers)
+        data = response.get_json()['data']
+
+        assert 'name' in data['fields']
+        assert data['rows'][0][data['fields'].index('name')] == test_deck.name
+
+    @pytest.mark.integration
+    def test_dashboard_and_monitor_stats(self, client, headers, test_deck):
+        """El dashboard usa los contadores precalculados y queda registrado"""
+        response = client.get('/api/v2/opt/dashboard', headers=headers)
+        assert response.status_code == 200
+
+        stats = response.get_json()['data']['stats']
+        assert stats['total_decks'] == 1
+        assert stats['study_streak'] == 0
+        assert get_performance_stats()['get_dashboard_v2_optimized']['count'] >= 1
+
+    @pytest.mark.integration
+    def test_study_cards_and_progress(self, client, headers, test_deck, multiple_flashcards):
+        """Las cartas nuevas se sirven para estudiar y el progreso responde"""
+        study = client.get(f'/api/v2/opt/decks/{test_deck.id}/study?limit=3', headers=headers)
+        assert study.status_code == 200
+        cards = study.get_json()['data']['cards']
+        assert len(cards) == 3
+        assert all(card['study_info']['is_new'] for card in cards)
+
+        progress = client.get('/api/v2/opt/stats/progress?days=7', headers=headers)
+        assert progress.status_code == 200
+        assert progress.get_json()['data']['summary']['total_sessions'] == 0
+
+    @pytest.mark.integration
+    def test_requires_auth(self, client):
+        """Sin token no se sirve nada (ni siquiera desde cache)"""
+        response = client.get('/api/v2/opt/decks')
+        assert response.status_code == 401
+
+
+def test_optimize_json_response():
+    """Elimina None, redondea floats y serializa fechas"""
+    from datetime import date
+    from decimal import Decimal
+
+    data = {'a': None, 'b': 1.234567, 'c': [Decimal('2.5'), date(2024, 1, 2)], 'd': {'e': None}}
+
+    assert optimize_json_response(data) == {'b': 1.2346, 'c': [2.5, '2024-01-02'], 'd': {}}
@@ -0,0 +1,84 @@
+"""
+Tests unitarios para el middleware de compresión
+"""
+import gzip
+import json
+
+import pytest
+from flask import Response
+
+from backend_app.middleware.middleware import compress_response
+from backend_app.utils.cache import get_cache
+
+CONFIG = {
+    "COMPRESS_MIN_SIZE": 1024,
+    "COMPRESS_LEVEL": 6,
+    "COMPRESS_STREAM_THRESHOLD": 64 * 1024,
+    "COMPRESS_CACHE_TIMEOUT": 60,
+}
+
+
+def _json_response(payload, **headers):
+    response = Response(json.dumps(payload), mimetype="application/json")
+    for name, value in headers.items():
+        response.headers[name] = value
+    return response
+
+
+class TestCompression:
+    """Tests de negociación, umbral, streaming y cache de bytes comprimidos"""
+
+    @pytest.mark.unit
+    def test_gzip_above_threshold(self, app):
+        payload = [{"date": f"2024-01-{i % 28 + 1:02d}", "count": i} for i in range(365)]
+        with app.test_request_context(headers={"Accept-Encoding": "gzip, deflate"}):
+            response = compress_response(_json_response(payload), CONFIG)
+
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert "Accept-Encoding" in response.headers["Vary"]
+        assert json.loads(gzip.decompress(response.get_data())) == payload
+        assert int(response.headers["Content-Length"]) == len(response.get_data())
+
+    @pytest.mark.unit
+    def test_small_or_not_accepted_bodies_are_untouched(self, app):
+        with app.test_request_context(headers={"Accept-Encoding": "gzip"}):
+            small = compress_response(_json_response({"ok": True}), CONFIG)
+        with app.test_request_context():
+            identity = compress_response(_json_response(["x" * 2000]), CONFIG)
+
+        assert "Content-Encoding" not in small.headers
+        assert "Content-Encoding" not in identity.headers
+
+    @pytest.mark.unit
+    def test_large_and_streamed_bodies_use_streaming(self, app):
+        payload = ["fila %d" % i for i in range(20000)]
+        with app.test_request_context(headers={"Accept-Encoding": "gzip"}):
+            large = compress_response(_json_response(payload), CONFIG)
+            streamed = compress_response(
+                Response((f"{i}\n" for i in range(1000)), mimetype="application/x-ndjson"),
+                CONFIG)
+
+            assert large.is_streamed
+            assert "Content-Length" not in large.headers
+            assert json.loads(gzip.decompress(b"".join(large.response))) == payload
+            assert gzip.decompress(b"".join(streamed.response)).decode().splitlines()[-1] == "999"
+
+    @pytest.mark.unit
+    def test_cacheable_responses_reuse_compressed_bytes(self, app, monkeypatch):
+        from backend_app.middleware import middleware
+
+        calls = []
+        original = middleware._compress
+        monkeypatch.setattr(
+            middleware, "_compress",
+            lambda *args: calls.append(1) or original(*args))
+        payload = {"decks": ["deck %d" % i for i in range(300)]}
+
+        get_cache().clear()
+        for _ in range(3):
+            with app.test_request_context(headers={"Accept-Encoding": "gzip"}):
+                response = compress_response(_json_response(payload, ETag='W/"v1"'), CONFIG)
+                assert json.loads(gzip.decompress(response.get_data())) == payload
+                assert response.headers["ETag"] == 'W/"v1"'
+
+        assert len(calls) == 1
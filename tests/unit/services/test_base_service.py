@@ -0,0 +1,98 @@
+"""
+Tests unitarios para el cache de BaseService
+"""
+import threading
+import time
+
+import pytest
+
+from backend_app.services_new.base_service import BaseService
+from backend_app.utils.cache import CacheManager, CachedValue
+
+
+@pytest.fixture
+def service():
+    return BaseService(cache=CacheManager())
+
+
+class TestGetOrSetCache:
+    """Tests de coalescencia, stale-while-revalidate y expiración temprana"""
+
+    @pytest.mark.unit
+    def test_parallel_callers_fetch_once(self, service):
+        """50 llamadas concurrentes sobre una clave vacía ejecutan un solo fetch"""
+        calls = []
+        barrier = threading.Barrier(50)
+        results = []
+
+        def fetch():
+            calls.append(1)
+            time.sleep(0.05)
+            return {"total": 42}
+
+        def worker():
+            barrier.wait()
+            results.append(service._get_or_set_cache("dashboard_stats:1", fetch))
+
+        threads = [threading.Thread(target=worker) for _ in range(50)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(calls) == 1
+        assert results == [{"total": 42}] * 50
+
+    @pytest.mark.unit
+    def test_fetch_error_reaches_waiters(self, service):
+        """Si el cálculo falla, todos los que esperan reciben el error"""
+        barrier = threading.Barrier(5)
+        errors = []
+
+        def fetch():
+            time.sleep(0.05)
+            raise ValueError("fallo")
+
+        def worker():
+            barrier.wait()
+            try:
+                service._get_or_set_cache("broken", fetch)
+            except ValueError as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(errors) == 5
+        assert service.cache.get("broken") is None
+
+    @pytest.mark.unit
+    def test_stale_value_served_while_refreshing(self, service):
+        """Con stale_timeout se sirve el valor vencido y se recalcula en segundo plano"""
+        service.cache.set("heatmap", CachedValue("viejo", time.time() - 1, 0.0), timeout=60)
+        refreshed = threading.Event()
+
+        def fetch():
+            refreshed.set()
+            return "nuevo"
+
+        assert service._get_or_set_cache("heatmap", fetch, timeout=60, stale_timeout=30) == "viejo"
+        assert refreshed.wait(1)
+
+        for _ in range(50):
+            if service.cache.get("heatmap").value == "nuevo":
+                break
+            time.sleep(0.01)
+        assert service._get_or_set_cache("heatmap", fetch, timeout=60, stale_timeout=30) == "nuevo"
+
+    @pytest.mark.unit
+    def test_probabilistic_early_expiration(self, service):
+        """Una entrada cara de calcular se recalcula antes de vencer"""
+        service.cache.set("slow", CachedValue("viejo", time.time() + 0.5, 1000.0), timeout=60)
+        service.cache.set("fast", CachedValue("viejo", time.time() + 60, 0.0), timeout=60)
+
+        assert service._get_or_set_cache("slow", lambda: "nuevo") == "nuevo"
+        assert service._get_or_set_cache("fast", lambda: "nuevo") == "viejo"
@@ -1,6 +1,11 @@
 """
 Tests unitarios para DeckService
 """
+import importlib
+import json
+import time
+from datetime import datetime
+
 import pytest
 from unittest.mock import Mock, patch
 from sqlalchemy.exc import IntegrityError
@@ -8,6 +13,15 @@ from sqlalchemy.exc import IntegrityError
 from backend_app.models.models import Deck
 
 
+@pytest.fixture
+def service(app):
+    from backend_app.models.models import db
+    from backend_app.services_new import DeckService
+    from backend_app.utils.cache import CacheManager
+
+    return DeckService(db=db, cache=CacheManager())
+
+
 class TestDeckService:
     """Tests para DeckService"""
     
@@ -201,3 +215,539 @@ class TestDeckService:
         assert 'total_cards' in result['data']
         assert result['data']['total_cards'] >= 1
 
+
+
+class TestDeckCardStats:
+    """Tests para los contadores de cartas mantenidos incrementalmente"""
+
+    def _stats(self, service, deck, user):
+        result = service.get_deck_by_id(deck.id, user.id)
+        assert result['success'] is True
+        return {key: result['data'][key] for key in (
+            'total_cards', 'cards_due', 'cards_new', 'cards_learning', 'cards_mastered')}
+
+    @pytest.mark.unit
+    def test_counters_follow_card_changes(self, service, db_session, test_user, test_deck, multiple_flashcards):
+        """Crear, repasar y borrar cartas actualiza contadores e histograma"""
+        from datetime import datetime, timedelta
+
+        assert self._stats(service, test_deck, test_user) == {
+            'total_cards': 5, 'cards_due': 5, 'cards_new': 5, 'cards_learning': 0, 'cards_mastered': 0}
+
+        now = datetime.utcnow()
+        multiple_flashcards[0].last_reviewed = now
+        multiple_flashcards[0].interval_days = 30
+        multiple_flashcards[0].next_review = now + timedelta(days=30)
+        multiple_flashcards[1].last_reviewed = now
+        multiple_flashcards[1].interval_days = 2
+        multiple_flashcards[1].next_review = now + timedelta(days=2)
+        multiple_flashcards[2].is_deleted = True
+        db_session.commit()
+
+        assert self._stats(service, test_deck, test_user) == {
+            'total_cards': 4, 'cards_due': 2, 'cards_new': 2, 'cards_learning': 1, 'cards_mastered': 1}
+
+    @pytest.mark.unit
+    def test_rebuild_matches_incremental_counters(self, service, db_session, test_user, test_deck, multiple_flashcards):
+        """El job de reparación reconstruye los mismos valores"""
+        from datetime import datetime, timedelta
+
+        multiple_flashcards[0].last_reviewed = datetime.utcnow()
+        multiple_flashcards[0].next_review = datetime.utcnow() + timedelta(days=3)
+        db_session.commit()
+        incremental = self._stats(service, test_deck, test_user)
+
+        result = service.rebuild_card_stats()
+
+        assert result['success'] is True
+        assert result['data']['decks'] >= 1
+        assert self._stats(service, test_deck, test_user) == incremental
+
+    @pytest.mark.unit
+    def test_deck_without_stats_is_rebuilt_on_read(self, service, db_session, test_user, test_deck, multiple_flashcards):
+        """Decks anteriores a las tablas de estadísticas se reconstruyen al leerse"""
+        from backend_app.models.models import DeckCardStats
+
+        db_session.query(DeckCardStats).filter_by(deck_id=test_deck.id).delete()
+        db_session.commit()
+
+        result = service.get_user_decks(test_user.id)
+
+        deck = result['data']['decks'][0]
+        assert deck['total_cards'] == 5
+        assert deck['cards_new'] == 5
+        assert db_session.query(DeckCardStats).filter_by(deck_id=test_deck.id).count() == 1
+
+    @pytest.mark.unit
+    def test_deleting_deck_removes_its_stats(self, db_session, test_deck, multiple_flashcards):
+        """Borrar un deck borra sus contadores e histograma"""
+        from datetime import datetime, timedelta
+        from backend_app.models.models import DeckCardStats, DeckDueBucket
+
+        multiple_flashcards[0].next_review = datetime.utcnow() + timedelta(days=3)
+        db_session.commit()
+        deck_id = test_deck.id
+        assert db_session.query(DeckDueBucket).filter_by(deck_id=deck_id).count() >= 1
+
+        db_session.delete(test_deck)
+        db_session.commit()
+
+        assert db_session.query(DeckCardStats).filter_by(deck_id=deck_id).count() == 0
+        assert db_session.query(DeckDueBucket).filter_by(deck_id=deck_id).count() == 0
+
+
+class TestCacheGenerations:
+    """Tests de invalidación por generaciones (sin recorrer claves)"""
+
+    @pytest.fixture
+    def cached_service(self, app):
+        from backend_app.models.models import db
+        from backend_app.services_new import DeckService
+        from backend_app.utils.cache import CacheManager
+
+        cache = CacheManager()
+        cache.delete_pattern = Mock(side_effect=AssertionError("no debe recorrer claves"))
+        return DeckService(db=db, cache=cache)
+
+    @pytest.mark.unit
+    def test_write_invalidates_user_listing(self, cached_service, db_session, test_user, test_deck, valid_deck_data):
+        """Crear un deck cambia la generación del usuario y el listado se recalcula"""
+        first = cached_service.get_user_decks(test_user.id)
+        cached_key = cached_service._cache_key("user_decks", 1, 20, "", None, "exact", user_id=test_user.id)
+
+        cached_service.create_deck(test_user.id, valid_deck_data)
+        second = cached_service.get_user_decks(test_user.id)
+
+        assert len(first['data']['decks']) == 1
+        assert len(second['data']['decks']) == 2
+        assert cached_service._cache_key("user_decks", 1, 20, "", None, "exact", user_id=test_user.id) != cached_key
+        # La entrada antigua no se borra: expira por su TTL
+        assert cached_service.cache.get(cached_key) is not None
+
+    @pytest.mark.unit
+    def test_invalidation_is_scoped(self, cached_service, app):
+        """Invalidar un usuario o deck no afecta a otros"""
+        other_user = cached_service._cache_key("user_decks", user_id=2)
+        other_deck = cached_service._cache_key("user_flashcards", deck_id=8)
+        namespace = cached_service._cache_key("dashboard_stats", user_id=1)
+
+        cached_service._invalidate_cache(user_id=1, deck_id=7)
+
+        assert cached_service._cache_key("user_decks", user_id=2) == other_user
+        assert cached_service._cache_key("user_flashcards", deck_id=8) == other_deck
+        assert cached_service._cache_key("dashboard_stats", user_id=1) != namespace
+
+        cached_service._invalidate_cache(namespace="user_decks")
+        assert cached_service._cache_key("user_decks", user_id=2) != other_user
+
+
+class TestKeysetPagination:
+    """Tests de paginación por cursor sobre (updated_at, id)"""
+
+    @pytest.fixture
+    def many_decks(self, db_session, test_user):
+        from datetime import datetime
+
+        # Mismo updated_at en todos: el id desempata el orden
+        updated_at = datetime(2024, 1, 1)
+        decks = [
+            Deck(name=f'Deck {i}', user_id=test_user.id, updated_at=updated_at)
+            for i in range(7)
+        ]
+        db_session.add_all(decks)
+        db_session.commit()
+        return decks
+
+    @pytest.mark.unit
+    def test_cursor_walks_all_pages_without_gaps(self, service, test_user, many_decks):
+        """Recorrer las páginas con next_cursor devuelve cada deck una vez"""
+        seen = []
+        cursor = ''
+        while True:
+            result = service.get_user_decks(test_user.id, per_page=3, cursor=cursor)
+            assert result['success'] is True
+            pagination = result['data']['pagination']
+            seen.extend(deck['id'] for deck in result['data']['decks'])
+            if not pagination['has_next']:
+                break
+            cursor = pagination['next_cursor']
+
+        assert seen == sorted((deck.id for deck in many_decks), reverse=True)
+        assert pagination['total'] == 7
+        assert pagination['next_cursor'] is None
+
+    @pytest.mark.unit
+    def test_count_modes(self, service, test_user, many_decks):
+        """count=none omite el total; estimate lo aproxima"""
+        skipped = service.get_user_decks(test_user.id, per_page=3, cursor='', count='none')
+        estimated = service.get_public_decks(per_page=3, count='estimate')
+
+        assert skipped['data']['pagination']['total'] is None
+        assert skipped['data']['pagination']['has_next'] is True
+        assert estimated['pagination']['total'] == 0
+        assert estimated['pagination']['total_is_estimate'] is False
+
+    @pytest.mark.unit
+    def test_invalid_cursor(self, service, test_user):
+        """Un cursor manipulado es un error 400, no un 500"""
+        result = service.get_user_decks(test_user.id, cursor='no-es-un-cursor')
+
+        assert result['success'] is False
+        assert result['code'] == 400
+
+
+class TestDuplicateDeck:
+    """Tests de la duplicación de decks en el servidor"""
+
+    @staticmethod
+    def _wait_for_job(service, job_id, user_id, timeout=10):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            job = service.get_job(job_id, user_id)['data']
+            if job['status'] in ('completed', 'failed'):
+                return job
+            time.sleep(0.05)
+        raise AssertionError(f'El job {job_id} no terminó')
+
+    @pytest.mark.unit
+    def test_copies_cards_without_study_state(self, service, db_session, test_user, test_deck,
+                                              multiple_flashcards):
+        from backend_app.models.models import DeckCardStats, Flashcard, rebuild_deck_card_stats
+        from backend_app.models.tags import FlashcardTag
+
+        multiple_flashcards[0].tags = json.dumps(['verbos'])
+        multiple_flashcards[1].interval_days = 30
+        multiple_flashcards[1].last_reviewed = datetime.utcnow()
+        multiple_flashcards[1].total_reviews = 3
+        db_session.delete(multiple_flashcards[4])
+        db_session.commit()
+
+        result = service.duplicate_deck(test_deck.id, test_user.id)
+
+        assert result['success'] is True
+        copy_id = result['data']['id']
+        assert result['data']['name'] == f'{test_deck.name} (Copia)'
+        assert result['data']['total_cards'] == 4
+        copies = db_session.query(Flashcard).filter_by(deck_id=copy_id).order_by(Flashcard.id).all()
+        assert [card.front_text for card in copies] == [f'Question {i}' for i in range(1, 5)]
+        assert {(card.total_reviews, card.last_reviewed, card.interval_days) for card in copies} == {(0, None, 1)}
+        assert db_session.query(FlashcardTag).filter_by(flashcard_id=copies[0].id).count() == 1
+
+        stats = db_session.query(DeckCardStats).filter_by(deck_id=copy_id).one()
+        incremental = (stats.total_cards, stats.cards_new)
+        rebuild_deck_card_stats(db_session, [copy_id])
+        db_session.refresh(stats)
+        assert incremental == (stats.total_cards, stats.cards_new) == (4, 4)
+
+    @pytest.mark.unit
+    def test_free_name_is_resolved_in_one_query(self, service, db_session, test_user, test_deck):
+        for name in ('Copia 100%', 'Copia 100% (1)', 'Copia 100% (3)', 'Copia 1000% (2)'):
+            db_session.add(Deck(user_id=test_user.id, name=name))
+        db_session.commit()
+
+        result = service.duplicate_deck(test_deck.id, test_user.id, new_name='Copia 100%')
+
+        assert result['data']['name'] == 'Copia 100% (2)'
+
+    @pytest.mark.unit
+    def test_background_copy_reports_progress(self, service, db_session, test_user, test_deck,
+                                              multiple_flashcards, monkeypatch):
+        deck_service_module = importlib.import_module('backend_app.services_new.deck_service')
+        monkeypatch.setattr(deck_service_module, 'DUPLICATE_CHUNK_SIZE', 2)
+
+        result = service.duplicate_deck(test_deck.id, test_user.id, background=True)
+
+        assert result['success'] is True
+        assert result['accepted'] is True
+        job = self._wait_for_job(service, result['data']['id'], test_user.id)
+        assert job['status'] == 'completed', job['error']
+        assert (job['processed'], job['total'], job['progress']) == (5, 5, 1.0)
+        copy = service.get_deck_by_id(job['result_deck_id'], test_user.id)
+        assert copy['data']['total_cards'] == 5
+        assert service.get_job(job['id'], test_user.id + 1)['code'] == 404
+
+    @pytest.mark.unit
+    def test_background_copy_is_hidden_until_done_and_resumable(
+            self, service, db_session, test_user, test_deck, multiple_flashcards, monkeypatch):
+        from backend_app.models.models import Flashcard
+
+        deck_service_module = importlib.import_module('backend_app.services_new.deck_service')
+        monkeypatch.setattr(deck_service_module, 'DUPLICATE_CHUNK_SIZE', 2)
+
+        # El proceso muere antes de lanzar el worker: el job queda pendiente
+        monkeypatch.setattr(service, '_start_job', lambda job_id, work: True)
+        job = service.duplicate_deck(test_deck.id, test_user.id, background=True)['data']
+        copy_id = job['result_deck_id']
+        assert service.get_deck_by_id(copy_id, test_user.id)['code'] == 404
+
+        # Y el worker falla en el segundo tramo, con el primero ya confirmado
+        copy_cards = service._copy_deck_cards
+        calls = []
+
+        def crash_on_second_chunk(*args, **kwargs):
+            calls.append(kwargs['after_id'])
+            if len(calls) == 2:
+                raise RuntimeError('worker interrumpido')
+            return copy_cards(*args, **kwargs)
+
+        monkeypatch.setattr(service, '_copy_deck_cards', crash_on_second_chunk)
+        assert service.resume_jobs()['data']['jobs'] == [job['id']]
+        job = service.get_job(job['id'], test_user.id)['data']
+        assert (job['status'], job['processed']) == ('failed', 2)
+        assert service.get_deck_by_id(copy_id, test_user.id)['code'] == 404
+
+        service.resume_jobs(job_ids=[job['id']])
+
+        job = service.get_job(job['id'], test_user.id)['data']
+        assert (job['status'], job['processed']) == ('completed', 5)
+        assert service.get_deck_by_id(copy_id, test_user.id)['data']['total_cards'] == 5
+        fronts = [front for front, in db_session.query(Flashcard.front_text)
+                  .filter_by(deck_id=copy_id).order_by(Flashcard.id)]
+        assert fronts == [f'Question {i}' for i in range(1, 6)]
+
+    @pytest.mark.slow
+    def test_duplicate_large_deck(self, service, db_session, test_user, test_deck):
+        """Duplicar un deck de 20k cartas"""
+        from backend_app.models.models import bulk_insert_flashcards
+
+        rows = [
+            {'front_text': f'Pregunta {i}', 'back_text': f'Respuesta {i}', 'difficulty': 'normal'}
+            for i in range(20_000)
+        ]
+        bulk_insert_flashcards(db_session.connection(), test_deck.id, rows)
+        db_session.commit()
+
+        start_time = time.perf_counter()
+        result = service.duplicate_deck(test_deck.id, test_user.id, background=False)
+        elapsed = time.perf_counter() - start_time
+
+        assert result['data']['total_cards'] == 20_000
+
+
+class TestExportDeck:
+    """Tests de la exportación en streaming"""
+
+    @pytest.mark.unit
+    def test_ndjson_streams_deck_then_cards(self, service, db_session, test_user, test_deck,
+                                            multiple_flashcards):
+        multiple_flashcards[2].interval_days = 12
+        db_session.delete(multiple_flashcards[4])
+        db_session.commit()
+
+        result = service.export_deck(test_deck.id, test_user.id, 'ndjson')
+
+        assert result['data']['mimetype'] == 'application/x-ndjson'
+        assert result['data']['filename'] == 'Test_Deck_export.jsonl'
+        records = [json.loads(line) for line in ''.join(result['data']['chunks']).splitlines()]
+        assert records[0]['type'] == 'deck'
+        assert records[0]['name'] == test_deck.name
+        assert [record['front_text'] for record in records[1:]] == [f'Question {i}' for i in range(1, 5)]
+        assert records[3]['interval_days'] == 12
+        assert isinstance(records[1]['next_review'], str)
+
+    @pytest.mark.unit
+    def test_csv_has_header_and_one_row_per_card(self, service, test_user, test_deck,
+                                                 multiple_flashcards):
+        import csv
+        import io
+
+        result = service.export_deck(test_deck.id, test_user.id, 'csv')
+
+        rows = list(csv.DictReader(io.StringIO(''.join(result['data']['chunks']))))
+        assert [row['back_text'] for row in rows] == [f'Answer {i}' for i in range(1, 6)]
+        assert rows[0]['ease_factor'] == '2.5'
+
+    @pytest.mark.unit
+    def test_sqlite_package_includes_review_history(self, service, db_session, test_user, test_deck,
+                                                    multiple_flashcards, tmp_path):
+        import sqlite3
+
+        from backend_app.models.models import CardReview, StudySession
+
+        session = StudySession(user_id=test_user.id, deck_id=test_deck.id)
+        db_session.add(session)
+        db_session.flush()
+        db_session.add_all([
+            CardReview(flashcard_id=multiple_flashcards[0].id, session_id=session.id, rating=rating)
+            for rating in (1, 3)
+        ])
+        db_session.commit()
+
+        result = service.export_deck(test_deck.id, test_user.id, 'sqlite')
+        package = tmp_path / 'deck.sqlite'
+        package.write_bytes(b''.join(result['data']['chunks']))
+
+        connection = sqlite3.connect(package)
+        try:
+            assert connection.execute('SELECT name FROM deck').fetchall() == [(test_deck.name,)]
+            assert connection.execute('SELECT COUNT(*) FROM cards').fetchone() == (5,)
+            assert connection.execute(
+                'SELECT flashcard_id, rating FROM reviews ORDER BY rowid').fetchall() == [
+                (multiple_flashcards[0].id, 1), (multiple_flashcards[0].id, 3)]
+            assert connection.execute(
+                'SELECT total_reviews FROM cards WHERE id = ?', (multiple_flashcards[0].id,)
+            ).fetchone() == (2,)
+        finally:
+            connection.close()
+
+    @pytest.mark.unit
+    def test_rejects_unknown_format_and_foreign_deck(self, service, test_user, test_deck):
+        assert service.export_deck(test_deck.id, test_user.id, 'xml')['code'] == 400
+        assert service.export_deck(test_deck.id, test_user.id + 1)['code'] == 404
+
+    @pytest.mark.slow
+    def test_export_memory_is_constant(self, service, db_session, test_user, test_deck):
+        """La memoria pico no crece con el tamaño del deck (20k frente a 200k cartas)"""
+        import tracemalloc
+
+        from backend_app.models.models import bulk_insert_flashcards
+
+        def peak_export(export_format):
+            result = service.export_deck(test_deck.id, test_user.id, export_format)
+            tracemalloc.start()
+            try:
+                for _ in result['data']['chunks']:
+                    pass
+                return tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+
+        peaks = {}
+        inserted = 0
+        for total in (20_000, 200_000):
+            rows = [
+                {'front_text': f'Pregunta {i}', 'back_text': f'Respuesta {i}', 'difficulty': 'normal'}
+                for i in range(inserted, total)
+            ]
+            bulk_insert_flashcards(db_session.connection(), test_deck.id, rows)
+            db_session.commit()
+            inserted = total
+            del rows
+            for export_format in ('ndjson', 'csv', 'sqlite'):
+                peaks[export_format, total] = peak_export(export_format)
+
+        for export_format in ('ndjson', 'csv', 'sqlite'):
+            assert peaks[export_format, 200_000] < 2 * peaks[export_format, 20_000] + 2**20
+
+
+class TestImportDeck:
+    """Tests de la importación por bloques en segundo plano"""
+
+    @staticmethod
+    def _write(tmp_path, name, chunks):
+        path = tmp_path / name
+        if name.endswith('.sqlite'):
+            path.write_bytes(b''.join(chunks))
+        else:
+            path.write_text(''.join(chunks), encoding='utf-8')
+        return str(path)
+
+    @staticmethod
+    def _fronts(db_session, deck_id):
+        from backend_app.models.models import Flashcard
+
+        return [front for front, in db_session.query(Flashcard.front_text)
+                .filter_by(deck_id=deck_id).order_by(Flashcard.id)]
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize('export_format, deck_name', [
+        ('ndjson', 'Test Deck (1)'), ('csv', 'Deck importado'), ('sqlite', 'Test Deck (1)'),
+    ])
+    def test_round_trip_from_export(self, service, db_session, test_user, test_deck,
+                                    multiple_flashcards, tmp_path, export_format, deck_name):
+        multiple_flashcards[1].interval_days = 9
+        multiple_flashcards[1].tags = json.dumps(['Verbos'])
+        db_session.commit()
+        export = service.export_deck(test_deck.id, test_user.id, export_format)
+        path = self._write(tmp_path, export['data']['filename'], export['data']['chunks'])
+
+        result = service.import_deck(test_user.id, path, export_format)
+
+        assert result['accepted'] is True
+        job = TestDuplicateDeck._wait_for_job(service, result['data']['id'], test_user.id)
+        assert job['status'] == 'completed', job['error']
+        assert (job['processed'], job['total'], job['params']['imported']) == (5, 5, 5)
+        deck = service.get_deck_by_id(job['result_deck_id'], test_user.id)['data']
+        assert (deck['name'], deck['total_cards']) == (deck_name, 5)
+        assert self._fronts(db_session, deck['id']) == [f'Question {i}' for i in range(1, 6)]
+        assert self._fronts(db_session, deck['id']) == self._fronts(db_session, test_deck.id)
+
+        from backend_app.models.models import Flashcard
+        from backend_app.models.tags import FlashcardTag
+
+        copy = db_session.query(Flashcard).filter_by(
+            deck_id=deck['id'], front_text='Question 2').one()
+        assert copy.interval_days == 9
+        assert db_session.query(FlashcardTag).filter_by(flashcard_id=copy.id).count() == 1
+        assert not (tmp_path / export['data']['filename']).exists()
+
+    @pytest.mark.unit
+    def test_counts_invalid_and_duplicate_records(self, service, db_session, test_user,
+                                                  tmp_path, monkeypatch):
+        deck_service_module = importlib.import_module('backend_app.services_new.deck_service')
+        monkeypatch.setattr(deck_service_module, 'IMPORT_CHUNK_SIZE', 2)
+        lines = [
+            {'type': 'deck', 'name': 'Importado', 'difficulty_level': 'imposible'},
+            {'type': 'card', 'front_text': 'Uno', 'back_text': 'One'},
+            {'type': 'card', 'front': 'Dos', 'back': 'Two', 'ease_factor': -1, 'interval_days': 40},
+            {'type': 'card', 'front_text': 'Uno', 'back_text': 'One'},
+            {'type': 'card', 'front_text': 'Tres', 'back_text': ''},
+        ]
+        path = tmp_path / 'deck.jsonl'
+        path.write_text('\n'.join(json.dumps(line) for line in lines) + '\nno es json\n')
+
+        result = service.import_deck(test_user.id, str(path), 'ndjson')
+
+        job = TestDuplicateDeck._wait_for_job(service, result['data']['id'], test_user.id)
+        assert job['status'] == 'completed', job['error']
+        assert job['total'] == job['processed'] == 5
+        params = job['params']
+        assert (params['imported'], params['duplicates'], params['invalid']) == (2, 1, 2)
+        assert params['errors'] == [
+            'Registro 4: El reverso debe tener texto o imagen', 'Registro 5: JSON inválido']
+
+        deck = db_session.get(Deck, job['result_deck_id'])
+        assert (deck.name, deck.difficulty_level, deck.total_cards) == ('Importado', 'intermediate', 2)
+        from backend_app.models.models import Flashcard
+
+        reset = db_session.query(Flashcard).filter_by(deck_id=deck.id, front_text='Dos').one()
+        assert (reset.ease_factor, reset.interval_days) == (2.5, 1)
+
+    @pytest.mark.unit
+    def test_resume_continues_from_last_committed_chunk(self, service, db_session, test_user,
+                                                        tmp_path, monkeypatch):
+        deck_service_module = importlib.import_module('backend_app.services_new.deck_service')
+        monkeypatch.setattr(deck_service_module, 'IMPORT_CHUNK_SIZE', 2)
+        path = tmp_path / 'deck.csv'
+        path.write_text('front_text,back_text\n' + ''.join(f'Q{i},A{i}\n' for i in range(5)))
+
+        # El proceso muere antes de lanzar el worker: el job queda pendiente
+        monkeypatch.setattr(service, '_start_job', lambda job_id, work: True)
+        job = service.import_deck(test_user.id, str(path), 'csv')['data']
+        job_id = job['id']
+        assert service.get_deck_by_id(job['result_deck_id'], test_user.id)['code'] == 404
+
+        # Y el worker falla en el segundo bloque, con el primero ya confirmado
+        import_chunk = service._import_chunk
+        calls = []
+
+        def crash_on_second_chunk(job, records, params):
+            calls.append(len(records))
+            if len(calls) == 2:
+                raise RuntimeError('worker interrumpido')
+            return import_chunk(job, records, params)
+
+        monkeypatch.setattr(service, '_import_chunk', crash_on_second_chunk)
+        assert service.resume_jobs()['data']['jobs'] == [job_id]
+        job = service.get_job(job_id, test_user.id)['data']
+        assert (job['status'], job['processed'], job['error']) == ('failed', 2, 'worker interrumpido')
+        assert service.resume_jobs()['data']['jobs'] == []
+
+        result = service.resume_jobs(job_ids=[job_id])
+
+        assert result['data']['jobs'] == [job_id]
+        job = service.get_job(job_id, test_user.id)['data']
+        assert (job['status'], job['processed'], job['params']['imported']) == ('completed', 5, 5)
+        assert job['params']['duplicates'] == 0
+        assert self._fronts(db_session, job['result_deck_id']) == [f'Q{i}' for i in range(5)]
+        assert not path.exists()
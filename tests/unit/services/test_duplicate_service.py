@@ -0,0 +1,73 @@
+"""
+Tests unitarios para DuplicateService y el aviso de duplicados al importar
+"""
+import pytest
+
+pytest.importorskip("numpy")
+
+from backend_app.models.models import Flashcard
+
+
+@pytest.fixture
+def services(app):
+    from backend_app.models.models import db
+    from backend_app.services_new import DuplicateService, FlashcardService
+    from backend_app.utils.cache import CacheManager
+
+    cache = CacheManager()
+    return DuplicateService(db=db, cache=cache), FlashcardService(db=db, cache=cache)
+
+
+@pytest.fixture
+def cards(db_session, test_deck):
+    cards = [
+        Flashcard(deck_id=test_deck.id, front_text='¿Qué bombea el corazón?',
+                  back_text='La sangre', difficulty='normal'),
+        Flashcard(deck_id=test_deck.id, front_text='¿Que bombea el corazon?',
+                  back_text='la sangre', difficulty='normal'),
+        Flashcard(deck_id=test_deck.id, front_text='Capital de Francia',
+                  back_text='París', difficulty='normal'),
+    ]
+    db_session.add_all(cards)
+    db_session.commit()
+    return cards
+
+
+class TestDuplicateService:
+    """Tests de grupos por deck y del aviso en la creación en lote"""
+
+    @pytest.mark.unit
+    def test_find_duplicates_groups_deck_cards(self, services, test_user, test_deck, cards):
+        duplicate_service, _ = services
+
+        result = duplicate_service.find_duplicates(test_user.id, test_deck.id)
+
+        assert result['success'] is True
+        assert result['data']['duplicate_cards'] == 1
+        assert [[card['id'] for card in cluster] for cluster in result['data']['clusters']] == [
+            [cards[0].id, cards[1].id]]
+
+    @pytest.mark.unit
+    def test_find_duplicates_validates_input(self, services, test_user, test_deck):
+        duplicate_service, _ = services
+
+        assert duplicate_service.find_duplicates(test_user.id, test_deck.id, 1.5)['code'] == 400
+        assert duplicate_service.find_duplicates(test_user.id, 9999)['code'] == 404
+
+    @pytest.mark.unit
+    def test_bulk_create_flags_near_duplicates(self, services, test_user, test_deck, cards):
+        _, flashcard_service = services
+
+        result = flashcard_service.create_multiple_flashcards(test_user.id, test_deck.id, [
+            {'front_text': 'Capital de Francia', 'back_text': 'Paris', 'difficulty': 'normal'},
+            {'front_text': 'Capital de Italia', 'back_text': 'Roma', 'difficulty': 'normal'},
+        ])
+
+        assert result['success'] is True
+        created = [card['id'] for card in result['data']['flashcards']]
+        assert [
+            (flag['flashcard_id'], flag['duplicate_of'])
+            for flag in result['data']['near_duplicates']
+        ] == [(created[0], cards[2].id)]
+        # Las cartas señaladas se crean igualmente
+        assert result['data']['created_count'] == 2
@@ -0,0 +1,149 @@
+"""
+Tests unitarios para la creación masiva de FlashcardService
+"""
+import json
+import time
+
+import pytest
+
+from backend_app.models.models import (
+    Deck, DeckCardStats, DeckDueBucket, Flashcard, rebuild_deck_card_stats)
+from backend_app.models.tags import FlashcardTag, Tag
+
+
+@pytest.fixture
+def flashcard_service(app):
+    from backend_app.models.models import db
+    from backend_app.services_new import FlashcardService
+    from backend_app.utils.cache import CacheManager
+
+    return FlashcardService(db=db, cache=CacheManager())
+
+
+def _cards(count, tags=''):
+    return [
+        {'front_text': f'Pregunta {i}', 'back_text': f'Respuesta {i}',
+         'difficulty': 'normal', 'tags': tags}
+        for i in range(count)
+    ]
+
+
+def _deck_stats(db_session, deck_id):
+    stats = db_session.query(DeckCardStats).filter_by(deck_id=deck_id).one()
+    buckets = sorted(
+        (bucket.due_date, bucket.card_count)
+        for bucket in db_session.query(DeckDueBucket).filter_by(deck_id=deck_id)
+    )
+    return (stats.total_cards, stats.cards_new, stats.cards_learning,
+            stats.cards_mastered, buckets)
+
+
+class TestBulkCreate:
+    """Tests del modo bulk de create_multiple_flashcards"""
+
+    @staticmethod
+    def _capture_statements(engine):
+        from sqlalchemy import event
+
+        statements = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            statements.append(' '.join(statement.split()).upper())
+
+        event.listen(engine, 'before_cursor_execute', capture)
+        return statements, lambda: event.remove(engine, 'before_cursor_execute', capture)
+
+    @pytest.mark.unit
+    def test_bulk_insert_keeps_counters_in_sync(self, flashcard_service, db_session, test_user, test_deck):
+        result = flashcard_service.create_multiple_flashcards(
+            test_user.id, test_deck.id, _cards(30), check_duplicates=False, bulk=True)
+
+        assert result['success'] is True
+        ids = result['data']['flashcard_ids']
+        assert len(ids) == 30
+        fronts = dict(db_session.query(Flashcard.id, Flashcard.front_text).filter(Flashcard.id.in_(ids)))
+        assert [fronts[card_id] for card_id in ids] == [f'Pregunta {i}' for i in range(30)]
+
+        deck = db_session.get(Deck, test_deck.id)
+        db_session.refresh(deck)
+        assert deck.total_cards == 30
+        incremental = _deck_stats(db_session, test_deck.id)
+        rebuild_deck_card_stats(db_session, [test_deck.id])
+        assert incremental == _deck_stats(db_session, test_deck.id)
+        assert incremental[:2] == (30, 30)
+
+    @pytest.mark.unit
+    def test_bulk_insert_statement_count_is_per_chunk(self, flashcard_service, db_session, test_user, test_deck):
+        """Sin UPDATE de decks por carta: un INSERT por bloque y un delta por deck"""
+        from backend_app.models.models import db
+
+        statements, stop = self._capture_statements(db.engine)
+        try:
+            result = flashcard_service.create_multiple_flashcards(
+                test_user.id, test_deck.id, _cards(2500), check_duplicates=False, bulk=True)
+        finally:
+            stop()
+
+        assert result['data']['created_count'] == 2500
+        assert len([s for s in statements if s.startswith('INSERT INTO FLASHCARDS')]) == 3
+        assert len([s for s in statements if s.startswith('UPDATE DECKS')]) == 1
+        assert len(statements) <= 12
+
+    @pytest.mark.unit
+    def test_bulk_insert_creates_tag_memberships(self, flashcard_service, db_session, test_user, test_deck):
+        rows = _cards(2, tags=json.dumps(['Verbos', 'verbos ', 'Irregulares'])) + _cards(1)
+
+        result = flashcard_service.create_multiple_flashcards(
+            test_user.id, test_deck.id, rows, check_duplicates=False, bulk=True)
+
+        ids = result['data']['flashcard_ids']
+        memberships = (
+            db_session.query(FlashcardTag.flashcard_id, Tag.name_key)
+            .join(Tag, Tag.id == FlashcardTag.tag_id)
+            .filter(FlashcardTag.flashcard_id.in_(ids))
+            .all()
+        )
+        assert sorted(memberships) == sorted(
+            (card_id, key) for card_id in ids[:2] for key in ('irregulares', 'verbos'))
+
+    @pytest.mark.unit
+    def test_orm_and_bulk_modes_agree(self, flashcard_service, db_session, test_user, test_deck):
+        flashcard_service.create_multiple_flashcards(
+            test_user.id, test_deck.id, _cards(3), check_duplicates=False)
+        flashcard_service.create_multiple_flashcards(
+            test_user.id, test_deck.id, _cards(3), check_duplicates=False, bulk=True)
+
+        deck = db_session.get(Deck, test_deck.id)
+        db_session.refresh(deck)
+        assert deck.total_cards == 6
+        assert _deck_stats(db_session, test_deck.id)[:2] == (6, 6)
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize('bulk', [False, True])
+    def test_cards_without_difficulty_default_to_normal(self, flashcard_service, db_session, test_user,
+                                                        test_deck, bulk):
+        result = flashcard_service.create_multiple_flashcards(
+            test_user.id, test_deck.id, [{'front_text': 'hola', 'back_text': 'hello'}],
+            check_duplicates=False, bulk=bulk)
+
+        assert result['success'] is True, result.get('error')
+        card = db_session.query(Flashcard).filter_by(deck_id=test_deck.id).one()
+        assert card.difficulty == 'normal'
+
+    @pytest.mark.slow
+    @pytest.mark.parametrize('count', [1_000, 10_000, 100_000])
+    def test_bulk_insert_throughput(self, flashcard_service, db_session, test_user, test_deck, count):
+        """Cartas por segundo del modo ORM frente al modo bulk"""
+        rows = _cards(count)
+        timings = {}
+        for bulk in (False, True):
+            if not bulk and count > 10_000:
+                continue
+            start_time = time.perf_counter()
+            result = flashcard_service.create_multiple_flashcards(
+                test_user.id, test_deck.id, rows, check_duplicates=False, bulk=bulk)
+            timings[bulk] = time.perf_counter() - start_time
+            assert result['data']['created_count'] == count
+
+        if False in timings:
+            assert timings[True] < timings[False]
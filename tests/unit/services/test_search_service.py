@@ -0,0 +1,205 @@
+"""
+Tests unitarios para SearchService y el índice de texto completo
+"""
+import random
+import sqlite3
+import time
+
+import pytest
+
+from backend_app.models.models import Flashcard
+from backend_app.models.search_index import fts_table, sqlite_ddl
+
+
+@pytest.fixture
+def search_service(app):
+    from backend_app.models.models import db
+    from backend_app.services_new import SearchService
+    from backend_app.utils.cache import CacheManager
+
+    return SearchService(db=db, cache=CacheManager())
+
+
+@pytest.fixture
+def cards(db_session, test_deck):
+    cards = [
+        Flashcard(deck_id=test_deck.id, front_text='¿Qué bombea el corazón?',
+                  back_text='La sangre'),
+        Flashcard(deck_id=test_deck.id, front_text='Órgano del corazón y los pulmones',
+                  back_text='Tórax', notes='corazón corazón corazón'),
+        Flashcard(deck_id=test_deck.id, front_text='Capital de Francia',
+                  back_text='París'),
+    ]
+    db_session.add_all(cards)
+    db_session.commit()
+    return cards
+
+
+class TestSearchService:
+    """Tests de búsqueda rankeada y sincronización del índice"""
+
+    @pytest.mark.unit
+    def test_ranked_results_with_snippets(self, search_service, test_user, cards):
+        """Sin acentos encuentra con acentos; más coincidencias, mejor rank"""
+        result = search_service.search_flashcards(test_user.id, 'corazon')
+
+        assert result['success'] is True
+        assert [card['id'] for card in result['data']] == [cards[1].id, cards[0].id]
+        assert '<mark>corazón</mark>' in result['data'][0]['snippet']
+
+    @pytest.mark.unit
+    def test_prefix_and_all_terms(self, search_service, test_user, cards):
+        """El último término es prefijo y todos los términos son obligatorios"""
+        prefix = search_service.search_flashcards(test_user.id, 'capital fra')
+        both = search_service.search_flashcards(test_user.id, 'corazon sangre')
+
+        assert [card['id'] for card in prefix['data']] == [cards[2].id]
+        assert [card['id'] for card in both['data']] == [cards[0].id]
+
+    @pytest.mark.unit
+    def test_index_follows_update_and_delete(self, search_service, db_session, test_user, cards):
+        """Los triggers mantienen el índice al editar y borrar cartas"""
+        cards[2].back_text = 'Roma'
+        db_session.delete(cards[0])
+        db_session.commit()
+
+        assert search_service.search_flashcards(test_user.id, 'paris')['data'] == []
+        assert len(search_service.search_flashcards(test_user.id, 'roma')['data']) == 1
+        assert [c['id'] for c in search_service.search_flashcards(test_user.id, 'sangre')['data']] == []
+
+    @pytest.mark.unit
+    def test_snippet_is_escaped(self, search_service, db_session, test_user, test_deck):
+        """El contenido del usuario se escapa antes de resaltar"""
+        db_session.add(Flashcard(deck_id=test_deck.id, front_text='<b>html</b> etiqueta',
+                                 back_text='x'))
+        db_session.commit()
+
+        snippet = search_service.search_flashcards(test_user.id, 'etiqueta')['data'][0]['snippet']
+        assert '&lt;b&gt;' in snippet
+        assert '<mark>etiqueta</mark>' in snippet
+
+    @pytest.mark.unit
+    def test_query_syntax_is_not_passed_through(self, search_service, test_user, cards):
+        """Operadores FTS5 en la entrada se tratan como texto"""
+        result = search_service.search_flashcards(test_user.id, 'corazon" OR "*')
+
+        # OR es un término más (prefijo de "Órgano"), no el operador
+        assert result['success'] is True
+        assert [card['id'] for card in result['data']] == [cards[1].id]
+
+    @pytest.mark.unit
+    def test_limit_is_clamped(self, search_service, test_user, cards):
+        for limit, expected in ((-1, 1), (0, 1), (1000, 2)):
+            result = search_service.search_flashcards(test_user.id, 'corazon', limit=limit)
+            assert len(result['data']) == expected
+
+    @pytest.mark.unit
+    def test_short_query_rejected(self, search_service, test_user):
+        """Consultas sin al menos dos caracteres de palabra son un 400"""
+        result = search_service.search(test_user.id, ' * ')
+
+        assert result['success'] is False
+        assert result['code'] == 400
+
+    @pytest.mark.unit
+    def test_deck_listing_uses_index(self, app, test_user, test_deck, cards):
+        """get_user_decks(search=...) filtra con el índice de decks"""
+        from backend_app.models.models import db
+        from backend_app.services_new import DeckService
+        from backend_app.utils.cache import CacheManager
+
+        service = DeckService(db=db, cache=CacheManager())
+        word = test_deck.name.split()[0]
+
+        assert len(service.get_user_decks(test_user.id, search=word)['data']['decks']) == 1
+        assert service.get_user_decks(test_user.id, search='inexistente')['data']['decks'] == []
+
+
+class TestSearchSuggest:
+    """Tests del autocompletado y su actualización desde los servicios"""
+
+    @pytest.fixture(autouse=True)
+    def clear_index(self):
+        from backend_app.utils.suggest import suggest_index
+
+        suggest_index.clear()
+        yield
+        suggest_index.clear()
+
+    @pytest.mark.unit
+    def test_suggest_follows_writes(self, app, search_service, test_user, test_deck, cards):
+        """Crear, editar y borrar cartas actualiza el índice ya construido"""
+        from backend_app.models.models import db
+        from backend_app.services_new import FlashcardService
+        from backend_app.utils.cache import CacheManager
+
+        flashcards = FlashcardService(db=db, cache=CacheManager())
+        texts = lambda prefix: [s['text'] for s in search_service.suggest(test_user.id, prefix)['data']]
+
+        assert texts('cora') == ['corazón']
+        created = flashcards.create_flashcard(
+            test_user.id, {'deck_id': test_deck.id, 'front_text': 'Coral marino', 'back_text': 'x',
+                           'difficulty': 'normal'})
+        assert texts('cora') == ['corazón', 'coral']
+
+        flashcards.update_flashcard(created['data']['id'], test_user.id, {'front_text': 'Arrecife'})
+        assert texts('cora') == ['corazón']
+        assert texts('arre') == ['arrecife']
+
+        flashcards.delete_flashcard(created['data']['id'], test_user.id)
+        assert texts('arre') == []
+
+    @pytest.mark.unit
+    def test_suggest_deck_names(self, app, search_service, test_user, test_deck):
+        """Los decks se sugieren por cualquier palabra de su nombre"""
+        last_word = test_deck.name.split()[-1]
+        result = search_service.suggest(test_user.id, last_word[:3])
+
+        assert {'text': test_deck.name, 'type': 'deck', 'count': 1} in result['data']
+
+
+class TestSearchBenchmark:
+    """Benchmark del índice FTS5 frente a LIKE"""
+
+    @pytest.mark.slow
+    def test_fts_vs_like_one_million_cards(self, tmp_path):
+        """Buscar en 1M de cartas con el índice y con un escaneo LIKE"""
+        size = 1_000_000
+        connection = sqlite3.connect(tmp_path / 'search.db')
+        connection.execute(
+            'CREATE TABLE flashcards (id INTEGER PRIMARY KEY, front_text TEXT, '
+            'back_text TEXT, notes TEXT)')
+        for statement in sqlite_ddl('flashcards'):
+            connection.execute(statement)
+
+        rng = random.Random(42)
+        vocabulary = [f'palabra{i}' for i in range(50000)]
+        with connection:
+            connection.executemany(
+                'INSERT INTO flashcards (front_text, back_text, notes) VALUES (?, ?, ?)',
+                (
+                    (' '.join(rng.choices(vocabulary, k=8)),
+                     ' '.join(rng.choices(vocabulary, k=6)),
+                     None)
+                    for _ in range(size)
+                ),
+            )
+
+        fts = fts_table('flashcards')
+        start_time = time.perf_counter()
+        fts_rows = connection.execute(
+            f'SELECT rowid FROM {fts} WHERE {fts} MATCH ? ORDER BY bm25({fts}) LIMIT 20',
+            ('"palabra12345"',),
+        ).fetchall()
+        fts_time = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        # Para ordenar por relevancia LIKE tiene que encontrar todas las filas
+        like_rows = connection.execute(
+            "SELECT id FROM flashcards WHERE front_text LIKE ? OR back_text LIKE ?",
+            ('%palabra12345 %', '%palabra12345 %'),
+        ).fetchall()
+        like_time = time.perf_counter() - start_time
+
+        assert fts_rows and like_rows
+        assert fts_time < like_time
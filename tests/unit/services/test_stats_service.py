@@ -0,0 +1,80 @@
+"""
+Tests unitarios para StatsService
+"""
+import pytest
+from datetime import datetime, timedelta
+
+from backend_app.models.models import CardReview, DailyActivity, StudySession
+
+
+@pytest.fixture(autouse=True)
+def clean_activity(db_session):
+    """db_session no limpia historial ni actividad entre tests"""
+    for model in (CardReview, StudySession, DailyActivity):
+        db_session.query(model).delete()
+    db_session.commit()
+
+
+@pytest.fixture
+def cached_services(app):
+    from backend_app.models.models import db
+    from backend_app.services_new import StatsService, StudyService
+    from backend_app.utils.cache import CacheManager
+
+    return StudyService(db=db, cache=CacheManager()), StatsService(db=db, cache=CacheManager())
+
+
+def _study(study_service, user, deck, cards, qualities):
+    session_id = study_service.start_study_session(user.id, deck.id)['data']['session_id']
+    for card, quality in zip(cards, qualities):
+        assert study_service.review_card(session_id, user.id, card.id, quality, 30)['success'] is True
+    assert study_service.complete_study_session(session_id, user.id)['success'] is True
+
+
+class TestDailyActivity:
+    """Tests para el resumen diario de actividad"""
+
+    @pytest.mark.unit
+    def test_reviews_and_sessions_update_rollup(self, cached_services, db_session, test_user, test_deck, multiple_flashcards):
+        """review_card y complete_study_session actualizan el día de hoy"""
+        study_service, stats_service = cached_services
+
+        _study(study_service, test_user, test_deck, multiple_flashcards[:3], [4, 1, 3])
+
+        row = db_session.query(DailyActivity).filter_by(user_id=test_user.id).one()
+        assert row.day == datetime.utcnow().date()
+        assert (row.cards_studied, row.cards_correct, row.study_time, row.sessions_count) == (3, 2, 90, 1)
+
+        weekly = stats_service.get_weekly_stats(test_user.id)['data']['weekly_data']
+        assert len(weekly) == 7
+        assert weekly[-1]['cards_studied'] == 3
+        assert weekly[-1]['sessions'] == 1
+        assert sum(day['cards_studied'] for day in weekly[:-1]) == 0
+
+    @pytest.mark.unit
+    def test_backfill_matches_incremental_rollup(self, cached_services, db_session, test_user, test_deck, multiple_flashcards):
+        """El backfill reconstruye los mismos valores que las escrituras incrementales"""
+        study_service, stats_service = cached_services
+        _study(study_service, test_user, test_deck, multiple_flashcards[:2], [3, 2])
+        incremental = db_session.query(DailyActivity).filter_by(user_id=test_user.id).one().to_dict()
+
+        db_session.query(DailyActivity).delete()
+        db_session.commit()
+        result = stats_service.rebuild_daily_activity([test_user.id])
+
+        assert result['success'] is True
+        assert result['data']['days'] == 1
+        rebuilt = db_session.query(DailyActivity).filter_by(user_id=test_user.id).one().to_dict()
+        assert rebuilt == incremental
+
+    @pytest.mark.unit
+    def test_streak_reads_rollup(self, cached_services, db_session, test_user):
+        """La racha cuenta días consecutivos con actividad hasta ayer u hoy"""
+        _, stats_service = cached_services
+        today = datetime.utcnow().date()
+        for offset in (1, 2, 3, 5):
+            db_session.add(DailyActivity(
+                user_id=test_user.id, day=today - timedelta(days=offset), cards_studied=4))
+        db_session.commit()
+
+        assert stats_service._calculate_study_streak(test_user.id) == 3
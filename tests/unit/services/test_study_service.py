@@ -9,6 +9,15 @@ import time
 from backend_app.utils.algorithms import calculate_fsrs, calculate_sm2
 
 
+@pytest.fixture
+def service(app):
+    from backend_app.models.models import db
+    from backend_app.services_new import StudyService
+    from backend_app.utils.cache import CacheManager
+
+    return StudyService(db=db, cache=CacheManager())
+
+
 class TestStudyService:
     """Tests para StudyService"""
     
@@ -296,6 +305,22 @@ class TestAlgorithmsSM2:
         # Debe completarse en menos de 1 segundo
         assert execution_time < 1.0
 
+    @pytest.mark.unit
+    @pytest.mark.parametrize('apply, repetitions', [('_apply_ultra_sm2', 2), ('_apply_anki', 4)])
+    def test_sm2_variants_schedule_graduated_cards(self, service, apply, repetitions):
+        """Ultra SM-2 y Anki usan SM-2 en lugar de caer al fallback"""
+        card = Mock(ease_factor=2.5, repetitions=repetitions, interval_days=10)
+
+        with patch.object(service.logger, 'error') as log_error:
+            result = getattr(service, apply)(card, 3)
+
+        new_interval, ease_factor, new_repetitions = result['data']
+        expected_ease, _, _ = calculate_sm2(rating=3, ease_factor=2.5, interval=10, repetitions=2)
+        log_error.assert_not_called()
+        assert new_interval == 25
+        assert ease_factor == expected_ease
+        assert new_repetitions == repetitions + 1
+
 
 class TestAlgorithmsComparison:
     """Tests comparativos entre algoritmos"""
@@ -345,3 +370,380 @@ class TestAlgorithmsComparison:
         assert fsrs_interval == 1
         assert sm2_interval == 1
 
+
+
+class TestStudySessionQueue:
+    """Tests para la cola de cartas precalculada por sesión"""
+
+    def _start(self, service, test_user, test_deck):
+        result = service.start_study_session(test_user.id, test_deck.id)
+        assert result['success'] is True
+        return result['data']['session_id']
+
+    @pytest.mark.unit
+    def test_next_card_follows_queue_order(self, service, test_user, test_deck, multiple_flashcards):
+        """La cola sigue el orden calculado al iniciar la sesión"""
+        session_id = self._start(service, test_user, test_deck)
+
+        first = service.get_next_card(session_id, test_user.id)
+        again = service.get_next_card(session_id, test_user.id)
+        assert first['data']['id'] == again['data']['id'] == multiple_flashcards[0].id
+
+        review = service.review_card(session_id, test_user.id, first['data']['id'], 4)
+        assert review['success'] is True
+
+        second = service.get_next_card(session_id, test_user.id)
+        assert second['data']['id'] == multiple_flashcards[1].id
+
+    @pytest.mark.unit
+    def test_next_card_without_memory_uses_persisted_queue(
+            self, service, app, test_user, test_deck, multiple_flashcards):
+        """Otro proceso (sin cola en memoria) retoma la cola persistida"""
+        from backend_app.models.models import db
+        from backend_app.services_new import StudyService
+        from backend_app.utils.cache import CacheManager
+
+        session_id = self._start(service, test_user, test_deck)
+        card_id = service.get_next_card(session_id, test_user.id)['data']['id']
+        service.review_card(session_id, test_user.id, card_id, 4)
+
+        other_service = StudyService(db=db, cache=CacheManager())
+        result = other_service.get_next_card(session_id, test_user.id)
+
+        assert result['data']['id'] == multiple_flashcards[1].id
+
+    @pytest.mark.unit
+    def test_deleted_card_is_skipped(self, service, db_session, test_user, test_deck, multiple_flashcards):
+        """Las cartas borradas durante la sesión se descartan de la cola"""
+        session_id = self._start(service, test_user, test_deck)
+
+        multiple_flashcards[0].soft_delete()
+        db_session.commit()
+
+        result = service.get_next_card(session_id, test_user.id)
+        assert result['data']['id'] == multiple_flashcards[1].id
+
+    @pytest.mark.unit
+    def test_queue_exhausted(self, service, test_user, test_deck, test_flashcard):
+        """Cuando la cola se vacía no hay más cartas"""
+        session_id = self._start(service, test_user, test_deck)
+        service.review_card(session_id, test_user.id, test_flashcard.id, 5)
+
+        result = service.get_next_card(session_id, test_user.id)
+
+        assert result['success'] is False
+        assert result['code'] == 404
+
+
+class TestTagSession:
+    """Tests de las sesiones de estudio por tag en todos los decks"""
+
+    @pytest.fixture
+    def tagged_cards(self, db_session, test_user, test_deck):
+        import json
+
+        from backend_app.models.models import Deck, Flashcard
+
+        other_deck = Deck(user_id=test_user.id, name='Otro Deck')
+        db_session.add(other_deck)
+        db_session.flush()
+        cards = [
+            Flashcard(deck_id=deck.id, front_text=front, back_text='Respuesta',
+                      difficulty='normal', tags=json.dumps(tags))
+            for deck, front, tags in (
+                (test_deck, 'ser', ['Verbos']),
+                (other_deck, 'estar', ['verbos ', 'irregulares']),
+                (other_deck, 'casa', ['sustantivos']),
+            )
+        ]
+        db_session.add_all(cards)
+        db_session.commit()
+        return cards
+
+    @pytest.mark.unit
+    def test_queue_spans_decks_and_is_limited_to_the_tag(self, service, test_user, tagged_cards):
+        result = service.start_study_session(test_user.id, tag='Verbos')
+
+        assert result['success'] is True
+        assert (result['data']['available_cards'], result['data']['tag']) == (2, 'verbos')
+        session_id = result['data']['session_id']
+        studied = []
+        while True:
+            card = service.get_next_card(session_id, test_user.id)
+            if not card['success']:
+                break
+            studied.append(card['data']['front_text'])
+            assert service.review_card(session_id, test_user.id, card['data']['id'], 4)['success']
+        assert sorted(studied) == ['estar', 'ser']
+
+        untagged = service.review_card(session_id, test_user.id, tagged_cards[2].id, 4)
+        assert untagged['success'] is False
+        batch = service.review_cards_batch(session_id, test_user.id, [
+            {'card_id': tagged_cards[0].id, 'quality': 3},
+            {'card_id': tagged_cards[2].id, 'quality': 3},
+        ])
+        assert [answer['success'] for answer in batch['data']['results']] == [True, False]
+
+        completed = service.complete_study_session(session_id, test_user.id)['data']
+        assert (completed['deck_name'], completed['tag'], completed['cards_studied']) == (None, 'verbos', 3)
+
+    @pytest.mark.unit
+    def test_deck_and_tag_narrow_each_other(self, service, test_user, test_deck, tagged_cards):
+        result = service.start_study_session(test_user.id, test_deck.id, tag='verbos')
+
+        assert result['data']['available_cards'] == 1
+        assert service.start_study_session(test_user.id)['code'] == 400
+        assert service.start_study_session(test_user.id, tag='inexistente')['code'] == 404
+
+
+class TestBatchReview:
+    """Tests para el registro de respuestas por lotes"""
+
+    @pytest.mark.unit
+    def test_batch_applies_all_answers(self, service, db_session, test_user, test_deck, multiple_flashcards):
+        """Todas las respuestas se guardan y la sesión acumula estadísticas"""
+        from backend_app.models.models import CardReview, Flashcard
+
+        session_id = service.start_study_session(test_user.id, test_deck.id)['data']['session_id']
+        answers = [
+            {'card_id': multiple_flashcards[0].id, 'quality': 4},
+            {'card_id': multiple_flashcards[1].id, 'quality': 1, 'response_time': 3000},
+            {'card_id': multiple_flashcards[2].id, 'quality': 3},
+        ]
+
+        result = service.review_cards_batch(session_id, test_user.id, answers)
+
+        assert result['success'] is True
+        assert result['data']['processed'] == 3
+        assert result['data']['failed'] == 0
+        assert result['data']['session_stats']['cards_studied'] == 3
+        assert result['data']['session_stats']['cards_correct'] == 2
+        assert db_session.query(CardReview).filter_by(session_id=session_id).count() == 3
+
+        card = db_session.get(Flashcard, multiple_flashcards[0].id)
+        assert card.total_reviews == 1
+        assert card.correct_reviews == 1
+        assert card.last_review_rating == 4
+
+        next_card = service.get_next_card(session_id, test_user.id)
+        assert next_card['data']['id'] == multiple_flashcards[3].id
+
+    @pytest.mark.unit
+    def test_batch_stats_listener_reads_previous_state_from_history(
+            self, service, db_session, test_user, test_deck, multiple_flashcards, max_queries):
+        """Sin un SELECT de la carta por respuesta para el delta de estadísticas"""
+        from backend_app.models.models import DeckCardStats, rebuild_deck_card_stats
+
+        session_id = service.start_study_session(test_user.id, test_deck.id)['data']['session_id']
+        answers = [{'card_id': card.id, 'quality': 4} for card in multiple_flashcards]
+
+        with max_queries(40) as statements:
+            result = service.review_cards_batch(session_id, test_user.id, answers)
+
+        assert result['data']['processed'] == 5
+        card_reads = [s for s in statements
+                      if s.startswith('SELECT') and s.endswith('FROM flashcards WHERE flashcards.id = ?')]
+        assert card_reads == []
+
+        stats = db_session.query(DeckCardStats).filter_by(deck_id=test_deck.id).one()
+        incremental = (stats.cards_new, stats.cards_learning)
+        rebuild_deck_card_stats(db_session, [test_deck.id])
+        db_session.refresh(stats)
+        assert incremental == (stats.cards_new, stats.cards_learning) == (0, 5)
+
+    @pytest.mark.unit
+    def test_batch_reports_invalid_answers(self, service, test_user, test_deck, multiple_flashcards):
+        """Las respuestas inválidas se informan sin abortar el lote"""
+        session_id = service.start_study_session(test_user.id, test_deck.id)['data']['session_id']
+        answers = [
+            {'card_id': 999999, 'quality': 3},
+            {'card_id': multiple_flashcards[0].id, 'quality': 3},
+        ]
+
+        result = service.review_cards_batch(session_id, test_user.id, answers)
+
+        assert result['data']['processed'] == 1
+        assert result['data']['results'][0]['success'] is False
+        assert result['data']['results'][1]['success'] is True
+
+    @pytest.mark.unit
+    def test_batch_uses_client_review_time(self, service, test_user, test_deck, test_flashcard):
+        """reviewed_at del cliente se respeta para clientes sin conexión"""
+        from datetime import datetime, timedelta, timezone
+
+        session_id = service.start_study_session(test_user.id, test_deck.id)['data']['session_id']
+        reviewed_at = datetime.now(timezone.utc) - timedelta(hours=5)
+
+        result = service.review_cards_batch(
+            session_id, test_user.id, [{'card_id': test_flashcard.id, 'quality': 3, 'reviewed_at': reviewed_at}])
+
+        assert result['success'] is True
+        assert test_flashcard.last_reviewed == reviewed_at.replace(tzinfo=None)
+
+    @pytest.mark.unit
+    def test_batch_unknown_session(self, service, test_user):
+        """Una sesión inexistente devuelve 404"""
+        result = service.review_cards_batch(999999, test_user.id, [{'card_id': 1, 'quality': 3}])
+
+        assert result['success'] is False
+        assert result['code'] == 404
+
+
+class TestReviewWritePath:
+    """Tests de la escritura de una revisión en una sola pasada"""
+
+    @staticmethod
+    def _capture_statements(engine):
+        from sqlalchemy import event
+
+        statements = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            statements.append(' '.join(statement.split()).upper())
+
+        event.listen(engine, 'before_cursor_execute', capture)
+        return statements, lambda: event.remove(engine, 'before_cursor_execute', capture)
+
+    @pytest.mark.unit
+    def test_single_card_update_per_review(self, service, db_session, test_user, test_deck, test_flashcard):
+        """La carta se actualiza una vez, contadores incluidos"""
+        from backend_app.models.models import CardReview, DeckCardStats, Flashcard, db
+
+        session_id = service.start_study_session(test_user.id, test_deck.id)['data']['session_id']
+        service.get_next_card(session_id, test_user.id)
+
+        statements, stop = self._capture_statements(db.engine)
+        try:
+            result = service.review_card(session_id, test_user.id, test_flashcard.id, 3, 4)
+        finally:
+            stop()
+
+        assert result['success'] is True
+        assert result['data']['session_stats']['cards_studied'] == 1
+        assert sum(s.startswith('UPDATE FLASHCARDS') for s in statements) == 1
+        assert sum(s.startswith('INSERT INTO CARD_REVIEWS') for s in statements) == 1
+        assert sum(s.startswith('UPDATE STUDY_SESSIONS') for s in statements) == 1
+        assert sum(s.startswith('SELECT') for s in statements) <= 2
+        # Lectura, pesos FSRS, carta, contadores del deck (estado y dos días de
+        # vencimiento, uno nuevo), historial, sesión, actividad diaria (nueva) y cola
+        assert len(statements) <= 12
+
+        db_session.expire_all()
+        card = db_session.get(Flashcard, test_flashcard.id)
+        assert (card.total_reviews, card.correct_reviews, card.last_review_rating) == (1, 1, 3)
+        assert db_session.query(CardReview).filter_by(session_id=session_id).count() == 1
+        stats = db_session.query(DeckCardStats).filter_by(deck_id=test_deck.id).one()
+        assert (stats.cards_new, stats.cards_learning) == (0, 1)
+
+    @pytest.mark.unit
+    def test_concurrent_review_of_same_card_is_retried(
+            self, service, db_session, test_user, test_deck, test_flashcard, monkeypatch):
+        """Si otra revisión cambia la carta entre lectura y escritura se reintenta"""
+        from backend_app.models.models import Flashcard, db
+
+        session_id = service.start_study_session(test_user.id, test_deck.id)['data']['session_id']
+        apply = service._apply_spaced_repetition
+        calls = []
+
+        def racing_apply(card, *args, **kwargs):
+            if not calls:
+                # Otra sesión revisa la carta justo después de leerla
+                db.session.execute(
+                    db.update(Flashcard).where(Flashcard.id == card.id)
+                    .values(total_reviews=Flashcard.total_reviews + 1))
+            calls.append(card.id)
+            return apply(card, *args, **kwargs)
+
+        monkeypatch.setattr(service, '_apply_spaced_repetition', racing_apply)
+        result = service.review_card(session_id, test_user.id, test_flashcard.id, 4)
+
+        assert result['success'] is True
+        assert len(calls) == 2
+        db_session.expire_all()
+        # La escritura concurrente se deshizo con el rollback del primer intento
+        assert db_session.get(Flashcard, test_flashcard.id).total_reviews == 1
+
+    @pytest.mark.unit
+    def test_completed_session_rejects_review(self, service, test_user, test_deck, test_flashcard):
+        session_id = service.start_study_session(test_user.id, test_deck.id)['data']['session_id']
+        service.complete_study_session(session_id, test_user.id)
+
+        result = service.review_card(session_id, test_user.id, test_flashcard.id, 4)
+
+        assert result['code'] == 404
+
+    @pytest.mark.unit
+    def test_review_invalidates_cached_deck_listing(self, service, test_user, test_deck, test_flashcard):
+        """El listado de cartas de un deck cacheado no sobrevive a una revisión"""
+        from backend_app.models.models import db
+        from backend_app.services_new import FlashcardService
+
+        flashcards = FlashcardService(db=db, cache=service.cache)
+        before = flashcards.get_user_flashcards(test_user.id, deck_id=test_deck.id, cursor='')
+        session_id = service.start_study_session(test_user.id, test_deck.id)['data']['session_id']
+
+        review = service.review_card(session_id, test_user.id, test_flashcard.id, 4)
+        after = flashcards.get_user_flashcards(test_user.id, deck_id=test_deck.id, cursor='')
+
+        assert review['success'] is True
+        card = after['data']['flashcards'][0]
+        assert card['next_review'] != before['data']['flashcards'][0]['next_review']
+        assert card['next_review'] == review['data']['next_review']
+
+    @pytest.mark.slow
+    def test_reviews_per_second_concurrent_sessions(self, app, db_session, test_user, test_deck):
+        """Revisiones/segundo con varias sesiones respondiendo las mismas cartas"""
+        import random
+        import threading
+
+        from backend_app.models.models import CardReview, Flashcard, StudySession, db
+        from backend_app.services_new import StudyService
+        from backend_app.utils.cache import CacheManager
+
+        sessions, cards_per_deck = 4, 100
+        cards = [
+            Flashcard(deck_id=test_deck.id, front_text=f'Q{i}', back_text=f'A{i}', difficulty='normal')
+            for i in range(cards_per_deck)
+        ]
+        db_session.add_all(cards)
+        db_session.commit()
+        card_ids = [card.id for card in cards]
+        service = StudyService(db=db, cache=CacheManager())
+        session_ids = [
+            service.start_study_session(test_user.id, test_deck.id)['data']['session_id']
+            for _ in range(sessions)
+        ]
+
+        outcomes = {session_id: [] for session_id in session_ids}
+
+        def answer_all(session_id, seed):
+            with app.app_context():
+                worker = StudyService(db=db, cache=CacheManager())
+                order = card_ids[:]
+                random.Random(seed).shuffle(order)
+                for card_id in order:
+                    result = worker.review_card(session_id, test_user.id, card_id, 3)
+                    outcomes[session_id].append(result['success'])
+                db.session.remove()
+
+        threads = [
+            threading.Thread(target=answer_all, args=(session_id, seed))
+            for seed, session_id in enumerate(session_ids)
+        ]
+        start_time = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start_time
+
+        succeeded = sum(sum(results) for results in outcomes.values())
+        db_session.expire_all()
+        # Sin actualizaciones perdidas: contadores, historial y sesiones cuadran
+        assert db_session.query(db.func.sum(Flashcard.total_reviews)).filter(
+            Flashcard.id.in_(card_ids)).scalar() == succeeded
+        assert db_session.query(CardReview).filter(
+            CardReview.session_id.in_(session_ids)).count() == succeeded
+        for session_id, results in outcomes.items():
+            assert db_session.get(StudySession, session_id).cards_studied == sum(results)
+        assert succeeded >= sessions * cards_per_deck * 0.95
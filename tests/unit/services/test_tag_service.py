@@ -0,0 +1,127 @@
+"""
+Tests unitarios para las tablas de tags normalizadas y TagService
+"""
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend_app.models.models import Deck, Flashcard
+from backend_app.models.tags import DeckTag, FlashcardTag, Tag
+
+
+@pytest.fixture
+def tag_service(app):
+    from backend_app.models.models import db
+    from backend_app.services_new import TagService
+    from backend_app.utils.cache import CacheManager
+
+    return TagService(db=db, cache=CacheManager())
+
+
+@pytest.fixture
+def tagged(db_session, test_user, test_deck):
+    """Dos decks y tres cartas con tags solapados"""
+    other = Deck(user_id=test_user.id, name='Anatomía', tags=json.dumps(['Medicina']))
+    test_deck.tags = json.dumps(['idiomas', 'Medicina'])
+    db_session.add(other)
+    db_session.flush()
+
+    past = datetime.utcnow() - timedelta(days=1)
+    cards = [
+        Flashcard(deck_id=test_deck.id, front_text='Corazón', back_text='Heart',
+                  difficulty='normal', tags='medicina, vocabulario', next_review=past),
+        Flashcard(deck_id=other.id, front_text='Fémur', back_text='Hueso',
+                  difficulty='normal', tags=json.dumps(['MEDICINA']), next_review=past),
+        Flashcard(deck_id=other.id, front_text='Radio', back_text='Hueso',
+                  difficulty='normal', tags=json.dumps(['huesos'])),
+    ]
+    db_session.add_all(cards)
+    db_session.commit()
+    return other, cards
+
+
+class TestTagTables:
+    """Tests de la sincronización con la columna JSON"""
+
+    @pytest.mark.unit
+    def test_tags_are_shared_case_insensitively(self, db_session, test_user, tagged):
+        tags = {tag.name_key for tag in db_session.query(Tag).filter_by(user_id=test_user.id)}
+
+        assert tags == {'idiomas', 'medicina', 'vocabulario', 'huesos'}
+        assert db_session.query(DeckTag).count() == 3
+        assert db_session.query(FlashcardTag).count() == 4
+
+    @pytest.mark.unit
+    def test_update_and_delete_follow_json(self, db_session, tagged):
+        other, cards = tagged
+        cards[0].tags = json.dumps(['vocabulario'])
+        db_session.delete(cards[1])
+        db_session.commit()
+
+        memberships = db_session.query(FlashcardTag.flashcard_id).all()
+        assert sorted(card_id for (card_id,) in memberships) == [cards[0].id, cards[2].id]
+
+    @pytest.mark.unit
+    def test_backfill_rebuilds_memberships(self, db_session, tag_service, test_deck, tagged):
+        db_session.query(FlashcardTag).delete()
+        db_session.query(DeckTag).delete()
+        db_session.commit()
+
+        result = tag_service.rebuild_tags()
+
+        assert result['success'] is True
+        assert result['data']['decks'] == 2
+        assert db_session.query(DeckTag).count() == 3
+        assert db_session.query(FlashcardTag).count() == 4
+
+
+class TestTagService:
+    """Tests de conteos y listados por tag"""
+
+    @pytest.mark.unit
+    def test_user_tag_counts(self, tag_service, test_user, tagged):
+        result = tag_service.get_user_tags(test_user.id)
+
+        assert result['success'] is True
+        assert result['data'][0] == {'name': 'Medicina', 'deck_count': 2, 'flashcard_count': 2}
+        assert {tag['name'] for tag in result['data']} == {
+            'Medicina', 'idiomas', 'vocabulario', 'huesos'}
+
+    @pytest.mark.unit
+    def test_soft_deleted_cards_are_not_counted(self, db_session, tag_service, test_user, tagged):
+        _, cards = tagged
+        cards[2].is_deleted = True
+        db_session.commit()
+
+        names = {tag['name'] for tag in tag_service.get_user_tags(test_user.id)['data']}
+        assert 'huesos' not in names
+
+    @pytest.mark.unit
+    def test_listings_by_tag_span_decks(self, tag_service, test_user, tagged):
+        _, cards = tagged
+
+        decks = tag_service.get_decks_by_tag(test_user.id, 'medicina')
+        flashcards = tag_service.get_flashcards_by_tag(test_user.id, ' MEDICINA ')
+
+        assert len(decks['data']) == 2
+        assert decks['pagination']['total'] == 2
+        assert {card['id'] for card in flashcards['data']} == {cards[0].id, cards[1].id}
+        assert tag_service.get_flashcards_by_tag(test_user.id, '')['code'] == 400
+
+    @pytest.mark.unit
+    def test_due_cards_by_tag(self, app, test_user, tagged):
+        from backend_app.models.models import db
+        from backend_app.services_new import StudyService
+        from backend_app.utils.cache import CacheManager
+
+        _, cards = tagged
+        service = StudyService(db=db, cache=CacheManager())
+
+        result = service.get_due_cards(test_user.id, tag='medicina')
+
+        assert result['success'] is True
+        assert result['data']['total_due'] == 2
+        assert {
+            card['id'] for deck in result['data']['decks'] for card in deck['cards']
+        } == {cards[0].id, cards[1].id}
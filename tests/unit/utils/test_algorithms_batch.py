@@ -0,0 +1,164 @@
+"""
+Tests unitarios para las variantes vectorizadas de FSRS y SM-2
+"""
+import pytest
+import time
+
+np = pytest.importorskip("numpy")
+
+from backend_app.utils.algorithms import (
+    calculate_fsrs,
+    calculate_fsrs_batch,
+    calculate_sm2,
+    calculate_sm2_batch,
+)
+
+
+def _random_collection(size, seed=42):
+    """Generar estados aleatorios de cartas para los tests"""
+    rng = np.random.default_rng(seed)
+    return {
+        "ratings": rng.integers(1, 5, size),
+        "stabilities": rng.uniform(0.05, 365.0, size),
+        "difficulties": rng.uniform(1.0, 10.0, size),
+        "elapsed_days": rng.integers(0, 400, size),
+        "ease_factors": rng.uniform(1.3, 3.0, size),
+        "intervals": rng.integers(0, 400, size),
+        "repetitions": rng.integers(0, 10, size),
+    }
+
+
+class TestFSRSBatch:
+    """Tests para calculate_fsrs_batch"""
+
+    @pytest.mark.unit
+    def test_fsrs_batch_matches_scalar(self):
+        """Test que cada elemento coincide con calculate_fsrs"""
+        cards = _random_collection(20000)
+
+        stabilities, difficulties, intervals = calculate_fsrs_batch(
+            cards["ratings"],
+            cards["stabilities"],
+            cards["difficulties"],
+            cards["elapsed_days"],
+        )
+
+        expected = [
+            calculate_fsrs(int(r), float(s), float(d), int(e))
+            for r, s, d, e in zip(
+                cards["ratings"],
+                cards["stabilities"],
+                cards["difficulties"],
+                cards["elapsed_days"],
+            )
+        ]
+
+        np.testing.assert_allclose(
+            stabilities, [e[0] for e in expected], rtol=1e-12)
+        np.testing.assert_array_equal(difficulties, [e[1] for e in expected])
+        np.testing.assert_array_equal(intervals, [e[2] for e in expected])
+
+    @pytest.mark.unit
+    def test_fsrs_batch_with_retrievability(self):
+        """Test con retrievability explícita y elapsed_days escalar"""
+        ratings = np.array([1, 2, 3, 4])
+        stabilities = np.array([5.0, 1.0, 2.0, 1.0])
+        difficulties = np.array([3.0, 5.0, 5.0, 5.0])
+        retrievabilities = np.array([0.5, 0.9, 0.8, 0.9])
+
+        stabilities_out, difficulties_out, intervals = calculate_fsrs_batch(
+            ratings, stabilities, difficulties, 1, retrievabilities)
+
+        for i in range(4):
+            s, d, interval = calculate_fsrs(
+                int(ratings[i]),
+                float(stabilities[i]),
+                float(difficulties[i]),
+                1,
+                float(retrievabilities[i]),
+            )
+            assert stabilities_out[i] == pytest.approx(s, rel=1e-12)
+            assert difficulties_out[i] == d
+            assert intervals[i] == interval
+
+    @pytest.mark.unit
+    def test_fsrs_batch_empty(self):
+        """Test con colección vacía"""
+        stabilities, difficulties, intervals = calculate_fsrs_batch([], [], [], [])
+
+        assert stabilities.shape == (0,)
+        assert difficulties.shape == (0,)
+        assert intervals.shape == (0,)
+
+
+class TestSM2Batch:
+    """Tests para calculate_sm2_batch"""
+
+    @pytest.mark.unit
+    def test_sm2_batch_matches_scalar(self):
+        """Test que cada elemento coincide con calculate_sm2"""
+        cards = _random_collection(20000, seed=7)
+
+        ease_factors, intervals, repetitions = calculate_sm2_batch(
+            cards["ratings"],
+            cards["ease_factors"],
+            cards["intervals"],
+            cards["repetitions"],
+        )
+
+        expected = [
+            calculate_sm2(int(r), float(ef), int(i), int(rep))
+            for r, ef, i, rep in zip(
+                cards["ratings"],
+                cards["ease_factors"],
+                cards["intervals"],
+                cards["repetitions"],
+            )
+        ]
+
+        np.testing.assert_array_equal(ease_factors, [e[0] for e in expected])
+        np.testing.assert_array_equal(intervals, [e[1] for e in expected])
+        np.testing.assert_array_equal(repetitions, [e[2] for e in expected])
+
+
+class TestBatchThroughput:
+    """Benchmark de throughput de los algoritmos por lotes"""
+
+    @pytest.mark.slow
+    def test_batch_throughput_one_million_cards(self):
+        """Reprogramar 1M de cartas y comparar con la versión escalar"""
+        size = 1_000_000
+        cards = _random_collection(size)
+
+        start_time = time.perf_counter()
+        calculate_fsrs_batch(
+            cards["ratings"],
+            cards["stabilities"],
+            cards["difficulties"],
+            cards["elapsed_days"],
+        )
+        fsrs_time = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        calculate_sm2_batch(
+            cards["ratings"],
+            cards["ease_factors"],
+            cards["intervals"],
+            cards["repetitions"],
+        )
+        sm2_time = time.perf_counter() - start_time
+
+        # Muestra escalar para extrapolar el coste por carta
+        sample = 20000
+        start_time = time.perf_counter()
+        for i in range(sample):
+            calculate_fsrs(
+                int(cards["ratings"][i]),
+                float(cards["stabilities"][i]),
+                float(cards["difficulties"][i]),
+                int(cards["elapsed_days"][i]),
+            )
+        scalar_time = (time.perf_counter() - start_time) * size / sample
+
+        assert fsrs_time < scalar_time
+        assert sm2_time < scalar_time
@@ -0,0 +1,212 @@
+"""
+Tests para los backends de cache (memoria y redis)
+"""
+import fnmatch
+import threading
+import time
+
+import pytest
+
+from backend_app.utils.cache import CacheManager, RedisCache, create_cache
+
+
+class TestCacheManager:
+    """Tests de TTL, desalojo LRU e invalidación"""
+
+    def test_entries_expire_after_timeout(self):
+        cache = CacheManager()
+        cache.set("short", 1, timeout=0.05)
+        cache.set("forever", 2, timeout=0)
+
+        time.sleep(0.1)
+
+        assert cache.get("short") is None
+        assert cache.get("forever") == 2
+        assert cache.get_stats()["expirations"] == 1
+
+    def test_lru_eviction_by_entries(self):
+        cache = CacheManager(max_entries=3)
+        for key in ("a", "b", "c"):
+            cache.set(key, key)
+        cache.get("a")  # "b" pasa a ser la menos usada
+
+        cache.set("d", "d")
+
+        assert cache.get("b") is None
+        assert cache.get("a") == "a"
+        assert len(cache) == 3
+        assert cache.get_stats()["evictions"] == 1
+
+    def test_eviction_by_bytes(self):
+        cache = CacheManager(max_bytes=5000)
+        for i in range(10):
+            cache.set(f"blob:{i}", "x" * 1000)
+
+        stats = cache.get_stats()
+        assert stats["bytes"] <= 5000
+        assert cache.get("blob:9") is not None
+        assert cache.get("blob:0") is None
+        assert cache.set("huge", "x" * 10000) is False
+
+    def test_delete_pattern_uses_prefix_index(self):
+        cache = CacheManager()
+        cache.set("user_decks:1:1:20:", "p1")
+        cache.set("user_decks:1:2:20:", "p2")
+        cache.set("user_decks:12:1:20:", "other user")
+        cache.set("dashboard_stats:1", "stats")
+
+        assert cache.delete_pattern("user_decks:1:*") == 2
+        assert cache.get("user_decks:12:1:20:") == "other user"
+        assert cache.get("dashboard_stats:1") == "stats"
+        assert cache.delete_prefix("dashboard_stats") == 1
+        assert len(cache) == 1
+
+    def test_hit_miss_counters(self):
+        cache = CacheManager()
+        cache.set("k", "v")
+        cache.get("k")
+        cache.get("missing")
+
+        stats = cache.get_stats()
+        assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 1, 0.5)
+
+    def test_concurrent_access_keeps_limits(self):
+        cache = CacheManager(max_entries=100)
+
+        def worker(offset):
+            for i in range(500):
+                cache.set(f"k:{offset}:{i}", i)
+                cache.get(f"k:{offset}:{i - 1}")
+                if i % 50 == 0:
+                    cache.delete_pattern(f"k:{offset}:*")
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(cache) <= 100
+        assert cache.get_stats()["entries"] == len(cache)
+
+
+class FakeRedis:
+    """Servidor redis mínimo en memoria (subconjunto de la API de redis-py)"""
+
+    def __init__(self):
+        self.data = {}
+        self.expires = {}
+        self.mget_calls = 0
+
+    def _alive(self, key):
+        expires_at = self.expires.get(key)
+        if expires_at is not None and expires_at <= time.monotonic():
+            self.data.pop(key, None)
+            self.expires.pop(key, None)
+        return key in self.data
+
+    def mget(self, keys):
+        self.mget_calls += 1
+        return [self.data[key] if self._alive(key) else None for key in keys]
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+        if ex:
+            self.expires[key] = time.monotonic() + ex
+        else:
+            self.expires.pop(key, None)
+        return True
+
+    def delete(self, *keys):
+        removed = 0
+        for key in keys:
+            if self._alive(key):
+                removed += 1
+            self.data.pop(key, None)
+            self.expires.pop(key, None)
+        return removed
+
+    def scan_iter(self, match="*", count=None):
+        return [key for key in list(self.data) if fnmatch.fnmatchcase(key, match)]
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, server):
+        self.server = server
+        self.commands = []
+
+    def set(self, key, value, ex=None):
+        self.commands.append((key, value, ex))
+
+    def execute(self):
+        return [self.server.set(key, value, ex=ex) for key, value, ex in self.commands]
+
+
+class BrokenRedis:
+    def __getattr__(self, name):
+        def fail(*args, **kwargs):
+            raise ConnectionError("redis caído")
+        return fail
+
+
+class TestRedisCache:
+    """Tests del backend compartido contra un servidor de prueba"""
+
+    def test_write_in_one_worker_invalidates_all(self):
+        server = FakeRedis()
+        worker_a = RedisCache(client=server)
+        worker_b = RedisCache(client=server)
+
+        worker_a.set("user_decks:1:1:20:", ["deck"])
+        worker_a.set("user_decks:2:1:20:", ["otro"])
+        assert worker_b.get("user_decks:1:1:20:") == ["deck"]
+
+        assert worker_b.delete_pattern("user_decks:1:*") == 1
+
+        assert worker_a.get("user_decks:1:1:20:") is None
+        assert worker_a.get("user_decks:2:1:20:") == ["otro"]
+
+    def test_batched_get_and_set(self):
+        server = FakeRedis()
+        cache = RedisCache(client=server, key_prefix="test:")
+
+        assert cache.set_many({"a": 1, "b": {"x": [1, 2]}}, timeout=60)
+        found = cache.get_many(["a", "b", "missing"])
+
+        assert found == {"a": 1, "b": {"x": [1, 2]}}
+        assert server.mget_calls == 1
+        assert set(server.data) == {"test:a", "test:b"}
+        assert cache.get_stats()["hits"] == 2
+        assert cache.get_stats()["misses"] == 1
+
+    def test_timeout_and_prefix_delete(self):
+        server = FakeRedis()
+        cache = RedisCache(client=server, key_prefix="")
+        cache.set("stats:1", "viejo", timeout=0.2)
+        cache.set("deck:1", 1, timeout=0)
+        cache.set("deck:1:cards", 2)
+
+        # redis expira en segundos enteros: el TTL se redondea hacia arriba
+        assert server.expires["stats:1"] - time.monotonic() > 0.5
+        assert "deck:1" not in server.expires
+        assert cache.delete_prefix("deck:1") == 2
+        assert cache.get_many(["deck:1", "deck:1:cards"]) == {}
+
+    def test_connection_errors_are_cache_misses(self):
+        cache = RedisCache(client=BrokenRedis())
+
+        assert cache.get("key") is None
+        assert cache.set("key", 1) is False
+        assert cache.delete_pattern("key*") == 0
+        assert cache.get_stats()["errors"] == 3
+
+    def test_backend_selected_by_config(self):
+        memory = create_cache({"CACHE_TYPE": "simple", "CACHE_MAX_ENTRIES": 5})
+        assert isinstance(memory, CacheManager)
+        assert memory.max_entries == 5
+
+        with pytest.raises(ValueError):
+            create_cache({"CACHE_TYPE": "memcached"})
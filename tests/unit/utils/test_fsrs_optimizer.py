@@ -0,0 +1,90 @@
+"""
+Tests para el optimizador de parámetros FSRS por usuario
+"""
+import random
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from backend_app.utils.algorithms import FSRS_DEFAULT_WEIGHTS, calculate_fsrs
+from backend_app.utils.fsrs_optimizer import (
+    build_review_chunk,
+    fit_weights,
+    replay_log_loss,
+)
+
+
+def _simulate_history(weights, cards=400, reviews_per_card=8, seed=7):
+    """Genera filas (flashcard_id, rating, reviewed_at, previous_stability)"""
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    rows = []
+    for card_id in range(1, cards + 1):
+        stability, difficulty = 1.0, 5.0
+        reviewed_at = start + timedelta(hours=rng.randint(0, 72))
+        elapsed = 0.0
+        for _ in range(reviews_per_card):
+            retrievability = 0.9 ** (elapsed / stability) if elapsed > 0 else 1.0
+            if rng.random() < retrievability:
+                rating = rng.choice((2, 3, 3, 3, 4))
+            else:
+                rating = 1
+            rows.append((card_id, rating, reviewed_at, stability))
+            stability, difficulty, _ = calculate_fsrs(
+                rating, stability, difficulty, retrievability=retrievability, weights=weights)
+            elapsed = max(1.0, stability * rng.uniform(0.3, 2.5))
+            reviewed_at = reviewed_at + timedelta(days=elapsed)
+    return rows
+
+
+class TestReviewChunk:
+    """Tests de la conversión del historial a matrices"""
+
+    def test_build_review_chunk_shapes(self):
+        start = datetime(2024, 1, 1)
+        rows = [
+            (1, 3, start, 2.0),
+            (1, 1, start + timedelta(days=3), 4.0),
+            (2, 4, start, None),
+        ]
+
+        chunk = build_review_chunk(rows)
+
+        assert chunk.ratings.shape == (2, 2)
+        assert chunk.mask.tolist() == [[True, True], [True, False]]
+        assert chunk.elapsed_days[0].tolist() == [0.0, 3.0]
+        assert chunk.initial_stability.tolist() == [2.0, 1.0]
+        assert chunk.review_count == 3
+
+    def test_replay_evaluates_candidates_independently(self):
+        chunk = build_review_chunk(_simulate_history(FSRS_DEFAULT_WEIGHTS, cards=20))
+        single, scored = replay_log_loss(chunk, FSRS_DEFAULT_WEIGHTS)
+        perturbed = list(FSRS_DEFAULT_WEIGHTS)
+        perturbed[8] += 0.5
+
+        batch, batch_scored = replay_log_loss(chunk, np.array([FSRS_DEFAULT_WEIGHTS, perturbed]))
+
+        assert scored == batch_scored > 0
+        assert batch[0] == pytest.approx(single[0])
+        assert batch[1] != pytest.approx(batch[0])
+
+
+class TestFitWeights:
+    """Tests del ajuste de pesos"""
+
+    def test_fit_improves_on_default_weights(self):
+        true_weights = list(FSRS_DEFAULT_WEIGHTS)
+        true_weights[8], true_weights[11], true_weights[14] = 0.9, 3.2, 0.6
+        rows = _simulate_history(true_weights)
+        # Bloques pequeños para ejercitar varios pasos por época
+        chunks = [build_review_chunk(rows[i:i + 800]) for i in range(0, len(rows), 800)]
+
+        result = fit_weights(lambda: iter(chunks), epochs=8, learning_rate=0.05)
+
+        assert result["review_count"] > 0
+        assert len(result["weights"]) == len(FSRS_DEFAULT_WEIGHTS)
+        assert result["log_loss"] < result["baseline_log_loss"]
+
+    def test_fit_without_reviews_returns_none(self):
+        assert fit_weights(lambda: iter([]), epochs=1) is None
@@ -0,0 +1,90 @@
+"""
+Tests unitarios para las firmas MinHash y el agrupamiento LSH
+"""
+import random
+import string
+import time
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from backend_app.utils.minhash import (
+    card_text,
+    duplicate_clusters,
+    minhash_signatures,
+    new_duplicates,
+    similar_pairs,
+)
+
+
+def _random_cards(size, seed=42):
+    """Cartas con palabras aleatorias (sin duplicados entre sí)"""
+    rng = random.Random(seed)
+    vocabulary = [
+        ''.join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 10)))
+        for _ in range(30000)
+    ]
+    return [
+        card_text(' '.join(rng.choices(vocabulary, k=8)), ' '.join(rng.choices(vocabulary, k=5)))
+        for _ in range(size)
+    ]
+
+
+class TestMinHash:
+    """Tests de similitud estimada y agrupamiento"""
+
+    def test_normalization_ignores_case_accents_and_spaces(self):
+        assert card_text('¿Cuál es  la Capital?', 'París') == card_text('¿cual es la capital?', 'paris')
+
+    def test_signatures_are_deterministic(self):
+        texts = _random_cards(50)
+        assert (minhash_signatures(texts) == minhash_signatures(texts)).all()
+
+    def test_similarity_tracks_jaccard(self):
+        base = card_text('La mitocondria es la central energética de la célula', 'ATP')
+        close = card_text('La mitocondria es la central energética de las células', 'ATP')
+        unrelated = card_text('Capital de Australia', 'Canberra')
+        signatures = minhash_signatures([base, close, unrelated])
+
+        pairs = similar_pairs(signatures, threshold=0.5)
+
+        assert [(i, j) for i, j, _ in pairs] == [(0, 1)]
+        assert pairs[0][2] > 0.7
+
+    def test_clusters_are_transitive_and_sorted(self):
+        texts = _random_cards(200)
+        texts += [texts[3], texts[3] + ' x', texts[10]]
+        clusters = duplicate_clusters(minhash_signatures(texts))
+
+        assert clusters == [[3, 200, 201], [10, 202]]
+
+    def test_new_duplicates_reports_best_earlier_match(self):
+        existing = _random_cards(100)
+        new = [existing[5] + ' z', _random_cards(1, seed=7)[0], existing[5] + ' z']
+
+        matches = new_duplicates(existing, new)
+
+        assert sorted(matches) == [0, 2]
+        assert matches[0][0] == 5
+        # El segundo repetido coincide con la carta existente o con el primero
+        assert matches[2][0] in (5, 100)
+        assert matches[2][1] == 1.0
+
+    def test_short_and_empty_texts(self):
+        signatures = minhash_signatures(['a', '', 'ab'])
+        assert signatures.shape == (3, 128)
+        assert minhash_signatures([]).shape == (0, 128)
+
+    @pytest.mark.slow
+    def test_cluster_one_hundred_thousand_cards(self):
+        """Agrupar 100k cartas tarda unos pocos segundos"""
+        texts = _random_cards(100_000)
+        texts += [text + ' extra' for text in texts[:1000]]
+
+        start_time = time.perf_counter()
+        clusters = duplicate_clusters(minhash_signatures(texts))
+        elapsed = time.perf_counter() - start_time
+
+        assert len(clusters) == 1000
+        assert elapsed < 10
@@ -0,0 +1,115 @@
+"""
+Tests para el índice de prefijos de autocompletado
+"""
+import time
+
+import pytest
+
+from backend_app.utils.suggest import (
+    PrefixTrie,
+    SuggestIndex,
+    card_entries,
+    deck_entries,
+)
+
+
+def _loader(entries):
+    calls = []
+
+    def load(user_id):
+        calls.append(user_id)
+        return list(entries)
+
+    load.calls = calls
+    return load
+
+
+class TestPrefixTrie:
+    """Tests de inserción, borrado y ranking"""
+
+    def test_suggest_orders_by_count(self):
+        trie = PrefixTrie()
+        for entry in card_entries('célula célula celular núcleo'):
+            trie.add(*entry)
+
+        assert trie.suggest('cel') == [('term', 'célula', 2), ('term', 'celular', 1)]
+        assert trie.suggest('x') == []
+
+    def test_remove_prunes_and_refreshes_top(self):
+        trie = PrefixTrie()
+        trie.add('verbo', 'term', 'verbo')
+        assert trie.suggest('ve') == [('term', 'verbo', 1)]
+
+        trie.remove('verbo', 'term', 'verbo')
+
+        assert trie.suggest('ve') == []
+        assert trie.root.children == {}
+        assert trie.size == 0
+
+    def test_deck_name_matches_any_word(self):
+        trie = PrefixTrie()
+        for entry in deck_entries('Spanish Verbs', '["idiomas"]'):
+            trie.add(*entry)
+
+        assert trie.suggest('verb') == [('deck', 'Spanish Verbs', 1)]
+        assert trie.suggest('idi') == [('tag', 'idiomas', 1)]
+
+
+class TestSuggestIndex:
+    """Tests de construcción perezosa, actualización y desalojo"""
+
+    def test_builds_lazily_once(self):
+        index = SuggestIndex()
+        loader = _loader(card_entries('Mitocondria'))
+
+        assert index.suggest(1, 'mito', loader)[0]['text'] == 'mitocondria'
+        index.suggest('1', 'mit', loader)
+
+        assert loader.calls == [1]
+
+    def test_update_only_applies_to_loaded_users(self):
+        index = SuggestIndex()
+        index.update(1, added=card_entries('ignorada'))
+        assert index.get_stats() == {'users': 0, 'terms': 0}
+
+        index.suggest(1, 'abc', _loader([]))
+        index.update(1, added=card_entries('ribosoma'))
+        assert index.suggest(1, 'ribo', _loader([]))[0]['text'] == 'ribosoma'
+
+        index.update(1, removed=card_entries('ribosoma'))
+        assert index.suggest(1, 'ribo', _loader([])) == []
+
+    def test_evicts_least_recently_used_user(self):
+        index = SuggestIndex(max_users=2)
+        for user_id in (1, 2):
+            index.suggest(user_id, 'ab', _loader(card_entries('abeja')))
+        index.suggest(1, 'ab', _loader([]))
+        index.suggest(3, 'ab', _loader(card_entries('abeja')))
+
+        reload_2 = _loader([])
+        index.suggest(2, 'ab', reload_2)
+        assert reload_2.calls == [2]
+        assert index.get_stats()['users'] == 2
+
+    def test_rebuilds_after_ttl(self):
+        index = SuggestIndex(ttl=0)
+        loader = _loader(card_entries('abeja'))
+        index.suggest(1, 'ab', loader)
+        time.sleep(0.001)
+        index.suggest(1, 'ab', loader)
+
+        assert loader.calls == [1, 1]
+
+    @pytest.mark.slow
+    def test_suggest_under_one_millisecond(self):
+        """Consultar un trie de 100k términos tarda menos de 1 ms"""
+        entries = [(f'termino{i}', 'term', f'termino{i}') for i in range(100_000)]
+        index = SuggestIndex()
+        index.suggest(1, 'ter', _loader(entries))
+
+        start_time = time.perf_counter()
+        for prefix in ('t', 'ter', 'termino1', 'termino12', 'termino123'):
+            index.suggest(1, prefix, _loader([]))
+        elapsed = (time.perf_counter() - start_time) / 5
+
+        assert elapsed < 0.001
@@ -0,0 +1,88 @@
+"""
+Tests para el simulador de carga futura de revisiones
+"""
+import time
+from datetime import date
+
+import numpy as np
+import pytest
+
+from backend_app.utils.algorithms import FSRS_DEFAULT_WEIGHTS
+from backend_app.utils.workload_simulator import simulate_review_load, summarize_load
+
+
+def _random_collection(cards, seed=0):
+    rng = np.random.default_rng(seed)
+    return (
+        rng.uniform(0.5, 60, cards),
+        rng.uniform(1, 10, cards),
+        rng.uniform(-5, 60, cards),
+        rng.uniform(0, 60, cards),
+    )
+
+
+class TestSimulateReviewLoad:
+    """Tests de la simulación Monte-Carlo"""
+
+    def test_overdue_cards_are_due_on_first_day(self):
+        loads = simulate_review_load(
+            [1.0, 5.0, 10.0], [5.0, 5.0, 5.0], [-3, 0, 10], days=5, simulations=4, seed=1)
+
+        assert loads.shape == (4, 5)
+        assert loads[:, 0].tolist() == [2, 2, 2, 2]
+
+    def test_same_seed_is_reproducible(self):
+        state = _random_collection(2000)
+
+        first = simulate_review_load(*state, days=30, simulations=10, seed=42)
+        second = simulate_review_load(*state, days=30, simulations=10, seed=42)
+
+        assert np.array_equal(first, second)
+        assert (first <= 2000).all()
+
+    def test_per_card_weights_match_shared_weights(self):
+        state = _random_collection(500)
+        per_card = np.tile(np.asarray(FSRS_DEFAULT_WEIGHTS)[:, None], (1, 500))
+
+        shared = simulate_review_load(*state, days=30, simulations=5, seed=3)
+        individual = simulate_review_load(
+            *state, days=30, simulations=5, weights=per_card, seed=3)
+
+        assert np.array_equal(shared, individual)
+
+    def test_empty_collection(self):
+        loads = simulate_review_load([], [], [], days=10, simulations=3)
+
+        assert loads.shape == (3, 10)
+        assert loads.sum() == 0
+
+
+class TestSummarizeLoad:
+    """Tests del resumen de la carga simulada"""
+
+    def test_summary_has_expected_and_percentiles(self):
+        loads = np.array([[4, 0, 2], [6, 2, 2]])
+
+        summary = summarize_load(loads, date(2024, 1, 1))
+
+        assert summary["days"] == 3
+        assert summary["simulations"] == 2
+        assert summary["daily"][0]["date"] == "2024-01-01"
+        assert summary["daily"][0]["expected"] == 5.0
+        assert summary["daily"][1]["p50"] == 1.0
+        assert summary["total_expected"] == 8.0
+
+
+@pytest.mark.slow
+class TestSimulatorThroughput:
+    """Benchmark de la simulación de colecciones grandes"""
+
+    def test_100k_cards_in_a_few_seconds(self):
+        state = _random_collection(100000)
+
+        start = time.perf_counter()
+        loads = simulate_review_load(*state, days=90, simulations=20, seed=0)
+        elapsed = time.perf_counter() - start
+
+        assert loads.sum() > 0
+        assert elapsed < 10